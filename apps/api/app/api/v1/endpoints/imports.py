@@ -6,26 +6,34 @@ Pre-flight validation ensures fail-fast before enqueue.
 """
 
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
-from pydantic import BaseModel, HttpUrl
-from typing import Optional, Dict
+from pydantic import BaseModel, Field, HttpUrl
+from typing import Optional, Dict, Literal
 from datetime import datetime
+import base64
 import logging
 
 from app.core.security import get_current_user_id
 from app.core.database import get_supabase
 from app.core.quota import require_quota, QuotaGuard
 from app.core.validators import validate_import_file, validate_import_url
-from app.queue.tasks import import_csv_products, import_xml_feed
+from app.queue.tasks import import_csv_products, import_xml_feed, import_feed_parallel
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+# Upper bound of a requested chunk_size (rows per SKU prefetch + bulk upsert request)
+MAX_IMPORT_CHUNK_SIZE = 5000
+
 
 class UrlImportRequest(BaseModel):
     url: HttpUrl
     format: str = "csv"  # csv, xml, json
     mapping_config: Dict[str, str] = {}
     update_existing: bool = True
+    chunk_size: Optional[int] = Field(None, ge=1, le=MAX_IMPORT_CHUNK_SIZE)  # rows per bulk upsert (default: IMPORT_CHUNK_SIZE)
+    incremental: bool = False  # skip unchanged feeds/rows since the last import of this URL
+    removed_action: Literal["ignore", "out_of_stock", "delete"] = "out_of_stock"  # incremental only
+    parallel: bool = False  # fan chunks out across import workers (large feeds)
 
 
 class FeedImportRequest(BaseModel):
@@ -49,10 +57,10 @@ async def import_csv(
         content = await file.read()
         is_excel = file_meta.get("is_excel", False)
 
-        # Enqueue Celery task
+        # Enqueue Celery task (JSON serializer: workbooks travel base64-encoded)
         result = import_csv_products.delay(
             user_id=user_id,
-            file_content=content if is_excel else content.decode("utf-8"),
+            file_content=base64.b64encode(content).decode("ascii") if is_excel else content.decode("utf-8"),
             filename=file.filename,
             is_excel=is_excel,
         )
@@ -84,12 +92,27 @@ async def import_from_url(
         # Pre-flight: check URL reachability
         url_meta = await validate_import_url(str(request.url), request.format)
 
-        if request.format in ("xml",):
+        if request.parallel and request.incremental:
+            raise HTTPException(status_code=400, detail="Parallel imports cannot be incremental")
+
+        if request.parallel:
+            result = import_feed_parallel.delay(
+                user_id=user_id,
+                feed_url=str(request.url),
+                format=request.format,
+                mapping_config=request.mapping_config,
+                update_existing=request.update_existing,
+                chunk_size=request.chunk_size,
+            )
+        elif request.format in ("xml",):
             result = import_xml_feed.delay(
                 user_id=user_id,
                 feed_url=str(request.url),
                 mapping_config=request.mapping_config,
                 update_existing=request.update_existing,
+                chunk_size=request.chunk_size,
+                incremental=request.incremental,
+                removed_action=request.removed_action,
             )
         else:
             result = import_csv_products.delay(
@@ -97,6 +120,9 @@ async def import_from_url(
                 feed_url=str(request.url),
                 mapping_config=request.mapping_config,
                 update_existing=request.update_existing,
+                chunk_size=request.chunk_size,
+                incremental=request.incremental,
+                removed_action=request.removed_action,
             )
 
         await quota.consume(1)
@@ -113,3 +139,53 @@ async def import_from_url(
     except Exception as e:
         logger.error(f"URL import failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/{job_id}/chunks/{chunk_index}/retry", status_code=202)
+async def retry_import_chunk(
+    job_id: str,
+    chunk_index: int,
+    user_id: str = Depends(get_current_user_id),
+):
+    """Retry one failed chunk of a parallel import, then re-aggregate the job"""
+    from celery import chain
+    from app.queue.tasks import import_chunk, import_finalize, _chunk_item_id
+    from app.queue.redis_queue import redis_queue
+
+    try:
+        supabase = get_supabase()
+
+        job = supabase.table("jobs").select("id, status, total_items, input_data") \
+            .eq("id", job_id).eq("user_id", user_id).single().execute()
+        if not job.data or not (job.data.get("input_data") or {}).get("parallel"):
+            raise HTTPException(status_code=404, detail="Parallel import job not found")
+
+        item = supabase.table("job_items").select("status") \
+            .eq("id", _chunk_item_id(job_id, chunk_index)).execute()
+        if not item.data:
+            raise HTTPException(status_code=404, detail="Chunk not found")
+        if item.data[0]["status"] != "failed":
+            raise HTTPException(status_code=400, detail="Only failed chunks can be retried")
+        if redis_queue.get_import_chunk(job_id, chunk_index) is None:
+            raise HTTPException(status_code=410, detail="Chunk payload expired; re-run the import")
+
+        supabase.table("jobs").update({"status": "running"}).eq("id", job_id).execute()
+        result = chain(
+            import_chunk.si(job_id=job_id, user_id=user_id, chunk_index=chunk_index,
+                            total=job.data.get("total_items") or 0,
+                            update_existing=job.data["input_data"].get("update_existing", True)),
+            import_finalize.si(job_id=job_id, user_id=user_id),
+        ).apply_async()
+
+        return {
+            "success": True,
+            "job_id": job_id,
+            "task_id": str(result.id),
+            "message": f"Chunk {chunk_index} queued for retry",
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Chunk retry failed: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
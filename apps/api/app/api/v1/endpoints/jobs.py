@@ -3,17 +3,34 @@ Jobs & Job Items endpoints — unified job tracking system
 Every action (sync, import, pricing, AI) creates a job with per-product results
 """
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import RedirectResponse, StreamingResponse
+from typing import Optional, Tuple
 from datetime import datetime
+import asyncio
+import json
 import logging
+import time
 
+from app.core.config import settings
 from app.core.security import get_current_user_id
 from app.core.database import get_supabase
+from app.core.pagination import CountMode, decode_cursor, keyset_postgrest, pagination_info, row_cursor
+from app.queue.redis_queue import redis_queue
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+# Seconds between two reads of the cached progress in /{job_id}/events
+JOB_EVENTS_POLL_SECONDS = 1.0
+
+# Cursor sort key of list_jobs (newest first)
+JOBS_SORT = "created_at.desc"
+
+# Bytes read per chunk when serving a local export file in /{job_id}/download
+DOWNLOAD_CHUNK_SIZE = 256 * 1024
+
 
 @router.get("/")
 async def list_jobs(
@@ -22,41 +39,62 @@ async def list_jobs(
     job_type: Optional[str] = None,
     page: int = Query(1, ge=1),
     limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    count: CountMode = "exact",
 ):
-    """List jobs with filtering and pagination"""
+    """List jobs with filtering and pagination.
+    Pass the returned `next_cursor` as `cursor` for keyset pagination on
+    (created_at, id); count=planned|estimated|none avoids the exact count."""
+    after = decode_cursor(cursor, JOBS_SORT) if cursor else None
     try:
         supabase = get_supabase()
 
-        query = supabase.table("jobs").select("*", count="exact").eq("user_id", user_id)
-
-        if status:
-            query = query.eq("status", status)
-        if job_type:
-            query = query.eq("job_type", job_type)
-
-        query = query.order("created_at", desc=True)
-        offset = (page - 1) * limit
-        query = query.range(offset, offset + limit - 1)
-
-        result = query.execute()
-        total = result.count if result.count is not None else len(result.data)
+        query = _jobs_query(supabase, user_id, status, job_type, count=None if after else count)
+        if after:
+            # Counted on its own: the page query only sees rows after the cursor
+            total = _jobs_query(supabase, user_id, status, job_type, "id", count).limit(1).execute().count \
+                if count != "none" else None
+            query = query.or_(keyset_postgrest("created_at", True, after))
+            offset = 0
+        else:
+            offset = (page - 1) * limit
+
+        query = query.order("created_at", desc=True).order("id", desc=True)
+        result = query.range(offset, offset + limit).execute()  # one extra row tells has_more
+        if not after:
+            total = result.count if count != "none" else None
+
+        jobs = result.data[:limit]
+        has_more = len(result.data) > limit
+        next_cursor = row_cursor(JOBS_SORT, jobs[-1], "created_at") if has_more else None
 
         return {
             "success": True,
-            "jobs": result.data,
-            "pagination": {
-                "page": page,
-                "limit": limit,
-                "total": total,
-                "total_pages": (total + limit - 1) // limit
-            }
+            "jobs": jobs,
+            "pagination": pagination_info(
+                limit, total, count, page=None if after else page, next_cursor=next_cursor, has_more=has_more,
+            ),
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Failed to list jobs: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _jobs_query(supabase, user_id: str, status: Optional[str], job_type: Optional[str],
+                columns: str = "*", count: Optional[CountMode] = None):
+    """Filtered jobs query; count is a PostgREST count method (exact/planned/estimated)"""
+    query = supabase.table("jobs").select(columns, count=None if count == "none" else count) \
+        .eq("user_id", user_id)
+    if status:
+        query = query.eq("status", status)
+    if job_type:
+        query = query.eq("job_type", job_type)
+    return query
+
+
 @router.get("/stats")
 async def get_job_stats(
     user_id: str = Depends(get_current_user_id)
@@ -160,6 +198,129 @@ async def get_job_items(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/{job_id}/events")
+async def stream_job_events(
+    job_id: str,
+    user_id: str = Depends(get_current_user_id),
+    timeout: int = Query(600, ge=1, le=3600),
+):
+    """Stream job progress as server-sent events until the job completes or fails"""
+    meta = await run_in_threadpool(redis_queue.get_job_meta, job_id)
+    if (meta or {}).get("user_id") != user_id:
+        # Not tracked at enqueue time: fall back to the jobs row
+        job = get_supabase().table("jobs").select("id").eq("id", job_id).eq("user_id", user_id).execute()
+        if not job.data:
+            raise HTTPException(status_code=404, detail="Job not found")
+
+    async def events():
+        last = None
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            progress = await run_in_threadpool(redis_queue.get_job_progress, job_id)
+            if progress and progress != last:
+                last = progress
+                yield f"data: {json.dumps({'job_id': job_id, **progress})}\n\n"
+                if progress.get("message") in ("completed", "failed"):
+                    return
+            await asyncio.sleep(JOB_EVENTS_POLL_SECONDS)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single `bytes=start-end` / `bytes=start-` / `bytes=-suffix` range.
+    Returns (start, end) inclusive, None when absent; raises 416 when unsatisfiable."""
+    if not header:
+        return None
+    unit, _, spec = header.partition("=")
+    first, sep, last = spec.strip().partition("-")
+    try:
+        if unit.strip() != "bytes" or not sep or "," in spec:
+            raise ValueError(header)
+        if first:
+            start, end = int(first), int(last) if last else size - 1
+        else:
+            start, end = size - int(last), size - 1
+    except ValueError:
+        return None  # malformed: ignore the header and send the whole file
+    start, end = max(start, 0), min(end, size - 1)
+    if start > end or start >= size:
+        raise HTTPException(status_code=416, detail="Range not satisfiable",
+                            headers={"Content-Range": f"bytes */{size}"})
+    return start, end
+
+
+def _file_chunks(storage, path: str, start: int, length: int):
+    with storage.open(path) as f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(DOWNLOAD_CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+@router.get("/{job_id}/download")
+async def download_job_file(
+    job_id: str,
+    request: Request,
+    user_id: str = Depends(get_current_user_id),
+):
+    """Download the file produced by an export job.
+    Supabase Storage files redirect to a short-lived signed URL; local files are
+    served here with single-range support (Range / 206) for resumable downloads."""
+    from app.services.export_storage import get_export_storage
+
+    try:
+        result = get_supabase().table("jobs").select("id, status, output_data") \
+            .eq("id", job_id).eq("user_id", user_id).execute()
+    except Exception as e:
+        logger.error(f"Failed to get job: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    if not result.data:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    job = result.data[0]
+    file = (job.get("output_data") or {}).get("file")
+    if not file:
+        raise HTTPException(status_code=409, detail=f"No file available (job {job.get('status')})")
+
+    storage = get_export_storage()
+    try:
+        url = storage.signed_url(file["path"], settings.EXPORT_URL_TTL_SECONDS, file["filename"])
+    except Exception as e:
+        logger.error(f"Failed to sign export file of job {job_id}: {e}")
+        raise HTTPException(status_code=502, detail="Export file unavailable")
+    if url:
+        return RedirectResponse(url, status_code=307)
+
+    size = storage.size(file["path"])
+    if size is None:
+        raise HTTPException(status_code=410, detail="Export file expired")
+
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": f"attachment; filename={file['filename']}",
+    }
+    byte_range = _parse_range(request.headers.get("range"), size)
+    start, end = byte_range or (0, size - 1)
+    headers["Content-Length"] = str(end - start + 1)
+    if byte_range:
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+
+    return StreamingResponse(
+        _file_chunks(storage, file["path"], start, end - start + 1),
+        status_code=206 if byte_range else 200,
+        media_type=file.get("content_type") or "application/octet-stream",
+        headers=headers,
+    )
+
+
 @router.post("/{job_id}/cancel")
 async def cancel_job(
     job_id: str,
@@ -321,37 +482,57 @@ async def enrich_job_products(
 def _reenqueue_task(original: dict, user_id: str, metadata_extra: dict = None) -> str:
     """Re-enqueue a Celery task based on the original job's type and input_data."""
     from app.queue.tasks import (
-        import_csv_products, import_xml_feed,
+        import_csv_products, import_xml_feed, import_feed_parallel,
         sync_supplier_products, scrape_product_url, scrape_store_catalog,
-        bulk_ai_enrichment
+        bulk_ai_enrichment, bulk_update_products, export_products_file, export_seo_audit_file,
+        sync_platform_links
     )
 
     job_type = original.get("job_type", "")
     job_subtype = original.get("job_subtype", "")
     input_data = original.get("input_data") or {}
+    # Import settings of the original run (mapping, update mode, chunk size)
+    import_settings = {
+        "mapping_config": input_data.get("mapping_config") or {},
+        "update_existing": input_data.get("update_existing", True),
+        "chunk_size": input_data.get("chunk_size"),
+    }
+    incremental = {
+        "incremental": input_data.get("incremental", False),
+        "removed_action": input_data.get("removed_action", "out_of_stock"),
+    }
 
     task_map = {
         ("import", "csv"): lambda: import_csv_products.delay(
             user_id=user_id,
             feed_url=input_data.get("feed_url"),
             filename=input_data.get("filename"),
+            **import_settings, **incremental,
         ),
         ("import", "excel"): lambda: import_csv_products.delay(
             user_id=user_id,
             feed_url=input_data.get("feed_url"),
             filename=input_data.get("filename"),
             is_excel=True,
+            **import_settings,
         ),
         ("import", "xml"): lambda: import_xml_feed.delay(
             user_id=user_id,
             feed_url=input_data.get("feed_url"),
             filename=input_data.get("filename"),
+            **import_settings, **incremental,
         ),
         ("sync", ""): lambda: sync_supplier_products.delay(
             user_id=user_id,
             supplier_id=input_data.get("supplier_id", ""),
             sync_type=input_data.get("sync_type", "products"),
         ),
+        ("sync", "platform"): lambda: sync_platform_links.delay(
+            user_id=user_id,
+            product_ids=input_data.get("product_ids", []),
+            store_ids=input_data.get("store_ids", []),
+            conflict_strategy=input_data.get("conflict_strategy", "local_wins"),
+        ),
         ("scraping", "url"): lambda: scrape_product_url.delay(
             user_id=user_id,
             url=input_data.get("url", ""),
@@ -361,11 +542,38 @@ def _reenqueue_task(original: dict, user_id: str, metadata_extra: dict = None) -
             store_url=input_data.get("store_url", ""),
             max_products=input_data.get("max_products", 100),
         ),
+        ("export", "products"): lambda: export_products_file.delay(
+            user_id=user_id,
+            format=input_data.get("format", "csv"),
+            gzip=input_data.get("gzip", True),
+            filters=input_data.get("filters"),
+        ),
+        ("export", "seo_audit"): lambda: export_seo_audit_file.delay(
+            user_id=user_id,
+            audit_id=input_data.get("audit_id", ""),
+            format=input_data.get("format", "csv"),
+            gzip=input_data.get("gzip", True),
+        ),
     }
 
     key = (job_type, job_subtype)
     dispatcher = task_map.get(key) or task_map.get((job_type, ""))
 
+    if job_type == "bulk_edit" and input_data.get("action") == "update" and input_data.get("product_ids"):
+        dispatcher = lambda: bulk_update_products.delay(
+            user_id=user_id,
+            product_ids=input_data["product_ids"],
+            updates=input_data.get("updates") or {},
+        )
+
+    if job_type == "import" and input_data.get("parallel") and input_data.get("feed_url"):
+        dispatcher = lambda: import_feed_parallel.delay(
+            user_id=user_id,
+            feed_url=input_data.get("feed_url"),
+            format=job_subtype or "csv",
+            **import_settings,
+        )
+
     if not dispatcher:
         raise HTTPException(status_code=400, detail=f"Cannot retry job type: {job_type}/{job_subtype}")
 
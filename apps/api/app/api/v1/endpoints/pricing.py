@@ -10,6 +10,7 @@ import logging
 
 from app.core.security import get_current_user_id
 from app.core.database import get_supabase
+from app.queue.redis_queue import redis_queue
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -215,6 +216,8 @@ async def apply_pricing_rules(
                 }).execute()
                 failed += 1
 
+        if not request.dry_run:
+            redis_queue.invalidate_product_stats(user_id)
         supabase.table("jobs").update({
             "status": "completed",
             "processed_items": success + failed,
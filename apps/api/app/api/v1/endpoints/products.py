@@ -3,20 +3,34 @@ Product management endpoints — aligned with unified DB schema
 Server-side filtering, sorting, pagination, bulk actions, export
 """
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Literal
 from datetime import datetime
+import hashlib
 import logging
-import csv
-import io
+import uuid
 
+from app.core.config import settings
 from app.core.security import get_current_user_id
 from app.core.database import get_supabase
+from app.core.pagination import CountMode, count_rows, decode_cursor, keyset_sql, pagination_info, row_cursor
+from app.core.repository import get_repository, ident
+from app.queue.redis_queue import redis_queue
+from app.services.product_queries import PRODUCT_SORT_TYPES, product_filters, public_product
+from app.services.product_search import search_products, suggest_products
+from app.services.export_service import (
+    EXPORT_FORMATS, ExportStats, encode_export, export_filename, iter_product_pages,
+)
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+# Larger bulk edits are offloaded to the bulk_update_products Celery task
+BULK_UPDATE_INLINE_LIMIT = 1000
+
 
 # === SCHEMAS ===
 
@@ -61,6 +75,25 @@ class BulkUpdateRequest(BaseModel):
     updates: Dict[str, Any]
 
 
+def bulk_product_updates(updates: Dict[str, Any]) -> Dict[str, Any]:
+    """Bulk update values checked against ProductUpdate: only its fields (the keys
+    become column names) and cast to its types. ValueError otherwise."""
+    unknown = sorted(set(updates) - set(ProductUpdate.model_fields))
+    if unknown:
+        raise ValueError(f"Unknown product fields: {', '.join(unknown)}")
+    return ProductUpdate.model_validate(updates).model_dump(include=set(updates))
+
+
+def product_uuids(product_ids: List[str]) -> List[str]:
+    """product_ids, each checked to be a UUID (ValueError naming the first that is not)"""
+    for pid in product_ids:
+        try:
+            uuid.UUID(pid)
+        except ValueError:
+            raise ValueError(f"Invalid product id: {pid}") from None
+    return product_ids
+
+
 class BulkDeleteRequest(BaseModel):
     product_ids: List[str]
 
@@ -73,7 +106,7 @@ class BulkStatusRequest(BaseModel):
 class BulkTagsRequest(BaseModel):
     product_ids: List[str]
     tags: List[str]
-    action: str = "add"  # add | remove | replace
+    action: Literal["add", "remove", "replace"] = "add"
 
 
 # === ENDPOINTS ===
@@ -93,143 +126,111 @@ async def list_products(
     tags: Optional[str] = None,
     sort_by: str = Query("created_at", regex="^(created_at|title|price|stock_quantity|updated_at|sku)$"),
     sort_order: str = Query("desc", regex="^(asc|desc)$"),
+    cursor: Optional[str] = None,
+    count: CountMode = "exact",
 ):
-    """List products with server-side filtering, sorting, pagination"""
+    """List products with server-side filtering, sorting, pagination.
+    Pass the returned `next_cursor` as `cursor` for keyset pagination (constant cost
+    per page; `page` is ignored); count=planned|estimated|none avoids the full count."""
+    sort_key = f"{sort_by}.{sort_order}"
+    after = decode_cursor(cursor, sort_key) if cursor else None
     try:
-        supabase = get_supabase()
-
-        # Count query
-        count_query = supabase.table("products").select("id", count="exact").eq("user_id", user_id)
-        # Data query
-        data_query = supabase.table("products").select("*").eq("user_id", user_id)
-
-        # Apply filters to both
-        for q_ref in [count_query, data_query]:
-            if status:
-                q_ref = q_ref.eq("status", status)
-            if category:
-                q_ref = q_ref.eq("category", category)
-            if vendor:
-                q_ref = q_ref.eq("vendor", vendor)
-            if search:
-                q_ref = q_ref.or_(f"title.ilike.%{search}%,sku.ilike.%{search}%,description.ilike.%{search}%")
-            if min_price is not None:
-                q_ref = q_ref.gte("price", min_price)
-            if max_price is not None:
-                q_ref = q_ref.lte("price", max_price)
-            if low_stock is not None:
-                q_ref = q_ref.lte("stock_quantity", low_stock)
-            if tags:
-                q_ref = q_ref.contains("tags", [tags])
-
-        # Unfortunately supabase-py builder is not mutable via reassign in loop
-        # Rebuild properly
-        count_q = supabase.table("products").select("id", count="exact").eq("user_id", user_id)
-        data_q = supabase.table("products").select("*").eq("user_id", user_id)
-
-        if status:
-            count_q = count_q.eq("status", status)
-            data_q = data_q.eq("status", status)
-        if category:
-            count_q = count_q.eq("category", category)
-            data_q = data_q.eq("category", category)
-        if vendor:
-            count_q = count_q.eq("vendor", vendor)
-            data_q = data_q.eq("vendor", vendor)
-        if search:
-            search_filter = f"title.ilike.%{search}%,sku.ilike.%{search}%,description.ilike.%{search}%"
-            count_q = count_q.or_(search_filter)
-            data_q = data_q.or_(search_filter)
-        if min_price is not None:
-            count_q = count_q.gte("price", min_price)
-            data_q = data_q.gte("price", min_price)
-        if max_price is not None:
-            count_q = count_q.lte("price", max_price)
-            data_q = data_q.lte("price", max_price)
-        if low_stock is not None:
-            count_q = count_q.lte("stock_quantity", low_stock)
-            data_q = data_q.lte("stock_quantity", low_stock)
-        if tags:
-            count_q = count_q.contains("tags", [tags])
-            data_q = data_q.contains("tags", [tags])
-
-        # Sort & paginate
-        ascending = sort_order == "asc"
-        data_q = data_q.order(sort_by, desc=not ascending)
-        offset = (page - 1) * limit
-        data_q = data_q.range(offset, offset + limit - 1)
-
-        count_result = count_q.execute()
-        data_result = data_q.execute()
-
-        total = count_result.count if count_result.count is not None else len(data_result.data)
+        repo = get_repository()
+
+        where, args = product_filters(
+            user_id, status=status, category=category, search=search, vendor=vendor,
+            min_price=min_price, max_price=max_price, low_stock=low_stock, tags=tags,
+        )
+        descending = sort_order != "asc"
+        direction = "DESC" if descending else "ASC"
+        query_where, query_args, offset = where, list(args), (page - 1) * limit
+        if after:
+            clause, bounds = keyset_sql(sort_by, PRODUCT_SORT_TYPES[sort_by], descending, after, len(args) + 1)
+            query_where, query_args, offset = f"{where} AND {clause}", query_args + bounds, 0
+
+        # Offset pages with an exact count get it in the same round trip (window count)
+        window = count == "exact" and not after
+        rows = await repo.fetch(
+            f"SELECT *{', count(*) OVER () AS _total' if window else ''} FROM products WHERE {query_where} "
+            f"ORDER BY {ident(sort_by)} {direction}, id {direction} "
+            f"LIMIT ${len(query_args) + 1} OFFSET ${len(query_args) + 2}",
+            *query_args, limit + 1, offset,
+        )
+        if window and rows:
+            total = rows[0]["_total"]
+        else:
+            # Past the last page the window count has no row to ride on
+            total = await count_rows(repo, f"products WHERE {where}", args, count)
+        for row in rows:
+            row.pop("_total", None)
+            public_product(row)
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        next_cursor = row_cursor(sort_key, rows[-1], sort_by) if has_more else None
 
         return {
             "success": True,
-            "products": data_result.data,
-            "pagination": {
-                "page": page,
-                "limit": limit,
-                "total": total,
-                "total_pages": (total + limit - 1) // limit
-            }
+            "products": rows,
+            "pagination": pagination_info(
+                limit, total, count, page=None if after else page, next_cursor=next_cursor, has_more=has_more,
+            ),
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Failed to list products: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# Counts, stock value, margin and category histogram in a single scan of the tenant's rows
+PRODUCT_STATS_SQL = """
+    SELECT
+        count(*) AS total,
+        count(*) FILTER (WHERE status = 'active') AS active,
+        count(*) FILTER (WHERE status = 'draft') AS draft,
+        count(*) FILTER (WHERE status = 'paused') AS paused,
+        count(*) FILTER (WHERE status = 'error') AS error,
+        count(*) FILTER (WHERE COALESCE(stock_quantity, 0) BETWEEN 0 AND 5) AS low_stock,
+        count(*) FILTER (WHERE COALESCE(stock_quantity, 0) = 0) AS out_of_stock,
+        COALESCE(sum(COALESCE(price, 0) * COALESCE(stock_quantity, 0)), 0)::float8 AS total_value,
+        COALESCE(avg((price - cost_price) / price * 100)
+                 FILTER (WHERE cost_price <> 0 AND price > 0), 0)::float8 AS avg_margin,
+        (
+            SELECT jsonb_object_agg(category, n)
+            FROM (
+                SELECT COALESCE(NULLIF(category, ''), 'Non catégorisé') AS category, count(*) AS n
+                FROM public.products
+                WHERE user_id = $1
+                GROUP BY 1
+            ) c
+        ) AS categories
+    FROM public.products
+    WHERE user_id = $1
+"""
+
+
 @router.get("/stats")
 async def get_product_stats(
     user_id: str = Depends(get_current_user_id)
 ):
-    """Get product statistics for the catalogue"""
+    """Get product statistics for the catalogue (one aggregate query, cached briefly)"""
     try:
-        supabase = get_supabase()
-
-        result = supabase.table("products").select(
-            "id, status, price, cost_price, stock_quantity, category"
-        ).eq("user_id", user_id).execute()
-
-        products = result.data or []
-        total = len(products)
-        active = sum(1 for p in products if p.get("status") == "active")
-        draft = sum(1 for p in products if p.get("status") == "draft")
-        paused = sum(1 for p in products if p.get("status") == "paused")
-        error = sum(1 for p in products if p.get("status") == "error")
-        low_stock = sum(1 for p in products if (p.get("stock_quantity") or 0) <= 5 and (p.get("stock_quantity") or 0) >= 0)
-        out_of_stock = sum(1 for p in products if (p.get("stock_quantity") or 0) == 0)
-        total_value = sum((p.get("price") or 0) * (p.get("stock_quantity") or 0) for p in products)
-        avg_margin = 0
-        margin_products = [p for p in products if p.get("cost_price") and p.get("price") and p["price"] > 0]
-        if margin_products:
-            avg_margin = sum(
-                ((p["price"] - p["cost_price"]) / p["price"]) * 100
-                for p in margin_products
-            ) / len(margin_products)
-
-        # Categories breakdown
-        categories = {}
-        for p in products:
-            cat = p.get("category") or "Non catégorisé"
-            categories[cat] = categories.get(cat, 0) + 1
-
-        return {
-            "success": True,
-            "stats": {
-                "total": total,
-                "active": active,
-                "draft": draft,
-                "paused": paused,
-                "error": error,
-                "low_stock": low_stock,
-                "out_of_stock": out_of_stock,
-                "total_value": round(total_value, 2),
-                "avg_margin": round(avg_margin, 2),
-                "categories": categories
-            }
+        cached = redis_queue.get_product_stats(user_id)
+        if cached is not None:
+            return {"success": True, "stats": cached}
+
+        row = await get_repository().fetchrow(PRODUCT_STATS_SQL, user_id)
+        stats = {
+            **{key: row[key] for key in ("total", "active", "draft", "paused", "error", "low_stock", "out_of_stock")},
+            "total_value": round(row["total_value"], 2),
+            "avg_margin": round(row["avg_margin"], 2),
+            "categories": row["categories"] or {},
         }
+        redis_queue.set_product_stats(user_id, stats)
+
+        return {"success": True, "stats": stats}
 
     except Exception as e:
         logger.error(f"Failed to get product stats: {e}")
@@ -239,106 +240,187 @@ async def get_product_stats(
 @router.get("/export")
 async def export_products(
     user_id: str = Depends(get_current_user_id),
-    format: str = Query("csv", regex="^(csv|json)$"),
+    format: str = Query("csv", pattern="^(csv|ndjson|json)$"),
+    gzip: bool = False,
     status: Optional[str] = None,
     category: Optional[str] = None,
+    background: bool = False,
 ):
-    """Export products as CSV or JSON — creates a job"""
+    """Stream products as CSV, NDJSON or a JSON array (optionally gzipped) — creates a job.
+    Rows are read page by page with keyset pagination and written as they arrive.
+    Exports above EXPORT_BACKGROUND_ROWS rows (or background=true) run as a Celery job
+    writing a gzipped file to export storage, downloadable from /jobs/{job_id}/download."""
+    where, args = product_filters(user_id, status=status, category=category)
     try:
-        supabase = get_supabase()
+        repo = get_repository()
+        now = datetime.utcnow().isoformat()
+
+        total = await repo.fetchval(f"SELECT count(*) FROM public.{ident('products')} WHERE {where}", *args)
+        if background or total > settings.EXPORT_BACKGROUND_ROWS:
+            from app.queue.tasks import export_products_file
+
+            result = export_products_file.delay(
+                user_id=user_id,
+                format=format,
+                gzip=True,
+                filters={"status": status, "category": category},
+                total=total,
+            )
+            redis_queue.track_user_job(user_id, str(result.id), "export")
+            return JSONResponse({
+                "success": True,
+                "job_id": str(result.id),
+                "status": "queued",
+                "total": total,
+                "download_url": f"/api/v1/jobs/{result.id}/download",
+            }, status_code=202)
 
-        # Create export job
-        job_data = {
+        job = (await repo.bulk_insert("jobs", [{
             "user_id": user_id,
             "job_type": "export",
             "status": "running",
-            "metadata": {"format": format, "filters": {"status": status, "category": category}},
-            "started_at": datetime.utcnow().isoformat(),
-            "created_at": datetime.utcnow().isoformat(),
-            "updated_at": datetime.utcnow().isoformat(),
-        }
-        job_result = supabase.table("jobs").insert(job_data).execute()
-        job = job_result.data[0]
-
-        # Fetch products
-        query = supabase.table("products").select("*").eq("user_id", user_id)
-        if status:
-            query = query.eq("status", status)
-        if category:
-            query = query.eq("category", category)
-        query = query.order("created_at", desc=True)
-        result = query.execute()
-        products = result.data or []
-
-        # Update job
-        supabase.table("jobs").update({
-            "status": "completed",
-            "total_items": len(products),
-            "processed_items": len(products),
-            "progress_percent": 100,
-            "completed_at": datetime.utcnow().isoformat(),
-            "updated_at": datetime.utcnow().isoformat(),
-        }).eq("id", job["id"]).execute()
+            "metadata": {"format": format, "gzip": gzip, "filters": {"status": status, "category": category}},
+            "started_at": now,
+            "created_at": now,
+            "updated_at": now,
+        }], returning="id"))[0]
 
-        if format == "json":
-            return {
-                "success": True,
-                "job_id": job["id"],
-                "data": products,
-                "count": len(products)
-            }
+    except Exception as e:
+        logger.error(f"Export failed: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
 
-        # CSV format
-        if not products:
-            return {"success": True, "job_id": job["id"], "csv": "", "count": 0}
+    stats = ExportStats()
+
+    async def body():
+        outcome: Dict[str, Any] = {"status": "cancelled"}  # client went away mid-stream
+        try:
+            async for chunk in encode_export(iter_product_pages(repo, where, args), format, gzip, stats):
+                yield chunk
+            outcome = {"status": "completed", "progress_percent": 100}
+        except Exception as e:
+            logger.error(f"Export {job['id']} failed after {stats.rows} rows: {e}")
+            outcome = {"status": "failed", "error_message": str(e)[:2000]}
+            raise
+        finally:
+            await repo.bulk_update_by_ids("jobs", [job["id"]], {
+                **outcome,
+                "total_items": stats.rows,
+                "processed_items": stats.rows,
+                "output_data": stats.to_dict(),
+                "completed_at": datetime.utcnow().isoformat(),
+                "updated_at": datetime.utcnow().isoformat(),
+            })
+
+    filename = export_filename(format, gzip, suffix=f"-{datetime.utcnow():%Y%m%d}")
+    return StreamingResponse(
+        body(),
+        media_type="application/gzip" if gzip else EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f"attachment; filename={filename}", "X-Job-Id": str(job["id"])},
+    )
+
+
+@router.get("/search")
+async def search_catalog(
+    q: str = Query(..., min_length=1, max_length=200),
+    user_id: str = Depends(get_current_user_id),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=1000),
+    status: Optional[str] = None,
+    category: Optional[str] = None,
+    fuzzy: bool = True,
+):
+    """Ranked product search: words of q match title, SKU, vendor, category and
+    description (as prefixes), best matches first; fuzzy admits near-miss titles"""
+    try:
+        results = await search_products(
+            get_repository(), user_id, q, limit=limit, offset=offset,
+            status=status, category=category, fuzzy=fuzzy,
+        )
+        return {"success": True, "query": q, "results": results, "count": len(results)}
+
+    except Exception as e:
+        logger.error(f"Product search failed: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
 
-        output = io.StringIO()
-        writer = csv.DictWriter(output, fieldnames=products[0].keys())
-        writer.writeheader()
-        writer.writerows(products)
 
-        return {
-            "success": True,
-            "job_id": job["id"],
-            "csv": output.getvalue(),
-            "count": len(products)
-        }
+@router.get("/search/suggest")
+async def suggest_catalog(
+    q: str = Query(..., min_length=1, max_length=100),
+    user_id: str = Depends(get_current_user_id),
+    limit: int = Query(10, ge=1, le=25),
+):
+    """Autocomplete: products whose title or SKU words start with what was typed"""
+    try:
+        suggestions = await suggest_products(get_repository(), user_id, q, limit=limit)
+        return {"success": True, "query": q, "suggestions": suggestions}
 
     except Exception as e:
-        logger.error(f"Export failed: {e}")
+        logger.error(f"Product suggest failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# Product with its variants, images and store links in one round trip. _version
+# (latest change across the four tables + child counts, so deletions count too)
+# feeds the ETag.
+PRODUCT_DETAIL_SQL = """
+    SELECT p.*,
+        v.items AS variants,
+        i.items AS images,
+        l.items AS store_links
+    FROM public.products p
+    CROSS JOIN LATERAL (
+        SELECT COALESCE(jsonb_agg(to_jsonb(x) ORDER BY x.position, x.id), '[]') AS items
+        FROM public.product_variants x
+        WHERE x.product_id = p.id
+    ) v
+    CROSS JOIN LATERAL (
+        SELECT COALESCE(jsonb_agg(to_jsonb(x) ORDER BY x.position, x.id), '[]') AS items
+        FROM public.product_images x
+        WHERE x.product_id = p.id
+    ) i
+    CROSS JOIN LATERAL (
+        SELECT COALESCE(jsonb_agg(to_jsonb(x) || jsonb_build_object(
+                   'stores', jsonb_build_object('name', s.name, 'platform', s.platform, 'domain', s.domain)
+               ) ORDER BY x.id), '[]') AS items
+        FROM public.product_store_links x
+        JOIN public.stores s ON s.id = x.store_id
+        WHERE x.product_id = p.id
+    ) l
+    WHERE p.id = $1 AND p.user_id = $2
+"""
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match check (weak comparison, lists and `*` allowed)"""
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or any(tag.removeprefix("W/") == etag.removeprefix("W/") for tag in tags)
+
+
 @router.get("/{product_id}")
 async def get_product(
     product_id: str,
+    request: Request,
     user_id: str = Depends(get_current_user_id)
 ):
-    """Get product with variants, images, and store links"""
+    """Get product with variants, images, and store links (one query).
+    Carries an ETag (hash of the response body, so any edit to the product, its
+    variants, images, links or linked stores changes it); a matching
+    If-None-Match gets 304 Not Modified."""
     try:
-        supabase = get_supabase()
-
-        # Product
-        product_result = supabase.table("products").select("*").eq("id", product_id).eq("user_id", user_id).single().execute()
-        if not product_result.data:
+        product = await get_repository().fetchrow(PRODUCT_DETAIL_SQL, product_id, user_id)
+        if not product:
             raise HTTPException(status_code=404, detail="Product not found")
 
-        # Variants
-        variants_result = supabase.table("product_variants").select("*").eq("product_id", product_id).order("position").execute()
-        # Images
-        images_result = supabase.table("product_images").select("*").eq("product_id", product_id).order("position").execute()
-        # Store links
-        store_links_result = supabase.table("product_store_links").select("*, stores(name, platform, domain)").eq("product_id", product_id).execute()
+        response = JSONResponse(jsonable_encoder({"success": True, "product": public_product(product)}))
+        etag = f'W/"{hashlib.md5(response.body).hexdigest()}"'
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        if _etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
 
-        return {
-            "success": True,
-            "product": {
-                **product_result.data,
-                "variants": variants_result.data or [],
-                "images": images_result.data or [],
-                "store_links": store_links_result.data or [],
-            }
-        }
+        response.headers.update(headers)
+        return response
 
     except HTTPException:
         raise
@@ -362,6 +444,7 @@ async def create_product(
         product_data["updated_at"] = datetime.utcnow().isoformat()
 
         result = supabase.table("products").insert(product_data).execute()
+        redis_queue.invalidate_product_stats(user_id)
 
         return {
             "success": True,
@@ -387,6 +470,7 @@ async def update_product(
         update_data["updated_at"] = datetime.utcnow().isoformat()
 
         result = supabase.table("products").update(update_data).eq("id", product_id).eq("user_id", user_id).execute()
+        redis_queue.invalidate_product_stats(user_id)
 
         if not result.data:
             raise HTTPException(status_code=404, detail="Product not found")
@@ -409,6 +493,7 @@ async def delete_product(
     try:
         supabase = get_supabase()
         supabase.table("products").delete().eq("id", product_id).eq("user_id", user_id).execute()
+        redis_queue.invalidate_product_stats(user_id)
         return {"success": True, "message": "Product deleted"}
     except Exception as e:
         logger.error(f"Failed to delete product: {e}")
@@ -422,58 +507,86 @@ async def bulk_update(
     request: BulkUpdateRequest,
     user_id: str = Depends(get_current_user_id)
 ):
-    """Bulk update products — creates a job with job_items"""
+    """Bulk update products — creates a job with job_items.
+    Requests above BULK_UPDATE_INLINE_LIMIT ids run as a Celery job instead.
+    Unknown fields, invalid values and malformed ids are rejected with 400."""
     try:
-        supabase = get_supabase()
-
-        # Create job
-        job = supabase.table("jobs").insert({
-            "user_id": user_id,
-            "job_type": "bulk_edit",
-            "status": "running",
-            "total_items": len(request.product_ids),
-            "started_at": datetime.utcnow().isoformat(),
-            "created_at": datetime.utcnow().isoformat(),
-            "updated_at": datetime.utcnow().isoformat(),
-        }).execute().data[0]
-
-        success = 0
-        failed = 0
-
-        for pid in request.product_ids:
-            try:
-                before = supabase.table("products").select("*").eq("id", pid).eq("user_id", user_id).single().execute()
-                updates = {**request.updates, "updated_at": datetime.utcnow().isoformat()}
-                supabase.table("products").update(updates).eq("id", pid).eq("user_id", user_id).execute()
+        product_ids = product_uuids(request.product_ids)
+        changes = bulk_product_updates(request.updates)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if len(product_ids) > BULK_UPDATE_INLINE_LIMIT:
+        from app.queue.tasks import bulk_update_products
+
+        result = bulk_update_products.delay(
+            user_id=user_id,
+            product_ids=product_ids,
+            updates=changes,
+        )
+        redis_queue.track_user_job(user_id, str(result.id), "bulk_edit")
+        return {
+            "success": True,
+            "job_id": str(result.id),
+            "status": "queued",
+            "message": f"Bulk update of {len(product_ids)} products queued",
+        }
 
-                supabase.table("job_items").insert({
+    try:
+        repo = get_repository()
+        now = datetime.utcnow().isoformat()
+
+        updates = {**changes, "updated_at": now}
+        # The job is created and completed in the same transaction as the update,
+        # so a failure leaves neither a half-applied update nor a job stuck "running"
+        async with repo.transaction() as tx:
+            job = (await tx.bulk_insert("jobs", [{
+                "user_id": user_id,
+                "job_type": "bulk_edit",
+                "status": "running",
+                "total_items": len(product_ids),
+                "started_at": now,
+                "created_at": now,
+                "updated_at": now,
+            }], returning="id"))[0]
+
+            # One snapshot query, one UPDATE ... WHERE id = ANY, one job_items insert
+            before = {
+                row["id"]: public_product(row)
+                for row in await tx.select_by_ids("products", product_ids, filters={"user_id": user_id})
+            }
+            await tx.bulk_update_by_ids("products", list(before), updates, filters={"user_id": user_id})
+            await tx.bulk_insert("job_items", [
+                {
                     "job_id": job["id"],
                     "product_id": pid,
                     "status": "success",
-                    "before_state": before.data if before.data else {},
+                    "before_state": before[pid],
                     "after_state": updates,
-                    "processed_at": datetime.utcnow().isoformat(),
-                }).execute()
-                success += 1
-            except Exception as e:
-                supabase.table("job_items").insert({
+                    "processed_at": now,
+                } if pid in before else {
                     "job_id": job["id"],
                     "product_id": pid,
                     "status": "failed",
-                    "message": str(e),
+                    "message": f"Product {pid} not found",
                     "error_code": "UPDATE_FAILED",
-                    "processed_at": datetime.utcnow().isoformat(),
-                }).execute()
-                failed += 1
-
-        supabase.table("jobs").update({
-            "status": "completed",
-            "processed_items": success + failed,
-            "failed_items": failed,
-            "progress_percent": 100,
-            "completed_at": datetime.utcnow().isoformat(),
-            "updated_at": datetime.utcnow().isoformat(),
-        }).eq("id", job["id"]).execute()
+                    "processed_at": now,
+                }
+                for pid in product_ids
+            ], returning=None)
+
+            success = len(before)
+            failed = len(product_ids) - success
+            await tx.bulk_update_by_ids("jobs", [job["id"]], {
+                "status": "completed",
+                "processed_items": success + failed,
+                "failed_items": failed,
+                "progress_percent": 100,
+                "completed_at": datetime.utcnow().isoformat(),
+                "updated_at": datetime.utcnow().isoformat(),
+            })
+
+        redis_queue.invalidate_product_stats(user_id)
 
         return {
             "success": True,
@@ -507,6 +620,7 @@ async def bulk_delete(
         }).execute().data[0]
 
         supabase.table("products").delete().in_("id", request.product_ids).eq("user_id", user_id).execute()
+        redis_queue.invalidate_product_stats(user_id)
 
         supabase.table("jobs").update({
             "status": "completed",
@@ -540,6 +654,7 @@ async def bulk_status_update(
             "status": request.status,
             "updated_at": datetime.utcnow().isoformat()
         }).in_("id", request.product_ids).eq("user_id", user_id).execute()
+        redis_queue.invalidate_product_stats(user_id)
 
         return {
             "success": True,
@@ -557,34 +672,12 @@ async def bulk_tags_update(
     request: BulkTagsRequest,
     user_id: str = Depends(get_current_user_id)
 ):
-    """Bulk add/remove/replace tags on products"""
+    """Bulk add/remove/replace tags on products in one statement (bulk_update_product_tags)"""
     try:
-        supabase = get_supabase()
-        updated = 0
-
-        for pid in request.product_ids:
-            try:
-                product = supabase.table("products").select("tags").eq("id", pid).eq("user_id", user_id).single().execute()
-                if not product.data:
-                    continue
-
-                current_tags = product.data.get("tags") or []
-
-                if request.action == "add":
-                    new_tags = list(set(current_tags + request.tags))
-                elif request.action == "remove":
-                    new_tags = [t for t in current_tags if t not in request.tags]
-                else:  # replace
-                    new_tags = request.tags
-
-                supabase.table("products").update({
-                    "tags": new_tags,
-                    "updated_at": datetime.utcnow().isoformat()
-                }).eq("id", pid).eq("user_id", user_id).execute()
-                updated += 1
-            except Exception:
-                pass
-
+        updated = await get_repository().fetchval(
+            "SELECT public.bulk_update_product_tags($1, $2, $3, $4)",
+            user_id, request.product_ids, request.tags, request.action,
+        )
         return {"success": True, "updated": updated}
 
     except Exception as e:
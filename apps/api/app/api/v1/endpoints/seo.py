@@ -4,17 +4,21 @@ All actions follow jobs-first pattern
 """
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from fastapi.responses import StreamingResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
 from typing import Optional, List
 from datetime import datetime
+import json
 import logging
-import csv
-import io
 
+from app.core.config import settings
 from app.core.security import get_current_user_id
 from app.core.database import get_supabase
+from app.core.pagination import CountMode, decode_cursor, keyset_postgrest, row_cursor
 from app.core.quota import require_quota, QuotaGuard
+from app.core.repository import get_repository
+from app.queue.redis_queue import redis_queue
+from app.services.export_service import SEO_EXPORT_COLUMNS, encode_export, iter_keyset_pages, seo_audit_row
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -201,8 +205,14 @@ async def list_audit_pages(
     min_score: Optional[int] = None,
     max_score: Optional[int] = None,
     has_critical: Optional[bool] = None,
+    cursor: Optional[str] = None,
+    count: CountMode = "exact",
 ):
-    """Paginated list of analyzed pages for an audit"""
+    """Paginated list of analyzed pages for an audit.
+    Pass the returned `next_cursor` as `cursor` for keyset pagination on (score, id);
+    count=planned|estimated|none avoids the exact count."""
+    sort_key = "score.asc" if sort == "score_asc" else "score.desc"
+    after = decode_cursor(cursor, sort_key) if cursor else None
     try:
         supabase = get_supabase()
 
@@ -215,31 +225,49 @@ async def list_audit_pages(
         if not audit.data:
             raise HTTPException(status_code=404, detail="Audit not found")
 
-        offset = (page - 1) * limit
-        query = supabase.table("seo_audit_pages") \
-            .select("id, url, page_type, http_status, score, issues_summary, title, meta_description, h1", count="exact") \
-            .eq("audit_id", audit_id)
-
-        if page_type:
-            query = query.eq("page_type", page_type)
-        if min_score is not None:
-            query = query.gte("score", min_score)
-        if max_score is not None:
-            query = query.lte("score", max_score)
-
-        # Sort
-        if sort == "score_asc":
-            query = query.order("score", desc=False)
+        def pages_query(columns: str, count_method: Optional[str]):
+            query = supabase.table("seo_audit_pages") \
+                .select(columns, count=None if count_method == "none" else count_method) \
+                .eq("audit_id", audit_id)
+            if page_type:
+                query = query.eq("page_type", page_type)
+            if min_score is not None:
+                query = query.gte("score", min_score)
+            if max_score is not None:
+                query = query.lte("score", max_score)
+            return query
+
+        descending = sort_key == "score.desc"
+        query = pages_query(
+            "id, url, page_type, http_status, score, issues_summary, title, meta_description, h1",
+            None if after else count,
+        )
+        if after:
+            # Counted on its own: the page query only sees rows after the cursor
+            total = pages_query("id", count).limit(1).execute().count if count != "none" else None
+            query = query.or_(keyset_postgrest("score", descending, after))
+            offset = 0
         else:
-            query = query.order("score", desc=True)
+            offset = (page - 1) * limit
+
+        # Sort (id breaks score ties so cursors are stable)
+        query = query.order("score", desc=descending).order("id", desc=descending)
 
-        result = query.range(offset, offset + limit - 1).execute()
+        result = query.range(offset, offset + limit).execute()  # one extra row tells has_more
+        if not after:
+            total = (result.count or 0) if count != "none" else None
+
+        items = (result.data or [])[:limit]
+        has_more = len(result.data or []) > limit
 
         return {
-            "items": result.data or [],
-            "page": page,
+            "items": items,
+            "page": None if after else page,
             "limit": limit,
-            "total": result.count or 0,
+            "total": total,
+            "count_mode": count,
+            "next_cursor": row_cursor(sort_key, items[-1], "score") if has_more else None,
+            "has_more": has_more,
         }
 
     except HTTPException:
@@ -418,13 +446,21 @@ async def apply_fix(
 
 # ── F) Export ────────────────────────────────────────────────
 
+def _audit_item(page):
+    """Audited page as a JSON export item (internal id dropped)"""
+    return {k: v for k, v in page.items() if k != "id"}
+
+
 @router.get("/audits/{audit_id}/export")
 async def export_audit(
     audit_id: str,
     user_id: str = Depends(get_current_user_id),
     format: str = Query("csv"),
+    background: bool = False,
 ):
-    """Export audit results as CSV, XLSX or JSON"""
+    """Export audit results as CSV or JSON, streamed page by page (keyset pagination).
+    Audits above EXPORT_BACKGROUND_ROWS pages (or background=true) are exported by a
+    Celery job to a gzipped file, downloadable from /jobs/{job_id}/download."""
     try:
         supabase = get_supabase()
 
@@ -437,43 +473,52 @@ async def export_audit(
         if not audit.data:
             raise HTTPException(status_code=404, detail="Audit not found")
 
-        # Fetch all pages (up to 1000)
-        pages = supabase.table("seo_audit_pages") \
-            .select("url, page_type, http_status, score, title_length, meta_description_length, images_missing_alt_count, issues_summary") \
+        total = supabase.table("seo_audit_pages") \
+            .select("id", count="exact") \
             .eq("audit_id", audit_id) \
-            .order("score", desc=True) \
-            .execute().data or []
+            .limit(1) \
+            .execute().count or 0
+
+        if background or total > settings.EXPORT_BACKGROUND_ROWS:
+            from app.queue.tasks import export_seo_audit_file
+
+            result = export_seo_audit_file.delay(
+                user_id=user_id,
+                audit_id=audit_id,
+                format="ndjson" if format == "json" else "csv",
+                gzip=True,
+                total=total,
+            )
+            redis_queue.track_user_job(user_id, str(result.id), "export")
+            return JSONResponse({
+                "success": True,
+                "job_id": str(result.id),
+                "status": "queued",
+                "total": total,
+                "download_url": f"/api/v1/jobs/{result.id}/download",
+            }, status_code=202)
+
+        # Stream every page, keyset-paginated on (score desc, id)
+        repo = get_repository()
+
+        def pages():
+            return iter_keyset_pages(
+                repo, "seo_audit_pages", "audit_id = $1", [audit_id],
+                keys=(("score", "int"), ("id", "uuid")), columns=SEO_EXPORT_COLUMNS,
+            )
 
         if format == "json":
-            return {"items": pages, "audit_id": audit_id}
-
-        # CSV export
-        output = io.StringIO()
-        writer = csv.DictWriter(output, fieldnames=[
-            "url", "page_type", "http_status", "score",
-            "title_length", "meta_description_length",
-            "images_missing_alt_count", "critical", "major", "minor",
-        ])
-        writer.writeheader()
-        for p in pages:
-            summary = p.get("issues_summary") or {}
-            writer.writerow({
-                "url": p.get("url"),
-                "page_type": p.get("page_type"),
-                "http_status": p.get("http_status"),
-                "score": p.get("score"),
-                "title_length": p.get("title_length"),
-                "meta_description_length": p.get("meta_description_length"),
-                "images_missing_alt_count": p.get("images_missing_alt_count"),
-                "critical": summary.get("critical", 0),
-                "major": summary.get("major", 0),
-                "minor": summary.get("minor", 0),
-            })
-
-        output.seek(0)
+            async def body():
+                yield f'{{"audit_id": {json.dumps(audit_id)}, "items": '.encode()
+                async for chunk in encode_export(pages(), "json", row_mapper=_audit_item):
+                    yield chunk
+                yield b"}"
+
+            return StreamingResponse(body(), media_type="application/json")
+
         filename = f"seo-audit-{audit_id[:8]}.csv"
         return StreamingResponse(
-            iter([output.getvalue()]),
+            encode_export(pages(), "csv", row_mapper=seo_audit_row),
             media_type="text/csv",
             headers={"Content-Disposition": f"attachment; filename={filename}"},
         )
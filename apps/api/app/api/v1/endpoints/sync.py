@@ -5,17 +5,16 @@ Uses platform adapters (Shopify, WooCommerce) for real API calls.
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
-from typing import Optional, List, Dict, Any
+from typing import Optional, List
 from datetime import datetime
 import logging
 
 from app.core.security import get_current_user_id
 from app.core.database import get_supabase
-from app.services.platform_sync import get_adapter
-from app.services.platform_sync.base import PlatformProduct
-from app.services.platform_sync.conflict_resolution import (
-    detect_conflicts, resolve_conflicts, apply_sync_actions, ConflictStrategy
-)
+from app.core.repository import get_repository
+from app.queue.redis_queue import redis_queue
+from app.services.platform_sync.conflict_resolution import ConflictStrategy
+from app.services.platform_sync.sync_engine import count_sync_links
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -51,175 +50,35 @@ async def bulk_sync(
     request: BulkSyncRequest,
     user_id: str = Depends(get_current_user_id)
 ):
-    """Sync products with external stores using platform adapters"""
-    try:
-        supabase = get_supabase()
-
-        # Get store links to sync
-        query = supabase.table("product_store_links").select(
-            "*, products!inner(id, title, description, sale_price, stock, status, user_id, updated_at), shops!inner(id, name, platform, credentials_encrypted)"
-        )
-        if request.product_ids:
-            query = query.in_("product_id", request.product_ids)
-        if request.store_ids:
-            query = query.in_("store_id", request.store_ids)
+    """Sync products with external stores — queued as a job.
 
-        links_result = query.execute()
-        links = [l for l in (links_result.data or []) if l.get("products", {}).get("user_id") == user_id]
+    The worker runs links concurrently (bounded per store) with batched link /
+    job_items writes; poll GET /jobs/{job_id} for progress and per-store throughput.
+    """
+    try:
+        try:
+            ConflictStrategy(request.conflict_strategy)
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Unknown conflict strategy: {request.conflict_strategy}")
 
+        links = await count_sync_links(get_repository(), user_id, request.product_ids, request.store_ids)
         if not links:
             raise HTTPException(status_code=400, detail="No product-store links found to sync")
 
-        # Create job
-        job = supabase.table("jobs").insert({
-            "user_id": user_id,
-            "job_type": "sync",
-            "status": "running",
-            "total_items": len(links),
-            "metadata": {
-                "product_count": len(set(l["product_id"] for l in links)),
-                "store_count": len(set(l["store_id"] for l in links)),
-                "conflict_strategy": request.conflict_strategy,
-            },
-            "started_at": datetime.utcnow().isoformat(),
-            "created_at": datetime.utcnow().isoformat(),
-            "updated_at": datetime.utcnow().isoformat(),
-        }).execute().data[0]
-
-        success = 0
-        failed = 0
-        conflicts_found = 0
-
-        # Group links by store for adapter reuse
-        store_adapters: Dict[str, Any] = {}
-
-        for link in links:
-            store = link.get("shops", {})
-            product = link.get("products", {})
-            store_id = store.get("id", "")
-
-            try:
-                # Get or create adapter for this store
-                if store_id not in store_adapters:
-                    platform = store.get("platform", "").lower()
-                    creds = store.get("credentials_encrypted", {})
-                    if isinstance(creds, str):
-                        import json
-                        creds = json.loads(creds)
-                    store_adapters[store_id] = get_adapter(platform, creds or {})
-
-                adapter = store_adapters[store_id]
-                external_id = link.get("external_product_id")
-
-                if external_id:
-                    # Pull remote state and check for conflicts
-                    try:
-                        remote = await adapter.pull_product(external_id)
-                        remote_dict = {
-                            "title": remote.title, "description": remote.description,
-                            "price": remote.price, "stock": remote.stock,
-                            "status": remote.status, "updated_at": link.get("last_remote_update"),
-                        }
-                        local_dict = {
-                            "title": product.get("title"), "description": product.get("description"),
-                            "sale_price": product.get("sale_price"), "stock": product.get("stock"),
-                            "status": product.get("status"), "updated_at": product.get("updated_at"),
-                        }
-
-                        conflicts = detect_conflicts(local_dict, remote_dict, link["product_id"], store_id)
-
-                        if conflicts:
-                            conflicts_found += len(conflicts)
-                            strategy = ConflictStrategy(request.conflict_strategy)
-                            resolution = resolve_conflicts(conflicts, strategy)
-
-                            if resolution["manual_review"]:
-                                # Flag for manual review
-                                supabase.table("product_store_links").update({
-                                    "sync_status": "conflict",
-                                    "metadata": {"conflicts": resolution["manual_review"]},
-                                    "updated_at": datetime.utcnow().isoformat(),
-                                }).eq("id", link["id"]).execute()
-
-                                supabase.table("job_items").insert({
-                                    "job_id": job["id"],
-                                    "product_id": link["product_id"],
-                                    "status": "warning",
-                                    "message": f"{len(resolution['manual_review'])} conflicts need review",
-                                    "processed_at": datetime.utcnow().isoformat(),
-                                }).execute()
-                                success += 1
-                                continue
-
-                            # Apply resolved actions
-                            if resolution["actions"]:
-                                await apply_sync_actions(supabase, resolution["actions"], user_id)
-                    except Exception as pull_err:
-                        logger.warning(f"Could not pull remote product {external_id}: {pull_err}")
-
-                # Push local → remote
-                pp = PlatformProduct(
-                    external_id=external_id,
-                    title=product.get("title", ""),
-                    description=product.get("description", ""),
-                    price=float(product.get("sale_price", 0)),
-                    stock=product.get("stock", 0),
-                    status=product.get("status", "draft"),
-                )
-                push_result = await adapter.push_product(pp)
-
-                # Update link
-                supabase.table("product_store_links").update({
-                    "external_product_id": push_result.get("external_id", external_id),
-                    "sync_status": "synced",
-                    "last_sync_at": datetime.utcnow().isoformat(),
-                    "last_error": None,
-                    "updated_at": datetime.utcnow().isoformat(),
-                }).eq("id", link["id"]).execute()
-
-                supabase.table("job_items").insert({
-                    "job_id": job["id"],
-                    "product_id": link["product_id"],
-                    "status": "success",
-                    "message": f"Synced with {store.get('name', 'store')}",
-                    "processed_at": datetime.utcnow().isoformat(),
-                }).execute()
-                success += 1
-
-            except Exception as e:
-                supabase.table("product_store_links").update({
-                    "sync_status": "error",
-                    "last_error": str(e)[:500],
-                    "updated_at": datetime.utcnow().isoformat(),
-                }).eq("id", link["id"]).execute()
-
-                supabase.table("job_items").insert({
-                    "job_id": job["id"],
-                    "product_id": link.get("product_id"),
-                    "status": "failed",
-                    "message": str(e)[:500],
-                    "error_code": "SYNC_FAILED",
-                    "processed_at": datetime.utcnow().isoformat(),
-                }).execute()
-                failed += 1
-
-        supabase.table("jobs").update({
-            "status": "completed",
-            "processed_items": success + failed,
-            "failed_items": failed,
-            "progress_percent": 100,
-            "completed_at": datetime.utcnow().isoformat(),
-            "updated_at": datetime.utcnow().isoformat(),
-            "metadata": {
-                "conflicts_found": conflicts_found,
-                "conflict_strategy": request.conflict_strategy,
-            },
-        }).eq("id", job["id"]).execute()
+        from app.queue.tasks import sync_platform_links
+        result = sync_platform_links.delay(
+            user_id=user_id,
+            product_ids=request.product_ids,
+            store_ids=request.store_ids,
+            conflict_strategy=request.conflict_strategy,
+        )
+        redis_queue.track_user_job(user_id, str(result.id), "sync")
 
         return {
             "success": True,
-            "job_id": job["id"],
-            "results": {"synced": success, "failed": failed, "conflicts": conflicts_found}
+            "job_id": str(result.id),
+            "status": "queued",
+            "links": links,
         }
 
     except HTTPException:
@@ -319,6 +178,7 @@ async def bulk_publish(
                     "processed_at": datetime.utcnow().isoformat(),
                 }).execute()
 
+        redis_queue.invalidate_product_stats(user_id)
         supabase.table("jobs").update({
             "status": "completed",
             "processed_items": success,
@@ -394,6 +254,7 @@ async def bulk_unpublish(
                     "processed_at": datetime.utcnow().isoformat(),
                 }).execute()
 
+        redis_queue.invalidate_product_stats(user_id)
         supabase.table("jobs").update({
             "status": "completed",
             "processed_items": success,
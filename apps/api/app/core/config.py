@@ -37,6 +37,24 @@ class Settings(BaseSettings):
     LOVABLE_API_KEY: Optional[str] = None
     AI_GATEWAY_URL: str = "https://ai.gateway.lovable.dev/v1/chat/completions"
     
+    # Imports
+    IMPORT_CHUNK_SIZE: int = 500  # rows per prefetch + bulk upsert round trip
+    
+    # Exports
+    EXPORT_BACKGROUND_ROWS: int = 50_000  # larger exports run as Celery jobs writing to storage
+    EXPORT_STORAGE_BACKEND: str = "supabase"  # supabase | local
+    EXPORT_STORAGE_BUCKET: str = "exports"
+    EXPORT_LOCAL_DIR: str = "/tmp/shopopti-exports"
+    EXPORT_URL_TTL_SECONDS: int = 3600  # lifetime of signed download URLs
+    
+    # Outbound HTTP (pooled clients per remote host)
+    HTTP_MAX_CONNECTIONS: int = 20  # per host
+    HTTP_MAX_KEEPALIVE: int = 10  # idle connections kept per host
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0  # seconds an idle connection is kept
+    HTTP_TIMEOUT: float = 30.0
+    HTTP2_ENABLED: bool = True  # negotiated per host (needs the h2 package)
+    HTTP_MAX_HOSTS: int = 256  # clients kept per process / event loop
+
     # Rate Limiting
     RATE_LIMIT_PER_MINUTE: int = 60
     
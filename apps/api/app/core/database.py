@@ -4,8 +4,10 @@ Uses Supabase PostgreSQL via asyncpg
 """
 
 from supabase import create_client, Client
-from typing import Optional
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Optional
 import asyncpg
+import json
 import logging
 
 from app.core.config import settings
@@ -19,6 +21,19 @@ supabase: Optional[Client] = None
 db_pool: Optional[asyncpg.Pool] = None
 
 
+def _encode_json(value: Any) -> str:
+    # Strings are taken as already-encoded JSON (asyncpg's default behaviour)
+    return value if isinstance(value, str) else json.dumps(value, default=str)
+
+
+async def _init_connection(conn):
+    """Decode json/jsonb columns to Python objects, as the Supabase client returns them"""
+    for typename in ("json", "jsonb"):
+        await conn.set_type_codec(
+            typename, encoder=_encode_json, decoder=json.loads, schema="pg_catalog"
+        )
+
+
 async def init_db():
     """Initialize database connections"""
     global supabase, db_pool
@@ -36,7 +51,8 @@ async def init_db():
             settings.DATABASE_URL,
             min_size=5,
             max_size=20,
-            command_timeout=60
+            command_timeout=60,
+            init=_init_connection
         )
         logger.info("PostgreSQL pool initialized")
     except Exception as e:
@@ -44,6 +60,22 @@ async def init_db():
         raise
 
 
+@asynccontextmanager
+async def task_pool(max_size: int = 2) -> AsyncIterator[asyncpg.Pool]:
+    """Short-lived pool for Celery tasks (db_pool belongs to the API process)"""
+    pool = await asyncpg.create_pool(
+        settings.DATABASE_URL,
+        min_size=1,
+        max_size=max_size,
+        command_timeout=300,
+        init=_init_connection
+    )
+    try:
+        yield pool
+    finally:
+        await pool.close()
+
+
 async def close_db():
     """Close database connections"""
     global db_pool
@@ -0,0 +1,182 @@
+"""
+Shared outbound HTTP clients
+One keep-alive httpx client per remote host (Shopify shop, WooCommerce store,
+supplier API...), reused across calls instead of a new client (and TCP + TLS
+handshake) per request. HTTP/2 is negotiated where the host supports it and the
+`h2` package is installed.
+
+Async clients belong to the event loop that created them: the API process keeps
+its clients until shutdown (close_http_clients in the lifespan), while each
+Celery run_async loop gets its own and closes them when the loop ends.
+
+Above max_hosts, the least recently used host's client is closed unless it is
+leased: callers hold a client through lease() (one call) or acquire()/release()
+(a run of calls), never a bare client() across awaits.
+"""
+
+import asyncio
+import logging
+import threading
+from collections import Counter, OrderedDict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+try:
+    import h2  # noqa: F401  (httpx's HTTP/2 support)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+def host_key(url: str) -> str:
+    """scheme://host:port of a URL: the unit of connection reuse"""
+    parsed = httpx.URL(url)
+    port = parsed.port or (443 if parsed.scheme == "https" else 80)
+    return f"{parsed.scheme}://{parsed.host}:{port}"
+
+
+class _LoopClients:
+    """Clients of one event loop, least recently used first"""
+
+    def __init__(self):
+        self.clients: "OrderedDict[str, httpx.AsyncClient]" = OrderedDict()
+        self.leases: Counter = Counter()
+
+
+class HTTPClientPool:
+    """Per-host httpx clients with connection limits and keep-alive"""
+
+    def __init__(
+        self,
+        max_connections: Optional[int] = None,
+        max_keepalive: Optional[int] = None,
+        keepalive_expiry: Optional[float] = None,
+        timeout: Optional[float] = None,
+        http2: Optional[bool] = None,
+        max_hosts: Optional[int] = None,
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections or settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=max_keepalive or settings.HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=keepalive_expiry or settings.HTTP_KEEPALIVE_EXPIRY,
+        )
+        self.timeout = timeout or settings.HTTP_TIMEOUT
+        self.http2 = (settings.HTTP2_ENABLED if http2 is None else http2) and HTTP2_AVAILABLE
+        self.max_hosts = max_hosts or settings.HTTP_MAX_HOSTS
+        self._loops: Dict[asyncio.AbstractEventLoop, _LoopClients] = {}
+        self._sync_clients: Dict[str, httpx.Client] = {}
+        self._sync_lock = threading.Lock()
+
+    def _loop_clients(self) -> _LoopClients:
+        loop = asyncio.get_running_loop()
+        if loop not in self._loops:
+            # Forget loops that ended without aclose() (their sockets went with them)
+            for ended in [l for l in self._loops if l.is_closed()]:
+                del self._loops[ended]
+            self._loops[loop] = _LoopClients()
+        return self._loops[loop]
+
+    async def client(self, url: str) -> httpx.AsyncClient:
+        """Shared async client for the host of `url` (created on first use). Not
+        leased: it can be evicted and closed by the next new host, use lease()"""
+        state, key = self._loop_clients(), host_key(url)
+        client = state.clients.get(key)
+        if client is None or client.is_closed:
+            client = state.clients[key] = httpx.AsyncClient(
+                limits=self.limits, timeout=self.timeout, http2=self.http2,
+            )
+            await self._evict(state, keep=key)
+        state.clients.move_to_end(key)
+        return client
+
+    async def acquire(self, url: str) -> httpx.AsyncClient:
+        """client() held open until release(): the host is never evicted meanwhile"""
+        client = await self.client(url)
+        self._loop_clients().leases[host_key(url)] += 1
+        return client
+
+    def release(self, url: str) -> None:
+        leases = self._loop_clients().leases
+        key = host_key(url)
+        leases[key] -= 1
+        if leases[key] <= 0:
+            del leases[key]
+
+    @asynccontextmanager
+    async def lease(self, url: str) -> AsyncIterator[httpx.AsyncClient]:
+        """acquire() for the duration of one call: `async with pool.lease(url) as client`"""
+        client = await self.acquire(url)
+        try:
+            yield client
+        finally:
+            self.release(url)
+
+    async def _evict(self, state: _LoopClients, keep: str) -> None:
+        # Too many hosts: close the least recently used ones nobody holds (never the
+        # client being handed out)
+        for key in list(state.clients):
+            if len(state.clients) <= self.max_hosts:
+                break
+            if key != keep and not state.leases[key]:
+                await state.clients.pop(key).aclose()
+
+    def sync_client(self, url: str) -> httpx.Client:
+        """Shared blocking client for the host of `url` (thread-safe, any loop)"""
+        key = host_key(url)
+        with self._sync_lock:
+            client = self._sync_clients.get(key)
+            if client is None or client.is_closed:
+                client = self._sync_clients[key] = httpx.Client(limits=self.limits, timeout=self.timeout)
+            return client
+
+    async def aclose(self) -> None:
+        """Close the current loop's clients"""
+        state = self._loops.pop(asyncio.get_running_loop(), None)
+        if state:
+            await asyncio.gather(*(c.aclose() for c in state.clients.values()), return_exceptions=True)
+
+    def close_sync(self) -> None:
+        with self._sync_lock:
+            clients, self._sync_clients = list(self._sync_clients.values()), {}
+        for client in clients:
+            client.close()
+
+
+_pool: Optional[HTTPClientPool] = None
+
+
+def get_http_pool() -> HTTPClientPool:
+    """Process-wide client pool (limits from settings)"""
+    global _pool
+    if _pool is None:
+        _pool = HTTPClientPool()
+    return _pool
+
+
+async def get_http_client(url: str) -> httpx.AsyncClient:
+    return await get_http_pool().client(url)
+
+
+def lease_http_client(url: str):
+    """Pooled client for the host of `url`, held for an `async with` block"""
+    return get_http_pool().lease(url)
+
+
+async def close_loop_http_clients():
+    """Close the current event loop's clients (end of a Celery task's loop)"""
+    if _pool is not None:
+        await _pool.aclose()
+
+
+async def close_http_clients():
+    """Close every pooled client (API shutdown)"""
+    if _pool is not None:
+        await _pool.aclose()
+        _pool.close_sync()
+        logger.info("HTTP clients closed")
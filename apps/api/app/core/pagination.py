@@ -0,0 +1,138 @@
+"""
+Keyset (cursor) pagination and count modes for list endpoints
+Cursors are opaque, URL-safe tokens encoding the sort column and the last row's
+(sort value, id). The next page resumes strictly after that pair instead of
+skipping OFFSET rows, so every page costs the same. NULL sort values follow
+PostgreSQL's default placement (first in DESC, last in ASC order).
+
+Count modes: exact (count(*)), planned (the planner's row estimate, free),
+estimated (exact when small, planned otherwise) and none.
+"""
+
+from typing import Any, Dict, List, Literal, Optional, Sequence, Tuple
+import base64
+import json
+
+from fastapi import HTTPException
+
+from app.core.repository import ident
+
+CountMode = Literal["exact", "planned", "estimated", "none"]
+
+# "estimated" counts exactly up to this many rows, then trusts the planner
+ESTIMATED_COUNT_EXACT_LIMIT = 10_000
+
+
+def encode_cursor(sort: str, values: Sequence[Any]) -> str:
+    """Opaque cursor for the row whose sort key is `values` under `sort`"""
+    raw = json.dumps({"s": sort, "v": [None if v is None else str(v) for v in values]}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str, size: int = 2) -> List[Optional[str]]:
+    """Key values of a cursor; 400 when it is malformed or was issued for another sort"""
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        values = data["v"]
+        valid = data["s"] == sort and isinstance(values, list) and len(values) == size
+    except (ValueError, TypeError, KeyError):
+        valid = False
+    if not valid:
+        raise HTTPException(status_code=400, detail="Invalid cursor for this sort order")
+    return values
+
+
+def row_cursor(sort: str, row: Dict[str, Any], column: str, id_column: str = "id") -> str:
+    return encode_cursor(sort, [row.get(column), row.get(id_column)])
+
+
+def keyset_sql(
+    column: str,
+    sql_type: str,
+    descending: bool,
+    values: Sequence[Optional[str]],
+    first_arg: int,
+    id_column: str = "id",
+    id_type: str = "uuid",
+) -> Tuple[str, List[Any]]:
+    """SQL condition selecting the rows after (value, id) in
+    ORDER BY column <dir>, id <dir>; args are numbered from $first_arg."""
+    value, last_id = values
+    col, idc = ident(column), ident(id_column)
+    op = "<" if descending else ">"
+    id_arg = f"${first_arg}::text::{id_type}"
+    if value is None:
+        # NULLs come first in DESC order: then the rest of the NULLs, then every value
+        if descending:
+            return f"({col} IS NOT NULL OR {idc} {op} {id_arg})", [last_id]
+        return f"({col} IS NULL AND {idc} {op} {id_arg})", [last_id]
+
+    value_arg = f"${first_arg + 1}::text::{sql_type}"
+    clause = f"({col}, {idc}) {op} ({value_arg}, {id_arg})"
+    if not descending:
+        clause = f"({clause} OR {col} IS NULL)"  # NULLs still to come in ASC order
+    return clause, [last_id, value]
+
+
+def keyset_postgrest(
+    column: str,
+    descending: bool,
+    values: Sequence[Optional[str]],
+    id_column: str = "id",
+) -> str:
+    """Same condition as keyset_sql, as a PostgREST `or` filter (for query.or_())"""
+    value, last_id = values
+    op = "lt" if descending else "gt"
+    if value is None:
+        if descending:
+            return f"{column}.not.is.null,{id_column}.{op}.{last_id}"
+        return f"and({column}.is.null,{id_column}.{op}.{last_id})"
+
+    quoted = '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+    conditions = f"{column}.{op}.{quoted},and({column}.eq.{quoted},{id_column}.{op}.{last_id})"
+    if not descending:
+        conditions += f",{column}.is.null"
+    return conditions
+
+
+async def planned_count(repo, from_where: str, args: Sequence[Any]) -> int:
+    """Planner's row estimate for `SELECT ... FROM <from_where>` (no scan)"""
+    plan = await repo.fetchval(f"EXPLAIN (FORMAT JSON) SELECT 1 FROM {from_where}", *args)
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+async def count_rows(repo, from_where: str, args: Sequence[Any], mode: CountMode) -> Optional[int]:
+    """Row count of `SELECT ... FROM <from_where>` under a count mode (None for "none")"""
+    if mode == "none":
+        return None
+    if mode == "exact":
+        return await repo.fetchval(f"SELECT count(*) FROM {from_where}", *args)
+
+    estimate = await planned_count(repo, from_where, args)
+    if mode == "estimated" and estimate <= ESTIMATED_COUNT_EXACT_LIMIT:
+        return await repo.fetchval(f"SELECT count(*) FROM {from_where}", *args)
+    return estimate
+
+
+def pagination_info(
+    limit: int,
+    total: Optional[int],
+    count_mode: CountMode,
+    page: Optional[int] = None,
+    next_cursor: Optional[str] = None,
+    has_more: Optional[bool] = None,
+) -> Dict[str, Any]:
+    """The `pagination` block of a list response (offset fields kept for page mode)"""
+    info: Dict[str, Any] = {
+        "limit": limit,
+        "total": total,
+        "count_mode": count_mode,
+        "total_pages": (total + limit - 1) // limit if total is not None else None,
+    }
+    if page is not None:
+        info["page"] = page
+    info["next_cursor"] = next_cursor
+    info["has_more"] = has_more if has_more is not None else next_cursor is not None
+    return info
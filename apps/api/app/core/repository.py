@@ -0,0 +1,236 @@
+"""
+Async data-access layer over the asyncpg pool
+Endpoints await these helpers instead of calling the synchronous Supabase client,
+so a slow query never blocks the event loop. Bulk helpers send one statement per
+call and type values through the table's row type (jsonb_populate_recordset), so
+callers pass the same JSON-like dicts they would send to PostgREST.
+"""
+
+from contextlib import asynccontextmanager
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Sequence, Tuple
+from uuid import UUID
+import json
+import re
+import logging
+
+from app.core import database
+
+logger = logging.getLogger(__name__)
+
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+def ident(name: str) -> str:
+    """Quote a table/column name (names are code constants, never user input)"""
+    if not _IDENTIFIER.match(name):
+        raise ValueError(f"Invalid SQL identifier: {name!r}")
+    return f'"{name}"'
+
+
+def _table(name: str) -> str:
+    return f"public.{ident(name)}"
+
+
+def _json_value(value: Any) -> Any:
+    """Render asyncpg values the way PostgREST serialises them"""
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, list):
+        return [_json_value(v) for v in value]
+    return value
+
+
+def record_to_dict(record) -> Dict[str, Any]:
+    return {key: _json_value(value) for key, value in record.items()}
+
+
+def _dumps(payload: Any) -> str:
+    return json.dumps(payload, default=str)
+
+
+def _group_by_columns(rows: Iterable[Dict[str, Any]]) -> Dict[Tuple[str, ...], List[Dict[str, Any]]]:
+    """Missing keys would be written as NULL (not DEFAULT), so each distinct key set
+    gets its own statement (normally a single group)"""
+    groups: Dict[Tuple[str, ...], List[Dict[str, Any]]] = {}
+    for row in rows:
+        groups.setdefault(tuple(row), []).append(row)
+    return groups
+
+
+class Repository:
+    """Async queries and typed bulk writes on the pool (or on one connection inside a transaction)"""
+
+    def __init__(self, executor=None):
+        self._executor = executor
+
+    @property
+    def executor(self):
+        # Resolved at call time: database.db_pool is only set once init_db() has run
+        executor = self._executor or database.db_pool
+        if executor is None:
+            raise RuntimeError("Database pool not initialized")
+        return executor
+
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator["Repository"]:
+        """Run several helpers atomically on one connection"""
+        async with self.executor.acquire() as conn:
+            async with conn.transaction():
+                yield Repository(conn)
+
+    # ── Queries ───────────────────────────────────────────────────────────────
+
+    async def fetch(self, query: str, *args) -> List[Dict[str, Any]]:
+        return [record_to_dict(r) for r in await self.executor.fetch(query, *args)]
+
+    async def fetchrow(self, query: str, *args) -> Optional[Dict[str, Any]]:
+        record = await self.executor.fetchrow(query, *args)
+        return record_to_dict(record) if record else None
+
+    async def fetchval(self, query: str, *args) -> Any:
+        return _json_value(await self.executor.fetchval(query, *args))
+
+    async def execute(self, query: str, *args) -> str:
+        return await self.executor.execute(query, *args)
+
+    async def select_by_ids(
+        self,
+        table: str,
+        ids: Sequence[Any],
+        columns: str = "*",
+        filters: Optional[Dict[str, Any]] = None,
+        id_column: str = "id",
+    ) -> List[Dict[str, Any]]:
+        """SELECT ... WHERE id = ANY($1) (+ equality filters) in one round trip"""
+        if not ids:
+            return []
+        where, args = self._where(filters or {}, start=2)
+        return await self.fetch(
+            f"SELECT {columns} FROM {_table(table)} WHERE {ident(id_column)} = ANY($1){where}",
+            list(ids), *args,
+        )
+
+    # ── Bulk writes ───────────────────────────────────────────────────────────
+
+    async def bulk_insert(
+        self,
+        table: str,
+        rows: Sequence[Dict[str, Any]],
+        returning: Optional[str] = "*",
+    ) -> List[Dict[str, Any]]:
+        """INSERT many rows in one statement per key set"""
+        inserted: List[Dict[str, Any]] = []
+        for columns, group in _group_by_columns(rows).items():
+            cols = ", ".join(ident(c) for c in columns)
+            query = (
+                f"INSERT INTO {_table(table)} ({cols}) "
+                f"SELECT {cols} FROM jsonb_populate_recordset(NULL::{_table(table)}, $1::jsonb)"
+            )
+            inserted += await self._write(query, returning, _dumps(group))
+        return inserted
+
+    async def bulk_upsert(
+        self,
+        table: str,
+        rows: Sequence[Dict[str, Any]],
+        on_conflict: Sequence[str],
+        update_columns: Optional[Sequence[str]] = None,
+        returning: Optional[str] = "*",
+    ) -> List[Dict[str, Any]]:
+        """INSERT ... ON CONFLICT DO UPDATE in one statement per key set.
+        update_columns defaults to every written column outside the conflict target."""
+        target = ", ".join(ident(c) for c in on_conflict)
+        upserted: List[Dict[str, Any]] = []
+        for columns, group in _group_by_columns(rows).items():
+            cols = ", ".join(ident(c) for c in columns)
+            updates = [c for c in (update_columns or columns) if c not in on_conflict and c in columns]
+            action = (
+                "DO UPDATE SET " + ", ".join(f"{ident(c)} = EXCLUDED.{ident(c)}" for c in updates)
+                if updates else "DO NOTHING"
+            )
+            query = (
+                f"INSERT INTO {_table(table)} ({cols}) "
+                f"SELECT {cols} FROM jsonb_populate_recordset(NULL::{_table(table)}, $1::jsonb) "
+                f"ON CONFLICT ({target}) {action}"
+            )
+            upserted += await self._write(query, returning, _dumps(group))
+        return upserted
+
+    async def bulk_update_by_ids(
+        self,
+        table: str,
+        ids: Sequence[Any],
+        values: Dict[str, Any],
+        filters: Optional[Dict[str, Any]] = None,
+        id_column: str = "id",
+    ) -> int:
+        """Apply the same values to every id in one UPDATE; returns the affected row count"""
+        if not ids or not values:
+            return 0
+        sets = ", ".join(f"{ident(c)} = r.{ident(c)}" for c in values)
+        where, args = self._where(filters or {}, start=3, alias="t")
+        status = await self.execute(
+            f"UPDATE {_table(table)} AS t SET {sets} "
+            f"FROM jsonb_populate_record(NULL::{_table(table)}, $1::jsonb) AS r "
+            f"WHERE t.{ident(id_column)} = ANY($2){where}",
+            _dumps(values), list(ids), *args,
+        )
+        return _affected(status)
+
+    async def bulk_update_rows(
+        self,
+        table: str,
+        rows: Sequence[Dict[str, Any]],
+        filters: Optional[Dict[str, Any]] = None,
+        id_column: str = "id",
+    ) -> int:
+        """Per-row values (each row carries its id) in one UPDATE per key set;
+        returns the affected row count"""
+        affected = 0
+        for columns, group in _group_by_columns(rows).items():
+            sets = ", ".join(f"{ident(c)} = r.{ident(c)}" for c in columns if c != id_column)
+            if not sets:
+                continue
+            where, args = self._where(filters or {}, start=2, alias="t")
+            status = await self.execute(
+                f"UPDATE {_table(table)} AS t SET {sets} "
+                f"FROM jsonb_populate_recordset(NULL::{_table(table)}, $1::jsonb) AS r "
+                f"WHERE t.{ident(id_column)} = r.{ident(id_column)}{where}",
+                _dumps(group), *args,
+            )
+            affected += _affected(status)
+        return affected
+
+    async def _write(self, query: str, returning: Optional[str], *args) -> List[Dict[str, Any]]:
+        if returning:
+            return await self.fetch(f"{query} RETURNING {returning}", *args)
+        await self.execute(query, *args)
+        return []
+
+    @staticmethod
+    def _where(filters: Dict[str, Any], start: int, alias: Optional[str] = None) -> Tuple[str, List[Any]]:
+        prefix = f"{alias}." if alias else ""
+        clauses, args = [], []
+        for offset, (column, value) in enumerate(filters.items()):
+            clauses.append(f" AND {prefix}{ident(column)} = ${start + offset}")
+            args.append(value)
+        return "".join(clauses), args
+
+
+def _affected(status: str) -> int:
+    """Row count from a command tag such as 'UPDATE 42'"""
+    try:
+        return int(status.rsplit(" ", 1)[-1])
+    except (AttributeError, ValueError):
+        return 0
+
+
+def get_repository() -> Repository:
+    """Get a repository bound to the shared pool"""
+    return Repository()
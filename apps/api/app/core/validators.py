@@ -14,6 +14,7 @@ logger = logging.getLogger(__name__)
 
 # Limits
 MAX_CSV_SIZE_MB = 50
+MAX_REMOTE_FEED_SIZE_MB = 2048  # URL feeds are streamed, so only uploads are held in memory
 MAX_CSV_ROWS = 50_000
 REQUIRED_COLUMNS = {"title"}  # Minimum: at least a product title
 SUPPORTED_CSV_TYPES = {"text/csv", "application/vnd.ms-excel"}
@@ -90,9 +91,34 @@ async def validate_import_file(file: UploadFile) -> Dict:
         except Exception as e:
             raise HTTPException(status_code=400, detail=f"Invalid CSV format: {str(e)[:200]}")
 
+    # 4. For Excel: validate the header row only (sheets are streamed at import time,
+    #    so large workbooks are not subject to MAX_CSV_ROWS)
+    else:
+        columns = _read_excel_header(content)
+        normalized = {c.lower() for c in columns}
+        if not columns:
+            raise HTTPException(status_code=400, detail="Excel file has no columns")
+        if not (REQUIRED_COLUMNS <= normalized or "name" in normalized):
+            raise HTTPException(
+                status_code=400,
+                detail=f"Missing required columns: {', '.join(REQUIRED_COLUMNS)}. Found: {', '.join(columns[:10])}"
+            )
+        metadata["columns"] = columns[:20]
+
     return metadata
 
 
+def _read_excel_header(content: bytes) -> List[str]:
+    """Return the header row of the sheet the import reads (read-only, no full load)."""
+    from app.services.import_service import ImportService
+
+    try:
+        headers = ImportService().excel_headers(content)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Invalid Excel file: {str(e)[:200]}")
+    return [h for h in headers if h]
+
+
 async def validate_import_url(url: str, format: str = "csv") -> Dict:
     """
     Validate a URL is reachable and returns expected content type.
@@ -115,10 +141,10 @@ async def validate_import_url(url: str, format: str = "csv") -> Dict:
             # Size check if header available
             if content_length:
                 size_mb = int(content_length) / (1024 * 1024)
-                if size_mb > MAX_CSV_SIZE_MB:
+                if size_mb > MAX_REMOTE_FEED_SIZE_MB:
                     raise HTTPException(
                         status_code=400,
-                        detail=f"Remote file too large: {size_mb:.1f}MB (max {MAX_CSV_SIZE_MB}MB)"
+                        detail=f"Remote file too large: {size_mb:.1f}MB (max {MAX_REMOTE_FEED_SIZE_MB}MB)"
                     )
 
             return {
@@ -6,7 +6,7 @@ Sprint 2: Added connection health check, retry logic, and connection pooling.
 import json
 import redis
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from enum import Enum
 import structlog
 
@@ -37,6 +37,7 @@ class RedisQueue:
         self.redis_url = redis_url or settings.REDIS_URL
         self._pool: Optional[redis.ConnectionPool] = None
         self._client: Optional[redis.Redis] = None
+        self._scripts: Dict[str, Any] = {}
 
     @property
     def client(self) -> redis.Redis:
@@ -77,6 +78,7 @@ class RedisQueue:
             self._pool.disconnect()
             self._pool = None
             self._client = None
+            self._scripts = {}
 
     # ── Job progress ──────────────────────────────────────────────────────────
 
@@ -126,6 +128,64 @@ class RedisQueue:
             return True
         return int(current) < max_requests
 
+    # Leaky bucket shared by every worker: `level` drains at `rate` units/s. A
+    # reservation adds its cost and returns how long the caller waits before
+    # sending, so concurrent callers are spaced out instead of overflowing.
+    # Times come from the Redis clock (workers' clocks may drift).
+    _BUCKET_RESERVE_LUA = """
+    local t = redis.call('TIME')
+    local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+    local s = redis.call('HMGET', KEYS[1], 'level', 'ts', 'capacity', 'rate')
+    local capacity = tonumber(s[3]) or tonumber(ARGV[2])
+    local rate = tonumber(s[4]) or tonumber(ARGV[3])
+    local level = math.max(0, (tonumber(s[1]) or 0) - (now - (tonumber(s[2]) or now)) * rate)
+    level = level + tonumber(ARGV[1])
+    redis.call('HSET', KEYS[1], 'level', level, 'ts', now, 'capacity', capacity, 'rate', rate)
+    redis.call('EXPIRE', KEYS[1], tonumber(ARGV[5]))
+    return tostring(math.max(0, (level - capacity + tonumber(ARGV[4])) / rate))
+    """
+
+    # Reconcile with what the server reports: refund unused cost, never drop below
+    # the observed level (calls made outside this bucket; -1 = full), adopt its
+    # capacity/rate (0 = keep the known ones, else the defaults)
+    _BUCKET_OBSERVE_LUA = """
+    local t = redis.call('TIME')
+    local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+    local s = redis.call('HMGET', KEYS[1], 'level', 'ts', 'capacity', 'rate')
+    local capacity = tonumber(ARGV[2]) > 0 and tonumber(ARGV[2]) or tonumber(s[3]) or tonumber(ARGV[6])
+    local rate = tonumber(ARGV[3]) > 0 and tonumber(ARGV[3]) or tonumber(s[4]) or tonumber(ARGV[7])
+    local observed = tonumber(ARGV[1]) < 0 and capacity or tonumber(ARGV[1])
+    local level = math.max(0, (tonumber(s[1]) or 0) - (now - (tonumber(s[2]) or now)) * rate)
+    level = math.max(level - tonumber(ARGV[4]), observed, 0)
+    redis.call('HSET', KEYS[1], 'level', level, 'ts', now, 'capacity', capacity, 'rate', rate)
+    redis.call('EXPIRE', KEYS[1], tonumber(ARGV[5]))
+    return tostring(level)
+    """
+
+    def _script(self, lua: str):
+        """Registered script (sent once, then run by EVALSHA)"""
+        if lua not in self._scripts:
+            self._scripts[lua] = self.client.register_script(lua)
+        return self._scripts[lua]
+
+    def reserve_bucket(self, key: str, cost: float, capacity: float, rate: float,
+                       headroom: float = 0, ttl_seconds: int = 3600) -> float:
+        """Take `cost` from a leaky bucket; returns the seconds to wait before using it.
+        capacity/rate are defaults for a new bucket (observe_bucket learns the real ones)."""
+        wait = self._script(self._BUCKET_RESERVE_LUA)(
+            keys=[key], args=[cost, capacity, rate, headroom, ttl_seconds],
+        )
+        return float(wait)
+
+    def observe_bucket(self, key: str, level: float, capacity: float = 0, rate: float = 0,
+                       refund: float = 0, defaults: Tuple[float, float] = (0, 1),
+                       ttl_seconds: int = 3600) -> float:
+        """Sync a bucket with the server-reported level (-1: full). capacity/rate of 0
+        keep the known values, falling back to `defaults` for a new bucket."""
+        return float(self._script(self._BUCKET_OBSERVE_LUA)(
+            keys=[key], args=[level, capacity, rate, refund, ttl_seconds, *defaults],
+        ))
+
     def get_user_rate_limit_status(self, user_id: str) -> Dict[str, Any]:
         """Get user's current rate limit status"""
         key = f"rate_limit:user:{user_id}"
@@ -202,6 +262,121 @@ class RedisQueue:
     def get_supplier_sync_status(self, supplier_id: str) -> Optional[Dict[str, str]]:
         return self.client.hgetall(f"supplier_sync:{supplier_id}")
 
+    # ── Import feed state ─────────────────────────────────────────────────────
+
+    FEED_STATE_TTL = 30 * 86400
+
+    def get_feed_validators(self, user_id: str, feed_key: str) -> Dict[str, str]:
+        """HTTP validators (etag / last_modified) of the last complete import of a feed"""
+        return self.client.hgetall(f"import_feed:{user_id}:{feed_key}")
+
+    def set_feed_validators(self, user_id: str, feed_key: str,
+                            etag: Optional[str] = None, last_modified: Optional[str] = None):
+        key = f"import_feed:{user_id}:{feed_key}"
+        pipe = self.client.pipeline()
+        pipe.delete(key)
+        validators = {k: v for k, v in (("etag", etag), ("last_modified", last_modified)) if v}
+        if validators:
+            pipe.hset(key, mapping=validators)
+            pipe.expire(key, self.FEED_STATE_TTL)
+        pipe.execute()
+
+    def get_import_fingerprints(self, user_id: str, feed_key: str, skus: List[str]) -> Dict[str, str]:
+        """Row fingerprints stored by previous imports of a feed, one HMGET per call"""
+        if not skus:
+            return {}
+        values = self.client.hmget(f"import_fp:{user_id}:{feed_key}", skus)
+        return {sku: fp for sku, fp in zip(skus, values) if fp is not None}
+
+    def set_import_fingerprints(self, user_id: str, feed_key: str, fingerprints: Dict[str, str]):
+        if not fingerprints:
+            return
+        key = f"import_fp:{user_id}:{feed_key}"
+        pipe = self.client.pipeline()
+        pipe.hset(key, mapping=fingerprints)
+        pipe.expire(key, self.FEED_STATE_TTL)
+        pipe.execute()
+
+    def delete_import_fingerprints(self, user_id: str, feed_key: str, skus: List[str]):
+        if skus:
+            self.client.hdel(f"import_fp:{user_id}:{feed_key}", *skus)
+
+    def iter_import_fingerprint_skus(self, user_id: str, feed_key: str):
+        """Iterate the SKUs known for a feed without loading the whole hash at once"""
+        for sku, _ in self.client.hscan_iter(f"import_fp:{user_id}:{feed_key}", count=1000):
+            yield sku
+
+    # ── Import chunk staging (fan-out imports) ────────────────────────────────
+
+    def stash_import_chunk(self, job_id: str, chunk_index: int, payload: Dict[str, Any],
+                           ttl_seconds: int = 86400):
+        """Keep a parsed chunk until it is imported, so failed chunks can be retried alone"""
+        self.client.setex(f"import_chunk:{job_id}:{chunk_index}", ttl_seconds, json.dumps(payload, default=str))
+
+    def get_import_chunk(self, job_id: str, chunk_index: int) -> Optional[Dict[str, Any]]:
+        data = self.client.get(f"import_chunk:{job_id}:{chunk_index}")
+        return json.loads(data) if data else None
+
+    def delete_import_chunk(self, job_id: str, chunk_index: int):
+        self.client.delete(f"import_chunk:{job_id}:{chunk_index}")
+
+    def incr_import_progress(self, job_id: str, rows: int) -> int:
+        """Rows processed so far across all chunk tasks of a job (atomic)"""
+        key = f"import_progress:{job_id}"
+        pipe = self.client.pipeline()
+        pipe.incrby(key, rows)
+        pipe.expire(key, 86400)
+        return pipe.execute()[0]
+
+    # ── Shopify id cache ──────────────────────────────────────────────────────
+
+    SHOPIFY_IDS_TTL = 7 * 86400
+
+    def get_shopify_ids(self, shop: str, external_ids: List[str]) -> Dict[str, str]:
+        """Cached variant / inventory item ids of a shop's products, one HMGET per call"""
+        if not external_ids:
+            return {}
+        values = self.client.hmget(f"shopify_ids:{shop}", external_ids)
+        return {eid: v for eid, v in zip(external_ids, values) if v is not None}
+
+    def set_shopify_ids(self, shop: str, ids: Dict[str, str]):
+        if not ids:
+            return
+        key = f"shopify_ids:{shop}"
+        pipe = self.client.pipeline()
+        pipe.hset(key, mapping=ids)
+        pipe.expire(key, self.SHOPIFY_IDS_TTL)
+        pipe.execute()
+
+    def delete_shopify_ids(self, shop: str, external_ids: List[str]):
+        if external_ids:
+            self.client.hdel(f"shopify_ids:{shop}", *external_ids)
+
+    # ── Product stats cache ───────────────────────────────────────────────────
+
+    PRODUCT_STATS_TTL = 60
+
+    def get_product_stats(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """Cached /products/stats payload; None on a miss or when Redis is unreachable"""
+        try:
+            return self.cache_get(f"product_stats:{user_id}")
+        except redis.RedisError:
+            logger.warning("redis.product_stats.get_failed", user_id=user_id)
+            return None
+
+    def set_product_stats(self, user_id: str, stats: Dict[str, Any]):
+        try:
+            self.cache_set(f"product_stats:{user_id}", stats, self.PRODUCT_STATS_TTL)
+        except redis.RedisError:
+            logger.warning("redis.product_stats.set_failed", user_id=user_id)
+
+    def invalidate_product_stats(self, user_id: str):
+        """Called after product writes; never fails the write itself (the TTL bounds staleness)"""
+        try:
+            self.cache_delete(f"product_stats:{user_id}")
+        except redis.RedisError:
+            logger.warning("redis.product_stats.invalidate_failed", user_id=user_id)
+
     # ── Distributed locking ───────────────────────────────────────────────────
 
     def acquire_lock(self, lock_name: str, ttl_seconds: int = 300) -> bool:
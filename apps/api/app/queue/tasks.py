@@ -9,10 +9,12 @@ added structured logging, idempotent job upserts, and progress callbacks.
 IMPORTANT: All tasks write to the `jobs` table (unified system).
 """
 
-from celery import shared_task
+from celery import shared_task, chord
 from typing import Optional, List, Dict, Any
 from datetime import datetime, timedelta
+import base64
 import logging
+import uuid
 import asyncio
 import sys
 import structlog
@@ -24,12 +26,22 @@ logger = structlog.get_logger(__name__)
 
 # ── Async helper (Sprint 2 fix) ──────────────────────────────────────────────
 
+async def _closing_http_clients(coro):
+    # Pooled HTTP clients are bound to this loop: close them before it ends
+    from app.core.http_client import close_loop_http_clients
+    try:
+        return await coro
+    finally:
+        await close_loop_http_clients()
+
+
 def run_async(coro):
     """
     Safely run an async coroutine from synchronous Celery tasks.
     Uses asyncio.Runner on Python 3.11+ (proper cleanup),
     falls back to new_event_loop on older versions.
     """
+    coro = _closing_http_clients(coro)
     if sys.version_info >= (3, 11):
         with asyncio.Runner() as runner:
             return runner.run(coro)
@@ -41,6 +53,23 @@ def run_async(coro):
             loop.close()
 
 
+async def _run_supplier_sync(service, user_id: str, products: Optional[Dict[str, Any]] = None,
+                             stock: bool = False) -> Dict[str, Any]:
+    """Product and/or stock sync of a supplier service on a task pool, its host's
+    pooled client pinned for the run"""
+    from app.core.database import task_pool
+    from app.core.repository import Repository
+
+    result = {}
+    async with task_pool() as pool, service:
+        repo = Repository(pool)
+        if products is not None:
+            result["products"] = await service.sync_products(repo, user_id=user_id, **products)
+        if stock:
+            result["stock"] = await service.sync_stock(repo, user_id=user_id)
+    return result
+
+
 # ── Job tracking helpers (unified `jobs` table) ──────────────────────────────
 
 def _upsert_job(supabase, job_id: str, user_id: str, job_type: str, job_subtype: str = None, **extra):
@@ -96,6 +125,21 @@ def _fail_job(supabase, job_id: str, error_message: str):
         logger.warning("job.update_failed", job_id=job_id)
 
 
+# PostgREST returns at most this many rows per request (db-max-rows)
+JOB_ITEMS_PAGE_SIZE = 1000
+
+
+def _job_items(supabase, job_id: str, columns: str, page_size: int = JOB_ITEMS_PAGE_SIZE) -> List[Dict[str, Any]]:
+    """Every job_items row of a job, read page_size rows at a time (in id order)."""
+    items: List[Dict[str, Any]] = []
+    while True:
+        page = supabase.table("job_items").select(columns).eq("job_id", job_id) \
+            .order("id").range(len(items), len(items) + page_size - 1).execute().data or []
+        items.extend(page)
+        if len(page) < page_size:
+            return items
+
+
 def _get_supabase_safe():
     """Import and return Supabase client, with error handling."""
     from app.core.database import get_supabase
@@ -135,11 +179,10 @@ def sync_supplier_products(
                      })
 
         service = get_supplier_service(supplier_id)
-        result = service.sync_products(
-            user_id=user_id,
-            limit=limit,
-            category_filter=category_filter
-        )
+        result = run_async(_run_supplier_sync(service, user_id, products={
+            "limit": limit,
+            "category_filter": category_filter
+        }))["products"]
 
         _complete_job(supabase, job_id,
                       output_data=result,
@@ -170,7 +213,7 @@ def sync_supplier_stock(self, user_id: str, supplier_id: str):
 
     try:
         service = get_supplier_service(supplier_id)
-        result = service.sync_stock(user_id=user_id)
+        result = run_async(_run_supplier_sync(service, user_id, stock=True))["stock"]
         log.info("task.completed")
         return result
     except Exception as exc:
@@ -195,10 +238,7 @@ def full_catalog_sync(self, user_id: str, supplier_id: str, **options):
 
     try:
         service = get_supplier_service(supplier_id)
-        products_result = service.sync_products(user_id=user_id, **options)
-        stock_result = service.sync_stock(user_id=user_id)
-
-        result = {"products": products_result, "stock": stock_result}
+        result = run_async(_run_supplier_sync(service, user_id, products=options, stock=True))
         log.info("task.completed")
         return result
     except Exception as exc:
@@ -357,9 +397,12 @@ def import_csv_products(
     filename: Optional[str] = None,
     mapping_config: Dict[str, str] = None,
     update_existing: bool = True,
-    is_excel: bool = False
+    is_excel: bool = False,
+    chunk_size: Optional[int] = None,
+    incremental: bool = False,
+    removed_action: str = "out_of_stock"
 ):
-    """Import products from CSV file or URL"""
+    """Import products from CSV/Excel file or URL (Excel content is base64-encoded)"""
     from app.services.import_service import ImportService
 
     job_id = self.request.id
@@ -372,25 +415,30 @@ def import_csv_products(
         _upsert_job(supabase, job_id, user_id, "import",
                      job_subtype="excel" if is_excel else "csv",
                      name=f"Import {filename or feed_url or 'CSV'}",
-                     input_data={"feed_url": feed_url, "filename": filename})
+                     input_data={"feed_url": feed_url, "filename": filename,
+                                 "mapping_config": mapping_config or {}, "update_existing": update_existing,
+                                 "chunk_size": chunk_size, "incremental": incremental,
+                                 "removed_action": removed_action})
 
-        importer = ImportService()
+        importer = ImportService(chunk_size=chunk_size)
 
         if feed_url:
             result = importer.import_from_url(
                 user_id=user_id, url=feed_url, format="csv",
-                mapping=mapping_config or {}, update_existing=update_existing
+                mapping=mapping_config or {}, update_existing=update_existing,
+                incremental=incremental, removed_action=removed_action
             )
         else:
             result = importer.import_from_content(
-                user_id=user_id, content=file_content,
+                user_id=user_id,
+                content=base64.b64decode(file_content) if is_excel else file_content,
                 format="excel" if is_excel else "csv",
-                mapping=mapping_config or {}
+                mapping=mapping_config or {}, update_existing=update_existing
             )
 
         _complete_job(supabase, job_id,
                       output_data=result,
-                      processed=result.get("imported", 0),
+                      processed=result.get("imported", 0) + result.get("updated", 0),
                       failed=result.get("failed", 0),
                       total=result.get("total", 0))
 
@@ -415,7 +463,10 @@ def import_xml_feed(
     file_content: Optional[str] = None,
     filename: Optional[str] = None,
     mapping_config: Dict[str, str] = None,
-    update_existing: bool = True
+    update_existing: bool = True,
+    chunk_size: Optional[int] = None,
+    incremental: bool = False,
+    removed_action: str = "out_of_stock"
 ):
     """Import products from XML feed"""
     from app.services.import_service import ImportService
@@ -429,24 +480,28 @@ def import_xml_feed(
 
         _upsert_job(supabase, job_id, user_id, "import", job_subtype="xml",
                      name=f"Import {filename or feed_url or 'XML'}",
-                     input_data={"feed_url": feed_url, "filename": filename})
+                     input_data={"feed_url": feed_url, "filename": filename,
+                                 "mapping_config": mapping_config or {}, "update_existing": update_existing,
+                                 "chunk_size": chunk_size, "incremental": incremental,
+                                 "removed_action": removed_action})
 
-        importer = ImportService()
+        importer = ImportService(chunk_size=chunk_size)
 
         if feed_url:
             result = importer.import_from_url(
                 user_id=user_id, url=feed_url, format="xml",
-                mapping=mapping_config or {}, update_existing=update_existing
+                mapping=mapping_config or {}, update_existing=update_existing,
+                incremental=incremental, removed_action=removed_action
             )
         else:
             result = importer.import_from_content(
                 user_id=user_id, content=file_content, format="xml",
-                mapping=mapping_config or {}
+                mapping=mapping_config or {}, update_existing=update_existing
             )
 
         _complete_job(supabase, job_id,
                       output_data=result,
-                      processed=result.get("imported", 0),
+                      processed=result.get("imported", 0) + result.get("updated", 0),
                       failed=result.get("failed", 0),
                       total=result.get("total", 0))
 
@@ -463,6 +518,235 @@ def import_xml_feed(
         self.retry_with_backoff(exc)
 
 
+# ── Fan-out imports (coordinator → chord of chunk tasks → reducer) ──────────
+
+def _chunk_item_id(job_id: str, chunk_index: int) -> str:
+    """Deterministic job_items id of a chunk, so re-runs upsert instead of duplicating"""
+    return str(uuid.uuid5(uuid.UUID(job_id), f"import-chunk:{chunk_index}"))
+
+
+def _chunk_item(job_id: str, user_id: str, chunk_index: int, start: int, rows: int, **extra) -> Dict[str, Any]:
+    item = {
+        "id": _chunk_item_id(job_id, chunk_index),
+        "job_id": job_id,
+        "user_id": user_id,
+        "line_number": start,
+        "raw_data": {"chunk_index": chunk_index, "start": start, "rows": rows},
+    }
+    item.update(extra)
+    return item
+
+
+@shared_task(bind=True, base=ResilientTask, max_retries=2)
+def import_feed_parallel(
+    self,
+    user_id: str,
+    feed_url: Optional[str] = None,
+    file_content: Optional[str] = None,
+    filename: Optional[str] = None,
+    format: str = "csv",
+    mapping_config: Dict[str, str] = None,
+    update_existing: bool = True,
+    chunk_size: Optional[int] = None
+):
+    """Coordinator: parse the feed once, stage its chunks in Redis and fan them out
+    to `import_chunk` tasks (chord) reduced by `import_finalize`"""
+    from app.services.import_service import ImportService
+    from app.queue.redis_queue import redis_queue
+
+    job_id = self.request.id
+    log = logger.bind(job_id=job_id, task="import_feed_parallel")
+    log.info("task.start", filename=filename or feed_url)
+
+    try:
+        supabase = _get_supabase_safe()
+
+        _upsert_job(supabase, job_id, user_id, "import", job_subtype=format,
+                     name=f"Import {filename or feed_url or format.upper()}",
+                     input_data={"feed_url": feed_url, "filename": filename, "parallel": True,
+                                 "mapping_config": mapping_config or {}, "update_existing": update_existing,
+                                 "chunk_size": chunk_size})
+
+        importer = ImportService(chunk_size=chunk_size)
+        if feed_url:
+            products = importer.iter_products_from_url(feed_url, format, mapping_config or {})
+        else:
+            content = base64.b64decode(file_content) if format == "excel" else file_content
+            products = importer.parse(content, format, mapping_config or {})
+
+        # Chunks are staged as they are parsed: the coordinator never holds the whole feed
+        items, buffer, total = [], [], 0
+        for product in products:
+            buffer.append(product)
+            if len(buffer) == importer.chunk_size:
+                redis_queue.stash_import_chunk(job_id, len(items), {"start": total, "rows": buffer})
+                items.append(_chunk_item(job_id, user_id, len(items), total, len(buffer), status="pending"))
+                total += len(buffer)
+                buffer = []
+        if buffer:
+            redis_queue.stash_import_chunk(job_id, len(items), {"start": total, "rows": buffer})
+            items.append(_chunk_item(job_id, user_id, len(items), total, len(buffer), status="pending"))
+            total += len(buffer)
+
+        if not items:
+            _complete_job(supabase, job_id, output_data={"mode": "parallel", "chunks": 0, "total": 0})
+            return {"job_id": job_id, "chunks": 0, "total": 0}
+
+        # One batched insert for all chunk items, then the total for progress tracking
+        supabase.table("job_items").upsert(items, on_conflict="id").execute()
+        supabase.table("jobs").update({
+            "total_items": total,
+            "metadata": {"chunks": len(items), "chunk_size": importer.chunk_size},
+        }).eq("id", job_id).execute()
+
+        chord(
+            import_chunk.si(job_id=job_id, user_id=user_id, chunk_index=n,
+                            total=total, update_existing=update_existing)
+            for n in range(len(items))
+        )(import_finalize.si(job_id=job_id, user_id=user_id))
+
+        log.info("task.fanned_out", chunks=len(items), total=total)
+        return {"job_id": job_id, "chunks": len(items), "total": total}
+
+    except Exception as exc:
+        log.error("task.failed", error=str(exc))
+        try:
+            supabase = _get_supabase_safe()
+            _fail_job(supabase, job_id, str(exc))
+        except Exception:
+            pass
+        self.retry_with_backoff(exc)
+
+
+@shared_task(bind=True, base=ResilientTask, max_retries=3)
+def import_chunk(
+    self,
+    job_id: str,
+    user_id: str,
+    chunk_index: int,
+    total: int = 0,
+    update_existing: bool = True
+):
+    """Import one staged chunk of a fan-out import and record it in `job_items`.
+
+    Never raises once retries are exhausted: a failed chunk is marked `failed`
+    (its payload stays staged for a manual retry) so the chord reducer still runs.
+    """
+    from app.services.import_service import ImportService
+    from app.queue.redis_queue import redis_queue
+
+    log = logger.bind(job_id=job_id, task="import_chunk", chunk=chunk_index)
+    supabase = _get_supabase_safe()
+    item_id = _chunk_item_id(job_id, chunk_index)
+
+    try:
+        payload = redis_queue.get_import_chunk(job_id, chunk_index)
+        if payload is None:
+            raise ValueError("Chunk payload expired or missing; re-run the import")
+
+        rows = payload["rows"]
+        supabase.table("job_items").update({
+            "status": "processing",
+            "retry_count": self.request.retries or 0,
+        }).eq("id", item_id).execute()
+
+        result = ImportService(chunk_size=max(1, len(rows))).import_products(
+            user_id, rows, update_existing, start_index=payload["start"]
+        )
+        if rows and result["metrics"]["connection_errors"] == len(rows):
+            # Nothing got in because the database was unreachable: retry the chunk.
+            # Rows rejected for their data are recorded as row failures instead.
+            raise ConnectionError(f"All {len(rows)} rows failed: {result['errors'][0]['error']}")
+
+    except Exception as exc:
+        retries = self.request.retries or 0
+        if classify_error(exc) != "permanent" and retries < self.max_retries:
+            self.retry_with_backoff(exc)
+
+        log.error("chunk.failed", error=str(exc))
+        supabase.table("job_items").update({
+            "status": "failed",
+            "error_code": "IMPORT_CHUNK_FAILED",
+            "error_message": str(exc)[:2000],
+            "retry_count": retries,
+            "processed_at": datetime.utcnow().isoformat(),
+        }).eq("id", item_id).execute()
+        return {"chunk": chunk_index, "status": "failed", "error": str(exc)[:500]}
+
+    summary = {k: result[k] for k in ("total", "imported", "updated", "skipped", "failed")}
+    supabase.table("job_items").update({
+        "status": "success",
+        "message": f"{summary['imported']} imported, {summary['updated']} updated, {summary['failed']} failed",
+        "after_state": {**summary, "errors": result["errors"][:20], "metrics": result["metrics"]},
+        "error_message": None,
+        "processed_at": datetime.utcnow().isoformat(),
+    }).eq("id", item_id).execute()
+    redis_queue.delete_import_chunk(job_id, chunk_index)
+
+    processed = redis_queue.incr_import_progress(job_id, len(rows))
+    _update_progress(supabase, job_id, min(processed, total or processed), total or processed,
+                     message=f"Chunk {chunk_index} imported")
+
+    log.info("chunk.completed", imported=summary["imported"], updated=summary["updated"])
+    return {"chunk": chunk_index, "status": "success", **summary}
+
+
+@shared_task(bind=True, base=ResilientTask, max_retries=2)
+def import_finalize(self, job_id: str, user_id: str):
+    """Reducer: aggregate chunk results from `job_items` into the `jobs` row.
+
+    Reads job_items rather than the chord results so that it can be re-run
+    after a single chunk has been retried.
+    """
+    log = logger.bind(job_id=job_id, task="import_finalize")
+
+    try:
+        supabase = _get_supabase_safe()
+        items = _job_items(supabase, job_id, "status, raw_data, after_state, error_message")
+
+        totals = {"total": 0, "imported": 0, "updated": 0, "skipped": 0, "failed": 0}
+        errors, failed_chunks = [], []
+        for item in sorted(items, key=lambda i: (i.get("raw_data") or {}).get("chunk_index", 0)):
+            chunk = item.get("raw_data") or {}
+            if item["status"] == "success":
+                state = item.get("after_state") or {}
+                for key in totals:
+                    totals[key] += state.get(key, 0)
+                errors.extend(state.get("errors", []))
+            else:
+                totals["total"] += chunk.get("rows", 0)
+                totals["failed"] += chunk.get("rows", 0)
+                failed_chunks.append({
+                    "chunk_index": chunk.get("chunk_index"),
+                    "rows": chunk.get("rows", 0),
+                    "error": item.get("error_message"),
+                })
+
+        output = {
+            **totals,
+            "errors": errors[:100],
+            "mode": "parallel",
+            "chunks": len(items),
+            "failed_chunks": failed_chunks,
+        }
+        if items and len(failed_chunks) == len(items):
+            supabase.table("jobs").update({"output_data": output}).eq("id", job_id).execute()
+            _fail_job(supabase, job_id, f"All {len(items)} chunks failed")
+        else:
+            _complete_job(supabase, job_id,
+                          output_data=output,
+                          processed=totals["imported"] + totals["updated"],
+                          failed=totals["failed"],
+                          total=totals["total"])
+
+        log.info("task.completed", chunks=len(items), failed_chunks=len(failed_chunks))
+        return output
+
+    except Exception as exc:
+        log.error("task.failed", error=str(exc))
+        self.retry_with_backoff(exc)
+
+
 # ==========================================
 # ORDER FULFILLMENT TASKS
 # ==========================================
@@ -655,6 +939,311 @@ def bulk_ai_enrichment(
         self.retry_with_backoff(exc)
 
 
+# ==========================================
+# BULK PRODUCT TASKS
+# ==========================================
+
+# Ids per in_() filter: keeps PostgREST query strings well under proxy URL limits
+BULK_UPDATE_CHUNK_SIZE = 250
+
+
+def _bulk_item_id(job_id: str, product_id: str) -> str:
+    """Deterministic job_items id of a product, so retries never duplicate items"""
+    return str(uuid.uuid5(uuid.UUID(job_id), f"bulk-update:{product_id}"))
+
+
+@shared_task(bind=True, base=ResilientTask, max_retries=3)
+def bulk_update_products(
+    self,
+    user_id: str,
+    product_ids: List[str],
+    updates: Dict[str, Any],
+    chunk_size: int = BULK_UPDATE_CHUNK_SIZE
+):
+    """Apply the same updates to many products, set-based per chunk.
+
+    Each chunk is one snapshot select, one update and one batched job_items write,
+    followed by a progress update (jobs row + Redis pub/sub). Products already
+    recorded by a previous attempt are skipped, so retries keep the original
+    before_state.
+    """
+    from app.api.v1.endpoints.products import bulk_product_updates, product_uuids
+    from app.queue.redis_queue import redis_queue
+    from app.services.product_queries import public_product
+
+    job_id = self.request.id
+    log = logger.bind(job_id=job_id, task="bulk_update_products")
+    log.info("task.start", products=len(product_ids))
+    total = len(product_ids)
+
+    try:
+        supabase = _get_supabase_safe()
+
+        _upsert_job(supabase, job_id, user_id, "bulk_edit", job_subtype="update",
+                    name=f"Bulk update: {total} products",
+                    total_items=total,
+                    input_data={"action": "update", "product_ids": product_ids, "updates": updates})
+        # Same checks as the endpoint (retries re-send stored input): a ValueError fails the job
+        product_ids = product_uuids(product_ids)
+        updates = bulk_product_updates(updates)
+
+        done = set()
+        if self.request.retries:
+            existing = supabase.table("job_items").select("product_id").eq("job_id", job_id).execute()
+            done = {row["product_id"] for row in existing.data or []}
+
+        success = failed = 0
+        for start in range(0, total, chunk_size):
+            chunk = [pid for pid in product_ids[start:start + chunk_size] if pid not in done]
+            now = datetime.utcnow().isoformat()
+            values = {**updates, "updated_at": now}
+
+            before = {
+                row["id"]: public_product(row)
+                for row in (supabase.table("products").select("*")
+                            .in_("id", chunk).eq("user_id", user_id).execute().data or [])
+            } if chunk else {}
+            if before:
+                supabase.table("products").update(values) \
+                    .in_("id", list(before)).eq("user_id", user_id).execute()
+
+            items = [
+                {
+                    "id": _bulk_item_id(job_id, pid),
+                    "job_id": job_id,
+                    "user_id": user_id,
+                    "product_id": pid,
+                    "status": "success",
+                    "before_state": before[pid],
+                    "after_state": values,
+                    "processed_at": now,
+                } if pid in before else {
+                    "id": _bulk_item_id(job_id, pid),
+                    "job_id": job_id,
+                    "user_id": user_id,
+                    "product_id": pid,
+                    "status": "failed",
+                    "message": f"Product {pid} not found",
+                    "error_code": "UPDATE_FAILED",
+                    "processed_at": now,
+                }
+                for pid in chunk
+            ]
+            if items:
+                supabase.table("job_items").upsert(items, on_conflict="id", ignore_duplicates=True).execute()
+
+            success += len(before)
+            failed += len(chunk) - len(before)
+            processed = min(start + chunk_size, total)
+            _update_progress(supabase, job_id, processed, total)
+            redis_queue.set_job_progress(job_id, int(processed * 100 / total), f"{processed}/{total} products", total)
+
+        redis_queue.invalidate_product_stats(user_id)
+        _complete_job(supabase, job_id,
+                      output_data={"success": success, "failed": failed, "skipped": len(done)},
+                      processed=total, failed=failed, total=total)
+        redis_queue.set_job_progress(job_id, 100, "completed", total)
+
+        log.info("task.completed", success=success, failed=failed)
+        return {"total": total, "success": success, "failed": failed}
+
+    except Exception as exc:
+        log.error("task.failed", error=str(exc))
+        try:
+            supabase = _get_supabase_safe()
+            _fail_job(supabase, job_id, str(exc))
+            redis_queue.set_job_progress(job_id, 0, "failed", total)
+        except Exception:
+            pass
+        self.retry_with_backoff(exc)
+
+
+# ==========================================
+# PLATFORM SYNC TASKS
+# ==========================================
+
+@shared_task(bind=True, base=ResilientTask, max_retries=3)
+def sync_platform_links(
+    self,
+    user_id: str,
+    product_ids: Optional[List[str]] = None,
+    store_ids: Optional[List[str]] = None,
+    conflict_strategy: str = "local_wins"
+):
+    """Push products to their linked stores (pull + conflict check first).
+
+    Links run concurrently with a per-store bound (see SyncEngine); link statuses
+    and job_items are written in batches, each batch followed by a progress
+    update. Links already recorded by a previous attempt are skipped.
+    """
+    from app.core.database import task_pool
+    from app.core.repository import Repository
+    from app.queue.redis_queue import redis_queue
+    from app.services.platform_sync.sync_engine import SyncEngine, load_sync_links, sync_item_id
+
+    job_id = self.request.id
+    product_ids, store_ids = product_ids or [], store_ids or []
+    log = logger.bind(job_id=job_id, task="sync_platform_links")
+    log.info("task.start", products=len(product_ids), stores=len(store_ids))
+
+    try:
+        supabase = _get_supabase_safe()
+        _upsert_job(supabase, job_id, user_id, "sync", job_subtype="platform",
+                    name="Store sync",
+                    input_data={"product_ids": product_ids, "store_ids": store_ids,
+                                "conflict_strategy": conflict_strategy})
+
+        recorded = set()
+        if self.request.retries:
+            existing = supabase.table("job_items").select("id").eq("job_id", job_id).execute()
+            recorded = {row["id"] for row in existing.data or []}
+
+        async def run():
+            async with task_pool() as pool:
+                repo = Repository(pool)
+                links = await load_sync_links(repo, user_id, product_ids, store_ids)
+                skip = {link["id"] for link in links if sync_item_id(job_id, link["id"]) in recorded}
+
+                async def on_progress(processed, total):
+                    await repo.bulk_update_by_ids("jobs", [job_id], {
+                        "processed_items": processed, "total_items": total,
+                    })
+                    redis_queue.set_job_progress(
+                        job_id, int(processed * 100 / max(total, 1)), f"{processed}/{total} links", total,
+                    )
+
+                engine = SyncEngine(repo, job_id, user_id, conflict_strategy, on_progress=on_progress)
+                return len(links), await engine.run(links, skip)
+
+        total, result = run_async(run())
+
+        redis_queue.invalidate_product_stats(user_id)
+        _complete_job(supabase, job_id,
+                      output_data={**result, "conflict_strategy": conflict_strategy},
+                      processed=total, failed=result["failed"], total=total)
+        redis_queue.set_job_progress(job_id, 100, "completed", total)
+
+        log.info("task.completed", synced=result["synced"], failed=result["failed"],
+                 conflicts=result["conflicts"])
+        return {"total": total, **result}
+
+    except Exception as exc:
+        log.error("task.failed", error=str(exc))
+        try:
+            supabase = _get_supabase_safe()
+            _fail_job(supabase, job_id, str(exc))
+        except Exception:
+            pass
+        self.retry_with_backoff(exc)
+
+
+# ==========================================
+# EXPORT TASKS
+# ==========================================
+
+def _export_download_url(job_id: str) -> str:
+    """Stable, authenticated download link stored on the jobs row"""
+    return f"/api/v1/jobs/{job_id}/download"
+
+
+def _run_export_job(task, user_id: str, job_subtype: str, name: str, input_data: Dict[str, Any],
+                    filename: str, format: str, compress: bool, total: int, pages_for, row_mapper=None):
+    """Stream keyset-paginated rows into a file in export storage and complete the job
+    with the export stats, the file metadata and its download URL"""
+    from app.core.database import task_pool
+    from app.core.repository import Repository
+    from app.services.export_service import export_to_storage
+    from app.services.export_storage import get_export_storage, export_path
+
+    job_id = task.request.id
+    log = logger.bind(job_id=job_id, task=task.name.rsplit(".", 1)[-1])
+    log.info("task.start", total=total)
+
+    try:
+        supabase = _get_supabase_safe()
+        _upsert_job(supabase, job_id, user_id, "export", job_subtype=job_subtype,
+                    name=name, total_items=total, input_data=input_data)
+
+        def on_page(stats):
+            if stats.pages % 10 == 0:
+                _update_progress(supabase, job_id, stats.rows, max(total, stats.rows))
+
+        async def run():
+            async with task_pool() as pool:
+                return await export_to_storage(
+                    get_export_storage(), export_path(user_id, job_id, filename),
+                    pages_for(Repository(pool)), format, compress, row_mapper, on_page,
+                )
+
+        result = run_async(run())
+        result["download_url"] = _export_download_url(job_id)
+        _complete_job(supabase, job_id, output_data=result, processed=result["rows"], total=result["rows"])
+
+        log.info("task.completed", rows=result["rows"], bytes=result["bytes"])
+        return {"job_id": job_id, "rows": result["rows"], "bytes": result["bytes"],
+                "download_url": result["download_url"]}
+
+    except Exception as exc:
+        log.error("task.failed", error=str(exc))
+        try:
+            supabase = _get_supabase_safe()
+            _fail_job(supabase, job_id, str(exc))
+        except Exception:
+            pass
+        task.retry_with_backoff(exc)
+
+
+@shared_task(bind=True, base=ResilientTask, max_retries=2)
+def export_products_file(
+    self,
+    user_id: str,
+    format: str = "csv",
+    gzip: bool = True,
+    filters: Optional[Dict[str, Any]] = None,
+    total: int = 0
+):
+    """Export the (filtered) catalog to a compressed file in export storage"""
+    from app.services.export_service import export_filename, iter_product_pages
+    from app.services.product_queries import product_filters
+
+    filters = filters or {}
+    where, args = product_filters(user_id, **filters)
+    return _run_export_job(
+        self, user_id, "products", "Product export",
+        input_data={"format": format, "gzip": gzip, "filters": filters},
+        filename=export_filename(format, gzip, suffix=f"-{datetime.utcnow():%Y%m%d}"),
+        format=format, compress=gzip, total=total,
+        pages_for=lambda repo: iter_product_pages(repo, where, args),
+    )
+
+
+@shared_task(bind=True, base=ResilientTask, max_retries=2)
+def export_seo_audit_file(
+    self,
+    user_id: str,
+    audit_id: str,
+    format: str = "csv",
+    gzip: bool = True,
+    total: int = 0
+):
+    """Export the pages of an SEO audit (best score first) to a compressed file"""
+    from app.services.export_service import (
+        SEO_EXPORT_COLUMNS, export_filename, iter_keyset_pages, seo_audit_row,
+    )
+
+    return _run_export_job(
+        self, user_id, "seo_audit", "SEO audit export",
+        input_data={"audit_id": audit_id, "format": format, "gzip": gzip},
+        filename=export_filename(format, gzip, suffix=f"-{audit_id[:8]}", name="seo-audit"),
+        format=format, compress=gzip, total=total,
+        pages_for=lambda repo: iter_keyset_pages(
+            repo, "seo_audit_pages", "audit_id = $1", [audit_id],
+            keys=(("score", "int"), ("id", "uuid")), columns=SEO_EXPORT_COLUMNS,
+        ),
+        row_mapper=seo_audit_row,
+    )
+
+
 # ==========================================
 # SCHEDULED TASKS (Celery Beat)
 # ==========================================
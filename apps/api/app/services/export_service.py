@@ -0,0 +1,246 @@
+"""
+Export service (products, SEO audits)
+Pages through rows with keyset pagination (products on (created_at, id)) and encodes
+each page as it arrives (CSV, NDJSON or a JSON array, optionally gzipped), so
+memory stays flat whatever the export size. Streams go to the HTTP response, or
+for background exports to a file in export storage.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Sequence, Tuple
+import csv
+import io
+import json
+import os
+import tempfile
+import time
+import zlib
+
+from app.core.repository import ident
+from app.services.product_queries import public_product
+
+# format → media type of the uncompressed stream
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "json": "application/json",
+}
+
+EXPORT_PAGE_SIZE = 1000
+
+# Columns of an SEO audit export (issue counts come from issues_summary)
+SEO_EXPORT_FIELDS = [
+    "url", "page_type", "http_status", "score",
+    "title_length", "meta_description_length",
+    "images_missing_alt_count", "critical", "major", "minor",
+]
+SEO_EXPORT_COLUMNS = (
+    "id, url, page_type, http_status, score, title_length, "
+    "meta_description_length, images_missing_alt_count, issues_summary"
+)
+
+
+@dataclass
+class ExportStats:
+    """Counters and timings for one export run (reported in the job's output_data)"""
+    rows: int = 0
+    pages: int = 0
+    bytes_raw: int = 0
+    bytes_written: int = 0
+    started_at: float = field(default_factory=time.monotonic)
+
+    def to_dict(self) -> Dict[str, Any]:
+        duration = max(time.monotonic() - self.started_at, 1e-6)
+        return {
+            "rows": self.rows,
+            "bytes": self.bytes_written,
+            "uncompressed_bytes": self.bytes_raw,
+            "metrics": {
+                "duration_seconds": round(duration, 3),
+                "rows_per_second": round(self.rows / duration, 1),
+                "mb_per_second": round(self.bytes_written / duration / 1_048_576, 3),
+                "pages": self.pages,
+                "compression_ratio": round(self.bytes_raw / self.bytes_written, 2) if self.bytes_written else 0,
+            },
+        }
+
+
+async def iter_keyset_pages(
+    repo,
+    table: str,
+    where: str,
+    args: List[Any],
+    keys: Sequence[Tuple[str, str]] = (("created_at", "timestamptz"), ("id", "uuid")),
+    columns: str = "*",
+    page_size: int = EXPORT_PAGE_SIZE,
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    """Yield pages ordered by `keys` (column, SQL type) descending, resuming each page
+    after the last key seen instead of using OFFSET (constant cost per page).
+    The key columns must be selected and NOT NULL, and the last key must be unique."""
+    key_columns = ", ".join(ident(column) for column, _ in keys)
+    order = ", ".join(f"{ident(column)} DESC" for column, _ in keys)
+    cursor: Optional[List[Any]] = None
+    while True:
+        keyset, page_args = "", list(args)
+        if cursor is not None:
+            n = len(page_args)
+            bounds = ", ".join(f"${n + i + 1}::text::{sql_type}" for i, (_, sql_type) in enumerate(keys))
+            keyset = f" AND ({key_columns}) < ({bounds})"
+            page_args += cursor
+
+        rows = await repo.fetch(
+            f"SELECT {columns} FROM public.{ident(table)} WHERE {where}{keyset} "
+            f"ORDER BY {order} LIMIT {int(page_size)}",
+            *page_args,
+        )
+        if not rows:
+            return
+        yield rows
+        if len(rows) < page_size:
+            return
+        cursor = [str(rows[-1][column]) for column, _ in keys]
+
+
+async def iter_product_pages(
+    repo,
+    where: str,
+    args: List[Any],
+    page_size: int = EXPORT_PAGE_SIZE,
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    """Products newest first, keyset-paginated on (created_at, id)"""
+    async for rows in iter_keyset_pages(repo, "products", where, args, page_size=page_size):
+        yield [public_product(row) for row in rows]
+
+
+def seo_audit_row(page: Dict[str, Any]) -> Dict[str, Any]:
+    """One audited page as an export row (issue counts flattened)"""
+    summary = page.get("issues_summary") or {}
+    row = {field: page.get(field) for field in SEO_EXPORT_FIELDS[:7]}
+    row.update({level: summary.get(level, 0) for level in ("critical", "major", "minor")})
+    return row
+
+
+class RowEncoder:
+    """Incremental encoder: header/opening on the first page, closing bracket at the end"""
+
+    def __init__(self, format: str):
+        if format not in EXPORT_FORMATS:
+            raise ValueError(f"Unsupported export format: {format}")
+        self.format = format
+        self._fieldnames: Optional[List[str]] = None
+        self._started = False
+
+    def encode(self, rows: List[Dict[str, Any]]) -> str:
+        if self.format == "csv":
+            return self._encode_csv(rows)
+        lines = [json.dumps(row, ensure_ascii=False, default=str) for row in rows]
+        if self.format == "ndjson":
+            return "".join(line + "\n" for line in lines)
+        prefix = "," if self._started else "["
+        self._started = True
+        return prefix + ",".join(lines) if lines else ""
+
+    def close(self) -> str:
+        if self.format == "json":
+            return "]" if self._started else "[]"
+        return ""
+
+    def _encode_csv(self, rows: List[Dict[str, Any]]) -> str:
+        output = io.StringIO()
+        if self._fieldnames is None:
+            self._fieldnames = list(rows[0]) if rows else []
+            writer = csv.DictWriter(output, fieldnames=self._fieldnames, extrasaction="ignore")
+            writer.writeheader()
+        else:
+            writer = csv.DictWriter(output, fieldnames=self._fieldnames, extrasaction="ignore")
+        # Arrays / objects (tags, images, metadata) as JSON so they can be re-imported
+        writer.writerows(
+            {k: json.dumps(v, ensure_ascii=False) if isinstance(v, (list, dict)) else v for k, v in row.items()}
+            for row in rows
+        )
+        return output.getvalue()
+
+
+async def encode_export(
+    pages: AsyncIterator[List[Dict[str, Any]]],
+    format: str,
+    compress: bool = False,
+    stats: Optional[ExportStats] = None,
+    row_mapper: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None,
+) -> AsyncIterator[bytes]:
+    """Turn pages of rows into byte chunks of the export file (one chunk per page)"""
+    stats = stats if stats is not None else ExportStats()
+    encoder = RowEncoder(format)
+    # wbits=31: gzip container, so the output is a plain .gz file
+    gzip = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+
+    def emit(text: str) -> bytes:
+        data = text.encode("utf-8")
+        stats.bytes_raw += len(data)
+        if gzip:
+            data = gzip.compress(data)
+        stats.bytes_written += len(data)
+        return data
+
+    async for rows in pages:
+        stats.pages += 1
+        stats.rows += len(rows)
+        if row_mapper:
+            rows = [row_mapper(row) for row in rows]
+        chunk = emit(encoder.encode(rows))
+        if chunk:
+            yield chunk
+
+    tail = emit(encoder.close())
+    if gzip:
+        flushed = gzip.flush()
+        stats.bytes_written += len(flushed)
+        tail += flushed
+    if tail:
+        yield tail
+
+
+def export_filename(format: str, compress: bool, suffix: str = "", name: str = "products") -> str:
+    return f"{name}{suffix}.{format}" + (".gz" if compress else "")
+
+
+def export_media_type(format: str, compress: bool) -> str:
+    return "application/gzip" if compress else EXPORT_FORMATS[format]
+
+
+async def export_to_storage(
+    storage,
+    path: str,
+    pages: AsyncIterator[List[Dict[str, Any]]],
+    format: str,
+    compress: bool = True,
+    row_mapper: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None,
+    on_page: Optional[Callable[[ExportStats], None]] = None,
+) -> Dict[str, Any]:
+    """Write the encoded export to a temporary file on local disk, then store it
+    under `path` (the whole file is buffered there before the upload, so the worker
+    needs disk space for the compressed export). Returns the export stats plus the
+    stored file's metadata."""
+    stats = ExportStats()
+    media_type = export_media_type(format, compress)
+    fd, tmp_path = tempfile.mkstemp(prefix="export-", suffix=os.path.basename(path))
+    try:
+        with os.fdopen(fd, "wb") as out:
+            async for chunk in encode_export(pages, format, compress, stats, row_mapper):
+                out.write(chunk)
+                if on_page:
+                    on_page(stats)
+        storage.save(path, tmp_path, media_type)
+    finally:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
+    return {
+        **stats.to_dict(),
+        "file": {
+            "path": path,
+            "filename": os.path.basename(path),
+            "size": stats.bytes_written,
+            "content_type": media_type,
+        },
+    }
@@ -0,0 +1,97 @@
+"""
+Export file storage
+Background exports are written to Supabase Storage (EXPORT_STORAGE_BACKEND=supabase)
+or to a local directory (EXPORT_STORAGE_BACKEND=local, used in tests and dev).
+Supabase downloads go through short-lived signed URLs (Range is served by the
+storage CDN); local files are served by the API with Range support.
+
+Every backend has save / signed_url / delete. Backends whose signed_url can return
+None (no direct URL) must also provide size and open, used to serve the file.
+"""
+
+from typing import BinaryIO, Optional
+import logging
+import os
+import shutil
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class LocalExportStorage:
+    """Files under a local root directory, streamed by GET /jobs/{job_id}/download"""
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+
+    def _full_path(self, path: str) -> str:
+        full = os.path.abspath(os.path.join(self.root, path))
+        if not full.startswith(self.root + os.sep):
+            raise ValueError(f"Invalid export path: {path!r}")
+        return full
+
+    def save(self, path: str, source_file: str, content_type: str) -> None:
+        full = self._full_path(path)
+        os.makedirs(os.path.dirname(full), exist_ok=True)
+        shutil.copyfile(source_file, full)
+
+    def signed_url(self, path: str, expires_in: int, filename: Optional[str] = None) -> Optional[str]:
+        return None  # no direct URL: served by the API
+
+    def size(self, path: str) -> Optional[int]:
+        full = self._full_path(path)
+        return os.path.getsize(full) if os.path.exists(full) else None
+
+    def open(self, path: str) -> BinaryIO:
+        return open(self._full_path(path), "rb")
+
+    def delete(self, path: str) -> None:
+        full = self._full_path(path)
+        if os.path.exists(full):
+            os.unlink(full)
+
+
+class SupabaseExportStorage:
+    """Files in a Supabase Storage bucket (the bucket must exist), always downloaded
+    through a signed URL, so there is no size / open"""
+
+    def __init__(self, bucket: str, client=None):
+        self.bucket = bucket
+        self._client = client
+
+    @property
+    def client(self):
+        if self._client is None:
+            from app.core.database import get_supabase
+            self._client = get_supabase()
+        return self._client
+
+    def save(self, path: str, source_file: str, content_type: str) -> None:
+        with open(source_file, "rb") as f:
+            self.client.storage.from_(self.bucket).upload(
+                path, f, {"content-type": content_type, "upsert": "true"}
+            )
+
+    def signed_url(self, path: str, expires_in: int, filename: Optional[str] = None) -> Optional[str]:
+        options = {"download": filename} if filename else None
+        signed = self.client.storage.from_(self.bucket).create_signed_url(path, expires_in, options)
+        url = signed.get("signedURL") or signed.get("signedUrl")
+        if not url:
+            raise RuntimeError(f"No signed URL returned for export {path!r}")
+        return url
+
+    def delete(self, path: str) -> None:
+        self.client.storage.from_(self.bucket).remove([path])
+
+
+def get_export_storage():
+    """Storage backend for background export files, per settings"""
+    if settings.EXPORT_STORAGE_BACKEND == "local":
+        return LocalExportStorage(settings.EXPORT_LOCAL_DIR)
+    return SupabaseExportStorage(settings.EXPORT_STORAGE_BUCKET)
+
+
+def export_path(user_id: str, job_id: str, filename: str) -> str:
+    """Object path of an export file: one folder per user, then per job"""
+    return f"{user_id}/{job_id}/{filename}"
@@ -0,0 +1,203 @@
+"""
+Import mapping compiler
+Turns a column mapping into a plan of (column index, field, coercer) steps once
+per feed, so rows are mapped without per-cell field branching. Plans map rows one
+at a time or a whole chunk at once, with price and stock columns coerced as arrays.
+"""
+
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Product fields written by every mapped row (images is copied per row, see _new_product)
+PRODUCT_TEMPLATE: Dict[str, Any] = {
+    "title": "",
+    "description": "",
+    "sale_price": 0,
+    "cost_price": 0,
+    "sku": "",
+    "stock": 0,
+    "images": [],
+    "category": ""
+}
+
+# Mapping targets that are renamed and coerced
+PRICE_FIELDS = {"price": "sale_price", "sale_price": "sale_price", "cost": "cost_price", "cost_price": "cost_price"}
+
+IN_STOCK_WORDS = frozenset({"in stock", "available", "en stock", "disponible"})
+OUT_OF_STOCK_WORDS = frozenset({"out of stock", "unavailable", "rupture", "indisponible"})
+
+# Currency symbols and spaces dropped, decimal comma normalised, in one pass
+_PRICE_TRANSLATION = str.maketrans({"€": None, "$": None, "£": None, " ": None, ",": "."})
+
+# Joins a text column so it can be cleaned with a few C-level replaces
+_COLUMN_SEP = "\x00"
+
+
+def parse_price(value: Any) -> float:
+    """Parse price from various formats"""
+    if isinstance(value, (int, float)):
+        return float(value)
+
+    if isinstance(value, str):
+        try:
+            return float(value.translate(_PRICE_TRANSLATION))
+        except ValueError:
+            return 0.0
+
+    return 0.0
+
+
+def parse_stock(value: Any) -> int:
+    """Parse stock quantity"""
+    if isinstance(value, int):
+        return value
+
+    if isinstance(value, str):
+        value_lower = value.lower()
+        if value_lower in IN_STOCK_WORDS:
+            return 100
+        elif value_lower in OUT_OF_STOCK_WORDS:
+            return 0
+
+        try:
+            return int(value)
+        except ValueError:
+            return 0
+
+    return 0
+
+
+def parse_images(value: Any) -> List[str]:
+    """Parse images from various formats"""
+    if isinstance(value, list):
+        return value
+
+    if isinstance(value, str):
+        # Could be comma-separated or pipe-separated
+        if "|" in value:
+            return [img.strip() for img in value.split("|") if img.strip()]
+        elif "," in value and "http" in value:
+            return [img.strip() for img in value.split(",") if img.strip()]
+        else:
+            return [value] if value.strip() else []
+
+    return []
+
+
+def coerce_prices(values: Sequence[Any]) -> List[float]:
+    """Vectorized parse_price over a column: the column is cleaned as one joined
+    string and converted by numpy in one call (same parsing rules as float()).
+    Columns with odd cells fall back to parse_price per cell."""
+    if not all(v is None or type(v) is str for v in values):
+        return [parse_price(v) for v in values]
+
+    joined = _COLUMN_SEP.join(v or "" for v in values)
+    for symbol in ("€", "$", "£", " "):
+        joined = joined.replace(symbol, "")
+    cleaned = joined.replace(",", ".").split(_COLUMN_SEP)
+    if len(cleaned) != len(values):  # a cell contained the separator
+        return [parse_price(v) for v in values]
+
+    try:
+        return np.array([c or "0" for c in cleaned], dtype=np.float64).tolist()
+    except (ValueError, OverflowError):
+        return [parse_price(v) for v in values]
+
+
+def coerce_stocks(values: Sequence[Any]) -> List[int]:
+    """Vectorized parse_stock over a column of numeric strings (same parsing rules
+    as int()); columns with words like "in stock" fall back to parse_stock per cell"""
+    if all(v is None or type(v) is str for v in values):
+        try:
+            return np.array([v or "0" for v in values], dtype=np.int64).tolist()
+        except (ValueError, OverflowError):
+            pass
+    return [parse_stock(v) for v in values]
+
+
+# field → (scalar coercer, column coercer); other fields are copied as-is
+_COERCERS: Dict[str, Tuple[Callable[[Any], Any], Callable[[Sequence[Any]], List[Any]]]] = {
+    "sale_price": (parse_price, coerce_prices),
+    "cost_price": (parse_price, coerce_prices),
+    "stock": (parse_stock, coerce_stocks),
+    "images": (parse_images, lambda column: [parse_images(v) for v in column]),
+}
+
+
+def _new_product() -> Dict[str, Any]:
+    product = dict(PRODUCT_TEMPLATE)
+    product["images"] = []
+    return product
+
+
+class MappingPlan:
+    """A column mapping compiled against one header row"""
+
+    def __init__(self, steps: List[Tuple[int, str, Optional[Callable[[Any], Any]]]], missing: Any = None):
+        self.steps = steps
+        self.missing = missing
+        self.fields = [field for _, field, _ in steps]
+
+    @classmethod
+    def compile(cls, headers: Sequence[str], mapping: Dict[str, str], missing: Any = None) -> "MappingPlan":
+        """Resolve mapped columns to positions (last duplicate header wins, like csv.DictReader)
+        and fields to their coercers. `missing` fills cells absent from short rows."""
+        positions = {header: index for index, header in enumerate(headers)}
+
+        steps = []
+        for column, field in mapping.items():
+            if column not in positions:
+                continue
+            field = PRICE_FIELDS.get(field, field)
+            coercer = _COERCERS.get(field, (None,))[0]
+            steps.append((positions[column], field, coercer))
+        return cls(steps, missing)
+
+    def map_row(self, values: Sequence[Any]) -> Dict[str, Any]:
+        """Map one row of cell values to a product dict"""
+        product = _new_product()
+        width = len(values)
+        for index, field, coercer in self.steps:
+            value = values[index] if index < width else self.missing
+            product[field] = coercer(value) if coercer else value
+        return product
+
+    def map_rows(self, rows: Sequence[Sequence[Any]]) -> List[Dict[str, Any]]:
+        """Map a chunk of rows column by column (price/stock columns coerced as arrays)"""
+        missing = self.missing
+        columns = []
+        for index, field, coercer in self.steps:
+            column = [row[index] if index < len(row) else missing for row in rows]
+            if coercer:
+                column = _COERCERS[field][1](column)
+            columns.append(column)
+
+        fields = self.fields
+        copy_images = "images" not in fields
+        products = []
+        for values in zip(*columns) if columns else ((),) * len(rows):
+            product = dict(PRODUCT_TEMPLATE)
+            if copy_images:
+                product["images"] = []
+            product.update(zip(fields, values))
+            products.append(product)
+        return products
+
+
+def compile_auto_mapping(field_options: Dict[str, List[str]]) -> Dict[str, frozenset]:
+    """Lowercase each field's header aliases once"""
+    return {field: frozenset(opt.lower() for opt in options) for field, options in field_options.items()}
+
+
+def detect_mapping(headers: Iterable[str], compiled_options: Dict[str, frozenset]) -> Dict[str, str]:
+    """For each field, the first header matching one of its aliases (case-insensitive)"""
+    lowered = [(header, header.lower()) for header in headers]
+
+    mapping = {}
+    for field, options in compiled_options.items():
+        for header, lower in lowered:
+            if lower in options:
+                mapping[header] = field
+                break
+    return mapping
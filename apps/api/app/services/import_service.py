@@ -1,23 +1,158 @@
 """
-Import Service - Handle CSV, XML, JSON imports
+Import Service - Handle CSV, Excel, XML, JSON imports
+Pipelined engine: parsers yield products, the save stage batches them in
+chunks, prefetches existing SKUs once per chunk and writes each chunk with
+a single bulk upsert on (user_id, sku).
+Feeds downloaded from a URL are streamed (CSV read line by line, XML via
+iterparse) so memory stays flat regardless of feed size.
 """
 
 import csv
+import hashlib
+import itertools
 import json
 import io
-from typing import Dict, Any, List, Optional
-from datetime import datetime
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional, Iterable, Iterator, Tuple, Union, IO
+from datetime import datetime, date
 import httpx
 import logging
 from xml.etree import ElementTree
 
+from app.core.config import settings
+from app.services.import_mapping import (
+    MappingPlan, compile_auto_mapping, detect_mapping,
+    parse_price, parse_stock, parse_images,
+)
 from app.core.database import get_supabase
 
 logger = logging.getLogger(__name__)
 
+# Keep per-row error details bounded so huge broken feeds don't bloat output_data
+MAX_ERROR_DETAILS = 100
+
+# Read size for streamed downloads
+STREAM_CHUNK_BYTES = 64 * 1024
+
+# Formats that can be parsed incrementally from a download stream
+STREAMABLE_FORMATS = {"csv", "xml"}
+
+# What an incremental import does with SKUs that disappeared from the feed
+REMOVED_ACTIONS = {"ignore", "out_of_stock", "delete"}
+
+# Element names that delimit one product in XML feeds (first match wins)
+XML_PRODUCT_TAGS = ["product", "item", "entry", "offer"]
+
+# Errors meaning the database could not be reached (the row itself may be fine)
+CONNECTIVITY_ERRORS = (ConnectionError, TimeoutError, httpx.TransportError)
+
+
+@dataclass
+class ImportStats:
+    """Counters and timings for one import run (reported in the job's output_data)"""
+    total: int = 0
+    imported: int = 0
+    updated: int = 0
+    skipped: int = 0
+    unchanged: int = 0
+    removed: int = 0
+    failed: int = 0
+    connection_errors: int = 0
+    chunks: int = 0
+    round_trips: int = 0
+    errors: List[Dict[str, Any]] = field(default_factory=list)
+    started_at: float = field(default_factory=time.monotonic)
+
+    def add_error(self, index: int, error: str, exc: Optional[BaseException] = None) -> None:
+        self.failed += 1
+        if isinstance(exc, CONNECTIVITY_ERRORS):
+            self.connection_errors += 1
+        if len(self.errors) < MAX_ERROR_DETAILS:
+            self.errors.append({"index": index, "error": error})
+
+    def to_dict(self) -> Dict[str, Any]:
+        duration = max(time.monotonic() - self.started_at, 1e-6)
+        return {
+            "total": self.total,
+            "imported": self.imported,
+            "updated": self.updated,
+            "skipped": self.skipped,
+            "unchanged": self.unchanged,
+            "removed": self.removed,
+            "failed": self.failed,
+            "errors": self.errors,
+            "metrics": {
+                "duration_seconds": round(duration, 3),
+                "rows_per_second": round(self.total / duration, 1),
+                "chunks": self.chunks,
+                "round_trips": self.round_trips,
+                "connection_errors": self.connection_errors,
+                "round_trips_per_1k_rows": round(self.round_trips * 1000 / self.total, 2) if self.total else 0,
+            },
+        }
+
+
+def product_fingerprint(product: Dict[str, Any]) -> str:
+    """Stable hash of a mapped product dict, used to detect changed rows between imports"""
+    payload = json.dumps(product, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+
+def feed_key_for_url(url: str) -> str:
+    """Short stable identifier of a feed URL for per-feed state keys"""
+    return hashlib.sha1(url.encode()).hexdigest()[:16]
+
+
+def _chunked(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Yield lists of at most `size` items without materializing the iterable"""
+    chunk: List[Any] = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class _ByteStream(io.RawIOBase):
+    """Read-only file object over an iterator of byte chunks (e.g. httpx iter_bytes)"""
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._buffer = b""
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        while not self._buffer:
+            try:
+                self._buffer = next(self._chunks)
+            except StopIteration:
+                return 0
+        size = min(len(b), len(self._buffer))
+        b[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+
 
 class ImportService:
     """Universal import service for various data formats"""
+
+    def __init__(self, chunk_size: Optional[int] = None, feed_store=None, vectorized: bool = True):
+        self.chunk_size = max(1, chunk_size or settings.IMPORT_CHUNK_SIZE)
+        self.vectorized = vectorized
+        self._feed_store = feed_store
+    
+    @property
+    def feed_store(self):
+        """Per-user, per-feed state (HTTP validators + row fingerprints), Redis-backed by default"""
+        if self._feed_store is None:
+            from app.queue.redis_queue import redis_queue
+            self._feed_store = redis_queue
+        return self._feed_store
     
     # Default column mappings for common formats
     DEFAULT_MAPPINGS = {
@@ -33,30 +168,111 @@ class ImportService:
         }
     }
     
+    # Header aliases lowercased once, not per header/field pair
+    _COMPILED_MAPPINGS = {fmt: compile_auto_mapping(options) for fmt, options in DEFAULT_MAPPINGS.items()}
+    
     def import_from_url(
         self,
         user_id: str,
         url: str,
         format: str = "csv",
         mapping: Dict[str, str] = None,
-        update_existing: bool = True
+        update_existing: bool = True,
+        stream: bool = True,
+        incremental: bool = False,
+        removed_action: str = "out_of_stock"
     ) -> Dict[str, Any]:
-        """Import products from a URL (CSV, XML, JSON feed)"""
-        
-        logger.info(f"Importing from URL: {url} (format: {format})")
-        
-        # Download the file
-        with httpx.Client(timeout=120) as client:
-            response = client.get(url, follow_redirects=True)
-            content = response.text
-        
-        return self.import_from_content(
-            user_id=user_id,
-            content=content,
-            format=format,
-            mapping=mapping,
-            update_existing=update_existing
+        """Import products from a URL (CSV, XML, JSON feed)
+        
+        incremental: conditional GET (ETag/Last-Modified) and per-row fingerprints,
+        so only inserted, changed and removed rows are written.
+        """
+        
+        logger.info(f"Importing from URL: {url} (format: {format}, stream: {stream}, incremental: {incremental})")
+        
+        feed_key = feed_key_for_url(url) if incremental else None
+        headers = {}
+        if feed_key:
+            validators = self.feed_store.get_feed_validators(user_id, feed_key)
+            if validators.get("etag"):
+                headers["If-None-Match"] = validators["etag"]
+            if validators.get("last_modified"):
+                headers["If-Modified-Since"] = validators["last_modified"]
+        
+        with httpx.Client(timeout=120, follow_redirects=True) as client:
+            with client.stream("GET", url, headers=headers) as response:
+                if response.status_code == 304:
+                    logger.info(f"Feed not modified since last import, skipping download: {url}")
+                    return {**ImportStats().to_dict(), "not_modified": True}
+                
+                response.raise_for_status()
+                products = self._parse_response(response, format, mapping, stream)
+                result = self._save_products(
+                    user_id, products, update_existing,
+                    feed_key=feed_key, removed_action=removed_action
+                )
+        
+        # Only remember validators once every row made it in, otherwise the
+        # next run must download again to retry the failed rows
+        if feed_key and not result["failed"]:
+            self.feed_store.set_feed_validators(
+                user_id, feed_key,
+                etag=response.headers.get("etag"),
+                last_modified=response.headers.get("last-modified"),
+            )
+        
+        return result
+    
+    def iter_products_from_url(
+        self,
+        url: str,
+        format: str = "csv",
+        mapping: Dict[str, str] = None,
+        stream: bool = True
+    ) -> Iterator[Dict[str, Any]]:
+        """Download and parse a feed without saving it (the connection stays open while iterating)"""
+        
+        with httpx.Client(timeout=120, follow_redirects=True) as client:
+            with client.stream("GET", url) as response:
+                response.raise_for_status()
+                yield from self._parse_response(response, format, mapping, stream)
+    
+    def _parse_response(
+        self,
+        response: httpx.Response,
+        format: str,
+        mapping: Dict[str, str] = None,
+        stream: bool = True
+    ) -> Iterator[Dict[str, Any]]:
+        """Parse a streamed HTTP response"""
+        
+        if not (stream and format in STREAMABLE_FORMATS):
+            response.read()
+            return self.parse(response.text, format, mapping)
+        
+        # Streaming mode: bytes flow download → parser → chunked save, never the whole feed
+        raw = _ByteStream(response.iter_bytes(STREAM_CHUNK_BYTES))
+        if format == "xml":
+            return self._parse_xml(raw, mapping)
+        text = io.TextIOWrapper(
+            io.BufferedReader(raw, STREAM_CHUNK_BYTES),
+            encoding=response.charset_encoding or "utf-8-sig",
+            errors="replace",
+            newline="",
         )
+        return self._parse_csv(text, mapping)
+    
+    def import_products(
+        self,
+        user_id: str,
+        products: Iterable[Dict[str, Any]],
+        update_existing: bool = True,
+        start_index: int = 0
+    ) -> Dict[str, Any]:
+        """Save already-parsed products (e.g. one chunk of a fan-out import).
+        Error indices are offset by start_index so they match row positions in the feed."""
+        
+        return self._save_products(user_id, products, update_existing, start_index=start_index)
     
     def import_from_content(
         self,
@@ -64,106 +280,187 @@ class ImportService:
         content: str,
         format: str = "csv",
         mapping: Dict[str, str] = None,
-        update_existing: bool = True
+        update_existing: bool = True,
+        feed_key: Optional[str] = None,
+        removed_action: str = "out_of_stock"
     ) -> Dict[str, Any]:
-        """Import products from raw content"""
+        """Import products from raw content (feed_key enables incremental change detection)"""
+        
+        products = self.parse(content, format, mapping)
+        
+        # Parsers are generators: rows flow straight into the chunked save stage
+        return self._save_products(
+            user_id, products, update_existing,
+            feed_key=feed_key, removed_action=removed_action
+        )
+    
+    def parse(self, content: Any, format: str, mapping: Dict[str, str] = None) -> Iterator[Dict[str, Any]]:
+        """Dispatch raw content to the parser for its format"""
         
         if format == "csv":
-            products = self._parse_csv(content, mapping)
+            return self._parse_csv(content, mapping)
         elif format == "excel":
-            products = self._parse_excel(content, mapping)
+            return self._parse_excel(content, mapping)
         elif format == "xml":
-            products = self._parse_xml(content, mapping)
+            return self._parse_xml(content, mapping)
         elif format == "json":
-            products = self._parse_json(content, mapping)
+            return self._parse_json(content, mapping)
         else:
             raise ValueError(f"Unsupported format: {format}")
-        
-        # Save products to database
-        result = self._save_products(user_id, products, update_existing)
-        
-        return {
-            "total": len(products),
-            "imported": result["imported"],
-            "updated": result["updated"],
-            "errors": result["errors"]
-        }
     
-    def _parse_csv(self, content: str, mapping: Dict[str, str] = None) -> List[Dict[str, Any]]:
-        """Parse CSV content"""
+    def _parse_csv(self, content: Union[str, IO[str]], mapping: Dict[str, str] = None) -> Iterator[Dict[str, Any]]:
+        """Parse CSV content (a string or a text stream read line by line)"""
+        
+        stream = io.StringIO(content) if isinstance(content, str) else content
         
-        # Detect delimiter
-        sample = content[:1000]
-        delimiter = ";" if ";" in sample and sample.count(";") > sample.count(",") else ","
+        # Detect delimiter from the header line
+        header = stream.readline()
+        delimiter = ";" if ";" in header and header.count(";") > header.count(",") else ","
         
-        reader = csv.DictReader(io.StringIO(content), delimiter=delimiter)
-        headers = reader.fieldnames or []
+        reader = csv.reader(itertools.chain([header], stream), delimiter=delimiter)
+        headers = next(reader, [])
         
-        # Auto-detect mapping if not provided
+        # Auto-detect mapping if not provided, then compile it once for the whole feed
         if not mapping:
             mapping = self._auto_detect_mapping(headers, "csv")
+        plan = MappingPlan.compile(headers, mapping)
         
-        products = []
-        for row in reader:
-            product = self._map_row(row, mapping)
-            if product.get("title"):  # Only include valid products
-                products.append(product)
-        
-        return products
+        rows = (row for row in reader if row)  # blank lines, as skipped by csv.DictReader
+        yield from self._map_with_plan(plan, rows)
     
-    def _parse_excel(self, content: bytes, mapping: Dict[str, str] = None) -> List[Dict[str, Any]]:
-        """Parse Excel content - would need openpyxl"""
-        # Placeholder - would need additional library
-        logger.warning("Excel parsing not fully implemented")
+    def _map_with_plan(self, plan: MappingPlan, rows: Iterable[List[Any]]) -> Iterator[Dict[str, Any]]:
+        """Map rows through a compiled plan, a chunk at a time in vectorized mode"""
+        
+        if self.vectorized:
+            for block in _chunked(rows, self.chunk_size):
+                for product in plan.map_rows(block):
+                    if product.get("title"):  # Only include valid products
+                        yield product
+        else:
+            for row in rows:
+                product = plan.map_row(row)
+                if product.get("title"):
+                    yield product
+    
+    def _parse_excel(self, content: bytes, mapping: Dict[str, str] = None) -> Iterator[Dict[str, Any]]:
+        """Parse Excel (.xlsx) content with read-only worksheets streamed row by row"""
+        from openpyxl import load_workbook
+        
+        workbook = load_workbook(io.BytesIO(content), read_only=True, data_only=True)
+        try:
+            for sheet in workbook.worksheets:
+                rows = sheet.iter_rows(values_only=True)
+                headers = self._sheet_headers(rows)
+                
+                sheet_mapping = mapping or self._auto_detect_mapping(headers, "csv")
+                if "title" not in sheet_mapping.values():
+                    logger.info(f"Skipping sheet '{sheet.title}': no title column")
+                    continue
+                
+                # Cells past the end of a short row read as empty, like in a CSV export
+                plan = MappingPlan.compile(headers, {c: f for c, f in sheet_mapping.items() if c}, missing="")
+                yield from self._map_with_plan(
+                    plan, ([self._excel_cell(value) for value in values] for values in rows)
+                )
+        finally:
+            workbook.close()
+    
+    def excel_headers(self, content: bytes) -> List[str]:
+        """Headers of the first sheet an import without mapping reads (first sheet
+        with a title column, as in _parse_excel), else of the first sheet with data"""
+        from openpyxl import load_workbook
+        
+        workbook = load_workbook(io.BytesIO(content), read_only=True, data_only=True)
+        try:
+            first: List[str] = []
+            for sheet in workbook.worksheets:
+                headers = self._sheet_headers(sheet.iter_rows(values_only=True))
+                if "title" in self._auto_detect_mapping(headers, "csv").values():
+                    return headers
+                first = first or headers
+            return first
+        finally:
+            workbook.close()
+    
+    def _sheet_headers(self, rows: Iterator[Tuple[Any, ...]]) -> List[str]:
+        """First non-empty row of a sheet (its headers); `rows` continues after it"""
+        for values in rows:
+            if any(v not in (None, "") for v in values):
+                return [self._excel_cell(v).strip() for v in values]
         return []
     
-    def _parse_xml(self, content: str, mapping: Dict[str, str] = None) -> List[Dict[str, Any]]:
-        """Parse XML content"""
-        
-        root = ElementTree.fromstring(content)
-        products = []
+    @staticmethod
+    def _excel_cell(value: Any) -> str:
+        """Render a cell like its CSV export so the mapping plan sees the same input for both formats"""
+        if value is None:
+            return ""
+        if isinstance(value, float) and value.is_integer():
+            return str(int(value))
+        if isinstance(value, (datetime, date)):
+            return value.isoformat()
+        return str(value)
+    
+    def _parse_xml(self, content: Union[str, IO], mapping: Dict[str, str] = None) -> Iterator[Dict[str, Any]]:
+        """Parse XML content incrementally (iterparse), clearing each product once mapped"""
         
-        # Find product elements (common patterns)
-        product_tags = ["product", "item", "entry", "offer"]
-        product_elements = []
+        source = io.StringIO(content) if isinstance(content, str) else content
         
-        for tag in product_tags:
-            product_elements = root.findall(f".//{tag}")
-            if product_elements:
-                break
+        product_tag = None
+        stack: List[ElementTree.Element] = []
         
-        for elem in product_elements:
-            product = {}
+        for event, elem in ElementTree.iterparse(source, events=("start", "end")):
+            if event == "start":
+                # Find product elements (common patterns): the first one seen fixes the tag
+                if product_tag is None and elem.tag in XML_PRODUCT_TAGS:
+                    product_tag = elem.tag
+                stack.append(elem)
+                continue
             
-            # Extract all child elements
-            for child in elem:
-                tag_name = child.tag.lower()
-                value = child.text or ""
-                
-                # Map to standard fields
-                if mapping and tag_name in mapping:
-                    product[mapping[tag_name]] = value
-                else:
-                    # Auto-map common fields
-                    if tag_name in ["title", "name"]:
-                        product["title"] = value
-                    elif tag_name in ["description", "desc"]:
-                        product["description"] = value
-                    elif tag_name in ["price"]:
-                        product["sale_price"] = self._parse_price(value)
-                    elif tag_name in ["sku", "id", "reference"]:
-                        product["sku"] = value
-                    elif tag_name in ["image", "image_link"]:
-                        product["images"] = [value]
-                    elif tag_name in ["availability", "stock"]:
-                        product["stock"] = self._parse_stock(value)
+            stack.pop()
+            if elem.tag != product_tag:
+                continue
+            
+            product = self._map_xml_element(elem, mapping)
+            
+            # Drop the processed subtree so the partial tree never grows with the feed
+            elem.clear()
+            if stack:
+                stack[-1].remove(elem)
             
             if product.get("title"):
-                products.append(product)
+                yield product
+    
+    def _map_xml_element(self, elem: ElementTree.Element, mapping: Dict[str, str] = None) -> Dict[str, Any]:
+        """Map the child elements of one XML product element"""
+        
+        product = {}
+        
+        # Extract all child elements
+        for child in elem:
+            tag_name = child.tag.lower()
+            value = child.text or ""
+            
+            # Map to standard fields
+            if mapping and tag_name in mapping:
+                product[mapping[tag_name]] = value
+            else:
+                # Auto-map common fields
+                if tag_name in ["title", "name"]:
+                    product["title"] = value
+                elif tag_name in ["description", "desc"]:
+                    product["description"] = value
+                elif tag_name in ["price"]:
+                    product["sale_price"] = self._parse_price(value)
+                elif tag_name in ["sku", "id", "reference"]:
+                    product["sku"] = value
+                elif tag_name in ["image", "image_link"]:
+                    product["images"] = [value]
+                elif tag_name in ["availability", "stock"]:
+                    product["stock"] = self._parse_stock(value)
         
-        return products
+        return product
     
-    def _parse_json(self, content: str, mapping: Dict[str, str] = None) -> List[Dict[str, Any]]:
+    def _parse_json(self, content: str, mapping: Dict[str, str] = None) -> Iterator[Dict[str, Any]]:
         """Parse JSON content"""
         
         data = json.loads(content)
@@ -177,59 +474,17 @@ class ImportService:
         else:
             items = []
         
-        products = []
         for item in items:
             if isinstance(item, dict):
                 product = self._map_json_item(item, mapping)
                 if product.get("title"):
-                    products.append(product)
-        
-        return products
+                    yield product
     
     def _auto_detect_mapping(self, headers: List[str], format: str) -> Dict[str, str]:
         """Auto-detect column mapping from headers"""
         
-        mapping = {}
-        field_options = self.DEFAULT_MAPPINGS.get(format, self.DEFAULT_MAPPINGS["csv"])
-        
-        for field, options in field_options.items():
-            for header in headers:
-                if header.lower() in [opt.lower() for opt in options]:
-                    mapping[header] = field
-                    break
-        
-        return mapping
-    
-    def _map_row(self, row: Dict[str, str], mapping: Dict[str, str]) -> Dict[str, Any]:
-        """Map a row to product format"""
-        
-        product = {
-            "title": "",
-            "description": "",
-            "sale_price": 0,
-            "cost_price": 0,
-            "sku": "",
-            "stock": 0,
-            "images": [],
-            "category": ""
-        }
-        
-        for col, field in mapping.items():
-            if col in row:
-                value = row[col]
-                
-                if field == "price" or field == "sale_price":
-                    product["sale_price"] = self._parse_price(value)
-                elif field == "cost" or field == "cost_price":
-                    product["cost_price"] = self._parse_price(value)
-                elif field == "stock":
-                    product["stock"] = self._parse_stock(value)
-                elif field == "images":
-                    product["images"] = self._parse_images(value)
-                else:
-                    product[field] = value
-        
-        return product
+        options = self._COMPILED_MAPPINGS.get(format, self._COMPILED_MAPPINGS["csv"])
+        return detect_mapping(headers, options)
     
     def _map_json_item(self, item: Dict[str, Any], mapping: Dict[str, str] = None) -> Dict[str, Any]:
         """Map a JSON item to product format"""
@@ -257,105 +512,249 @@ class ImportService:
     
     def _parse_price(self, value: Any) -> float:
         """Parse price from various formats"""
-        if isinstance(value, (int, float)):
-            return float(value)
-        
-        if isinstance(value, str):
-            # Remove currency symbols and spaces
-            clean = value.replace("€", "").replace("$", "").replace("£", "").replace(" ", "").strip()
-            clean = clean.replace(",", ".")
-            
-            try:
-                return float(clean)
-            except ValueError:
-                return 0.0
-        
-        return 0.0
+        return parse_price(value)
     
     def _parse_stock(self, value: Any) -> int:
         """Parse stock quantity"""
-        if isinstance(value, int):
-            return value
-        
-        if isinstance(value, str):
-            value_lower = value.lower()
-            if value_lower in ["in stock", "available", "en stock", "disponible"]:
-                return 100
-            elif value_lower in ["out of stock", "unavailable", "rupture", "indisponible"]:
-                return 0
-            
-            try:
-                return int(value)
-            except ValueError:
-                return 0
-        
-        return 0
+        return parse_stock(value)
     
     def _parse_images(self, value: Any) -> List[str]:
         """Parse images from various formats"""
-        if isinstance(value, list):
-            return value
-        
-        if isinstance(value, str):
-            # Could be comma-separated or pipe-separated
-            if "|" in value:
-                return [img.strip() for img in value.split("|") if img.strip()]
-            elif "," in value and "http" in value:
-                return [img.strip() for img in value.split(",") if img.strip()]
-            else:
-                return [value] if value.strip() else []
-        
-        return []
+        return parse_images(value)
     
     def _save_products(
         self,
         user_id: str,
-        products: List[Dict[str, Any]],
-        update_existing: bool = True
+        products: Iterable[Dict[str, Any]],
+        update_existing: bool = True,
+        feed_key: Optional[str] = None,
+        removed_action: str = "out_of_stock",
+        start_index: int = 0
     ) -> Dict[str, Any]:
-        """Save products to database"""
+        """Save products to database in chunks (prefetch + one bulk upsert per chunk)
         
-        supabase = get_supabase()
+        With a feed_key, rows whose fingerprint matches the previous import of the
+        same feed are skipped, and SKUs missing from the feed are handled per
+        removed_action. Rows without a SKU cannot be tracked and are always written.
+        """
         
-        imported = 0
-        updated = 0
-        errors = []
+        if removed_action not in REMOVED_ACTIONS:
+            raise ValueError(f"Unsupported removed_action: {removed_action}")
         
-        for i, product in enumerate(products):
+        supabase = get_supabase()
+        stats = ImportStats()
+        seen_skus = set()
+        
+        for chunk in _chunked(enumerate(products, start_index), self.chunk_size):
+            stats.total += len(chunk)
+            stats.chunks += 1
+            if feed_key:
+                fingerprints = {p["sku"]: product_fingerprint(p) for _, p in chunk if p.get("sku")}
+                seen_skus.update(fingerprints)
+                chunk = self._drop_unchanged(user_id, feed_key, chunk, fingerprints, stats)
+            written = self._save_chunk(supabase, user_id, chunk, update_existing, stats)
+            if feed_key and written:
+                self.feed_store.set_import_fingerprints(
+                    user_id, feed_key, {sku: fingerprints[sku] for sku in written}
+                )
+        
+        # An empty feed is far more likely a broken export than an empty catalog
+        if feed_key and stats.total:
+            self._handle_removed(supabase, user_id, feed_key, seen_skus, removed_action, stats)
+        
+        if stats.imported or stats.updated or stats.removed:
+            from app.queue.redis_queue import redis_queue
+            redis_queue.invalidate_product_stats(user_id)
+        
+        result = stats.to_dict()
+        logger.info(
+            f"Import finished: {result['total']} rows, {result['imported']} imported, "
+            f"{result['updated']} updated, {result['unchanged']} unchanged, "
+            f"{result['removed']} removed, {result['failed']} failed "
+            f"({result['metrics']['rows_per_second']} rows/s, "
+            f"{result['metrics']['round_trips_per_1k_rows']} round trips/1k rows)"
+        )
+        return result
+    
+    def _drop_unchanged(
+        self,
+        user_id: str,
+        feed_key: str,
+        chunk: List[Tuple[int, Dict[str, Any]]],
+        fingerprints: Dict[str, str],
+        stats: ImportStats
+    ) -> List[Tuple[int, Dict[str, Any]]]:
+        """Remove rows identical to the previous import of the feed (one HMGET per chunk)"""
+        
+        if not fingerprints:
+            return chunk
+        stored = self.feed_store.get_import_fingerprints(user_id, feed_key, list(fingerprints))
+        
+        changed = []
+        for index, product in chunk:
+            sku = product.get("sku")
+            if sku and stored.get(sku) == product_fingerprint(product):
+                stats.unchanged += 1
+            else:
+                changed.append((index, product))
+        return changed
+    
+    def _handle_removed(
+        self,
+        supabase,
+        user_id: str,
+        feed_key: str,
+        seen_skus: set,
+        removed_action: str,
+        stats: ImportStats
+    ) -> None:
+        """Apply removed_action to SKUs imported from this feed before but absent now"""
+        
+        removed = [
+            sku for sku in self.feed_store.iter_import_fingerprint_skus(user_id, feed_key)
+            if sku not in seen_skus
+        ]
+        
+        for skus in _chunked(removed, self.chunk_size):
             try:
-                # Check if product exists by SKU
-                existing = None
-                if product.get("sku"):
-                    result = supabase.table("products").select("id").eq(
-                        "user_id", user_id
-                    ).eq("sku", product["sku"]).execute()
-                    
-                    if result.data:
-                        existing = result.data[0]
-                
-                if existing and update_existing:
-                    # Update existing product
+                if removed_action == "out_of_stock":
                     supabase.table("products").update({
-                        **product,
-                        "updated_at": datetime.utcnow().isoformat()
-                    }).eq("id", existing["id"]).execute()
-                    updated += 1
-                elif not existing:
-                    # Insert new product
-                    supabase.table("products").insert({
-                        **product,
-                        "user_id": user_id,
-                        "status": "draft",
-                        "created_at": datetime.utcnow().isoformat()
-                    }).execute()
-                    imported += 1
-                    
+                        "stock": 0,
+                        "updated_at": datetime.utcnow().isoformat(),
+                    }).eq("user_id", user_id).in_("sku", skus).execute()
+                    stats.round_trips += 1
+                elif removed_action == "delete":
+                    supabase.table("products").delete().eq("user_id", user_id).in_("sku", skus).execute()
+                    stats.round_trips += 1
             except Exception as e:
-                errors.append({"index": i, "error": str(e)})
-                logger.warning(f"Failed to import product {i}: {e}")
+                stats.round_trips += 1
+                logger.warning(f"Failed to apply '{removed_action}' to {len(skus)} removed SKUs: {e}")
+                continue
+            
+            # Forget the SKUs so the action is applied once; a SKU that comes
+            # back later is treated as a new row
+            self.feed_store.delete_import_fingerprints(user_id, feed_key, skus)
+            stats.removed += len(skus)
+    
+    def _save_chunk(
+        self,
+        supabase,
+        user_id: str,
+        chunk: List[Tuple[int, Dict[str, Any]]],
+        update_existing: bool,
+        stats: ImportStats
+    ) -> List[str]:
+        """Write one chunk: one SELECT ... IN (skus), one upsert, one insert for SKU-less rows
+        
+        Returns the SKUs that were written.
+        """
+        
+        now = datetime.utcnow().isoformat()
+        
+        # One upsert cannot touch the same row twice: the last occurrence of a SKU wins
+        by_sku: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+        without_sku: List[Tuple[int, Dict[str, Any]]] = []
+        for index, product in chunk:
+            sku = product.get("sku")
+            if sku:
+                if sku in by_sku:
+                    stats.skipped += 1
+                by_sku[sku] = (index, product)
+            else:
+                without_sku.append((index, {**product, "sku": None}))
         
-        return {
-            "imported": imported,
-            "updated": updated,
-            "errors": errors
-        }
+        existing: Dict[str, Dict[str, Any]] = {}
+        if by_sku:
+            try:
+                result = supabase.table("products").select("sku, status, created_at").eq(
+                    "user_id", user_id
+                ).in_("sku", list(by_sku)).execute()
+                stats.round_trips += 1
+                existing = {row["sku"]: row for row in (result.data or [])}
+            except Exception as e:
+                for index, _ in chunk:
+                    stats.add_error(index, f"SKU prefetch failed: {e}", e)
+                logger.warning(f"Failed to prefetch SKUs for chunk: {e}")
+                return []
+        
+        # Existing rows keep their status/created_at so new and updated rows
+        # can share a single upsert statement
+        upserts: List[Tuple[int, Dict[str, Any], bool]] = []
+        for sku, (index, product) in by_sku.items():
+            current = existing.get(sku)
+            if current and not update_existing:
+                stats.skipped += 1
+                continue
+            upserts.append((index, {
+                **product,
+                "user_id": user_id,
+                "status": (current or {}).get("status") or "draft",
+                "created_at": (current or {}).get("created_at") or now,
+                "updated_at": now,
+            }, current is not None))
+        
+        inserts = [
+            (index, {**product, "user_id": user_id, "status": "draft", "created_at": now, "updated_at": now}, False)
+            for index, product in without_sku
+        ]
+        
+        written: List[Dict[str, Any]] = []
+        if upserts:
+            written += self._write_grouped(
+                lambda rows: supabase.table("products").upsert(rows, on_conflict="user_id,sku").execute(),
+                upserts, stats
+            )
+        if inserts:
+            self._write_grouped(
+                lambda rows: supabase.table("products").insert(rows).execute(),
+                inserts, stats
+            )
+        return [row["sku"] for row in written]
+    
+    def _write_grouped(
+        self, write, entries: List[Tuple[int, Dict[str, Any], bool]], stats: ImportStats
+    ) -> List[Dict[str, Any]]:
+        """Multi-row writes null out columns missing from some rows, so rows are grouped
+        by key set (feeds are uniform: normally a single group, i.e. one statement)"""
+        groups: Dict[Tuple[str, ...], List[Tuple[int, Dict[str, Any], bool]]] = {}
+        for entry in entries:
+            groups.setdefault(tuple(sorted(entry[1])), []).append(entry)
+        written: List[Dict[str, Any]] = []
+        for group in groups.values():
+            written += self._write_rows(write, group, stats)
+        return written
+    
+    def _write_rows(
+        self, write, rows: List[Tuple[int, Dict[str, Any], bool]], stats: ImportStats
+    ) -> List[Dict[str, Any]]:
+        """Write rows in one statement; on failure replay row by row to isolate bad rows.
+        Returns the rows that were written."""
+        try:
+            write([row for _, row, _ in rows])
+            stats.round_trips += 1
+            self._count_written(rows, stats)
+            return [row for _, row, _ in rows]
+        except Exception as e:
+            stats.round_trips += 1
+            logger.warning(f"Bulk write of {len(rows)} rows failed, retrying row by row: {e}")
+        
+        written = []
+        for index, row, is_update in rows:
+            try:
+                write([row])
+                self._count_written([(index, row, is_update)], stats)
+                written.append(row)
+            except Exception as e:
+                stats.add_error(index, str(e), e)
+                logger.warning(f"Failed to import product {index}: {e}")
+            finally:
+                stats.round_trips += 1
+        return written
+    
+    @staticmethod
+    def _count_written(rows: List[Tuple[int, Dict[str, Any], bool]], stats: ImportStats) -> None:
+        for _, _, is_update in rows:
+            if is_update:
+                stats.updated += 1
+            else:
+                stats.imported += 1
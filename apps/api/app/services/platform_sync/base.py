@@ -3,10 +3,20 @@ Base adapter interface for platform sync (Shopify, WooCommerce, etc.)
 """
 
 from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Any
+from typing import AsyncIterator, Dict, List, Optional, Any, Set, Tuple
 from datetime import datetime
 
+import httpx
+
+from app.core.http_client import get_http_pool
+
+# Field groups of a delta push (PlatformProduct attributes), each with its narrow endpoint
+PRICE_FIELDS = frozenset({"price", "compare_at_price"})
+STOCK_FIELDS = frozenset({"stock"})
+METADATA_FIELDS = frozenset({"title", "description", "status", "tags"})
+
 
 @dataclass
 class SyncResult:
@@ -40,10 +50,43 @@ class PlatformAdapter(ABC):
     """Abstract base for all platform integrations"""
 
     platform_name: str = "unknown"
+    # Concurrent requests the sync engine runs against one store
+    max_concurrency: int = 4
+    # Per-request timeout (seconds) of platform API calls
+    request_timeout: float = 30.0
+    # Adapters implementing list_changed_since let syncs skip unchanged links
+    supports_change_sweep: bool = False
 
     def __init__(self, credentials: Dict[str, str]):
         self.credentials = credentials
         self._validate_credentials()
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    @abstractmethod
+    def _base_url(self) -> str:
+        """API root of the store (its host keys the pooled HTTP client)"""
+        ...
+
+    @asynccontextmanager
+    async def _http(self) -> AsyncIterator[httpx.AsyncClient]:
+        """Keep-alive client shared by every adapter talking to this host, leased for
+        one call (the pinned client inside `async with adapter`)"""
+        if self._client is not None:
+            yield self._client
+            return
+        async with get_http_pool().lease(self._base_url) as client:
+            yield client
+
+    async def __aenter__(self) -> "PlatformAdapter":
+        # Pins the host's pooled client (never evicted) for a run of calls
+        self._client = await get_http_pool().acquire(self._base_url)
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        if self._client is not None:
+            get_http_pool().release(self._base_url)
+            self._client = None
 
     @abstractmethod
     def _validate_credentials(self) -> None:
@@ -58,7 +101,7 @@ class PlatformAdapter(ABC):
     @abstractmethod
     async def push_product(self, product: PlatformProduct) -> Dict[str, Any]:
         """Create or update a product on the remote platform.
-        Returns {"external_id": "...", "url": "..."} on success."""
+        Returns {"external_id": "...", "url": "...", "updated_at": "..."} on success."""
         ...
 
     @abstractmethod
@@ -81,6 +124,26 @@ class PlatformAdapter(ABC):
         """Remove a product from the remote platform."""
         ...
 
+    async def push_product_delta(self, product: PlatformProduct, fields: Set[str]) -> Dict[str, Any]:
+        """Update only `fields` of a product already on the platform, without resending
+        images and variants. Default: update_price / update_stock when only those
+        changed, a full push_product otherwise (or when a narrow update cannot apply).
+        Returns push_product's keys; updated_at is None when the platform did not report it."""
+        if not product.external_id or not fields <= PRICE_FIELDS | STOCK_FIELDS:
+            return await self.push_product(product)
+        if fields & PRICE_FIELDS and not await self.update_price(
+            product.external_id, product.price, product.compare_at_price,
+        ):
+            return await self.push_product(product)
+        if fields & STOCK_FIELDS and not await self.update_stock(product.external_id, product.stock):
+            return await self.push_product(product)
+        return {"external_id": product.external_id, "updated_at": None}
+
+    async def list_changed_since(self, since: datetime) -> AsyncIterator[Tuple[str, str]]:
+        """(external_id, remote updated_at) of every product modified after `since`."""
+        raise NotImplementedError(f"{self.platform_name} cannot list changed products")
+        yield  # pragma: no cover
+
     async def push_products_batch(self, products: List[PlatformProduct]) -> SyncResult:
         """Batch push — default loops one by one; adapters can override for bulk APIs."""
         result = SyncResult()
@@ -93,3 +156,48 @@ class PlatformAdapter(ABC):
                 result.errors.append({"sku": p.sku or p.title, "error": str(e)})
         result.success = result.failed == 0
         return result
+
+    async def update_stock_batch(self, quantities: Dict[str, int]) -> SyncResult:
+        """Batch stock update (external_id -> quantity) — default loops one by one."""
+        result = SyncResult()
+        for external_id, quantity in quantities.items():
+            try:
+                if await self.update_stock(external_id, quantity):
+                    result.synced += 1
+                    continue
+                error = "Product has no stock-tracked variant"
+            except Exception as e:
+                error = str(e)
+            result.failed += 1
+            result.errors.append({"external_id": external_id, "error": error})
+        result.success = result.failed == 0
+        return result
+
+    async def update_price_batch(self, prices: Dict[str, Tuple[float, Optional[float]]]) -> SyncResult:
+        """Batch price update (external_id -> (price, compare_at)) — default loops one by one."""
+        result = SyncResult()
+        for external_id, (price, compare_at) in prices.items():
+            try:
+                if await self.update_price(external_id, price, compare_at):
+                    result.synced += 1
+                    continue
+                error = "Product has no variant to price"
+            except Exception as e:
+                error = str(e)
+            result.failed += 1
+            result.errors.append({"external_id": external_id, "error": error})
+        result.success = result.failed == 0
+        return result
+
+    async def delete_products_batch(self, external_ids: List[str]) -> SyncResult:
+        """Batch delete — default loops one by one."""
+        result = SyncResult()
+        for external_id in external_ids:
+            try:
+                await self.delete_product(external_id)
+                result.synced += 1
+            except Exception as e:
+                result.failed += 1
+                result.errors.append({"external_id": external_id, "error": str(e)})
+        result.success = result.failed == 0
+        return result
@@ -4,10 +4,15 @@ Strategies: local_wins, remote_wins, newest_wins, manual
 """
 
 import logging
-from typing import Dict, Any, List, Optional
+import operator
+from dataclasses import dataclass
+from typing import Dict, Any, List, Mapping, Optional, Sequence, Tuple, Union
 from datetime import datetime
+from decimal import Decimal
 from enum import Enum
 
+import numpy as np
+
 logger = logging.getLogger(__name__)
 
 
@@ -54,6 +59,31 @@ CRITICAL_FIELDS = {"price", "stock", "compare_at_price"}
 # Fields that can auto-resolve with strategy
 SAFE_FIELDS = {"title", "description", "tags", "status", "images", "weight"}
 
+# Compared fields: name -> (local key, remote key)
+COMPARE_FIELDS: Dict[str, Tuple[str, str]] = {
+    "title": ("title", "title"),
+    "description": ("description", "description"),
+    "price": ("sale_price", "price"),
+    "stock": ("stock", "stock"),
+    "status": ("status", "status"),
+}
+# Compared as numbers when both sides are numeric (0.01 tolerance)
+NUMERIC_FIELDS = {"price", "stock"}
+
+
+# Value types compared as numbers (Decimal: NUMERIC columns read through asyncpg)
+NUMBER_TYPES = (int, float, Decimal)
+
+
+def _values_differ(local_val: Any, remote_val: Any) -> bool:
+    """Conflict rule for one value pair: None is skipped, numbers are compared with
+    a 0.01 tolerance (Decimal("10.00") equals 10.0), anything else as stripped strings"""
+    if local_val is None or remote_val is None:
+        return False
+    if isinstance(local_val, NUMBER_TYPES) and isinstance(remote_val, NUMBER_TYPES):
+        return not abs(float(local_val) - float(remote_val)) < 0.01
+    return str(local_val).strip() != str(remote_val).strip()
+
 
 def detect_conflicts(
     local_product: Dict[str, Any],
@@ -63,26 +93,12 @@ def detect_conflicts(
 ) -> List[SyncConflict]:
     """Compare local and remote product data, return list of conflicts."""
     conflicts: List[SyncConflict] = []
-    compare_fields = {
-        "title": ("title", "title"),
-        "description": ("description", "description"),
-        "price": ("sale_price", "price"),
-        "stock": ("stock", "stock"),
-        "status": ("status", "status"),
-    }
 
-    for field_name, (local_key, remote_key) in compare_fields.items():
+    for field_name, (local_key, remote_key) in COMPARE_FIELDS.items():
         local_val = local_product.get(local_key)
         remote_val = remote_product.get(remote_key)
 
-        if local_val is None or remote_val is None:
-            continue
-
-        # Normalize for comparison
-        if isinstance(local_val, (int, float)) and isinstance(remote_val, (int, float)):
-            if abs(float(local_val) - float(remote_val)) < 0.01:
-                continue
-        elif str(local_val).strip() == str(remote_val).strip():
+        if not _values_differ(local_val, remote_val):
             continue
 
         conflicts.append(SyncConflict(
@@ -98,6 +114,103 @@ def detect_conflicts(
     return conflicts
 
 
+# Aligned product snapshots: rows (one dict per product) or columns (key -> list / array)
+Snapshot = Union[Sequence[Dict[str, Any]], Mapping[str, Sequence[Any]]]
+
+
+def _column(snapshot: Snapshot, key: str, n: int) -> Sequence[Any]:
+    if isinstance(snapshot, Mapping):
+        column = snapshot.get(key)
+        return [None] * n if column is None else column
+    return [p.get(key) for p in snapshot]
+
+
+def _item(value: Any) -> Any:
+    """numpy scalar (from an array column) -> Python value"""
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def _value(snapshot: Snapshot, key: str, row: int) -> Any:
+    if isinstance(snapshot, Mapping):
+        column = snapshot.get(key)
+        return None if column is None else _item(column[row])
+    return snapshot[row].get(key)
+
+
+@dataclass
+class ConflictMatrix:
+    """Field-level diffs of aligned local / remote snapshots, one byte per product:
+    bit j of codes[i] is set when product i differs on fields[j]"""
+    codes: np.ndarray
+    product_ids: Sequence[str]
+    store_ids: Sequence[str]
+    local: Snapshot
+    remote: Snapshot
+    fields: Tuple[str, ...] = tuple(COMPARE_FIELDS)
+
+    @property
+    def mask(self) -> np.ndarray:
+        """(products x fields) boolean view"""
+        return (self.codes[:, None] >> np.arange(len(self.fields), dtype=np.uint8)) & 1 == 1
+
+    def conflicted_rows(self) -> np.ndarray:
+        return np.flatnonzero(self.codes)
+
+    def field_counts(self) -> Dict[str, int]:
+        return dict(zip(self.fields, self.mask.sum(axis=0).tolist()))
+
+    def conflicts(self, row: int) -> List[SyncConflict]:
+        """The SyncConflicts detect_conflicts returns for this product"""
+        return [SyncConflict(
+            product_id=self.product_ids[row],
+            store_id=self.store_ids[row],
+            field=field_name,
+            local_value=_value(self.local, COMPARE_FIELDS[field_name][0], row),
+            remote_value=_value(self.remote, COMPARE_FIELDS[field_name][1], row),
+            local_updated_at=_value(self.local, "updated_at", row),
+            remote_updated_at=_value(self.remote, "updated_at", row),
+        ) for j, field_name in enumerate(self.fields) if self.codes[row] >> j & 1]
+
+
+def _floats(values: Sequence[Any]) -> Optional[np.ndarray]:
+    """Numeric array of a column holding only numbers (None when anything else is in it)"""
+    array = np.asarray(values)
+    return array if array.dtype.kind in "iuf" else None
+
+
+def detect_conflicts_batch(
+    local: Snapshot,
+    remote: Snapshot,
+    product_ids: Sequence[str],
+    store_ids: Sequence[str],
+) -> ConflictMatrix:
+    """detect_conflicts over aligned snapshots, one columnar pass per field.
+    Numeric columns are compared as arrays (0.01 tolerance). Other columns are
+    compared for equality in C, and only the unequal pairs (usually a few) go
+    through the same per-pair rule as detect_conflicts (_values_differ).
+    Columnar snapshots (key -> list / array) skip the per-row extraction, which is
+    most of the cost for dict rows."""
+    n = len(product_ids)
+    if not (len(store_ids) == n and all(
+            isinstance(s, Mapping) or len(s) == n for s in (local, remote))):
+        raise ValueError("local, remote, product_ids and store_ids must be aligned")
+    codes = np.zeros(n, dtype=np.uint8)
+
+    for j, (field_name, (local_key, remote_key)) in enumerate(COMPARE_FIELDS.items()):
+        local_col, remote_col = _column(local, local_key, n), _column(remote, remote_key, n)
+        if field_name in NUMERIC_FIELDS:
+            local_num, remote_num = _floats(local_col), _floats(remote_col)
+            if local_num is not None and remote_num is not None:
+                codes |= (~(np.abs(local_num - remote_num) < 0.01)).astype(np.uint8) << j
+                continue
+        equal = np.fromiter(map(operator.eq, local_col, remote_col), dtype=bool, count=n)
+        for i in np.flatnonzero(~equal).tolist():
+            if _values_differ(_item(local_col[i]), _item(remote_col[i])):
+                codes[i] |= 1 << j
+
+    return ConflictMatrix(codes, product_ids, store_ids, local, remote)
+
+
 def resolve_conflicts(
     conflicts: List[SyncConflict],
     strategy: ConflictStrategy = ConflictStrategy.LOCAL_WINS,
@@ -175,8 +288,11 @@ def resolve_conflicts(
     }
 
 
-async def apply_sync_actions(supabase, actions: List[Dict], user_id: str) -> Dict[str, int]:
-    """Apply resolved sync actions to local DB or queue push to remote."""
+async def apply_sync_actions(repo, actions: List[Dict], user_id: str) -> Dict[str, int]:
+    """Apply resolved sync actions to local DB or queue push to remote.
+
+    `repo` is an app.core.repository.Repository (async, non-blocking).
+    """
     pushed = 0
     pulled = 0
 
@@ -192,18 +308,18 @@ async def apply_sync_actions(supabase, actions: List[Dict], user_id: str) -> Dic
                     "status": "status",
                 }
                 db_field = field_map.get(action["field"], action["field"])
-                supabase.table("products").update({
+                await repo.bulk_update_by_ids("products", [action["product_id"]], {
                     db_field: action["value"],
                     "updated_at": datetime.utcnow().isoformat(),
-                }).eq("id", action["product_id"]).eq("user_id", user_id).execute()
+                }, filters={"user_id": user_id})
                 pulled += 1
 
             elif action["direction"] == "push":
                 # Mark store link as outdated so next sync pushes the value
-                supabase.table("product_store_links").update({
+                await repo.bulk_update_by_ids("product_store_links", [action["product_id"]], {
                     "sync_status": "outdated",
                     "updated_at": datetime.utcnow().isoformat(),
-                }).eq("product_id", action["product_id"]).eq("store_id", action["store_id"]).execute()
+                }, id_column="product_id", filters={"store_id": action["store_id"]})
                 pushed += 1
 
         except Exception as e:
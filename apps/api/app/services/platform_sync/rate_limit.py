@@ -0,0 +1,112 @@
+"""
+Shopify rate limiting shared across workers
+Shopify meters each app per shop with leaky buckets: REST calls (40 calls,
+draining 2/s; 10x on Plus) and GraphQL query cost points (1000 points, restoring
+50/s on standard plans). Every worker reserves from the same Redis bucket before
+sending, sleeping as long as the bucket needs to drain, so a shop runs at its
+full allowed throughput without 429s. Responses (X-Shopify-Shop-Api-Call-Limit,
+GraphQL extensions.cost) keep the bucket in line with Shopify's own count.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, Mapping, Optional
+
+import redis
+
+logger = logging.getLogger(__name__)
+
+CALL_LIMIT_HEADER = "X-Shopify-Shop-Api-Call-Limit"
+
+
+@dataclass(frozen=True)
+class BucketSpec:
+    """Defaults until the shop's real limits are observed"""
+    capacity: float
+    rate: float  # units drained per second
+    headroom: float  # kept free for calls that bypass the limiter (other services on the same token)
+
+
+BUCKETS: Dict[str, BucketSpec] = {
+    "rest": BucketSpec(capacity=40, rate=2.0, headroom=2),
+    "graphql": BucketSpec(capacity=1000, rate=50.0, headroom=50),
+}
+
+# REST buckets drain in 20 s whatever the plan (40 / 2/s, 400 / 20/s)
+REST_DRAIN_SECONDS = 20
+
+# Query cost reserved when the caller gives no estimate
+GRAPHQL_DEFAULT_COST = 50
+
+
+def shop_key(shop_domain: str) -> str:
+    domain = shop_domain.lower().strip().rstrip("/")
+    for prefix in ("https://", "http://"):
+        if domain.startswith(prefix):
+            domain = domain[len(prefix):]
+    return domain
+
+
+class ShopifyRateLimiter:
+    """Reserve / observe the REST and GraphQL buckets of one shop"""
+
+    def __init__(self, shop_domain: str, queue=None):
+        self.shop = shop_key(shop_domain)
+        self._queue = queue
+
+    @property
+    def queue(self):
+        if self._queue is None:
+            from app.queue.redis_queue import redis_queue
+            self._queue = redis_queue
+        return self._queue
+
+    def _key(self, api: str) -> str:
+        return f"shopify_bucket:{self.shop}:{api}"
+
+    async def acquire(self, api: str = "rest", cost: float = 1) -> float:
+        """Wait for room for `cost` in the bucket; returns the seconds waited.
+        Without Redis, requests go out unpaced (the 429 retry still applies)."""
+        spec = BUCKETS[api]
+        try:
+            wait = self.queue.reserve_bucket(self._key(api), cost, spec.capacity, spec.rate, spec.headroom)
+        except redis.RedisError as e:
+            logger.warning(f"Shopify rate limiter unavailable for {self.shop}: {e}")
+            return 0.0
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def _observe(self, api: str, level: float, capacity: float = 0, rate: float = 0, refund: float = 0):
+        spec = BUCKETS[api]
+        try:
+            self.queue.observe_bucket(self._key(api), level, capacity, rate, refund, (spec.capacity, spec.rate))
+        except redis.RedisError as e:
+            logger.warning(f"Shopify rate limiter unavailable for {self.shop}: {e}")
+
+    def observe_rest(self, headers: Mapping[str, str]) -> None:
+        """Adopt the 'used/capacity' count of a REST response"""
+        value = headers.get(CALL_LIMIT_HEADER)
+        if not value:
+            return
+        try:
+            used, capacity = (float(part) for part in value.split("/"))
+        except ValueError:
+            return
+        self._observe("rest", used, capacity, capacity / REST_DRAIN_SECONDS)
+
+    def observe_graphql(self, cost: Optional[Dict[str, Any]], reserved: float) -> None:
+        """Refund the unused part of the reservation and adopt the throttle status"""
+        if not cost:
+            return
+        actual = cost.get("actualQueryCost")
+        refund = reserved - (actual if actual is not None else 0)
+        status = cost.get("throttleStatus") or {}
+        maximum = float(status.get("maximumAvailable") or 0)
+        level = maximum - float(status.get("currentlyAvailable", maximum)) if maximum else 0
+        self._observe("graphql", level, maximum, float(status.get("restoreRate") or 0), refund)
+
+    def throttled(self, api: str = "rest") -> None:
+        """Shopify answered 429 / THROTTLED: treat the bucket as full"""
+        self._observe(api, -1)
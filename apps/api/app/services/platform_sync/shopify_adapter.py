@@ -1,21 +1,70 @@
 """
-Shopify REST Admin API adapter (2024-01 stable)
+Shopify Admin API adapter (REST + GraphQL, 2024-01 stable)
 Uses access_token + shop_domain from store credentials.
 """
 
-import httpx
+import asyncio
 import logging
-from typing import Dict, List, Any, Optional
+from datetime import datetime
+from typing import AsyncIterator, Callable, Dict, List, Any, Optional, Set, Tuple
+from urllib.parse import urlencode
+
+import httpx
 
-from .base import PlatformAdapter, PlatformProduct, SyncResult
+from .base import METADATA_FIELDS, PRICE_FIELDS, STOCK_FIELDS, PlatformAdapter, PlatformProduct, SyncResult
+from .rate_limit import GRAPHQL_DEFAULT_COST, ShopifyRateLimiter
+from .shopify_cache import ShopifyIdCache, VariantIds
+from .shopify_bulk import (
+    PRODUCT_CREATE_MUTATION, PRODUCT_UPDATE_MUTATION, ShopifyBulkOperations,
+    gid, group_products, legacy_id, products_query,
+)
 
 logger = logging.getLogger(__name__)
 
 API_VERSION = "2024-01"
 
+# Retries of a request Shopify still throttles (429 / THROTTLED) despite pacing
+THROTTLE_RETRIES = 3
+
+# Products resolved per GET /products.json?ids=... / listed per sweep page (Shopify's page limit)
+IDS_PER_REQUEST = 250
+# Quantities per inventorySetQuantities call
+INVENTORY_BATCH_SIZE = 250
+# Update responses meaning a cached variant / inventory item / location is gone
+STALE_ID_STATUSES = (404, 422)
+
+# Product payload keys of the metadata fields (a delta push PUTs only these)
+METADATA_KEYS = {"title": "title", "description": "body_html", "status": "status", "tags": "tags"}
+
+INVENTORY_SET_QUANTITIES = """
+mutation inventorySetQuantities($input: InventorySetQuantitiesInput!) {
+  inventorySetQuantities(input: $input) {
+    inventoryAdjustmentGroup { id }
+    userErrors { field message }
+  }
+}
+"""
+
+
+class ShopifyAPIError(Exception):
+    """GraphQL errors returned with a 200 response"""
+
+    def __init__(self, errors: List[Dict[str, Any]]):
+        self.errors = errors
+        super().__init__("; ".join(e.get("message", str(e)) for e in errors))
+
 
 class ShopifyAdapter(PlatformAdapter):
     platform_name = "shopify"
+    # Batches from this size go through bulk operations (a staged upload and
+    # polling cost more than a few single calls)
+    bulk_threshold = 50
+    supports_change_sweep = True
+
+    def __init__(self, credentials: Dict[str, str]):
+        super().__init__(credentials)
+        self.rate_limiter = ShopifyRateLimiter(self.credentials["shop_domain"])
+        self.id_cache = ShopifyIdCache(self.credentials["shop_domain"])
 
     def _validate_credentials(self) -> None:
         if not self.credentials.get("access_token"):
@@ -38,20 +87,46 @@ class ShopifyAdapter(PlatformAdapter):
         }
 
     async def _request(self, method: str, path: str, json: Any = None) -> Dict:
-        async with httpx.AsyncClient(timeout=30) as client:
-            resp = await client.request(
-                method,
-                f"{self._base_url}{path}",
-                headers=self._headers,
-                json=json,
-            )
-            if resp.status_code == 429:
-                retry_after = float(resp.headers.get("Retry-After", "2"))
-                import asyncio
-                await asyncio.sleep(retry_after)
-                resp = await client.request(method, f"{self._base_url}{path}", headers=self._headers, json=json)
-            resp.raise_for_status()
-            return resp.json()
+        """REST call paced by the shop's shared call bucket"""
+        async with self._http() as client:
+            url = f"{self._base_url}{path}"
+            for attempt in range(THROTTLE_RETRIES + 1):
+                await self.rate_limiter.acquire("rest")
+                resp = await client.request(method, url, headers=self._headers, json=json, timeout=self.request_timeout)
+                self.rate_limiter.observe_rest(resp.headers)
+                if resp.status_code != 429 or attempt == THROTTLE_RETRIES:
+                    break
+                self.rate_limiter.throttled("rest")
+                await asyncio.sleep(float(resp.headers.get("Retry-After", "2")))
+        resp.raise_for_status()
+        return resp.json()
+
+    async def _graphql(self, query: str, variables: Optional[Dict[str, Any]] = None,
+                       cost: float = GRAPHQL_DEFAULT_COST) -> Dict[str, Any]:
+        """Admin GraphQL call paced by query cost (`cost`: estimated points, the
+        unused part is refunded from the response's extensions.cost)"""
+        async with self._http() as client:
+            payload = {"query": query, "variables": variables or {}}
+            for attempt in range(THROTTLE_RETRIES + 1):
+                await self.rate_limiter.acquire("graphql", cost)
+                resp = await client.post(
+                    f"{self._base_url}/graphql.json", headers=self._headers, json=payload, timeout=self.request_timeout,
+                )
+                if resp.status_code == 429 and attempt < THROTTLE_RETRIES:
+                    self.rate_limiter.throttled("graphql")
+                    await asyncio.sleep(float(resp.headers.get("Retry-After", "2")))
+                    continue
+                resp.raise_for_status()
+                body = resp.json()
+                self.rate_limiter.observe_graphql((body.get("extensions") or {}).get("cost"), cost)
+                errors = body.get("errors") or []
+                throttled = any((e.get("extensions") or {}).get("code") == "THROTTLED" for e in errors)
+                if throttled and attempt < THROTTLE_RETRIES:
+                    continue  # the next reservation waits for the observed bucket to drain
+                if errors:
+                    raise ShopifyAPIError(errors)
+                return body.get("data") or {}
+            raise ShopifyAPIError([{"message": "Throttled by Shopify"}])
 
     async def test_connection(self) -> bool:
         try:
@@ -104,15 +179,43 @@ class ShopifyAdapter(PlatformAdapter):
             data = await self._request("POST", "/products.json", json=payload)
 
         shopify_product = data.get("product", {})
+        self._remember_variants([shopify_product])  # variants may have been replaced
         return {
             "external_id": str(shopify_product.get("id", "")),
             "url": f"https://{self.credentials['shop_domain']}/admin/products/{shopify_product.get('id', '')}",
             "handle": shopify_product.get("handle", ""),
+            "updated_at": shopify_product.get("updated_at"),
+        }
+
+    async def push_product_delta(self, product: PlatformProduct, fields: Set[str]) -> Dict[str, Any]:
+        """Metadata through a product PUT without variants / images, price through the
+        variant, stock through its inventory level"""
+        if not product.external_id or not fields <= PRICE_FIELDS | STOCK_FIELDS | METADATA_FIELDS:
+            return await self.push_product(product)
+        updated_at = None
+        if fields & METADATA_FIELDS:
+            payload = self._to_shopify_payload(product)
+            data = await self._request("PUT", f"/products/{product.external_id}.json", json={"product": {
+                "id": product.external_id,
+                **{key: payload[key] for name, key in METADATA_KEYS.items() if name in fields},
+            }})
+            updated_at = data.get("product", {}).get("updated_at")
+        if fields & PRICE_FIELDS and not await self.update_price(
+            product.external_id, product.price, product.compare_at_price,
+        ):
+            return await self.push_product(product)
+        if fields & STOCK_FIELDS and not await self.update_stock(product.external_id, product.stock):
+            return await self.push_product(product)
+        return {
+            "external_id": product.external_id,
+            "url": f"https://{self.credentials['shop_domain']}/admin/products/{product.external_id}",
+            "updated_at": updated_at,
         }
 
     async def pull_product(self, external_id: str) -> PlatformProduct:
         data = await self._request("GET", f"/products/{external_id}.json")
         sp = data.get("product", {})
+        self._remember_variants([sp])
         variants_raw = sp.get("variants", [])
         first_variant = variants_raw[0] if variants_raw else {}
 
@@ -136,43 +239,302 @@ class ShopifyAdapter(PlatformAdapter):
             } for v in variants_raw],
             tags=[t.strip() for t in sp.get("tags", "").split(",") if t.strip()],
             status="active" if sp.get("status") == "active" else "draft",
+            metadata={"updated_at": sp.get("updated_at")},
         )
 
-    async def update_stock(self, external_id: str, quantity: int) -> bool:
-        data = await self._request("GET", f"/products/{external_id}.json")
-        variant = data.get("product", {}).get("variants", [{}])[0]
-        inventory_item_id = variant.get("inventory_item_id")
-        if not inventory_item_id:
-            return False
+    async def list_changed_since(self, since: datetime) -> AsyncIterator[Tuple[str, str]]:
+        """updated_at_min listing, IDS_PER_REQUEST ids per page (since_id paging)"""
+        since_id = 0
+        while True:
+            query = urlencode({
+                "updated_at_min": since.isoformat(), "since_id": since_id,
+                "fields": "id,updated_at", "limit": IDS_PER_REQUEST,
+            })
+            products = (await self._request("GET", f"/products.json?{query}")).get("products", [])
+            for sp in products:
+                yield str(sp["id"]), sp.get("updated_at")
+            if len(products) < IDS_PER_REQUEST:
+                return
+            since_id = products[-1]["id"]
 
-        # Get locations
-        loc_data = await self._request("GET", "/locations.json")
-        locations = loc_data.get("locations", [])
-        if not locations:
-            return False
+    # ── Variant / location ids ──
 
-        location_id = locations[0]["id"]
-        await self._request("POST", "/inventory_levels/set.json", json={
-            "location_id": location_id,
-            "inventory_item_id": inventory_item_id,
-            "available": quantity,
-        })
-        return True
+    def _remember_variants(self, products: List[Dict[str, Any]]) -> Dict[str, VariantIds]:
+        """Cache the first variant ids of REST product payloads"""
+        ids = {}
+        for sp in products:
+            variant = (sp.get("variants") or [{}])[0]
+            if sp.get("id") and variant.get("id"):
+                item = variant.get("inventory_item_id")
+                ids[str(sp["id"])] = VariantIds(str(variant["id"]), str(item) if item else None)
+        if ids:
+            self.id_cache.set(ids)
+        return ids
 
-    async def update_price(self, external_id: str, price: float, compare_at: float = None) -> bool:
-        data = await self._request("GET", f"/products/{external_id}.json")
-        variant = data.get("product", {}).get("variants", [{}])[0]
-        variant_id = variant.get("id")
-        if not variant_id:
-            return False
+    async def _variant_ids(self, external_ids: List[str]) -> Dict[str, VariantIds]:
+        """Cached ids; misses are resolved IDS_PER_REQUEST products per GET"""
+        found = self.id_cache.get(external_ids)
+        missing = [eid for eid in dict.fromkeys(external_ids) if eid not in found]
+        for start in range(0, len(missing), IDS_PER_REQUEST):
+            chunk = missing[start:start + IDS_PER_REQUEST]
+            data = await self._request(
+                "GET", f"/products.json?ids={','.join(chunk)}&fields=id,variants&limit={len(chunk)}",
+            )
+            found.update(self._remember_variants(data.get("products", [])))
+        return found
+
+    async def _location_id(self) -> Optional[str]:
+        """Location stock is written to (the shop's first, as before), cached"""
+        location_id = self.id_cache.get_location()
+        if location_id is None:
+            locations = (await self._request("GET", "/locations.json")).get("locations", [])
+            if not locations:
+                return None
+            location_id = str(locations[0]["id"])
+            self.id_cache.set_location(location_id)
+        return location_id
+
+    def _forget(self, external_ids: List[str]) -> None:
+        self.id_cache.invalidate(external_ids)
+        self.id_cache.invalidate_location()
+
+    async def _with_fresh_ids(self, external_id: str, update: Callable) -> bool:
+        """Run update(ids) with cached ids, once more with re-fetched ones if Shopify
+        says they are stale"""
+        for attempt in range(2):
+            ids = (await self._variant_ids([external_id])).get(external_id)
+            if not ids:
+                return False
+            try:
+                return await update(ids)
+            except httpx.HTTPStatusError as e:
+                if attempt or e.response.status_code not in STALE_ID_STATUSES:
+                    raise
+                self._forget([external_id])
+        return False
+
+    async def update_stock(self, external_id: str, quantity: int) -> bool:
+        async def set_level(ids: VariantIds) -> bool:
+            location_id = await self._location_id()
+            if not ids.inventory_item_id or not location_id:
+                return False
+            await self._request("POST", "/inventory_levels/set.json", json={
+                "location_id": location_id,
+                "inventory_item_id": ids.inventory_item_id,
+                "available": quantity,
+            })
+            return True
 
+        return await self._with_fresh_ids(external_id, set_level)
+
+    async def update_price(self, external_id: str, price: float, compare_at: float = None) -> bool:
         update_payload: Dict[str, Any] = {"price": str(price)}
         if compare_at is not None:
             update_payload["compare_at_price"] = str(compare_at)
 
-        await self._request("PUT", f"/variants/{variant_id}.json", json={"variant": update_payload})
-        return True
+        async def put_variant(ids: VariantIds) -> bool:
+            await self._request("PUT", f"/variants/{ids.variant_id}.json", json={"variant": update_payload})
+            return True
+
+        return await self._with_fresh_ids(external_id, put_variant)
+
+    async def update_stock_batch(self, quantities: Dict[str, int]) -> SyncResult:
+        """inventorySetQuantities, INVENTORY_BATCH_SIZE items per call. Shopify applies
+        a call entirely or not at all: items it rejects are dropped (and their cached
+        ids forgotten) and the rest of the batch is sent again."""
+        return await self._set_quantities(quantities, await self._variant_ids(list(quantities)))
+
+    async def _set_quantities(self, quantities: Dict[str, int], ids: Dict[str, VariantIds]) -> SyncResult:
+        result = SyncResult()
+        location_id = await self._location_id()
+        items = []
+        for external_id, quantity in quantities.items():
+            item = ids.get(external_id)
+            if item and item.inventory_item_id and location_id:
+                items.append((external_id, item.inventory_item_id, quantity))
+            else:
+                result.failed += 1
+                result.errors.append({"external_id": external_id, "error": "Product has no stock-tracked variant"})
+
+        for start in range(0, len(items), INVENTORY_BATCH_SIZE):
+            batch = items[start:start + INVENTORY_BATCH_SIZE]
+            while batch:
+                try:
+                    data = await self._graphql(INVENTORY_SET_QUANTITIES, {"input": {
+                        "name": "available",
+                        "reason": "correction",
+                        "ignoreCompareQuantity": True,
+                        "quantities": [{
+                            "inventoryItemId": gid("InventoryItem", item_id),
+                            "locationId": gid("Location", location_id),
+                            "quantity": quantity,
+                        } for _, item_id, quantity in batch],
+                    }}, cost=10)
+                    user_errors = data["inventorySetQuantities"]["userErrors"]
+                except Exception as e:
+                    user_errors = [{"message": str(e)}]
+
+                rejected = {}
+                for error in user_errors:
+                    field = error.get("field") or []
+                    if len(field) > 2 and field[1] == "quantities" and str(field[2]).isdigit():
+                        rejected[int(field[2])] = error["message"]
+                if not user_errors:
+                    result.synced += len(batch)
+                    break
+                if not rejected or len(rejected) == len(batch):
+                    # Not attributable to single items: the whole batch failed
+                    message = "; ".join(e.get("message", str(e)) for e in user_errors)
+                    rejected = {i: rejected.get(i, message) for i in range(len(batch))}
+                for i, message in rejected.items():
+                    result.failed += 1
+                    result.errors.append({"external_id": batch[i][0], "error": message})
+                self._forget([batch[i][0] for i in rejected])
+                batch = [item for i, item in enumerate(batch) if i not in rejected]
+
+        result.success = result.failed == 0
+        return result
 
     async def delete_product(self, external_id: str) -> bool:
         await self._request("DELETE", f"/products/{external_id}.json")
+        self.id_cache.invalidate([external_id])
         return True
+
+    # ── Bulk operations ──
+
+    def _bulk(self) -> ShopifyBulkOperations:
+        return ShopifyBulkOperations(self)
+
+    def _from_bulk_node(self, node: Dict[str, Any]) -> PlatformProduct:
+        variants_raw = node.get("variants", [])
+        first_variant = variants_raw[0] if variants_raw else {}
+        return PlatformProduct(
+            external_id=legacy_id(node.get("id")),
+            title=node.get("title", ""),
+            description=node.get("descriptionHtml") or "",
+            price=float(first_variant.get("price") or 0),
+            compare_at_price=float(first_variant["compareAtPrice"]) if first_variant.get("compareAtPrice") else None,
+            sku=first_variant.get("sku"),
+            barcode=first_variant.get("barcode"),
+            stock=first_variant.get("inventoryQuantity") or 0,
+            images=[img["url"] for img in node.get("images", []) if img.get("url")],
+            variants=[{
+                "external_id": legacy_id(v.get("id")),
+                "title": v.get("title", ""),
+                "price": float(v.get("price") or 0),
+                "sku": v.get("sku"),
+                "stock": v.get("inventoryQuantity") or 0,
+                "inventory_item_id": legacy_id((v.get("inventoryItem") or {}).get("id")),
+            } for v in variants_raw],
+            tags=list(node.get("tags") or []),
+            status="active" if node.get("status") == "ACTIVE" else "draft",
+            metadata={"updated_at": node.get("updatedAt")},
+        )
+
+    async def pull_products_bulk(self, search: Optional[str] = None) -> AsyncIterator[PlatformProduct]:
+        """Whole catalog (or the products matching `search`, e.g.
+        "updated_at:>'2026-10-01T00:00:00Z'") via one bulk query, streamed"""
+        async for node in group_products(self._bulk().run_query(products_query(search))):
+            yield self._from_bulk_node(node)
+
+    def _to_product_input(self, product: PlatformProduct) -> Dict[str, Any]:
+        """productCreate / productUpdate variables. Stock is not part of it:
+        inventory is per location (update_stock)."""
+        data: Dict[str, Any] = {
+            "title": product.title,
+            "descriptionHtml": product.description,
+            "status": "ACTIVE" if product.status == "active" else "DRAFT",
+            "tags": product.tags,
+        }
+        if product.external_id:
+            data["id"] = gid("Product", product.external_id)
+            # Updates only touch variants whose Shopify id is known
+            variants = [v for v in product.variants if v.get("external_id")]
+        else:
+            variants = product.variants or [{
+                "price": product.price, "sku": product.sku, "barcode": product.barcode,
+                "compare_at_price": product.compare_at_price,
+            }]
+            if product.images:
+                data["images"] = [{"src": url} for url in product.images]
+        if variants:
+            data["variants"] = [{
+                **({"id": gid("ProductVariant", v["external_id"])} if v.get("external_id") else {}),
+                "price": str(v.get("price", product.price)),
+                "sku": v.get("sku") or "",
+                **({"barcode": v["barcode"]} if v.get("barcode") else {}),
+                **({"compareAtPrice": str(v["compare_at_price"])} if v.get("compare_at_price") else {}),
+            } for v in variants]
+        return {"input": data}
+
+    async def push_products_batch(self, products: List[PlatformProduct]) -> SyncResult:
+        """Bulk mutations: one for new products (productCreate), one for linked ones
+        (productUpdate), then their stock through update_stock_batch (product inputs
+        carry no inventory). details["external_ids"] lines up with `products` (None
+        when the product failed); details["stock"] counts the stock updates, whose
+        failures are listed in errors by external_id."""
+        if len(products) < self.bulk_threshold:
+            return await super().push_products_batch(products)
+
+        result = SyncResult()
+        external_ids: List[Optional[str]] = [None] * len(products)
+        errors: Dict[int, str] = {}
+        variant_ids: Dict[str, VariantIds] = {}
+        bulk = self._bulk()
+        for mutation, field, indexes in (
+            (PRODUCT_CREATE_MUTATION, "productCreate", [i for i, p in enumerate(products) if not p.external_id]),
+            (PRODUCT_UPDATE_MUTATION, "productUpdate", [i for i, p in enumerate(products) if p.external_id]),
+        ):
+            if not indexes:
+                continue
+            try:
+                async for line in bulk.run_mutation(mutation, (self._to_product_input(products[i]) for i in indexes)):
+                    i = indexes[line["__lineNumber"]]
+                    payload = (line.get("data") or {}).get(field) or {}
+                    line_errors = payload.get("userErrors") or line.get("errors") or []
+                    if line_errors or not payload.get("product"):
+                        errors[i] = "; ".join(e.get("message", str(e)) for e in line_errors) or "No product returned"
+                    else:
+                        external_ids[i] = legacy_id(payload["product"]["id"])
+                        ids = self._bulk_variant_ids(payload["product"])
+                        if ids:
+                            variant_ids[external_ids[i]] = ids
+            except Exception as e:
+                logger.error(f"Shopify bulk {field} failed: {e}")
+                for i in indexes:
+                    if external_ids[i] is None:
+                        errors.setdefault(i, str(e))
+
+        for i, p in enumerate(products):
+            if external_ids[i] is not None:
+                result.synced += 1
+            else:
+                result.failed += 1
+                result.errors.append({"sku": p.sku or p.title, "error": errors.get(i, "No result line")})
+
+        # The mutations returned the variant ids, so the stock update needs no lookup
+        if variant_ids:
+            self.id_cache.set(variant_ids)
+        quantities = {external_ids[i]: p.stock for i, p in enumerate(products) if external_ids[i] is not None}
+        missing = [external_id for external_id in quantities if external_id not in variant_ids]
+        if missing:
+            variant_ids.update(await self._variant_ids(missing))
+        stock = await self._set_quantities(quantities, variant_ids) if quantities else SyncResult()
+        result.errors += stock.errors
+        result.success = result.failed == 0 and stock.failed == 0
+        result.details = {
+            "external_ids": external_ids,
+            "bulk_operations": bulk.operations,
+            "stock": {"synced": stock.synced, "failed": stock.failed},
+        }
+        return result
+
+    @staticmethod
+    def _bulk_variant_ids(product: Dict[str, Any]) -> Optional[VariantIds]:
+        """First variant ids of a bulk mutation's product payload"""
+        edges = (product.get("variants") or {}).get("edges") or []
+        node = edges[0]["node"] if edges else {}
+        if not node.get("id"):
+            return None
+        item = (node.get("inventoryItem") or {}).get("id")
+        return VariantIds(legacy_id(node["id"]), legacy_id(item) if item else None)
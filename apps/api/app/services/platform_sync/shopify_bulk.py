@@ -0,0 +1,243 @@
+"""
+Shopify GraphQL bulk operations
+A bulk query exports a whole connection (the catalog with its variants and
+images) as one JSONL file, and a bulk mutation runs one mutation per line of an
+uploaded JSONL file, so a catalog costs a handful of requests instead of one per
+product. Shopify runs the operation asynchronously: it is polled until done, then
+its result file is streamed line by line.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional
+
+from app.core.http_client import lease_http_client
+
+logger = logging.getLogger(__name__)
+
+# Shopify's limit on a staged bulk mutation variables file
+BULK_UPLOAD_MAX_BYTES = 20 * 1024 * 1024
+BULK_POLL_INTERVAL = 1.0
+BULK_MAX_POLL_INTERVAL = 10.0
+BULK_TIMEOUT_SECONDS = 3600
+
+STAGED_UPLOADS_CREATE = """
+mutation stagedUploadsCreate($input: [StagedUploadInput!]!) {
+  stagedUploadsCreate(input: $input) {
+    stagedTargets { url resourceUrl parameters { name value } }
+    userErrors { field message }
+  }
+}
+"""
+
+BULK_RUN_QUERY = """
+mutation bulkOperationRunQuery($query: String!) {
+  bulkOperationRunQuery(query: $query) {
+    bulkOperation { id status }
+    userErrors { field message }
+  }
+}
+"""
+
+BULK_RUN_MUTATION = """
+mutation bulkOperationRunMutation($mutation: String!, $stagedUploadPath: String!) {
+  bulkOperationRunMutation(mutation: $mutation, stagedUploadPath: $stagedUploadPath) {
+    bulkOperation { id status }
+    userErrors { field message }
+  }
+}
+"""
+
+BULK_OPERATION_STATUS = """
+query bulkOperation($id: ID!) {
+  node(id: $id) {
+    ... on BulkOperation { id status errorCode objectCount url partialDataUrl }
+  }
+}
+"""
+
+PRODUCTS_BULK_QUERY = """
+{
+  products%s {
+    edges { node {
+      id title descriptionHtml status tags updatedAt
+      variants { edges { node {
+        id title price compareAtPrice sku barcode inventoryQuantity inventoryItem { id }
+      } } }
+      images { edges { node { id url } } }
+    } }
+  }
+}
+"""
+
+# First variant and inventory item of a mutated product, for the stock update that follows
+PRODUCT_VARIANT_IDS = " variants(first: 1) { edges { node { id inventoryItem { id } } } }"
+
+PRODUCT_CREATE_MUTATION = (
+    "mutation call($input: ProductInput!) "
+    "{ productCreate(input: $input) { product { id" + PRODUCT_VARIANT_IDS + " } userErrors { field message } } }"
+)
+
+PRODUCT_UPDATE_MUTATION = (
+    "mutation call($input: ProductInput!) "
+    "{ productUpdate(input: $input) { product { id" + PRODUCT_VARIANT_IDS + " } userErrors { field message } } }"
+)
+
+TERMINAL_STATUSES = {"COMPLETED", "FAILED", "CANCELED", "EXPIRED"}
+
+
+def gid(resource: str, external_id: str) -> str:
+    """REST id -> GraphQL global id (gid://shopify/Product/123)"""
+    return external_id if str(external_id).startswith("gid://") else f"gid://shopify/{resource}/{external_id}"
+
+
+def legacy_id(global_id: Optional[str]) -> str:
+    """GraphQL global id -> REST id (what product_store_links store)"""
+    return (global_id or "").rsplit("/", 1)[-1]
+
+
+def products_query(search: Optional[str] = None) -> str:
+    """Bulk query of the catalog, optionally filtered (Shopify search syntax)"""
+    return PRODUCTS_BULK_QUERY % (f"(query: {json.dumps(search)})" if search else "")
+
+
+def jsonl_chunks(lines: Iterable[Dict[str, Any]], max_bytes: int = BULK_UPLOAD_MAX_BYTES):
+    """Split mutation variables into JSONL files under the upload limit.
+    Yields (first line number, lines count, payload bytes)."""
+    buffer, size, start, count = [], 0, 0, 0
+    for line in lines:
+        encoded = (json.dumps(line, separators=(",", ":"), default=str) + "\n").encode()
+        if buffer and size + len(encoded) > max_bytes:
+            yield start, count, b"".join(buffer)
+            buffer, size, start, count = [], 0, start + count, 0
+        buffer.append(encoded)
+        size += len(encoded)
+        count += 1
+    if buffer:
+        yield start, count, b"".join(buffer)
+
+
+async def group_products(lines: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[Dict[str, Any]]:
+    """Reassemble the flattened bulk query output: each product line is followed by
+    its variant and image lines (linked by __parentId)"""
+    current: Optional[Dict[str, Any]] = None
+    async for line in lines:
+        parent = line.get("__parentId")
+        if parent is None:
+            if current is not None:
+                yield current
+            current = {**line, "variants": [], "images": []}
+        elif current is None or parent != current["id"]:
+            logger.warning(f"Bulk query line for {parent} out of order, skipped")
+        elif "/ProductVariant/" in line.get("id", ""):
+            current["variants"].append(line)
+        else:
+            current["images"].append(line)
+    if current is not None:
+        yield current
+
+
+class ShopifyBulkError(Exception):
+    pass
+
+
+class ShopifyBulkOperations:
+    """Run bulk queries / mutations through an adapter's paced GraphQL client"""
+
+    def __init__(
+        self,
+        adapter,
+        poll_interval: float = BULK_POLL_INTERVAL,
+        max_poll_interval: float = BULK_MAX_POLL_INTERVAL,
+        timeout: float = BULK_TIMEOUT_SECONDS,
+        max_upload_bytes: int = BULK_UPLOAD_MAX_BYTES,
+    ):
+        self.adapter = adapter
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.timeout = timeout
+        self.max_upload_bytes = max_upload_bytes
+        self.operations: List[Dict[str, Any]] = []
+
+    async def run_query(self, query: str) -> AsyncIterator[Dict[str, Any]]:
+        """Run a bulk query and stream its JSONL result lines"""
+        data = await self.adapter._graphql(BULK_RUN_QUERY, {"query": query}, cost=10)
+        operation = self._started(data["bulkOperationRunQuery"])
+        async for line in self._results(await self._wait(operation["id"])):
+            yield line
+
+    async def run_mutation(self, mutation: str, variables: Iterable[Dict[str, Any]]) -> AsyncIterator[Dict[str, Any]]:
+        """Run `mutation` once per variables dict (one bulk operation per upload-sized
+        chunk, one after the other: Shopify runs one bulk mutation per shop at a time).
+        Streams result lines; __lineNumber indexes `variables` across chunks."""
+        for start, _count, payload in jsonl_chunks(variables, self.max_upload_bytes):
+            path = await self._stage_upload(payload)
+            data = await self.adapter._graphql(
+                BULK_RUN_MUTATION, {"mutation": mutation, "stagedUploadPath": path}, cost=10,
+            )
+            operation = self._started(data["bulkOperationRunMutation"])
+            async for line in self._results(await self._wait(operation["id"])):
+                line["__lineNumber"] = start + int(line.get("__lineNumber", 0))
+                yield line
+
+    def _started(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        if payload.get("userErrors"):
+            raise ShopifyBulkError("; ".join(e["message"] for e in payload["userErrors"]))
+        return payload["bulkOperation"]
+
+    async def _stage_upload(self, payload: bytes) -> str:
+        """Upload a JSONL variables file; returns its stagedUploadPath"""
+        data = await self.adapter._graphql(STAGED_UPLOADS_CREATE, {"input": [{
+            "resource": "BULK_MUTATION_VARIABLES",
+            "filename": "bulk_op_vars.jsonl",
+            "mimeType": "text/jsonl",
+            "httpMethod": "POST",
+        }]}, cost=10)
+        result = data["stagedUploadsCreate"]
+        if result.get("userErrors"):
+            raise ShopifyBulkError("; ".join(e["message"] for e in result["userErrors"]))
+        target = result["stagedTargets"][0]
+        fields = {p["name"]: p["value"] for p in target["parameters"]}
+
+        async with lease_http_client(target["url"]) as client:
+            resp = await client.post(
+                target["url"], data=fields, files={"file": ("bulk_op_vars.jsonl", payload, "text/jsonl")},
+                timeout=max(self.adapter.request_timeout, 120),
+            )
+        resp.raise_for_status()
+        return fields.get("key") or target["resourceUrl"]
+
+    async def _wait(self, operation_id: str) -> Dict[str, Any]:
+        """Poll until the operation ends (interval growing up to max_poll_interval)"""
+        deadline = time.monotonic() + self.timeout
+        interval = self.poll_interval
+        while True:
+            data = await self.adapter._graphql(BULK_OPERATION_STATUS, {"id": operation_id}, cost=2)
+            operation = data.get("node") or {}
+            if operation.get("status") in TERMINAL_STATUSES:
+                break
+            if time.monotonic() > deadline:
+                raise ShopifyBulkError(f"Bulk operation {operation_id} still {operation.get('status')} after {self.timeout}s")
+            await asyncio.sleep(interval)
+            interval = min(interval * 1.5, self.max_poll_interval)
+
+        self.operations.append(operation)
+        if operation["status"] != "COMPLETED":
+            raise ShopifyBulkError(
+                f"Bulk operation {operation_id} {operation['status'].lower()}: {operation.get('errorCode')}"
+            )
+        return operation
+
+    async def _results(self, operation: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        """Stream the result file (no url: the operation matched nothing)"""
+        url = operation.get("url")
+        if not url:
+            return
+        async with lease_http_client(url) as client, \
+                client.stream("GET", url, timeout=max(self.adapter.request_timeout, 120)) as resp:
+            resp.raise_for_status()
+            async for line in resp.aiter_lines():
+                if line.strip():
+                    yield json.loads(line)
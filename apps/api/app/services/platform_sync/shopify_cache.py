@@ -0,0 +1,95 @@
+"""
+Shopify id cache shared across workers
+Stock and price updates address a variant (and its inventory item at a
+location), while links only store the product id. Resolving those ids used to
+cost a product GET (plus a locations GET for stock) before every update; they are
+cached in Redis per shop instead. Entries expire individually after ID_TTL and
+are dropped when the product is deleted, re-pushed, or an update finds them stale.
+"""
+
+import json
+import logging
+import time
+from typing import Dict, Iterable, NamedTuple, Optional
+
+import redis
+
+from .rate_limit import shop_key
+
+logger = logging.getLogger(__name__)
+
+ID_TTL_SECONDS = 86400
+LOCATION_TTL_SECONDS = 3600
+
+
+class VariantIds(NamedTuple):
+    """First variant of a product: what update_price / update_stock touch"""
+    variant_id: str
+    inventory_item_id: Optional[str]
+
+
+class ShopifyIdCache:
+    """external_id -> VariantIds and the stock location of one shop"""
+
+    def __init__(self, shop_domain: str, queue=None, ttl_seconds: int = ID_TTL_SECONDS):
+        self.shop = shop_key(shop_domain)
+        self.ttl_seconds = ttl_seconds
+        self._queue = queue
+
+    @property
+    def queue(self):
+        if self._queue is None:
+            from app.queue.redis_queue import redis_queue
+            self._queue = redis_queue
+        return self._queue
+
+    def get(self, external_ids: Iterable[str]) -> Dict[str, VariantIds]:
+        """Fresh entries only; a Redis outage reads as all misses"""
+        try:
+            raw = self.queue.get_shopify_ids(self.shop, list(external_ids))
+        except redis.RedisError as e:
+            logger.warning(f"Shopify id cache unavailable for {self.shop}: {e}")
+            return {}
+        now = time.time()
+        found = {}
+        for external_id, value in raw.items():
+            variant_id, inventory_item_id, cached_at = json.loads(value)
+            if now - cached_at < self.ttl_seconds:
+                found[external_id] = VariantIds(variant_id, inventory_item_id)
+        return found
+
+    def set(self, ids: Dict[str, VariantIds]) -> None:
+        now = time.time()
+        try:
+            self.queue.set_shopify_ids(self.shop, {
+                external_id: json.dumps([v.variant_id, v.inventory_item_id, now]) for external_id, v in ids.items()
+            })
+        except redis.RedisError as e:
+            logger.warning(f"Shopify id cache unavailable for {self.shop}: {e}")
+
+    def invalidate(self, external_ids: Iterable[str]) -> None:
+        try:
+            self.queue.delete_shopify_ids(self.shop, list(external_ids))
+        except redis.RedisError as e:
+            logger.warning(f"Shopify id cache unavailable for {self.shop}: {e}")
+
+    def _location_key(self) -> str:
+        return f"shopify_location:{self.shop}"
+
+    def get_location(self) -> Optional[str]:
+        try:
+            return self.queue.cache_get(self._location_key())
+        except redis.RedisError:
+            return None
+
+    def set_location(self, location_id: str) -> None:
+        try:
+            self.queue.cache_set(self._location_key(), location_id, LOCATION_TTL_SECONDS)
+        except redis.RedisError as e:
+            logger.warning(f"Shopify id cache unavailable for {self.shop}: {e}")
+
+    def invalidate_location(self) -> None:
+        try:
+            self.queue.cache_delete(self._location_key())
+        except redis.RedisError as e:
+            logger.warning(f"Shopify id cache unavailable for {self.shop}: {e}")
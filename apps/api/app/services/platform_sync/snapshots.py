@@ -0,0 +1,124 @@
+"""
+Per-link sync snapshots
+Each product-store link remembers what it last agreed on with its store: a hash of
+the product payload pushed or pulled (sync_hash) and the store's updated_at for it
+(remote_updated_at), plus the synced field values themselves (synced_fields) so a
+push can send only the fields that changed. The store's latest known updated_at (last_remote_update) is
+fed by platform webhooks (store-webhook) and by an updated_at_min sweep at the
+start of each sync, so steady-state syncs skip links that moved on neither side
+instead of pulling and pushing every one of them.
+"""
+
+import hashlib
+import json
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional, Set
+
+import redis
+
+logger = logging.getLogger(__name__)
+
+# Local product fields a sync pushes (what sync_hash covers)
+SNAPSHOT_FIELDS = ("title", "description", "sale_price", "stock", "status")
+
+# Sweeps re-list this much before the previous sweep (clock skew between us and the store)
+SWEEP_OVERLAP = timedelta(minutes=5)
+WATERMARK_TTL_SECONDS = 30 * 86400
+
+
+def synced_fields(product: Dict[str, Any]) -> Dict[str, Any]:
+    """Canonical values of the synced fields of a local product row, keyed by
+    PlatformProduct attribute"""
+    return {
+        "title": str(product.get("title") or "").strip(),
+        "description": str(product.get("description") or "").strip(),
+        "price": round(float(product.get("sale_price") or 0), 2),
+        "stock": int(product.get("stock") or 0),
+        "status": product.get("status") or "",
+    }
+
+
+def payload_hash(product: Dict[str, Any]) -> str:
+    """Stable hash of the synced fields of a local product row"""
+    canonical = list(synced_fields(product).values())
+    return hashlib.sha1(json.dumps(canonical, separators=(",", ":")).encode()).hexdigest()
+
+
+def changed_fields(link: Dict[str, Any], fields: Dict[str, Any]) -> Optional[Set[str]]:
+    """Fields whose value differs from the link's last synced one (None: nothing recorded)"""
+    synced = link.get("synced_fields")
+    if not synced:
+        return None
+    return {name for name, value in fields.items() if synced.get(name) != value}
+
+
+def parse_timestamp(value: Any) -> Optional[datetime]:
+    """timestamptz column / ISO string (Shopify offsets, WooCommerce naive GMT) -> aware datetime"""
+    if not value:
+        return None
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def local_moved(link: Dict[str, Any], local_hash: str) -> bool:
+    return link.get("sync_hash") != local_hash
+
+
+def remote_moved(link: Dict[str, Any]) -> bool:
+    """The store reported a version newer than the one last synced (or none was recorded)"""
+    synced = parse_timestamp(link.get("remote_updated_at"))
+    if synced is None:
+        return True
+    latest = parse_timestamp(link.get("last_remote_update"))
+    return latest is not None and latest > synced
+
+
+async def oldest_remote_version(repo, store_id: str) -> Optional[datetime]:
+    """Sweep start when no watermark is known: every recorded version is covered"""
+    value = await repo.fetchval(
+        "SELECT min(remote_updated_at) FROM product_store_links WHERE store_id = $1", store_id,
+    )
+    return parse_timestamp(value)
+
+
+async def record_remote_versions(repo, store_id: str, versions: Dict[str, str]) -> int:
+    """last_remote_update of every link of the store, by external id"""
+    if not versions:
+        return 0
+    return await repo.bulk_update_rows("product_store_links", [
+        {"external_product_id": external_id, "last_remote_update": updated_at}
+        for external_id, updated_at in versions.items()
+    ], filters={"store_id": store_id}, id_column="external_product_id")
+
+
+class SweepWatermarks:
+    """Start time of each store's last completed sweep (Redis; a miss falls back
+    to the oldest recorded remote version)"""
+
+    def __init__(self, queue=None):
+        self._queue = queue
+
+    @property
+    def queue(self):
+        if self._queue is None:
+            from app.queue.redis_queue import redis_queue
+            self._queue = redis_queue
+        return self._queue
+
+    def get(self, store_id: str) -> Optional[datetime]:
+        try:
+            return parse_timestamp(self.queue.cache_get(f"sync_sweep:{store_id}"))
+        except redis.RedisError as e:
+            logger.warning(f"Sweep watermark unavailable for {store_id}: {e}")
+            return None
+
+    def set(self, store_id: str, swept_at: datetime) -> None:
+        try:
+            self.queue.cache_set(f"sync_sweep:{store_id}", swept_at.isoformat(), WATERMARK_TTL_SECONDS)
+        except redis.RedisError as e:
+            logger.warning(f"Sweep watermark unavailable for {store_id}: {e}")
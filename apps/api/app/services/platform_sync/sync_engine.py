@@ -0,0 +1,373 @@
+"""
+Concurrent sync engine for product-store links
+Links run concurrently, bounded per store (adapter.max_concurrency, so one slow or
+rate-limited store never starves the others), with one adapter per store. Link
+status updates and job_items are buffered and written in batches instead of two
+writes per link. Links already on a store get a delta push of the fields that
+changed since their last sync (price, stock, metadata endpoints) instead of the
+full payload. Throughput is reported per store.
+"""
+
+import asyncio
+import json
+import logging
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+from .base import PlatformProduct
+from .conflict_resolution import ConflictStrategy, apply_sync_actions, detect_conflicts, resolve_conflicts
+from .registry import get_adapter
+from .snapshots import (
+    SWEEP_OVERLAP, SweepWatermarks, changed_fields, local_moved, oldest_remote_version, parse_timestamp,
+    payload_hash, record_remote_versions, remote_moved, synced_fields,
+)
+
+logger = logging.getLogger(__name__)
+
+# Link updates / job_items buffered before one batched write
+SYNC_WRITE_BATCH_SIZE = 100
+
+# Links with their product and store embedded, scoped to the user
+SYNC_LINKS_SQL = """
+    SELECT l.*,
+           jsonb_build_object(
+               'id', p.id, 'title', p.title, 'description', p.description,
+               'sale_price', p.sale_price, 'stock', p.stock, 'status', p.status,
+               'user_id', p.user_id, 'updated_at', p.updated_at
+           ) AS products,
+           jsonb_build_object(
+               'id', s.id, 'name', s.name, 'platform', s.platform,
+               'credentials_encrypted', s.credentials_encrypted
+           ) AS shops
+    FROM product_store_links l
+    JOIN products p ON p.id = l.product_id
+    JOIN shops s ON s.id = l.store_id
+    WHERE {where}
+"""
+
+
+def _link_filters(user_id: str, product_ids: Sequence[str], store_ids: Sequence[str]) -> Tuple[str, List[Any]]:
+    conditions, args = ["p.user_id = $1"], [user_id]
+    if product_ids:
+        args.append(list(product_ids))
+        conditions.append(f"l.product_id = ANY(${len(args)})")
+    if store_ids:
+        args.append(list(store_ids))
+        conditions.append(f"l.store_id = ANY(${len(args)})")
+    return " AND ".join(conditions), args
+
+
+async def load_sync_links(repo, user_id: str, product_ids: Sequence[str] = (), store_ids: Sequence[str] = ()):
+    where, args = _link_filters(user_id, product_ids, store_ids)
+    return await repo.fetch(SYNC_LINKS_SQL.format(where=where), *args)
+
+
+async def count_sync_links(repo, user_id: str, product_ids: Sequence[str] = (), store_ids: Sequence[str] = ()) -> int:
+    where, args = _link_filters(user_id, product_ids, store_ids)
+    return await repo.fetchval(
+        f"SELECT count(*) FROM product_store_links l JOIN products p ON p.id = l.product_id WHERE {where}", *args,
+    )
+
+
+def sync_item_id(job_id: str, link_id: str) -> str:
+    """Deterministic job_items id per (job, link): a retried job skips links already recorded"""
+    return str(uuid.uuid5(uuid.UUID(str(job_id)), str(link_id)))
+
+
+@dataclass
+class StoreThroughput:
+    """Per-store counters of one sync run"""
+    store_id: str
+    name: str = ""
+    platform: str = ""
+    concurrency: int = 1
+    links: int = 0
+    synced: int = 0
+    failed: int = 0
+    conflicts: int = 0
+    unchanged: int = 0
+    remote_changes: Optional[int] = None  # products the sweep found changed (None: no sweep)
+    started_at: float = field(default_factory=time.monotonic)
+    finished_at: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        duration = max((self.finished_at or time.monotonic()) - self.started_at, 1e-6)
+        return {
+            "store_id": self.store_id,
+            "name": self.name,
+            "platform": self.platform,
+            "concurrency": self.concurrency,
+            "links": self.links,
+            "synced": self.synced,
+            "failed": self.failed,
+            "conflicts": self.conflicts,
+            "unchanged": self.unchanged,
+            "remote_changes": self.remote_changes,
+            "duration_seconds": round(duration, 3),
+            "links_per_second": round((self.synced + self.failed + self.unchanged) / duration, 2),
+        }
+
+
+class SyncEngine:
+    """Run the pull → conflict check → push cycle for many links concurrently"""
+
+    def __init__(
+        self,
+        repo,
+        job_id: str,
+        user_id: str,
+        conflict_strategy: str = "local_wins",
+        write_batch_size: int = SYNC_WRITE_BATCH_SIZE,
+        max_concurrency: Optional[int] = None,
+        adapter_factory: Callable[[str, Dict[str, str]], Any] = get_adapter,
+        on_progress: Optional[Callable[[int, int], Awaitable[None]]] = None,
+        watermarks: Optional[SweepWatermarks] = None,
+        delta_push: bool = True,
+    ):
+        self.repo = repo
+        self.job_id = job_id
+        self.user_id = user_id
+        self.strategy = ConflictStrategy(conflict_strategy)
+        self.write_batch_size = write_batch_size
+        self.max_concurrency = max_concurrency
+        self.adapter_factory = adapter_factory
+        self.on_progress = on_progress
+        self.watermarks = watermarks or SweepWatermarks()
+        self.delta_push = delta_push
+        self.stores: Dict[str, StoreThroughput] = {}
+        self.processed = 0
+        self.total = 0
+        self._link_updates: List[Dict[str, Any]] = []
+        self._job_items: List[Dict[str, Any]] = []
+        self._flush_lock = asyncio.Lock()
+
+    async def run(self, links: List[Dict[str, Any]], skip_link_ids: Set[str] = frozenset()) -> Dict[str, Any]:
+        """Sync every link (minus those already recorded); returns totals and per-store throughput"""
+        by_store: Dict[str, List[Dict[str, Any]]] = {}
+        for link in links:
+            if link["id"] not in skip_link_ids:
+                by_store.setdefault((link.get("shops") or {}).get("id", ""), []).append(link)
+        self.total = sum(len(store_links) for store_links in by_store.values())
+
+        await asyncio.gather(*(self._sync_store(store_id, store_links) for store_id, store_links in by_store.items()))
+        await self.flush()
+
+        stores = [stats.to_dict() for stats in self.stores.values()]
+        return {
+            "synced": sum(s["synced"] for s in stores),
+            "failed": sum(s["failed"] for s in stores),
+            "conflicts": sum(s["conflicts"] for s in stores),
+            "unchanged": sum(s["unchanged"] for s in stores),
+            "skipped": len(links) - self.total,
+            "stores": stores,
+        }
+
+    async def _sync_store(self, store_id: str, links: List[Dict[str, Any]]):
+        store = links[0].get("shops") or {}
+        stats = self.stores[store_id] = StoreThroughput(
+            store_id=store_id, name=store.get("name", ""), platform=store.get("platform", ""), links=len(links),
+        )
+        try:
+            creds = store.get("credentials_encrypted") or {}
+            if isinstance(creds, str):
+                creds = json.loads(creds)
+            adapter = self.adapter_factory(store.get("platform", "").lower(), creds)
+        except Exception as e:
+            # No adapter (bad platform / credentials): every link of the store fails
+            for link in links:
+                await self._record(stats, link, *self._failure(link, e))
+            stats.finished_at = time.monotonic()
+            return
+
+        stats.concurrency = min(self.max_concurrency or adapter.max_concurrency, adapter.max_concurrency)
+        semaphore = asyncio.Semaphore(stats.concurrency)
+
+        async def bounded(link, tracked):
+            async with semaphore:
+                try:
+                    outcome = await self._sync_link(adapter, link, store, tracked)
+                except Exception as e:
+                    outcome = self._failure(link, e)
+            await self._record(stats, link, *outcome)
+
+        async with adapter:
+            swept_at = await self._sweep(adapter, store_id, links, stats)
+            await asyncio.gather(*(bounded(link, swept_at is not None) for link in links))
+        if swept_at is not None:
+            self.watermarks.set(store_id, swept_at)
+        stats.finished_at = time.monotonic()
+
+    async def _sweep(self, adapter, store_id: str, links: List[Dict[str, Any]],
+                     stats: StoreThroughput) -> Optional[datetime]:
+        """Record the remote versions changed since the last sweep (on every link of
+        the store, and on `links` in memory). Returns the sweep start, or None when
+        remote versions cannot be trusted this run (every linked product is pulled)."""
+        if not getattr(adapter, "supports_change_sweep", False):
+            return None
+        started = datetime.now(timezone.utc)
+        since = self.watermarks.get(store_id) or await oldest_remote_version(self.repo, store_id)
+        versions: Dict[str, str] = {}
+        if since is not None:
+            try:
+                async for external_id, updated_at in adapter.list_changed_since(since - SWEEP_OVERLAP):
+                    versions[external_id] = updated_at
+                await record_remote_versions(self.repo, store_id, versions)
+            except Exception as e:
+                logger.warning(f"Change sweep failed for store {store_id}: {e}")
+                return None
+        for link in links:
+            updated_at = versions.get(link.get("external_product_id") or "")
+            if updated_at:
+                link["last_remote_update"] = updated_at
+        stats.remote_changes = len(versions)
+        return started
+
+    async def _sync_link(self, adapter, link: Dict[str, Any], store: Dict[str, Any], tracked: bool = False):
+        """One link: pull + conflict check (when already on the store), then push.
+        With `tracked` remote versions, unchanged links are skipped and links only
+        changed locally are pushed without a pull. Links with synced field values
+        push only the fields changed locally or found different on the store.
+        Returns (status, link update, job item fields, conflict count)."""
+        product = link.get("products") or {}
+        external_id = link.get("external_product_id")
+        now = datetime.utcnow().isoformat()
+        conflict_count = 0
+        local_hash = payload_hash(product)
+        local_fields = synced_fields(product)
+        remote_diff: Optional[Set[str]] = set()  # None: the store's values are unknown
+        pull = bool(external_id)
+
+        if external_id and tracked:
+            pull = remote_moved(link)
+            if not pull and not local_moved(link, local_hash):
+                return "unchanged", None, {"status": "skipped", "message": "Unchanged since last sync"}, 0
+
+        if pull:
+            try:
+                remote = await adapter.pull_product(external_id)
+                remote_dict = {
+                    "title": remote.title, "description": remote.description,
+                    "price": remote.price, "stock": remote.stock,
+                    "status": remote.status, "updated_at": link.get("last_remote_update"),
+                }
+                local_dict = {
+                    "title": product.get("title"), "description": product.get("description"),
+                    "sale_price": product.get("sale_price"), "stock": product.get("stock"),
+                    "status": product.get("status"), "updated_at": product.get("updated_at"),
+                }
+                conflicts = detect_conflicts(local_dict, remote_dict, link["product_id"], store.get("id", ""))
+                remote_diff = {c.field for c in conflicts}
+
+                if conflicts:
+                    conflict_count = len(conflicts)
+                    resolution = resolve_conflicts(conflicts, self.strategy)
+
+                    if resolution["manual_review"]:
+                        # job_items.status has no 'warning' value (CHECK constraint)
+                        return "skipped", {
+                            "id": link["id"],
+                            "sync_status": "conflict",
+                            "metadata": {"conflicts": resolution["manual_review"]},
+                            "updated_at": now,
+                        }, {
+                            "status": "skipped",
+                            "error_code": "CONFLICT_REVIEW",
+                            "message": f"{len(resolution['manual_review'])} conflicts need review",
+                        }, conflict_count
+
+                    if resolution["actions"]:
+                        await apply_sync_actions(self.repo, resolution["actions"], self.user_id)
+            except Exception as pull_err:
+                logger.warning(f"Could not pull remote product {external_id}: {pull_err}")
+                remote_diff = None
+
+        platform_product = PlatformProduct(
+            external_id=external_id,
+            title=product.get("title", ""),
+            description=product.get("description", ""),
+            price=float(product.get("sale_price") or 0),
+            stock=product.get("stock", 0),
+            status=product.get("status", "draft"),
+        )
+        local_diff = changed_fields(link, local_fields) if self.delta_push and external_id else None
+        delta = None if local_diff is None or remote_diff is None else local_diff | remote_diff
+        if delta is None:
+            push_result = await adapter.push_product(platform_product)
+        elif delta:
+            push_result = await adapter.push_product_delta(platform_product, delta)
+        else:
+            push_result = {"external_id": external_id}  # the store already holds the local values
+
+        remote_version = parse_timestamp(push_result.get("updated_at"))
+        if remote_version or delta is None:
+            version = remote_version.isoformat() if remote_version else None
+            versions = {"remote_updated_at": version, "last_remote_update": version}
+        elif not delta:
+            versions = {"remote_updated_at": link.get("last_remote_update") or link.get("remote_updated_at")}
+        else:
+            # Unreported version after a delta push: keep the recorded one (if the push
+            # moved it, the next sweep costs one pull that finds nothing to push)
+            versions = {}
+        return "success", {
+            "id": link["id"],
+            "external_product_id": push_result.get("external_id", external_id),
+            "sync_hash": local_hash,
+            "synced_fields": local_fields,
+            **versions,
+            "sync_status": "synced",
+            "last_sync_at": datetime.utcnow().isoformat(),
+            "last_error": None,
+            "updated_at": datetime.utcnow().isoformat(),
+        }, {
+            "status": "success",
+            "message": f"Synced with {store.get('name', 'store')}",
+        }, conflict_count
+
+    @staticmethod
+    def _failure(link: Dict[str, Any], error: Exception):
+        return "failed", {
+            "id": link["id"],
+            "sync_status": "error",
+            "last_error": str(error)[:500],
+            "updated_at": datetime.utcnow().isoformat(),
+        }, {
+            "status": "failed",
+            "message": str(error)[:500],
+            "error_code": "SYNC_FAILED",
+        }, 0
+
+    async def _record(self, stats: StoreThroughput, link, status, link_update, item, conflicts):
+        if status == "failed":
+            stats.failed += 1
+        elif status == "unchanged":
+            stats.unchanged += 1
+        else:
+            stats.synced += 1  # conflicts flagged for review count as handled, as before
+        stats.conflicts += conflicts
+        if link_update:
+            self._link_updates.append(link_update)
+        self._job_items.append({
+            "id": sync_item_id(self.job_id, link["id"]),
+            "job_id": self.job_id,
+            "product_id": link.get("product_id"),
+            "processed_at": datetime.utcnow().isoformat(),
+            **item,
+        })
+        self.processed += 1
+        if len(self._job_items) >= self.write_batch_size:
+            await self.flush()
+
+    async def flush(self):
+        """Write buffered link updates and job_items (one statement per kind and key set)"""
+        async with self._flush_lock:
+            link_updates, self._link_updates = self._link_updates, []
+            job_items, self._job_items = self._job_items, []
+            if link_updates:
+                await self.repo.bulk_update_rows("product_store_links", link_updates)
+            if job_items:
+                await self.repo.bulk_insert("job_items", job_items, returning=None)
+            if (link_updates or job_items) and self.on_progress:
+                await self.on_progress(self.processed, self.total)
@@ -3,17 +3,40 @@ WooCommerce REST API adapter (v3)
 Uses consumer_key + consumer_secret + store_url from credentials.
 """
 
-import httpx
 import logging
-from typing import Dict, List, Any, Optional
+from datetime import datetime, timezone
+from typing import AsyncIterator, Dict, List, Any, Optional, Set, Tuple
 
 from .base import PlatformAdapter, PlatformProduct, SyncResult
 
 logger = logging.getLogger(__name__)
 
+# Products listed per sweep page (WooCommerce's per_page limit)
+SWEEP_PAGE_SIZE = 100
+# create + update + delete operations per /products/batch call (WooCommerce's limit)
+BATCH_SIZE = 100
+
+# Product payload keys per PlatformProduct field (a delta push PUTs only these)
+DELTA_KEYS = {
+    "title": ("name",),
+    "description": ("description",),
+    "status": ("status",),
+    "tags": ("tags",),
+    "price": ("regular_price", "sale_price"),
+    "compare_at_price": ("regular_price", "sale_price"),
+    "stock": ("manage_stock", "stock_quantity"),
+}
+
+
+def _gmt(value: Optional[str]) -> Optional[str]:
+    """date_*_gmt fields are naive UTC"""
+    return f"{value}+00:00" if value else None
+
 
 class WooCommerceAdapter(PlatformAdapter):
     platform_name = "woocommerce"
+    max_concurrency = 8
+    supports_change_sweep = True
 
     def _validate_credentials(self) -> None:
         if not self.credentials.get("consumer_key"):
@@ -35,16 +58,17 @@ class WooCommerceAdapter(PlatformAdapter):
         return (self.credentials["consumer_key"], self.credentials["consumer_secret"])
 
     async def _request(self, method: str, path: str, json: Any = None, params: Dict = None) -> Any:
-        async with httpx.AsyncClient(timeout=30) as client:
+        async with self._http() as client:
             resp = await client.request(
                 method,
                 f"{self._base_url}{path}",
                 auth=self._auth,
                 json=json,
                 params=params,
+                timeout=self.request_timeout,
             )
-            resp.raise_for_status()
-            return resp.json()
+        resp.raise_for_status()
+        return resp.json()
 
     async def test_connection(self) -> bool:
         try:
@@ -87,6 +111,22 @@ class WooCommerceAdapter(PlatformAdapter):
             "external_id": str(data.get("id", "")),
             "url": data.get("permalink", ""),
             "slug": data.get("slug", ""),
+            "updated_at": _gmt(data.get("date_modified_gmt")),
+        }
+
+    async def push_product_delta(self, product: PlatformProduct, fields: Set[str]) -> Dict[str, Any]:
+        """One product PUT carrying only the changed fields (no images, weight or sku)"""
+        if not product.external_id or not fields <= DELTA_KEYS.keys():
+            return await self.push_product(product)
+        # Prices as update_price sends them: a cleared compare-at price also clears sale_price
+        full = {**self._to_wc_payload(product), **self._price_payload(product.price, product.compare_at_price)}
+        payload = {key: full[key] for name in fields for key in DELTA_KEYS[name] if key in full}
+        data = await self._request("PUT", f"/products/{product.external_id}", json=payload)
+        return {
+            "external_id": str(data.get("id", product.external_id)),
+            "url": data.get("permalink", ""),
+            "slug": data.get("slug", ""),
+            "updated_at": _gmt(data.get("date_modified_gmt")),
         }
 
     async def pull_product(self, external_id: str) -> PlatformProduct:
@@ -106,8 +146,24 @@ class WooCommerceAdapter(PlatformAdapter):
             images=[img["src"] for img in data.get("images", [])],
             tags=[t["name"] for t in data.get("tags", [])],
             status="active" if data.get("status") == "publish" else "draft",
+            metadata={"updated_at": _gmt(data.get("date_modified_gmt"))},
         )
 
+    async def list_changed_since(self, since: datetime) -> AsyncIterator[Tuple[str, str]]:
+        """modified_after listing, SWEEP_PAGE_SIZE ids per page"""
+        after = since.astimezone(timezone.utc).replace(tzinfo=None).isoformat(timespec="seconds")
+        page = 1
+        while True:
+            products = await self._request("GET", "/products", params={
+                "modified_after": after, "dates_are_gmt": "true", "orderby": "id", "order": "asc",
+                "per_page": SWEEP_PAGE_SIZE, "page": page, "_fields": "id,date_modified_gmt",
+            })
+            for data in products:
+                yield str(data["id"]), _gmt(data.get("date_modified_gmt"))
+            if len(products) < SWEEP_PAGE_SIZE:
+                return
+            page += 1
+
     async def update_stock(self, external_id: str, quantity: int) -> bool:
         await self._request("PUT", f"/products/{external_id}", json={
             "stock_quantity": quantity,
@@ -115,17 +171,97 @@ class WooCommerceAdapter(PlatformAdapter):
         })
         return True
 
-    async def update_price(self, external_id: str, price: float, compare_at: float = None) -> bool:
-        payload: Dict[str, Any] = {}
+    @staticmethod
+    def _price_payload(price: float, compare_at: Optional[float] = None) -> Dict[str, Any]:
         if compare_at:
-            payload["regular_price"] = str(compare_at)
-            payload["sale_price"] = str(price)
-        else:
-            payload["regular_price"] = str(price)
-            payload["sale_price"] = ""
-        await self._request("PUT", f"/products/{external_id}", json=payload)
+            return {"regular_price": str(compare_at), "sale_price": str(price)}
+        return {"regular_price": str(price), "sale_price": ""}
+
+    async def update_price(self, external_id: str, price: float, compare_at: float = None) -> bool:
+        await self._request("PUT", f"/products/{external_id}", json=self._price_payload(price, compare_at))
         return True
 
     async def delete_product(self, external_id: str) -> bool:
         await self._request("DELETE", f"/products/{external_id}", params={"force": True})
         return True
+
+    # ── /products/batch ──
+
+    async def _batch(self, **operations: List[Any]) -> Dict[str, List[Tuple[Optional[Dict[str, Any]], Optional[str]]]]:
+        """Run create / update / delete operations BATCH_SIZE per call (actions mixed
+        in a call). Returns (product, error) per item of each action, in order."""
+        queued = [(action, item) for action, items in operations.items() for item in items]
+        results: Dict[str, List[Tuple[Optional[Dict[str, Any]], Optional[str]]]] = {a: [] for a in operations}
+        for start in range(0, len(queued), BATCH_SIZE):
+            payload: Dict[str, List[Any]] = {}
+            for action, item in queued[start:start + BATCH_SIZE]:
+                payload.setdefault(action, []).append(item)
+            try:
+                data = await self._request("POST", "/products/batch", json=payload)
+            except Exception as e:
+                logger.error(f"WooCommerce batch call failed: {e}")
+                for action, items in payload.items():
+                    results[action].extend((None, str(e)) for _ in items)
+                continue
+            for action, items in payload.items():
+                lines = data.get(action) or []
+                for i in range(len(items)):
+                    line = lines[i] if i < len(lines) else {}
+                    error = line.get("error")
+                    if error or not line.get("id"):
+                        results[action].append((None, (error or {}).get("message") or "No result returned"))
+                    else:
+                        results[action].append((line, None))
+        return results
+
+    @staticmethod
+    def _batch_result(keys: List[str], key_name: str, results) -> SyncResult:
+        result = SyncResult()
+        for key, (_, error) in zip(keys, results):
+            if error is None:
+                result.synced += 1
+            else:
+                result.failed += 1
+                result.errors.append({key_name: key, "error": error})
+        result.success = result.failed == 0
+        return result
+
+    async def push_products_batch(self, products: List[PlatformProduct]) -> SyncResult:
+        """Creates and updates through /products/batch. details["external_ids"] lines
+        up with `products` (None when the product failed)."""
+        external_ids: List[Optional[str]] = [None] * len(products)
+        errors: Dict[int, str] = {}
+        creates = [i for i, p in enumerate(products) if not p.external_id]
+        updates = [i for i, p in enumerate(products) if p.external_id]
+        results = await self._batch(
+            create=[self._to_wc_payload(products[i]) for i in creates],
+            update=[{"id": products[i].external_id, **self._to_wc_payload(products[i])} for i in updates],
+        )
+        for indexes, action in ((creates, "create"), (updates, "update")):
+            for i, (data, error) in zip(indexes, results[action]):
+                if error is None:
+                    external_ids[i] = str(data["id"])
+                else:
+                    errors[i] = error
+
+        result = self._batch_result(
+            [p.sku or p.title for p in products], "sku",
+            [(None, errors.get(i)) for i in range(len(products))],
+        )
+        result.details = {"external_ids": external_ids}
+        return result
+
+    async def update_stock_batch(self, quantities: Dict[str, int]) -> SyncResult:
+        items = [{"id": external_id, "manage_stock": True, "stock_quantity": quantity}
+                 for external_id, quantity in quantities.items()]
+        return self._batch_result(list(quantities), "external_id", (await self._batch(update=items))["update"])
+
+    async def update_price_batch(self, prices: Dict[str, Tuple[float, Optional[float]]]) -> SyncResult:
+        items = [{"id": external_id, **self._price_payload(price, compare_at)}
+                 for external_id, (price, compare_at) in prices.items()]
+        return self._batch_result(list(prices), "external_id", (await self._batch(update=items))["update"])
+
+    async def delete_products_batch(self, external_ids: List[str]) -> SyncResult:
+        """Batch deletes are permanent (force), as delete_product"""
+        results = (await self._batch(delete=list(external_ids)))["delete"]
+        return self._batch_result(external_ids, "external_id", results)
@@ -0,0 +1,77 @@
+"""
+Product query building
+SQL filter clauses and sort columns shared by the product list, search, exports
+and background export tasks.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+import re
+
+# Sortable product columns → SQL type (for typed keyset cursor bounds)
+PRODUCT_SORT_TYPES = {
+    "created_at": "timestamptz",
+    "updated_at": "timestamptz",
+    "title": "text",
+    "price": "numeric",
+    "stock_quantity": "integer",
+    "sku": "text",
+}
+
+# Maintained by the database (generated column): never returned to clients or exported
+INTERNAL_PRODUCT_COLUMNS = ("search_vector",)
+
+
+def public_product(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Product row without internal columns (drops them in place)"""
+    for column in INTERNAL_PRODUCT_COLUMNS:
+        row.pop(column, None)
+    return row
+
+
+def search_tsquery(text: str, weights: str = "") -> str:
+    """to_tsquery('simple', ...) text matching every word of `text` as a prefix.
+    Words are reduced to letters/digits, so user input cannot inject tsquery syntax;
+    `weights` restricts matches to those weight classes (e.g. "A" = title/SKU)."""
+    words = re.findall(r"\w+", text.lower())
+    return " & ".join(f"'{word}':*{weights}" for word in words)
+
+
+def product_filters(
+    user_id: str,
+    status: Optional[str] = None,
+    category: Optional[str] = None,
+    search: Optional[str] = None,
+    vendor: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    low_stock: Optional[int] = None,
+    tags: Optional[str] = None,
+) -> Tuple[str, List[Any]]:
+    """WHERE clause + positional args for the product list filters"""
+    clauses, args = ["user_id = $1"], [user_id]
+
+    def add(clause: str, value: Any):
+        args.append(value)
+        clauses.append(clause.replace("$?", f"${len(args)}"))
+
+    if status:
+        add("status = $?", status)
+    if category:
+        add("category = $?", category)
+    if vendor:
+        add("vendor = $?", vendor)
+    if search:
+        # Substrings of title / SKU (trigram indexes) or words anywhere (search vector)
+        args.append(f"%{search}%")
+        add(f"(title ILIKE ${len(args)} OR sku ILIKE ${len(args)} OR search_vector @@ to_tsquery('simple', $?))",
+            search_tsquery(search))
+    if min_price is not None:
+        add("price >= $?", min_price)
+    if max_price is not None:
+        add("price <= $?", max_price)
+    if low_stock is not None:
+        add("stock_quantity <= $?", low_stock)
+    if tags:
+        add("tags @> $?::text[]", [tags])
+
+    return " AND ".join(clauses), args
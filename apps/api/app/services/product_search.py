@@ -0,0 +1,70 @@
+"""
+Product search
+Ranked full-text search and autocomplete over the catalog, served by the
+products.search_vector GIN index (words, prefix-matched) and the title / SKU
+trigram indexes (SKU prefixes, typo-tolerant title matches).
+"""
+
+from typing import Any, Dict, List, Optional
+
+from app.services.product_queries import search_tsquery
+
+# Columns returned by search and autocomplete (no descriptions: results stay light)
+SEARCH_COLUMNS = "id, title, sku, price, status, stock_quantity, category, vendor, image_url"
+
+
+def _escape_like(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+async def search_products(
+    repo,
+    user_id: str,
+    q: str,
+    limit: int = 20,
+    offset: int = 0,
+    status: Optional[str] = None,
+    category: Optional[str] = None,
+    fuzzy: bool = True,
+) -> List[Dict[str, Any]]:
+    """Products matching every word of `q` (as prefixes), best first.
+    Rank: weighted cover density (title/SKU > vendor/category > description) plus
+    title similarity; `fuzzy` also admits titles within a typo of `q`."""
+    args: List[Any] = [user_id, search_tsquery(q), q.strip(), f"{_escape_like(q.strip())}%"]
+    matches = ["p.search_vector @@ query", "p.sku ILIKE $4"]
+    if fuzzy:
+        matches.append("$3 <% p.title")  # word similarity, trigram index
+    filters = ""
+    if status:
+        args.append(status)
+        filters += f" AND p.status = ${len(args)}"
+    if category:
+        args.append(category)
+        filters += f" AND p.category = ${len(args)}"
+
+    rows = await repo.fetch(
+        f"SELECT {', '.join('p.' + c for c in SEARCH_COLUMNS.split(', '))}, "
+        f"ts_rank_cd(p.search_vector, query, 32) + word_similarity($3, p.title) AS rank "
+        f"FROM public.products p, to_tsquery('simple', $2) query "
+        f"WHERE p.user_id = $1 AND ({' OR '.join(matches)}){filters} "
+        f"ORDER BY rank DESC, p.id "
+        f"LIMIT {int(limit)} OFFSET {int(offset)}",
+        *args,
+    )
+    for row in rows:
+        row["rank"] = round(float(row["rank"]), 4)
+    return rows
+
+
+async def suggest_products(repo, user_id: str, prefix: str, limit: int = 10) -> List[Dict[str, Any]]:
+    """Autocomplete: products whose title/SKU words start with the typed words.
+    Titles starting with the prefix come first, then by rank, then shortest."""
+    args = [user_id, search_tsquery(prefix, weights="A"), f"{_escape_like(prefix.strip())}%"]
+    return await repo.fetch(
+        "SELECT id, title, sku, image_url "
+        "FROM public.products p, to_tsquery('simple', $2) query "
+        "WHERE p.user_id = $1 AND (p.search_vector @@ query OR p.sku ILIKE $3) "
+        "ORDER BY (p.title ILIKE $3) DESC, ts_rank_cd(p.search_vector, query) DESC, length(p.title), p.id "
+        f"LIMIT {int(limit)}",
+        *args,
+    )
@@ -2,21 +2,24 @@
 AliExpress supplier integration service
 """
 
-import httpx
-from typing import Dict, Any, List, Optional
+from typing import AsyncIterator, Dict, Any, List, Optional
 import logging
-from datetime import datetime
 import hashlib
 import time
 
 from .base import BaseSupplierService
-from app.core.database import get_supabase
+from .pagination import paginate
+from app.core.http_client import get_http_pool
 
 logger = logging.getLogger(__name__)
 
 
 class AliExpressService(BaseSupplierService):
     """AliExpress Dropshipping API integration"""
+
+    supplier_name = "aliexpress"
+    # The API's page_size limit
+    page_size = 50
     
     def __init__(self, api_key: str, config: Optional[Dict[str, Any]] = None):
         super().__init__(api_key, config)
@@ -41,56 +44,47 @@ class AliExpressService(BaseSupplierService):
         """Validate AliExpress API credentials"""
         try:
             # Try to fetch account info
-            async with httpx.AsyncClient() as client:
-                params = {
-                    "app_key": self.app_key,
-                    "timestamp": str(int(time.time() * 1000)),
-                    "method": "aliexpress.ds.member.info.get",
-                    "sign_method": "md5",
-                    "v": "2.0"
-                }
-                params["sign"] = self._generate_sign(params)
-                
+            params = {
+                "app_key": self.app_key,
+                "timestamp": str(int(time.time() * 1000)),
+                "method": "aliexpress.ds.member.info.get",
+                "sign_method": "md5",
+                "v": "2.0"
+            }
+            params["sign"] = self._generate_sign(params)
+            
+            async with self._http() as client:
                 response = await client.get(
                     self.base_url,
                     params=params,
                     timeout=30
                 )
-                
-                data = response.json()
-                return "error_response" not in data
-                
+            
+            data = response.json()
+            return "error_response" not in data
+            
         except Exception as e:
             logger.error(f"AliExpress credential validation failed: {e}")
             return False
     
-    def sync_products(
+    def fetch_product_pages(
         self,
-        user_id: str,
-        limit: int = 1000,
+        limit: Optional[int] = None,
         category_filter: Optional[str] = None
-    ) -> Dict[str, Any]:
-        """Sync products from AliExpress"""
-        import httpx
-        
-        logger.info(f"Starting AliExpress product sync for user {user_id}")
-        
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Product pages (page_no / page_size), page_concurrency requests in flight"""
         # Note: AliExpress API requires specific permissions
         # This is a simplified implementation
         
-        products_fetched = 0
-        products_saved = 0
-        errors = []
-        
-        try:
+        async def fetch_page(page: int) -> List[Dict[str, Any]]:
             params = {
                 "app_key": self.app_key,
                 "timestamp": str(int(time.time() * 1000)),
                 "method": "aliexpress.ds.product.get",
                 "sign_method": "md5",
                 "v": "2.0",
-                "page_size": min(limit, 50),
-                "page_no": 1
+                "page_size": self.page_size,
+                "page_no": page
             }
             
             if category_filter:
@@ -98,56 +92,26 @@ class AliExpressService(BaseSupplierService):
             
             params["sign"] = self._generate_sign(params)
             
-            with httpx.Client(timeout=60) as client:
-                response = client.get(self.base_url, params=params)
-                
-                if response.status_code != 200:
-                    raise Exception(f"AliExpress API error: {response.status_code}")
-                
-                data = response.json()
-                
-                if "error_response" in data:
-                    raise Exception(data["error_response"].get("msg", "Unknown error"))
-                
-                products = data.get("aliexpress_ds_product_get_response", {}).get("products", {}).get("product", [])
-                products_fetched = len(products)
-                
-                supabase = get_supabase()
-                
-                for raw_product in products:
-                    try:
-                        normalized = self.normalize_product(raw_product)
-                        
-                        supabase.table("products").upsert({
-                            "user_id": user_id,
-                            "supplier": "aliexpress",
-                            "supplier_product_id": str(normalized["external_id"]),
-                            "title": normalized["title"],
-                            "description": normalized["description"],
-                            "cost_price": normalized["cost_price"],
-                            "stock_quantity": normalized["stock_quantity"],
-                            "images": normalized["images"],
-                            "category": normalized["category"],
-                            "status": "draft",
-                            "updated_at": datetime.utcnow().isoformat()
-                        }, on_conflict="supplier,supplier_product_id,user_id").execute()
-                        
-                        products_saved += 1
-                        
-                    except Exception as e:
-                        errors.append(str(e))
-                
-        except Exception as e:
-            logger.error(f"AliExpress sync error: {e}")
-            errors.append(str(e))
+            response = await self._request("GET", self.base_url, params=params, timeout=60)
+            
+            if response.status_code != 200:
+                raise Exception(f"AliExpress API error: {response.status_code}")
+            
+            data = response.json()
+            
+            if "error_response" in data:
+                raise Exception(data["error_response"].get("msg", "Unknown error"))
+            
+            return data.get("aliexpress_ds_product_get_response", {}).get("products", {}).get("product", [])
         
-        return {
-            "fetched": products_fetched,
-            "saved": products_saved,
-            "errors": errors[:10]
-        }
+        return paginate(fetch_page, self.page_size, limit, self.page_concurrency)
+    
+    def product_row(self, user_id: str, normalized: Dict[str, Any]) -> Dict[str, Any]:
+        row = super().product_row(user_id, normalized)
+        del row["sku"]  # the product id, already supplier_product_id
+        return row
     
-    def sync_stock(self, user_id: str) -> Dict[str, Any]:
+    async def sync_stock(self, repo, user_id: str) -> Dict[str, Any]:
         """Sync stock levels - AliExpress requires per-product checks"""
         logger.info(f"AliExpress stock sync for user {user_id}")
         
@@ -158,8 +122,6 @@ class AliExpressService(BaseSupplierService):
     
     def get_product_details(self, product_id: str) -> Dict[str, Any]:
         """Get detailed product info from AliExpress"""
-        import httpx
-        
         params = {
             "app_key": self.app_key,
             "timestamp": str(int(time.time() * 1000)),
@@ -170,15 +132,15 @@ class AliExpressService(BaseSupplierService):
         }
         params["sign"] = self._generate_sign(params)
         
-        with httpx.Client(timeout=30) as client:
-            response = client.get(self.base_url, params=params)
-            data = response.json()
-            
-            if "error_response" in data:
-                raise Exception(data["error_response"].get("msg", "Product not found"))
-            
-            product = data.get("aliexpress_ds_product_get_response", {}).get("result", {})
-            return self.normalize_product(product)
+        client = get_http_pool().sync_client(self.base_url)
+        response = client.get(self.base_url, params=params)
+        data = response.json()
+        
+        if "error_response" in data:
+            raise Exception(data["error_response"].get("msg", "Product not found"))
+        
+        product = data.get("aliexpress_ds_product_get_response", {}).get("result", {})
+        return self.normalize_product(product)
     
     def place_order(
         self,
@@ -187,8 +149,6 @@ class AliExpressService(BaseSupplierService):
         shipping_address: Dict[str, Any]
     ) -> Dict[str, Any]:
         """Place dropshipping order with AliExpress"""
-        import httpx
-        
         params = {
             "app_key": self.app_key,
             "timestamp": str(int(time.time() * 1000)),
@@ -216,19 +176,17 @@ class AliExpressService(BaseSupplierService):
         params["param_place_order_request4_open_api_d_t_o"] = str(order_data)
         params["sign"] = self._generate_sign(params)
         
-        with httpx.Client(timeout=60) as client:
-            response = client.post(self.base_url, params=params)
-            data = response.json()
-            
-            if "error_response" in data:
-                raise Exception(data["error_response"].get("msg", "Order creation failed"))
-            
-            return data.get("aliexpress_ds_order_create_response", {})
+        client = get_http_pool().sync_client(self.base_url)
+        response = client.post(self.base_url, params=params, timeout=60)
+        data = response.json()
+        
+        if "error_response" in data:
+            raise Exception(data["error_response"].get("msg", "Order creation failed"))
+        
+        return data.get("aliexpress_ds_order_create_response", {})
     
     def get_order_status(self, order_id: str) -> Dict[str, Any]:
         """Get order status from AliExpress"""
-        import httpx
-        
         params = {
             "app_key": self.app_key,
             "timestamp": str(int(time.time() * 1000)),
@@ -239,22 +197,22 @@ class AliExpressService(BaseSupplierService):
         }
         params["sign"] = self._generate_sign(params)
         
-        with httpx.Client(timeout=30) as client:
-            response = client.get(self.base_url, params=params)
-            data = response.json()
-            
-            if "error_response" in data:
-                raise Exception(data["error_response"].get("msg", "Order not found"))
-            
-            order = data.get("aliexpress_ds_order_get_response", {}).get("result", {})
-            
-            return {
-                "order_id": order_id,
-                "status": order.get("order_status"),
-                "tracking_number": order.get("logistics_info_list", [{}])[0].get("logistics_no"),
-                "carrier": order.get("logistics_info_list", [{}])[0].get("logistics_company"),
-                "shipped_at": order.get("gmt_send_goods")
-            }
+        client = get_http_pool().sync_client(self.base_url)
+        response = client.get(self.base_url, params=params)
+        data = response.json()
+        
+        if "error_response" in data:
+            raise Exception(data["error_response"].get("msg", "Order not found"))
+        
+        order = data.get("aliexpress_ds_order_get_response", {}).get("result", {})
+        
+        return {
+            "order_id": order_id,
+            "status": order.get("order_status"),
+            "tracking_number": order.get("logistics_info_list", [{}])[0].get("logistics_no"),
+            "carrier": order.get("logistics_info_list", [{}])[0].get("logistics_company"),
+            "shipped_at": order.get("gmt_send_goods")
+        }
     
     def normalize_product(self, raw_product: Dict[str, Any]) -> Dict[str, Any]:
         """Normalize AliExpress product to standard format"""
@@ -1,46 +1,167 @@
 """
 Base supplier service interface
+Catalog and stock syncs are async: catalog pages are fetched concurrently
+(bounded, rate limited and retried, see pagination) and their normalized products
+stream into chunked bulk upserts instead of one write per product.
 """
 
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List, Optional
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional
 import logging
 
+import httpx
+
+from app.core.http_client import get_http_pool, lease_http_client
+from app.services.platform_sync.rate_limit import BucketSpec
+from .pagination import SupplierRateLimiter, request_with_retry
+
 logger = logging.getLogger(__name__)
 
+# Product / stock rows written per bulk statement
+SUPPLIER_UPSERT_BATCH_SIZE = 500
+# Products are keyed per user by supplier and supplier product id
+PRODUCT_CONFLICT_COLUMNS = ("supplier", "supplier_product_id", "user_id")
+
 
 class BaseSupplierService(ABC):
     """Abstract base class for supplier integrations"""
-    
+
+    supplier_name: str = "unknown"
+    # Catalog items per page and page requests in flight (config: page_size / page_concurrency)
+    page_size: int = 100
+    page_concurrency: int = 4
+    # Request pacing per supplier account (config: requests_per_second)
+    rate_limit: BucketSpec = BucketSpec(capacity=10, rate=5.0, headroom=0)
+    upsert_batch_size: int = SUPPLIER_UPSERT_BATCH_SIZE
+
     def __init__(self, api_key: str, config: Optional[Dict[str, Any]] = None):
         self.api_key = api_key
         self.config = config or {}
-    
+        self.page_size = int(self.config.get("page_size") or self.page_size)
+        self.page_concurrency = int(self.config.get("page_concurrency") or self.page_concurrency)
+        rate = self.config.get("requests_per_second")
+        spec = BucketSpec(self.rate_limit.capacity, float(rate), 0) if rate else self.rate_limit
+        self.limiter = SupplierRateLimiter(self.supplier_name, api_key, spec)
+        self._client: Optional[httpx.AsyncClient] = None
+
+    # API root, set by each service (its host keys the pooled HTTP client)
+    base_url: str = ""
+
+    async def __aenter__(self) -> "BaseSupplierService":
+        # Pins the supplier host's pooled client (never evicted) for a run of calls
+        self._client = await get_http_pool().acquire(self.base_url)
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        if self._client is not None:
+            get_http_pool().release(self.base_url)
+            self._client = None
+
+    @asynccontextmanager
+    async def _http(self) -> AsyncIterator[httpx.AsyncClient]:
+        """The pinned client inside `async with service`, else the pooled one leased for one call"""
+        if self._client is not None:
+            yield self._client
+            return
+        async with lease_http_client(self.base_url) as client:
+            yield client
+
+    async def _request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """Rate-limited request, retried on throttling / server / transport errors"""
+        async with self._http() as client:
+            return await request_with_retry(lambda: client.request(method, url, **kwargs), self.limiter)
+
     @abstractmethod
     async def validate_credentials(self) -> bool:
         """Validate API credentials"""
         pass
-    
+
     @abstractmethod
-    def sync_products(
+    def fetch_product_pages(
+        self,
+        limit: Optional[int] = None,
+        category_filter: Optional[str] = None
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Raw catalog products, page by page, at most `limit` in total"""
+        pass
+
+    async def sync_products(
         self,
+        repo,
         user_id: str,
         limit: int = 1000,
         category_filter: Optional[str] = None
     ) -> Dict[str, Any]:
-        """Sync products from supplier"""
-        pass
-    
+        """Sync products from supplier: fetched pages are normalized and upserted
+        upsert_batch_size rows at a time (a failing batch is split in halves down to
+        single rows, so only the bad rows are reported in errors)"""
+        logger.info(f"Starting {self.supplier_name} product sync for user {user_id}")
+
+        products_fetched = 0
+        products_saved = 0
+        errors: List[str] = []
+        rows: Dict[str, Dict[str, Any]] = {}
+
+        async def save(batch: List[Dict[str, Any]]):
+            nonlocal products_saved
+            try:
+                saved = await repo.bulk_upsert("products", batch, on_conflict=PRODUCT_CONFLICT_COLUMNS, returning="id")
+                products_saved += len(saved)
+                return
+            except Exception as e:
+                if len(batch) == 1 or isinstance(e, (ConnectionError, TimeoutError)):
+                    # A single bad row, or the database is unreachable (splitting cannot help)
+                    errors.append(f"{batch[0]['supplier_product_id']}: {e}" if len(batch) == 1 else str(e))
+                    logger.warning(f"Failed to save {len(batch)} {self.supplier_name} products: {e}")
+                    return
+                logger.warning(f"Failed to save {len(batch)} {self.supplier_name} products, splitting the batch: {e}")
+            # Halve until the bad rows are isolated: one bad record cannot drop its neighbours
+            middle = len(batch) // 2
+            await save(batch[:middle])
+            await save(batch[middle:])
+
+        async def flush():
+            batch = list(rows.values())
+            rows.clear()
+            await save(batch)
+
+        try:
+            async for page in self.fetch_product_pages(limit, category_filter):
+                products_fetched += len(page)
+                for raw_product in page:
+                    try:
+                        row = self.product_row(user_id, self.normalize_product(raw_product))
+                    except Exception as e:
+                        errors.append(str(e))
+                        continue
+                    # One row per key in a statement (ON CONFLICT cannot update a row twice)
+                    rows[row["supplier_product_id"]] = row
+                    if len(rows) >= self.upsert_batch_size:
+                        await flush()
+        except Exception as e:
+            logger.error(f"{self.supplier_name} sync error: {e}")
+            errors.append(str(e))
+        if rows:
+            await flush()
+
+        return {
+            "fetched": products_fetched,
+            "saved": products_saved,
+            "errors": errors[:10]  # Limit error list
+        }
+
     @abstractmethod
-    def sync_stock(self, user_id: str) -> Dict[str, Any]:
+    async def sync_stock(self, repo, user_id: str) -> Dict[str, Any]:
         """Sync stock levels"""
         pass
-    
+
     @abstractmethod
     def get_product_details(self, product_id: str) -> Dict[str, Any]:
         """Get detailed product information"""
         pass
-    
+
     @abstractmethod
     def place_order(
         self,
@@ -50,12 +171,29 @@ class BaseSupplierService(ABC):
     ) -> Dict[str, Any]:
         """Place an order with the supplier"""
         pass
-    
+
     @abstractmethod
     def get_order_status(self, order_id: str) -> Dict[str, Any]:
         """Get order status and tracking"""
         pass
-    
+
+    def product_row(self, user_id: str, normalized: Dict[str, Any]) -> Dict[str, Any]:
+        """`products` row of a normalized supplier product"""
+        return {
+            "user_id": user_id,
+            "supplier": self.supplier_name,
+            "supplier_product_id": str(normalized["external_id"]),
+            "title": normalized["title"],
+            "description": normalized["description"],
+            "cost_price": normalized["cost_price"],
+            "stock_quantity": normalized["stock_quantity"],
+            "sku": normalized["sku"],
+            "images": normalized["images"],
+            "category": normalized["category"],
+            "status": "draft",
+            "updated_at": datetime.utcnow().isoformat()
+        }
+
     def normalize_product(self, raw_product: Dict[str, Any]) -> Dict[str, Any]:
         """Normalize product data to standard format"""
         # Default implementation - override for supplier-specific normalization
@@ -2,21 +2,25 @@
 BigBuy supplier integration service
 """
 
-import httpx
-from typing import Dict, Any, List, Optional
+from typing import AsyncIterator, Dict, Any, List, Optional
 import logging
 from datetime import datetime
 
 from .base import BaseSupplierService
-from app.core.database import get_supabase
+from .pagination import paginate
+from app.core.http_client import get_http_pool
 
 logger = logging.getLogger(__name__)
 
 BIGBUY_API_BASE = "https://api.bigbuy.eu"
+# Catalog pages are numbered from 0
+BIGBUY_FIRST_PAGE = 0
 
 
 class BigBuyService(BaseSupplierService):
     """BigBuy API integration"""
+
+    supplier_name = "bigbuy"
     
     def __init__(self, api_key: str, config: Optional[Dict[str, Any]] = None):
         super().__init__(api_key, config)
@@ -29,133 +33,77 @@ class BigBuyService(BaseSupplierService):
     async def validate_credentials(self) -> bool:
         """Validate BigBuy API credentials"""
         try:
-            async with httpx.AsyncClient() as client:
+            async with self._http() as client:
                 response = await client.get(
                     f"{self.base_url}/rest/user/purse.json",
                     headers=self.headers,
                     timeout=30
                 )
-                return response.status_code == 200
+            return response.status_code == 200
         except Exception as e:
             logger.error(f"BigBuy credential validation failed: {e}")
             return False
     
-    def sync_products(
+    def fetch_product_pages(
         self,
-        user_id: str,
-        limit: int = 1000,
+        limit: Optional[int] = None,
         category_filter: Optional[str] = None
-    ) -> Dict[str, Any]:
-        """Sync products from BigBuy catalog"""
-        import httpx
-        
-        logger.info(f"Starting BigBuy product sync for user {user_id}")
-        
-        products_fetched = 0
-        products_saved = 0
-        errors = []
-        
-        try:
-            with httpx.Client(timeout=60) as client:
-                # Get product catalog
-                params = {
-                    "isoCode": self.config.get("language", "fr"),
-                    "pageSize": min(limit, 100)
-                }
-                
-                if category_filter:
-                    params["category"] = category_filter
-                
-                response = client.get(
-                    f"{self.base_url}/rest/catalog/products.json",
-                    headers=self.headers,
-                    params=params
-                )
-                
-                if response.status_code != 200:
-                    raise Exception(f"BigBuy API error: {response.status_code}")
-                
-                products = response.json()
-                products_fetched = len(products)
-                
-                # Save to database
-                supabase = get_supabase()
-                
-                for raw_product in products[:limit]:
-                    try:
-                        normalized = self.normalize_product(raw_product)
-                        
-                        # Upsert product into unified `products` table
-                        supabase.table("products").upsert({
-                            "user_id": user_id,
-                            "supplier": "bigbuy",
-                            "supplier_product_id": str(normalized["external_id"]),
-                            "title": normalized["title"],
-                            "description": normalized["description"],
-                            "cost_price": normalized["cost_price"],
-                            "stock_quantity": normalized["stock_quantity"],
-                            "sku": normalized["sku"],
-                            "images": normalized["images"],
-                            "category": normalized["category"],
-                            "status": "draft",
-                            "updated_at": datetime.utcnow().isoformat()
-                        }, on_conflict="supplier,supplier_product_id,user_id").execute()
-                        
-                        products_saved += 1
-                        
-                    except Exception as e:
-                        errors.append(str(e))
-                        logger.warning(f"Failed to save BigBuy product: {e}")
-                
-        except Exception as e:
-            logger.error(f"BigBuy sync error: {e}")
-            errors.append(str(e))
-        
-        return {
-            "fetched": products_fetched,
-            "saved": products_saved,
-            "errors": errors[:10]  # Limit error list
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Catalog pages (page / pageSize), page_concurrency requests in flight"""
+        params = {
+            "isoCode": self.config.get("language", "fr"),
+            "pageSize": self.page_size
         }
+
+        if category_filter:
+            params["category"] = category_filter
+
+        async def fetch_page(page: int) -> List[Dict[str, Any]]:
+            response = await self._request(
+                "GET",
+                f"{self.base_url}/rest/catalog/products.json",
+                headers=self.headers,
+                params={**params, "page": page},
+                timeout=60
+            )
+
+            if response.status_code != 200:
+                raise Exception(f"BigBuy API error: {response.status_code}")
+
+            return response.json()
+
+        return paginate(fetch_page, self.page_size, limit, self.page_concurrency, first_page=BIGBUY_FIRST_PAGE)
     
-    def sync_stock(self, user_id: str) -> Dict[str, Any]:
-        """Sync stock levels from BigBuy"""
-        import httpx
-        
+    async def sync_stock(self, repo, user_id: str) -> Dict[str, Any]:
+        """Sync stock levels from BigBuy (one UPDATE per upsert_batch_size skus)"""
         logger.info(f"Syncing BigBuy stock for user {user_id}")
         
         updated = 0
         
         try:
-            with httpx.Client(timeout=60) as client:
-                response = client.get(
-                    f"{self.base_url}/rest/catalog/productsstockbyreference.json",
-                    headers=self.headers
+            response = await self._request(
+                "GET",
+                f"{self.base_url}/rest/catalog/productsstockbyreference.json",
+                headers=self.headers,
+                timeout=60
+            )
+            
+            if response.status_code != 200:
+                raise Exception(f"BigBuy stock API error: {response.status_code}")
+            
+            now = datetime.utcnow().isoformat()
+            levels = {
+                item["sku"]: (item.get("stocks") or [{}])[0].get("quantity", 0)
+                for item in response.json() if item.get("sku")
+            }
+            rows = [{"sku": sku, "stock_quantity": stock, "updated_at": now} for sku, stock in levels.items()]
+            
+            for start in range(0, len(rows), self.upsert_batch_size):
+                updated += await repo.bulk_update_rows(
+                    "products", rows[start:start + self.upsert_batch_size],
+                    filters={"user_id": user_id, "supplier": "bigbuy"}, id_column="sku",
                 )
-                
-                if response.status_code != 200:
-                    raise Exception(f"BigBuy stock API error: {response.status_code}")
-                
-                stock_data = response.json()
-                supabase = get_supabase()
-                
-                for item in stock_data:
-                    sku = item.get("sku")
-                    stock = item.get("stocks", [{}])[0].get("quantity", 0)
-                    
-                    if sku:
-                        result = supabase.table("products")\
-                            .update({
-                                "stock_quantity": stock,
-                                "updated_at": datetime.utcnow().isoformat()
-                            })\
-                            .eq("user_id", user_id)\
-                            .eq("supplier", "bigbuy")\
-                            .eq("sku", sku)\
-                            .execute()
-                        
-                        if result.data:
-                            updated += 1
-                
+            
         except Exception as e:
             logger.error(f"BigBuy stock sync error: {e}")
         
@@ -163,18 +111,16 @@ class BigBuyService(BaseSupplierService):
     
     def get_product_details(self, product_id: str) -> Dict[str, Any]:
         """Get detailed product info from BigBuy"""
-        import httpx
+        client = get_http_pool().sync_client(self.base_url)
+        response = client.get(
+            f"{self.base_url}/rest/catalog/product/{product_id}.json",
+            headers=self.headers
+        )
         
-        with httpx.Client(timeout=30) as client:
-            response = client.get(
-                f"{self.base_url}/rest/catalog/product/{product_id}.json",
-                headers=self.headers
-            )
-            
-            if response.status_code != 200:
-                raise Exception(f"Product not found: {product_id}")
-            
-            return self.normalize_product(response.json())
+        if response.status_code != 200:
+            raise Exception(f"Product not found: {product_id}")
+        
+        return self.normalize_product(response.json())
     
     def place_order(
         self,
@@ -183,8 +129,6 @@ class BigBuyService(BaseSupplierService):
         shipping_address: Dict[str, Any]
     ) -> Dict[str, Any]:
         """Place order with BigBuy"""
-        import httpx
-        
         order_data = {
             "internalReference": f"SHOP_{datetime.utcnow().timestamp()}",
             "cashOnDelivery": False,
@@ -206,40 +150,39 @@ class BigBuyService(BaseSupplierService):
             ]
         }
         
-        with httpx.Client(timeout=60) as client:
-            response = client.post(
-                f"{self.base_url}/rest/order/create.json",
-                headers=self.headers,
-                json=order_data
-            )
-            
-            if response.status_code not in [200, 201]:
-                raise Exception(f"Order creation failed: {response.text}")
-            
-            return response.json()
+        client = get_http_pool().sync_client(self.base_url)
+        response = client.post(
+            f"{self.base_url}/rest/order/create.json",
+            headers=self.headers,
+            json=order_data,
+            timeout=60
+        )
+        
+        if response.status_code not in [200, 201]:
+            raise Exception(f"Order creation failed: {response.text}")
+        
+        return response.json()
     
     def get_order_status(self, order_id: str) -> Dict[str, Any]:
         """Get order status from BigBuy"""
-        import httpx
+        client = get_http_pool().sync_client(self.base_url)
+        response = client.get(
+            f"{self.base_url}/rest/order/{order_id}.json",
+            headers=self.headers
+        )
         
-        with httpx.Client(timeout=30) as client:
-            response = client.get(
-                f"{self.base_url}/rest/order/{order_id}.json",
-                headers=self.headers
-            )
-            
-            if response.status_code != 200:
-                raise Exception(f"Order not found: {order_id}")
-            
-            data = response.json()
-            
-            return {
-                "order_id": order_id,
-                "status": data.get("status"),
-                "tracking_number": data.get("trackingNumber"),
-                "carrier": data.get("carrier"),
-                "shipped_at": data.get("dateShipped")
-            }
+        if response.status_code != 200:
+            raise Exception(f"Order not found: {order_id}")
+        
+        data = response.json()
+        
+        return {
+            "order_id": order_id,
+            "status": data.get("status"),
+            "tracking_number": data.get("trackingNumber"),
+            "carrier": data.get("carrier"),
+            "shipped_at": data.get("dateShipped")
+        }
     
     def normalize_product(self, raw_product: Dict[str, Any]) -> Dict[str, Any]:
         """Normalize BigBuy product to standard format"""
@@ -0,0 +1,128 @@
+"""
+Concurrent supplier pagination
+Supplier catalogs are fetched several pages at a time. Every request is paced by
+the supplier's leaky bucket in Redis (shared by all workers using the same API
+key) and retried with exponential backoff on throttling (429, honouring
+Retry-After), 5xx responses and transport errors. Pages are yielded in order;
+fetching stops at the first short page or once `limit` items were yielded.
+"""
+
+import asyncio
+import hashlib
+import logging
+import math
+import random
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+import redis
+
+from app.services.platform_sync.rate_limit import BucketSpec
+
+logger = logging.getLogger(__name__)
+
+# Responses worth sending again after a pause
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+SUPPLIER_RETRIES = 4
+# Cap on a single backoff / Retry-After pause (seconds)
+MAX_RETRY_DELAY = 60.0
+
+
+class SupplierRateLimiter:
+    """Requests-per-second bucket of one supplier account"""
+
+    def __init__(self, supplier: str, api_key: str, spec: BucketSpec, queue=None):
+        account = hashlib.sha1((api_key or "").encode()).hexdigest()[:12]
+        self.key = f"supplier_bucket:{supplier}:{account}"
+        self.spec = spec
+        self._queue = queue
+
+    @property
+    def queue(self):
+        if self._queue is None:
+            from app.queue.redis_queue import redis_queue
+            self._queue = redis_queue
+        return self._queue
+
+    async def acquire(self) -> float:
+        """Wait for the next request slot; returns the seconds waited.
+        Without Redis, requests go out unpaced (the 429 retry still applies)."""
+        try:
+            wait = self.queue.reserve_bucket(self.key, 1, self.spec.capacity, self.spec.rate, self.spec.headroom)
+        except redis.RedisError as e:
+            logger.warning(f"Supplier rate limiter unavailable for {self.key}: {e}")
+            return 0.0
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+
+def _retry_delay(response: Optional[httpx.Response], attempt: int, base_delay: float) -> float:
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after:
+        try:
+            return min(float(retry_after), MAX_RETRY_DELAY)
+        except ValueError:
+            pass
+    return min(base_delay * 2 ** attempt, MAX_RETRY_DELAY) * random.uniform(0.5, 1.0)
+
+
+async def request_with_retry(
+    send: Callable[[], Awaitable[httpx.Response]],
+    limiter: Optional[SupplierRateLimiter] = None,
+    retries: int = SUPPLIER_RETRIES,
+    base_delay: float = 1.0,
+) -> httpx.Response:
+    """Send (paced by `limiter`) until the response is not retryable or retries run
+    out; the last response is returned, the last transport error raised."""
+    for attempt in range(retries + 1):
+        if limiter is not None:
+            await limiter.acquire()
+        try:
+            response = await send()
+        except httpx.TransportError as e:
+            if attempt == retries:
+                raise
+            logger.warning(f"Supplier request failed ({e!r}), retry {attempt + 1}/{retries}")
+            await asyncio.sleep(_retry_delay(None, attempt, base_delay))
+            continue
+        if response.status_code not in RETRY_STATUSES or attempt == retries:
+            return response
+        logger.warning(f"Supplier responded {response.status_code}, retry {attempt + 1}/{retries}")
+        await asyncio.sleep(_retry_delay(response, attempt, base_delay))
+
+
+async def paginate(
+    fetch_page: Callable[[int], Awaitable[List[Dict[str, Any]]]],
+    page_size: int,
+    limit: Optional[int] = None,
+    concurrency: int = 4,
+    first_page: int = 1,
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    """Pages of items, up to `concurrency` page requests in flight. Requests past
+    the end of the catalog are cancelled once a short page is seen."""
+    last_page = first_page + math.ceil(limit / page_size) - 1 if limit is not None else None
+    remaining = limit
+    pending: Dict[int, asyncio.Task] = {}
+    next_page = first_page
+    try:
+        while True:
+            while len(pending) < concurrency and (last_page is None or next_page <= last_page):
+                pending[next_page] = asyncio.create_task(fetch_page(next_page))
+                next_page += 1
+            if not pending:
+                return
+            items = await pending.pop(min(pending))
+            exhausted = len(items) < page_size
+            if remaining is not None:
+                items = items[:remaining]
+                remaining -= len(items)
+                exhausted = exhausted or remaining <= 0
+            if items:
+                yield items
+            if exhausted:
+                return
+    finally:
+        for task in pending.values():
+            task.cancel()
+        await asyncio.gather(*pending.values(), return_exceptions=True)
@@ -0,0 +1,185 @@
+"""
+Outbound HTTP client benchmark
+Per-request latency of platform adapter calls against a local stub store API:
+a new httpx client per call (the previous adapter code: fresh TCP + TLS
+handshake every time) against the pooled keep-alive client of app.core.http_client.
+The stub serves HTTPS with a throwaway self-signed certificate (openssl CLI),
+so the handshake cost is part of the measurement.
+
+Usage (from apps/api):
+    python -m benchmarks.bench_http_pool --requests 500 --concurrency 8
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import ssl
+import statistics
+import subprocess
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+import httpx
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def _reply(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+        if self.server.delay:
+            time.sleep(self.server.delay)
+        body = json.dumps({"product": {"id": 1, "title": "Stub", "variants": []}}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_PUT = do_POST = _reply
+
+    def log_message(self, *args):
+        pass
+
+
+class _StubHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, delay: float, ssl_context: Optional[ssl.SSLContext]):
+        super().__init__(address, _StubHandler)
+        self.delay = delay
+        self.ssl_context = ssl_context
+        self.connections = 0
+        self._lock = threading.Lock()
+
+    def get_request(self):
+        sock, addr = super().get_request()
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)  # no delayed-ACK stalls
+        with self._lock:
+            self.connections += 1
+        if self.ssl_context:
+            sock = self.ssl_context.wrap_socket(sock, server_side=True)
+        return sock, addr
+
+
+class StubServer:
+    """Local JSON API on 127.0.0.1 counting the TCP connections it accepts"""
+
+    def __init__(self, delay: float = 0.0, certfile: Optional[str] = None, keyfile: Optional[str] = None):
+        context = None
+        if certfile:
+            context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            context.load_cert_chain(certfile, keyfile)
+        self.server = _StubHTTPServer(("127.0.0.1", 0), delay, context)
+        self.scheme = "https" if context else "http"
+
+    @property
+    def url(self) -> str:
+        return f"{self.scheme}://127.0.0.1:{self.server.server_address[1]}"
+
+    @property
+    def connections(self) -> int:
+        return self.server.connections
+
+    def __enter__(self) -> "StubServer":
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def self_signed_cert(directory: str) -> Dict[str, str]:
+    cert, key = os.path.join(directory, "stub.crt"), os.path.join(directory, "stub.key")
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+         "-subj", "/CN=127.0.0.1", "-addext", "subjectAltName=IP:127.0.0.1",
+         "-keyout", key, "-out", cert],
+        check=True, capture_output=True,
+    )
+    return {"certfile": cert, "keyfile": key}
+
+
+def _adapter(base_url: str):
+    from app.services.platform_sync.woocommerce_adapter import WooCommerceAdapter
+
+    class StubStoreAdapter(WooCommerceAdapter):
+        @property
+        def _base_url(self) -> str:
+            return f"{base_url}/wp-json/wc/v3"
+
+    return StubStoreAdapter({"consumer_key": "ck", "consumer_secret": "cs", "store_url": base_url})
+
+
+async def per_call_client(adapter, path: str):
+    """The previous adapter request: a new client for every call"""
+    async with httpx.AsyncClient(timeout=30) as client:
+        resp = await client.get(f"{adapter._base_url}{path}", auth=adapter._auth)
+        resp.raise_for_status()
+        return resp.json()
+
+
+async def pooled_client(adapter, path: str):
+    return await adapter._request("GET", path)
+
+
+async def measure(fn, adapter, requests: int, concurrency: int) -> List[float]:
+    semaphore = asyncio.Semaphore(concurrency)
+    timings: List[float] = []
+
+    async def one(i):
+        async with semaphore:
+            start = time.perf_counter()
+            await fn(adapter, f"/products/{i}")
+            timings.append((time.perf_counter() - start) * 1000)
+
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    return timings
+
+
+async def run(args, server: StubServer):
+    from app.core.http_client import close_loop_http_clients
+
+    print(f"stub {server.url}  requests={args.requests} concurrency={args.concurrency}")
+    print(f"{'client':<16} {'p50 ms':>8} {'p95 ms':>8} {'total s':>8} {'connections':>12}")
+    results = {}
+    for name, fn in (("per-call", per_call_client), ("pooled", pooled_client)):
+        before = server.connections
+        start = time.perf_counter()
+        async with _adapter(server.url) as adapter:
+            timings = await measure(fn, adapter, args.requests, args.concurrency)
+        elapsed = time.perf_counter() - start
+        p50 = statistics.median(timings)
+        p95 = statistics.quantiles(timings, n=20)[-1]
+        results[name] = p50
+        print(f"{name:<16} {p50:>8.2f} {p95:>8.2f} {elapsed:>8.2f} {server.connections - before:>12}")
+    await close_loop_http_clients()
+    print(f"\np50 speed-up: x{results['per-call'] / results['pooled']:.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--delay-ms", type=float, default=0.0, help="server-side processing time")
+    parser.add_argument("--plain-http", action="store_true", help="no TLS (no openssl needed)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tls = {} if args.plain_http else self_signed_cert(tmp)
+        if tls:
+            os.environ["SSL_CERT_FILE"] = tls["certfile"]  # trusted by both client paths
+        with StubServer(delay=args.delay_ms / 1000, **tls) as server:
+            asyncio.run(run(args, server))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+Import mapping micro-benchmark
+Rows/sec of CSV row mapping: the previous per-cell implementation (DictReader +
+field branching + chained str.replace) against the compiled MappingPlan, row at a
+time and vectorized per chunk.
+
+Usage (from apps/api):
+    python -m benchmarks.bench_import_mapping --rows 200000 --chunk-size 500
+"""
+
+import argparse
+import csv
+import io
+import random
+import time
+from typing import Any, Dict, List
+
+from app.services.import_mapping import MappingPlan, compile_auto_mapping, detect_mapping
+
+HEADERS = ["title", "description", "price", "cost", "sku", "stock", "images", "category"]
+
+ALIASES = {
+    "title": ["title", "name", "product_name", "product_title", "nom", "titre"],
+    "description": ["description", "desc", "body", "body_html", "content"],
+    "price": ["price", "sale_price", "prix", "retail_price", "selling_price"],
+    "cost": ["cost", "cost_price", "wholesale", "buy_price", "cout"],
+    "sku": ["sku", "reference", "ref", "product_id", "item_number"],
+    "stock": ["stock", "qty", "quantity", "inventory", "stock_quantity"],
+    "images": ["images", "image_url", "image", "picture", "photo"],
+    "category": ["category", "categorie", "type", "product_type"],
+}
+
+
+def synthetic_csv(rows: int, seed: int = 42) -> str:
+    rng = random.Random(seed)
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(HEADERS)
+    for i in range(rows):
+        writer.writerow([
+            f"Product {i}",
+            "Lorem ipsum dolor sit amet",
+            f"{rng.randint(1, 500)},{rng.randint(0, 99):02d} €",
+            f"{rng.uniform(1, 300):.2f}",
+            f"SKU-{i}",
+            rng.choice([str(rng.randint(0, 500)), "in stock", "rupture"]),
+            f"https://cdn.example.com/{i}.jpg",
+            "Home",
+        ])
+    return out.getvalue()
+
+
+# ── Previous implementation (reference) ──────────────────────────────────────
+
+def legacy_detect(headers: List[str]) -> Dict[str, str]:
+    mapping = {}
+    for field, options in ALIASES.items():
+        for header in headers:
+            if header.lower() in [opt.lower() for opt in options]:
+                mapping[header] = field
+                break
+    return mapping
+
+
+def legacy_price(value: Any) -> float:
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        clean = value.replace("€", "").replace("$", "").replace("£", "").replace(" ", "").strip()
+        clean = clean.replace(",", ".")
+        try:
+            return float(clean)
+        except ValueError:
+            return 0.0
+    return 0.0
+
+
+def legacy_stock(value: Any) -> int:
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str):
+        value_lower = value.lower()
+        if value_lower in ["in stock", "available", "en stock", "disponible"]:
+            return 100
+        elif value_lower in ["out of stock", "unavailable", "rupture", "indisponible"]:
+            return 0
+        try:
+            return int(value)
+        except ValueError:
+            return 0
+    return 0
+
+
+def legacy_images(value: Any) -> List[str]:
+    if isinstance(value, str):
+        if "|" in value:
+            return [img.strip() for img in value.split("|") if img.strip()]
+        elif "," in value and "http" in value:
+            return [img.strip() for img in value.split(",") if img.strip()]
+        return [value] if value.strip() else []
+    return []
+
+
+def legacy_map_row(row: Dict[str, str], mapping: Dict[str, str]) -> Dict[str, Any]:
+    product = {"title": "", "description": "", "sale_price": 0, "cost_price": 0,
+               "sku": "", "stock": 0, "images": [], "category": ""}
+    for col, field in mapping.items():
+        if col in row:
+            value = row[col]
+            if field == "price" or field == "sale_price":
+                product["sale_price"] = legacy_price(value)
+            elif field == "cost" or field == "cost_price":
+                product["cost_price"] = legacy_price(value)
+            elif field == "stock":
+                product["stock"] = legacy_stock(value)
+            elif field == "images":
+                product["images"] = legacy_images(value)
+            else:
+                product[field] = value
+    return product
+
+
+def run_legacy(content: str, chunk_size: int) -> List[Dict[str, Any]]:
+    reader = csv.DictReader(io.StringIO(content))
+    mapping = legacy_detect(reader.fieldnames or [])
+    return [p for p in (legacy_map_row(row, mapping) for row in reader) if p.get("title")]
+
+
+# ── Compiled plan ────────────────────────────────────────────────────────────
+
+def _plan(reader) -> MappingPlan:
+    headers = next(reader)
+    return MappingPlan.compile(headers, detect_mapping(headers, compile_auto_mapping(ALIASES)))
+
+
+def run_plan_rows(content: str, chunk_size: int) -> List[Dict[str, Any]]:
+    reader = csv.reader(io.StringIO(content))
+    plan = _plan(reader)
+    return [p for p in (plan.map_row(row) for row in reader if row) if p.get("title")]
+
+
+def run_plan_vectorized(content: str, chunk_size: int) -> List[Dict[str, Any]]:
+    reader = csv.reader(io.StringIO(content))
+    plan = _plan(reader)
+    products, block = [], []
+    for row in reader:
+        if row:
+            block.append(row)
+            if len(block) == chunk_size:
+                products.extend(p for p in plan.map_rows(block) if p.get("title"))
+                block = []
+    if block:
+        products.extend(p for p in plan.map_rows(block) if p.get("title"))
+    return products
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    content = synthetic_csv(args.rows)
+    reference = run_legacy(content, args.chunk_size)
+
+    print(f"{args.rows} rows, chunk size {args.chunk_size}, best of {args.repeat}")
+    baseline = None
+    for name, fn in (("legacy", run_legacy), ("plan", run_plan_rows), ("plan+vectorized", run_plan_vectorized)):
+        best = min(_timed(fn, content, args.chunk_size) for _ in range(args.repeat))
+        assert fn(content, args.chunk_size) == reference, f"{name} output differs from legacy"
+        rate = args.rows / best
+        baseline = baseline or rate
+        print(f"  {name:<16} {rate:>12,.0f} rows/s  x{rate / baseline:.2f}")
+
+
+def _timed(fn, content: str, chunk_size: int) -> float:
+    start = time.perf_counter()
+    fn(content, chunk_size)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    main()
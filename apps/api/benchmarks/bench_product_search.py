@@ -0,0 +1,166 @@
+"""
+Product search benchmark
+Latency of catalog search on a synthetic catalog: the previous ilike filter
+(title/SKU/description substrings) against the indexed list filter, ranked
+search and autocomplete. Needs a Postgres with the product search migration
+applied (search_vector column, GIN and trigram indexes).
+
+Usage (from apps/api):
+    python -m benchmarks.bench_product_search --dsn postgresql://... --products 500000
+The synthetic rows are inserted for --user-id (a fresh id by default, which needs
+the auth.users foreign key to be absent, e.g. a scratch database) and deleted at
+the end unless --keep is given.
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, List
+
+import asyncpg
+
+from app.core.database import _init_connection
+from app.core.repository import Repository
+from app.services.product_queries import product_filters, search_tsquery
+from app.services.product_search import search_products, suggest_products
+
+ADJECTIVES = ["vintage", "modern", "compact", "wireless", "organic", "premium", "rustic", "portable",
+              "ergonomic", "waterproof", "minimalist", "handmade", "foldable", "smart", "classic"]
+NOUNS = ["lamp", "chair", "backpack", "headphones", "mug", "desk", "blanket", "speaker", "bottle",
+         "watch", "sneakers", "jacket", "keyboard", "planter", "mirror", "cushion", "charger", "wallet"]
+MATERIALS = ["oak", "bamboo", "leather", "ceramic", "steel", "linen", "cotton", "glass", "walnut", "wool"]
+FILLER = ("lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor incididunt "
+          "ut labore et dolore magna aliqua enim ad minim veniam quis nostrud exercitation").split()
+CATEGORIES = ["Home", "Office", "Outdoor", "Audio", "Fashion", "Kitchen", "Garden", "Sport"]
+VENDORS = ["Acme", "Nordic Supply", "Maison Lune", "Peak Gear", "Urban Craft"]
+
+# Typed terms: a common word, a rarer combination, a description-only word, a SKU, a typo
+TERMS = ["lamp", "walnut desk", "ergonomic keyboard", "tempor", "SKU-0012345", "headphnes"]
+
+
+def synthetic_rows(user_id: uuid.UUID, count: int, seed: int = 42):
+    rng = random.Random(seed)
+    for i in range(count):
+        adjective, noun, material = rng.choice(ADJECTIVES), rng.choice(NOUNS), rng.choice(MATERIALS)
+        description = " ".join(rng.choice(FILLER) for _ in range(rng.randint(80, 200)))
+        yield (
+            user_id,
+            f"{adjective.title()} {material} {noun}",
+            f"SKU-{i:07d}",
+            f"{description} {material} {noun}",
+            round(rng.uniform(5, 500), 2),
+            rng.randint(0, 300),
+            rng.choice(CATEGORIES),
+            rng.choice(VENDORS),
+            rng.choice(["active", "active", "active", "draft"]),
+        )
+
+
+async def seed(pool, user_id: uuid.UUID, count: int, batch: int = 20_000):
+    columns = ["user_id", "title", "sku", "description", "price", "stock_quantity", "category", "vendor", "status"]
+    rows = synthetic_rows(user_id, count)
+    async with pool.acquire() as conn:
+        while True:
+            block = [row for _, row in zip(range(batch), rows)]
+            if not block:
+                break
+            await conn.copy_records_to_table("products", records=block, columns=columns)
+        await conn.execute("ANALYZE public.products")
+
+
+def legacy_ilike(repo, user_id, term):
+    return repo.fetch(
+        "SELECT * FROM products WHERE user_id = $1 "
+        "AND (title ILIKE $2 OR sku ILIKE $2 OR description ILIKE $2) "
+        "ORDER BY created_at DESC, id DESC LIMIT 50",
+        user_id, f"%{term}%",
+    )
+
+
+def indexed_list_filter(repo, user_id, term):
+    where, args = product_filters(user_id, search=term)
+    return repo.fetch(f"SELECT * FROM products WHERE {where} ORDER BY created_at DESC, id DESC LIMIT 50", *args)
+
+
+def full_text_only(repo, user_id, term):
+    return repo.fetch(
+        "SELECT id, title FROM products, to_tsquery('simple', $2) query "
+        "WHERE user_id = $1 AND search_vector @@ query "
+        "ORDER BY ts_rank_cd(search_vector, query, 32) DESC LIMIT 20",
+        user_id, search_tsquery(term),
+    )
+
+
+PATHS: Dict[str, Callable[..., Awaitable[List]]] = {
+    "legacy ilike": legacy_ilike,
+    "list filter": indexed_list_filter,
+    "ranked search": lambda repo, user_id, term: search_products(repo, user_id, term, limit=20),
+    "autocomplete": lambda repo, user_id, term: suggest_products(repo, user_id, term[:4], limit=10),
+    "full-text only": full_text_only,
+}
+
+# Paths that need pg_trgm (trigram operators / indexes)
+TRIGRAM_PATHS = {"list filter", "ranked search", "autocomplete"}
+
+
+async def measure(fn, repo, user_id: str, term: str, repeat: int) -> List[float]:
+    await fn(repo, user_id, term)  # warm-up (plan cache, buffers)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await fn(repo, user_id, term)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+async def run(args):
+    pool = await asyncpg.create_pool(args.dsn, min_size=1, max_size=2, init=_init_connection)
+    user_id = uuid.UUID(args.user_id) if args.user_id else uuid.uuid4()
+    repo = Repository(pool)
+    try:
+        trigram = await repo.fetchval("SELECT count(*) FROM pg_extension WHERE extname = 'pg_trgm'")
+        start = time.perf_counter()
+        await seed(pool, user_id, args.products)
+        print(f"seeded {args.products:,} products in {time.perf_counter() - start:.1f}s")
+        if not trigram:
+            print("pg_trgm is not installed: trigram paths skipped")
+
+        print(f"{'path':<16} {'term':<20} {'rows':>5} {'p50 ms':>9} {'p95 ms':>9}")
+        summary: Dict[str, List[float]] = {}
+        for name, fn in PATHS.items():
+            if name in TRIGRAM_PATHS and not trigram:
+                continue
+            for term in TERMS:
+                timings = await measure(fn, repo, str(user_id), term, args.repeat)
+                rows = len(await fn(repo, str(user_id), term))
+                p50 = statistics.median(timings)
+                p95 = statistics.quantiles(timings, n=20)[-1] if len(timings) > 1 else p50
+                summary.setdefault(name, []).append(p50)
+                print(f"{name:<16} {term:<20} {rows:>5} {p50:>9.1f} {p95:>9.1f}")
+
+        baseline = statistics.mean(summary["legacy ilike"])
+        print("\nmean p50 per path")
+        for name, values in summary.items():
+            mean = statistics.mean(values)
+            print(f"  {name:<16} {mean:>9.1f} ms  x{baseline / mean:.1f}")
+    finally:
+        if not args.keep:
+            await pool.execute("DELETE FROM products WHERE user_id = $1", user_id)
+        await pool.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--dsn", required=True)
+    parser.add_argument("--products", type=int, default=500_000)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--user-id", default=None)
+    parser.add_argument("--keep", action="store_true")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
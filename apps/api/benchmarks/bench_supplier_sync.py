@@ -0,0 +1,84 @@
+"""
+Supplier catalog sync benchmark
+Products/sec of BigBuyService.sync_products against a simulated catalog API
+(fixed latency per page request, httpx MockTransport) with a repository that
+only counts bulk upserts: one page at a time (as the old single-request loop
+would have to) against page_concurrency pages in flight. Every run must save the
+whole catalog.
+
+Usage (from apps/api):
+    python -m benchmarks.bench_supplier_sync --products 20000 --latency 0.15 --concurrency 8
+"""
+
+import argparse
+import asyncio
+import time
+from typing import Any, Dict, List, Sequence
+
+import httpx
+
+from app.services.suppliers.bigbuy import BigBuyService
+
+
+class CountingRepo:
+    """Stands in for Repository.bulk_upsert: counts statements and rows"""
+
+    def __init__(self):
+        self.statements = 0
+        self.rows = 0
+
+    async def bulk_upsert(self, table: str, rows: Sequence[Dict[str, Any]], on_conflict, returning="*") -> List[Dict]:
+        self.statements += 1
+        self.rows += len(rows)
+        return [{"id": row["supplier_product_id"]} for row in rows]
+
+
+class NoBuckets:
+    def reserve_bucket(self, key, cost, capacity, rate, headroom=0, ttl_seconds=3600):
+        return 0.0
+
+
+def catalog_api(total: int, latency: float):
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(latency)
+        page, size = int(request.url.params["page"]), int(request.url.params["pageSize"])
+        return httpx.Response(200, json=[
+            {"id": i, "name": f"Product {i}", "sku": f"SKU{i}", "wholesalePrice": 9.99, "stock": i % 50,
+             "images": [{"url": f"https://cdn.test/{i}.jpg"}], "category": {"name": "Home"}}
+            for i in range(page * size, min((page + 1) * size, total))
+        ])
+    return handler
+
+
+async def run(products: int, latency: float, concurrency: int) -> Dict[str, Any]:
+    service = BigBuyService(api_key="bench", config={"page_concurrency": concurrency})
+    service.limiter._queue = NoBuckets()
+    service._client = httpx.AsyncClient(transport=httpx.MockTransport(catalog_api(products, latency)))
+    repo = CountingRepo()
+    start = time.perf_counter()
+    result = await service.sync_products(repo, "bench-user", limit=products)
+    elapsed = time.perf_counter() - start
+    await service._client.aclose()
+    assert result["saved"] == products and not result["errors"], result
+    return {"elapsed": elapsed, "statements": repo.statements}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--products", type=int, default=20_000)
+    parser.add_argument("--latency", type=float, default=0.15, help="seconds per page request")
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    print(f"{args.products} products, {args.latency * 1000:.0f} ms per page")
+    baseline = None
+    for concurrency in (1, args.concurrency):
+        stats = asyncio.run(run(args.products, args.latency, concurrency))
+        rate = args.products / stats["elapsed"]
+        baseline = baseline or rate
+        print(f"  {concurrency} page(s) in flight  {rate:>10,.0f} products/s  x{rate / baseline:.2f}  "
+              f"({stats['statements']} upserts, 100k in {100_000 / rate / 60:.1f} min)")
+
+
+if __name__ == "__main__":
+    main()
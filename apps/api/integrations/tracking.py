@@ -2,11 +2,11 @@
 17Track Integration - Real tracking API implementation
 """
 
-import httpx
 import os
 from typing import List, Optional, Dict, Any
 import structlog
 from utils.database import get_supabase_client
+from app.core.http_client import lease_http_client
 
 logger = structlog.get_logger()
 
@@ -32,14 +32,14 @@ class TrackingAPI:
         if carrier:
             payload["carrier"] = carrier
             
-        async with httpx.AsyncClient() as client:
+        async with lease_http_client(self.base_url) as client:
             response = await client.post(
                 f"{self.base_url}/gettrackinfo",
                 headers=headers,
                 json=payload
             )
-            response.raise_for_status()
-            return response.json()
+        response.raise_for_status()
+        return response.json()
     
     async def track_multiple_packages(self, tracking_data: List[Dict[str, str]]) -> Dict[str, Any]:
         """Track multiple packages in batch"""
@@ -59,14 +59,14 @@ class TrackingAPI:
                 track_item["carrier"] = item["carrier"]
             formatted_data.append(track_item)
         
-        async with httpx.AsyncClient() as client:
+        async with lease_http_client(self.base_url) as client:
             response = await client.post(
                 f"{self.base_url}/gettrackinfo",
                 headers=headers,
                 json=formatted_data
             )
-            response.raise_for_status()
-            return response.json()
+        response.raise_for_status()
+        return response.json()
     
     async def get_supported_carriers(self) -> List[Dict[str, Any]]:
         """Get list of supported carriers from 17Track"""
@@ -78,13 +78,13 @@ class TrackingAPI:
             "Content-Type": "application/json"
         }
         
-        async with httpx.AsyncClient() as client:
+        async with lease_http_client(self.base_url) as client:
             response = await client.post(
                 f"{self.base_url}/getcarriers",
                 headers=headers
             )
-            response.raise_for_status()
-            return response.json()
+        response.raise_for_status()
+        return response.json()
     
     async def register_tracking(self, tracking_number: str, carrier: Optional[str] = None) -> Dict[str, Any]:
         """Register a tracking number for monitoring"""
@@ -103,14 +103,14 @@ class TrackingAPI:
         if carrier:
             payload["carrier"] = carrier
             
-        async with httpx.AsyncClient() as client:
+        async with lease_http_client(self.base_url) as client:
             response = await client.post(
                 f"{self.base_url}/register",
                 headers=headers,
                 json=[payload]
             )
-            response.raise_for_status()
-            return response.json()
+        response.raise_for_status()
+        return response.json()
     
     async def sync_all_shipments(self, user_id: str):
         """Sync tracking status for all user shipments"""
@@ -16,12 +16,13 @@ import structlog
 
 from app.core.config import settings
 from app.core.database import init_db, close_db, db_pool
+from app.core.http_client import close_http_clients
 
 # Configure structured logging
 structlog.configure(
     processors=[
-        structlog.stdlib.filter_by_level,
-        structlog.stdlib.add_logger_name,
+        # Level filtering is done by the wrapper class: the stdlib-only processors
+        # (filter_by_level, add_logger_name) fail on PrintLogger instances
         structlog.stdlib.add_log_level,
         structlog.stdlib.PositionalArgumentsFormatter(),
         structlog.processors.TimeStamper(fmt="iso"),
@@ -51,6 +52,7 @@ async def lifespan(app: FastAPI):
     await init_db()
     logger.info("✅ Database connection established")
     yield
+    await close_http_clients()
     await close_db()
     logger.info("👋 ShopOpti API shutting down...")
 
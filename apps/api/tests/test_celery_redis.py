@@ -156,6 +156,17 @@ class TestRedisQueue:
         rq.set_job_progress("job-1", 50, message="halfway", total=100)
         rq._client.setex.assert_called_once()
 
+    def test_product_stats_cache_never_raises(self):
+        import redis
+        rq = self._make_queue()
+        rq.set_product_stats("user-1", {"total": 3})
+        assert rq._client.setex.call_args.args[:2] == ("product_stats:user-1", rq.PRODUCT_STATS_TTL)
+
+        rq._client.get.side_effect = redis.ConnectionError("down")
+        rq._client.delete.side_effect = redis.ConnectionError("down")
+        assert rq.get_product_stats("user-1") is None
+        rq.invalidate_product_stats("user-1")
+
     def test_close_disconnects_pool(self):
         rq = self._make_queue()
         rq._pool = MagicMock()
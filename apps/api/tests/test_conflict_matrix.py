@@ -0,0 +1,87 @@
+"""
+Batch conflict detection tests
+Tests: detect_conflicts_batch agrees with the per-pair detect_conflicts (None
+skipping, whitespace, price tolerance, Decimals, mixed types), columnar
+snapshots, and the compact matrix views.
+"""
+
+from decimal import Decimal
+
+import numpy as np
+import pytest
+
+from app.services.platform_sync.conflict_resolution import detect_conflicts, detect_conflicts_batch
+
+LOCAL = [
+    {"title": "Mug", "description": "Blue", "sale_price": 10.0, "stock": 5, "status": "active", "updated_at": "a"},
+    {"title": "Mug ", "description": None, "sale_price": 10.004, "stock": 5, "status": "active"},
+    {"title": "Cup", "description": "x", "sale_price": 12.5, "stock": 5, "status": "draft"},
+    {"title": "Pot", "description": "y", "sale_price": "10", "stock": None, "status": "active"},
+    {"title": "Pan", "description": "z", "sale_price": 3, "stock": 2, "status": "active"},
+]
+REMOTE = [
+    {"title": "Mug", "description": "Blue", "price": 10.0, "stock": 5, "status": "active", "updated_at": "b"},
+    {"title": "Mug", "description": "Red", "price": 10.0, "stock": 5, "status": "active"},
+    {"title": "Cup!", "description": "x", "price": 13.0, "stock": 7, "status": "active"},
+    {"title": "Pot", "description": "y", "price": 10.0, "stock": 9, "status": "active"},
+    {"title": "Pan", "description": "z", "price": 3.0, "status": "active"},
+]
+PRODUCT_IDS = [f"p{i}" for i in range(len(LOCAL))]
+STORE_IDS = ["s1"] * len(LOCAL)
+
+
+def _per_pair():
+    return {(c.product_id, c.field) for l, r, pid, sid in zip(LOCAL, REMOTE, PRODUCT_IDS, STORE_IDS)
+            for c in detect_conflicts(l, r, pid, sid)}
+
+
+def _found(matrix):
+    return {(c.product_id, c.field) for row in matrix.conflicted_rows() for c in matrix.conflicts(row)}
+
+
+class TestDetectConflictsBatch:
+    def test_matches_per_pair_detection(self):
+        matrix = detect_conflicts_batch(LOCAL, REMOTE, PRODUCT_IDS, STORE_IDS)
+
+        assert _found(matrix) == _per_pair() == {
+            ("p2", "title"), ("p2", "price"), ("p2", "stock"), ("p2", "status"), ("p3", "price"),
+        }
+        assert matrix.codes.dtype == np.uint8 and matrix.codes.tolist() == [0, 0, 0b11101, 0b00100, 0]
+        assert matrix.field_counts() == {"title": 1, "description": 0, "price": 2, "stock": 1, "status": 1}
+        assert matrix.mask.shape == (5, 5) and matrix.mask[2].tolist() == [True, False, True, True, True]
+
+    def test_conflicts_carry_values_and_timestamps(self):
+        local = [dict(LOCAL[0], title="Old")]
+        matrix = detect_conflicts_batch(local, REMOTE[:1], ["p0"], ["s1"])
+
+        [conflict] = matrix.conflicts(0)
+        assert conflict.to_dict() == detect_conflicts(local[0], REMOTE[0], "p0", "s1")[0].to_dict()
+
+    def test_columnar_snapshots(self):
+        def columns(rows, numeric):
+            cols = {key: [row.get(key) for row in rows] for key in ("title", "description", "status", "updated_at")}
+            for key in numeric:
+                cols[key] = [row.get(key) for row in rows]
+            return cols
+
+        local, remote = columns(LOCAL, ("sale_price", "stock")), columns(REMOTE, ("price", "stock"))
+        assert _found(detect_conflicts_batch(local, remote, PRODUCT_IDS, STORE_IDS)) == _per_pair()
+
+        local = {"title": ["A", "B"], "sale_price": np.array([1.0, 2.0])}
+        remote = {"title": ["A", "B"], "price": np.array([1.0, 2.5])}
+        [conflict] = detect_conflicts_batch(local, remote, ["p0", "p1"], ["s", "s"]).conflicts(1)
+        assert conflict.field == "price" and type(conflict.remote_value) is float
+
+    def test_decimals_are_compared_as_numbers(self):
+        local = [{"sale_price": Decimal("10.00"), "stock": 3}, {"sale_price": Decimal("10.50"), "stock": 3}]
+        remote = [{"price": 10.0, "stock": Decimal("3")}, {"price": 10.0, "stock": 3}]
+
+        matrix = detect_conflicts_batch(local, remote, ["p0", "p1"], ["s", "s"])
+
+        assert matrix.codes.tolist() == [0, 0b00100]
+        assert detect_conflicts(local[0], remote[0], "p0", "s") == []
+        assert [c.field for c in detect_conflicts(local[1], remote[1], "p1", "s")] == ["price"]
+
+    def test_misaligned_snapshots_are_rejected(self):
+        with pytest.raises(ValueError):
+            detect_conflicts_batch(LOCAL, REMOTE[:2], PRODUCT_IDS, STORE_IDS)
@@ -0,0 +1,122 @@
+"""
+Delta push tests
+Tests: Shopify / WooCommerce push only the changed fields through their narrow
+endpoints (no images or variants resent), fall back to a full push for fields
+without one, and the sync engine diffs links against their synced field values.
+"""
+
+import json
+from dataclasses import replace
+
+import httpx
+import pytest
+
+from app.services.platform_sync.base import PlatformProduct
+from tests.test_shopify_id_cache import ShopifyStore, _adapter
+
+PRODUCT = PlatformProduct(
+    external_id="1", title="Mug", description="Blue", price=12.5, stock=4, status="active",
+    images=["https://cdn/a.jpg", "https://cdn/b.jpg"], sku="MUG",
+)
+
+
+class RecordingShopify(ShopifyStore):
+    """ShopifyStore keeping request bodies, product PUTs stamped with updated_at"""
+
+    def __init__(self):
+        super().__init__()
+        self.bodies = []
+
+    def __call__(self, request):
+        self.bodies.append(json.loads(request.content) if request.content else None)
+        response = super().__call__(request)
+        path = request.url.path.split("/2024-01")[-1]
+        if path.startswith("/products/") and request.method == "PUT":
+            product = response.json()["product"]
+            return httpx.Response(200, json={"product": {**product, "updated_at": "2026-10-17T10:00:00+02:00"}})
+        return response
+
+
+class WooStore:
+    def __init__(self):
+        self.requests = []
+
+    def __call__(self, request):
+        self.requests.append((request.method, request.url.path, json.loads(request.content)))
+        return httpx.Response(200, json={"id": 1, "date_modified_gmt": "2026-10-17T08:00:00"})
+
+
+def _woo(store):
+    from app.services.platform_sync.woocommerce_adapter import WooCommerceAdapter
+    adapter = WooCommerceAdapter({"consumer_key": "k", "consumer_secret": "s", "store_url": "https://shop.test"})
+    adapter._client = httpx.AsyncClient(transport=httpx.MockTransport(store))
+    return adapter
+
+
+class TestShopifyDelta:
+    @pytest.mark.asyncio
+    async def test_price_only_updates_the_variant(self):
+        store = RecordingShopify()
+
+        result = await _adapter(store).push_product_delta(PRODUCT, {"price"})
+
+        assert store.requests == [("GET", "/products.json"), ("PUT", "/variants/10.json")]
+        assert store.bodies[-1] == {"variant": {"price": "12.5"}}
+        assert result["external_id"] == "1" and result["updated_at"] is None
+
+    @pytest.mark.asyncio
+    async def test_metadata_put_leaves_variants_and_images_out(self):
+        store = RecordingShopify()
+
+        result = await _adapter(store).push_product_delta(PRODUCT, {"title", "status", "stock"})
+
+        assert store.requests[0] == ("PUT", "/products/1.json")
+        assert store.bodies[0] == {"product": {"id": "1", "title": "Mug", "status": "active"}}
+        assert store.requests[-1] == ("POST", "/inventory_levels/set.json")
+        assert store.bodies[-1]["available"] == 4
+        assert result["updated_at"] == "2026-10-17T10:00:00+02:00"
+
+    @pytest.mark.asyncio
+    async def test_fields_without_a_narrow_endpoint_push_everything(self):
+        store = RecordingShopify()
+
+        await _adapter(store).push_product_delta(PRODUCT, {"price", "images"})
+
+        assert store.requests == [("PUT", "/products/1.json")]
+        assert len(store.bodies[0]["product"]["images"]) == 2
+
+
+class TestWooCommerceDelta:
+    @pytest.mark.asyncio
+    async def test_one_put_with_only_changed_keys(self):
+        store = WooStore()
+
+        result = await _woo(store).push_product_delta(PRODUCT, {"price", "stock"})
+
+        [(method, path, body)] = store.requests
+        assert method == "PUT" and path.endswith("/products/1")
+        assert body == {"regular_price": "12.5", "sale_price": "", "manage_stock": True, "stock_quantity": 4}
+        assert result["updated_at"] == "2026-10-17T08:00:00+00:00"
+
+    @pytest.mark.asyncio
+    async def test_clearing_a_sale_clears_sale_price(self):
+        store = WooStore()
+        on_sale = replace(PRODUCT, price=9.5, compare_at_price=12.5)
+
+        await _woo(store).push_product_delta(on_sale, {"price"})
+        await _woo(store).push_product_delta(PRODUCT, {"compare_at_price"})
+
+        assert [body for _, _, body in store.requests] == [
+            {"regular_price": "12.5", "sale_price": "9.5"},
+            {"regular_price": "12.5", "sale_price": ""},
+        ]
+
+    @pytest.mark.asyncio
+    async def test_new_products_are_created_in_full(self):
+        store = WooStore()
+        product = PlatformProduct(title="Mug", price=3, images=["https://cdn/a.jpg"])
+
+        await _woo(store).push_product_delta(product, {"price"})
+
+        [(method, path, body)] = store.requests
+        assert method == "POST" and body["images"] == [{"src": "https://cdn/a.jpg"}]
@@ -0,0 +1,362 @@
+"""
+Product export tests
+Tests: keyset pagination, incremental CSV/NDJSON/JSON encoding, gzip on the fly,
+streamed endpoint and the export job's throughput / byte counts, background export
+jobs to storage and Range downloads.
+"""
+
+import csv
+import gzip
+import io
+import json
+import pytest
+from unittest.mock import patch
+
+
+def _products(n, start=0):
+    return [
+        {"id": f"id-{i:05d}", "created_at": f"2026-01-01T00:00:{i % 60:02d}", "title": f"P{i}",
+         "tags": ["a", "b"], "metadata": {"k": i}}
+        for i in range(start, start + n)
+    ]
+
+
+class PagedExecutor:
+    """asyncpg stand-in serving product pages in order and recording statements"""
+
+    def __init__(self, pages, fail_at=None, count=0):
+        self.pages = list(pages)
+        self.fail_at = fail_at
+        self.count = count
+        self.statements = []
+
+    async def fetchval(self, query, *args):
+        return self.count  # row count checked before choosing stream vs background
+
+    async def fetch(self, query, *args):
+        self.statements.append((query, args))
+        if 'FROM public."products"' in query:
+            if self.fail_at is not None and len(self.product_queries()) > self.fail_at:
+                raise ConnectionError("connection lost")
+            return self.pages.pop(0) if self.pages else []
+        return [{"id": "job-1"}]
+
+    async def execute(self, query, *args):
+        self.statements.append((query, args))
+        return "UPDATE 1"
+
+    def product_queries(self):
+        return [s for s in self.statements if 'FROM public."products"' in s[0]]
+
+    def job_update(self):
+        query, args = [s for s in self.statements if s[0].startswith('UPDATE public."jobs"')][-1]
+        return json.loads(args[0])
+
+
+async def _collect(iterator):
+    return [chunk async for chunk in iterator]
+
+
+class TestKeysetPagination:
+    @pytest.mark.asyncio
+    async def test_pages_resume_after_last_created_at_and_id(self):
+        from app.core.repository import Repository
+        from app.services.export_service import iter_product_pages
+        db = PagedExecutor([_products(2), _products(2, start=2), _products(1, start=4)])
+
+        pages = await _collect(iter_product_pages(Repository(db), "user_id = $1 AND status = $2", ["u", "active"], page_size=2))
+
+        assert [len(p) for p in pages] == [2, 2, 1]
+        first, second, _ = db.product_queries()
+        assert "<" not in first[0]
+        assert 'ORDER BY "created_at" DESC, "id" DESC LIMIT 2' in first[0]
+        assert '("created_at", "id") < ($3::text::timestamptz, $4::text::uuid)' in second[0]
+        assert second[1] == ("u", "active", "2026-01-01T00:00:01", "id-00001")
+
+    @pytest.mark.asyncio
+    async def test_short_page_ends_without_extra_query(self):
+        from app.core.repository import Repository
+        from app.services.export_service import iter_product_pages
+        db = PagedExecutor([_products(3)])
+
+        pages = await _collect(iter_product_pages(Repository(db), "user_id = $1", ["u"], page_size=5))
+
+        assert len(pages) == 1 and len(db.product_queries()) == 1
+
+
+class TestEncoding:
+    async def _pages(self, *pages):
+        for page in pages:
+            yield page
+
+    @pytest.mark.asyncio
+    async def test_csv_header_once_and_nested_values_as_json(self):
+        from app.services.export_service import encode_export
+        chunks = await _collect(encode_export(self._pages(_products(2), _products(2, start=2)), "csv"))
+
+        assert len(chunks) == 2
+        rows = list(csv.DictReader(io.StringIO(b"".join(chunks).decode())))
+        assert [r["title"] for r in rows] == ["P0", "P1", "P2", "P3"]
+        assert json.loads(rows[3]["tags"]) == ["a", "b"] and json.loads(rows[3]["metadata"]) == {"k": 3}
+
+    @pytest.mark.asyncio
+    async def test_json_array_spans_pages(self):
+        from app.services.export_service import encode_export
+        data = b"".join(await _collect(encode_export(self._pages(_products(2), _products(1, start=2)), "json")))
+        assert [p["title"] for p in json.loads(data)] == ["P0", "P1", "P2"]
+        assert json.loads(b"".join(await _collect(encode_export(self._pages(), "json")))) == []
+
+    @pytest.mark.asyncio
+    async def test_gzip_stream_and_byte_counts(self):
+        from app.services.export_service import ExportStats, encode_export
+        stats = ExportStats()
+
+        chunks = await _collect(encode_export(self._pages(_products(500), _products(500, start=500)), "ndjson", True, stats))
+        data = b"".join(chunks)
+
+        lines = gzip.decompress(data).decode().splitlines()
+        assert len(lines) == 1000 and json.loads(lines[-1])["title"] == "P999"
+        assert stats.rows == 1000 and stats.pages == 2
+        assert stats.bytes_written == len(data) < stats.bytes_raw
+        assert stats.to_dict()["metrics"]["compression_ratio"] > 1
+
+
+class TestExportEndpoint:
+    async def _export(self, db, **kwargs):
+        from app.api.v1.endpoints import products
+        from app.core.repository import Repository
+        params = {"format": "csv", "gzip": False, "status": None, "category": None, **kwargs}
+        with patch.object(products, "get_repository", return_value=Repository(db)):
+            response = await products.export_products(user_id="u", **params)
+            chunks = await _collect(response.body_iterator)
+        return response, b"".join(chunks)
+
+    @pytest.mark.asyncio
+    async def test_streams_pages_and_records_throughput(self):
+        from app.services.export_service import EXPORT_PAGE_SIZE
+        db = PagedExecutor([_products(EXPORT_PAGE_SIZE), _products(10, start=EXPORT_PAGE_SIZE)])
+
+        response, data = await self._export(db, format="ndjson", gzip=True, status="active")
+
+        assert response.media_type == "application/gzip"
+        assert response.headers["x-job-id"] == "job-1"
+        assert "products-" in response.headers["content-disposition"]
+        assert response.headers["content-disposition"].endswith(".ndjson.gz")
+        assert len(gzip.decompress(data).splitlines()) == EXPORT_PAGE_SIZE + 10
+        update = db.job_update()
+        assert update["status"] == "completed" and update["total_items"] == EXPORT_PAGE_SIZE + 10
+        assert update["output_data"]["bytes"] == len(data)
+        assert update["output_data"]["metrics"]["rows_per_second"] > 0
+        assert db.product_queries()[0][1] == ("u", "active")
+
+    @pytest.mark.asyncio
+    async def test_failure_mid_stream_marks_job_failed(self):
+        from app.services.export_service import EXPORT_PAGE_SIZE
+        db = PagedExecutor([_products(EXPORT_PAGE_SIZE)], fail_at=1)
+
+        with pytest.raises(ConnectionError):
+            await self._export(db)
+
+        update = db.job_update()
+        assert update["status"] == "failed" and update["processed_items"] == EXPORT_PAGE_SIZE
+        assert "connection lost" in update["error_message"]
+
+
+class TestBackgroundExport:
+    JOB_ID = "00000000-0000-0000-0000-0000000000e1"
+
+    def _storage(self, tmp_path):
+        from app.services.export_storage import LocalExportStorage
+        return LocalExportStorage(str(tmp_path))
+
+    def test_local_storage_round_trip_and_path_checks(self, tmp_path):
+        storage = self._storage(tmp_path)
+        source = tmp_path / "src.bin"
+        source.write_bytes(b"0123456789")
+
+        storage.save("u/job/f.csv.gz", str(source), "application/gzip")
+
+        assert storage.size("u/job/f.csv.gz") == 10 and storage.signed_url("u/job/f.csv.gz", 60) is None
+        with storage.open("u/job/f.csv.gz") as f:
+            assert f.read() == b"0123456789"
+        with pytest.raises(ValueError):
+            storage.open("../outside.csv")
+        storage.delete("u/job/f.csv.gz")
+        assert storage.size("u/job/f.csv.gz") is None
+
+    def test_supabase_storage_is_signed_url_only(self):
+        from unittest.mock import MagicMock
+        from app.services.export_storage import SupabaseExportStorage
+        client = MagicMock()
+        client.storage.from_.return_value.create_signed_url.return_value = {"signedURL": "https://cdn/x"}
+        storage = SupabaseExportStorage("exports", client=client)
+
+        assert storage.signed_url("u/j/f.csv.gz", 60, "f.csv.gz") == "https://cdn/x"
+        assert not hasattr(storage, "open") and not hasattr(storage, "size")
+        client.storage.from_.return_value.create_signed_url.return_value = {"error": "not found"}
+        with pytest.raises(RuntimeError):
+            storage.signed_url("u/j/f.csv.gz", 60)
+
+    def test_task_writes_gzip_file_and_completes_job(self, tmp_path):
+        from contextlib import asynccontextmanager
+        from app.queue.tasks import export_products_file
+        from app.services.export_service import EXPORT_PAGE_SIZE
+        from tests.test_imports import FakeSupabase
+        db, fake, storage = PagedExecutor([_products(EXPORT_PAGE_SIZE), _products(5, start=EXPORT_PAGE_SIZE)]), FakeSupabase(), self._storage(tmp_path)
+
+        @asynccontextmanager
+        async def pool():
+            yield db
+
+        with patch("app.core.database.task_pool", pool), \
+                patch("app.core.database.get_supabase", return_value=fake), \
+                patch("app.services.export_storage.get_export_storage", return_value=storage):
+            result = export_products_file.apply(
+                kwargs={"user_id": "u", "format": "ndjson", "filters": {"status": "active"}}, task_id=self.JOB_ID,
+            ).get()
+
+        assert result["rows"] == EXPORT_PAGE_SIZE + 5
+        assert result["download_url"] == f"/api/v1/jobs/{self.JOB_ID}/download"
+        job = fake.rows["jobs"][0]
+        assert job["status"] == "completed" and job["job_subtype"] == "products"
+        file = job["output_data"]["file"]
+        assert file["path"].startswith(f"u/{self.JOB_ID}/products-") and file["path"].endswith(".ndjson.gz")
+        with storage.open(file["path"]) as f:
+            data = f.read()
+        assert len(data) == file["size"] and len(gzip.decompress(data).splitlines()) == EXPORT_PAGE_SIZE + 5
+        assert db.product_queries()[0][1] == ("u", "active")
+
+    @pytest.mark.asyncio
+    async def test_large_export_is_queued_instead_of_streamed(self):
+        from unittest.mock import MagicMock
+        from app.api.v1.endpoints import products
+        from app.core.repository import Repository
+        task = MagicMock()
+        task.delay.return_value.id = "job-9"
+        db = PagedExecutor([], count=80_000)
+        with patch("app.queue.tasks.export_products_file", task), \
+                patch.object(products, "redis_queue") as queue, \
+                patch.object(products, "get_repository", return_value=Repository(db)):
+            response = await products.export_products(user_id="u", format="csv", gzip=False, status=None, category=None)
+
+        assert response.status_code == 202
+        assert json.loads(response.body) == {
+            "success": True, "job_id": "job-9", "status": "queued", "total": 80_000,
+            "download_url": "/api/v1/jobs/job-9/download",
+        }
+        assert task.delay.call_args.kwargs["gzip"] is True and task.delay.call_args.kwargs["total"] == 80_000
+        queue.track_user_job.assert_called_once_with("u", "job-9", "export")
+        assert not db.product_queries()
+
+
+class TestSeoAuditExport:
+    """Inline SEO audit exports stream every page, not just PostgREST's first 1000 rows"""
+
+    def _pages(self, n):
+        return [{"id": f"p-{i:05d}", "url": f"https://s.test/{i}", "page_type": "product", "http_status": 200,
+                 "score": 100 - i // 100, "title_length": 40, "meta_description_length": 120,
+                 "images_missing_alt_count": 0, "issues_summary": {"major": 1}} for i in range(n)]
+
+    async def _export(self, format, total=1500):
+        from unittest.mock import MagicMock
+        from app.api.v1.endpoints import seo
+        from app.core.repository import Repository
+        from app.services.export_service import EXPORT_PAGE_SIZE
+        rows = self._pages(total)
+        db = PagedExecutor([])
+        db.pages = [rows[i:i + EXPORT_PAGE_SIZE] for i in range(0, total, EXPORT_PAGE_SIZE)]
+        query = MagicMock()
+        for method in ("select", "eq", "single", "limit"):
+            getattr(query, method).return_value = query
+        query.execute.return_value = MagicMock(data={"id": "a1"}, count=total)
+        supabase = MagicMock()
+        supabase.table.return_value = query
+
+        async def fetch(sql, *args):
+            db.statements.append((sql, args))
+            return db.pages.pop(0) if db.pages else []
+
+        db.fetch = fetch
+        with patch.object(seo, "get_supabase", return_value=supabase), \
+                patch.object(seo, "get_repository", return_value=Repository(db)):
+            response = await seo.export_audit(audit_id="a1", user_id="u", format=format, background=False)
+            body = b"".join(await _collect(response.body_iterator))
+        return body, db.statements
+
+    @pytest.mark.asyncio
+    async def test_csv_streams_past_the_first_thousand_rows(self):
+        body, statements = await self._export("csv")
+
+        rows = list(csv.DictReader(io.StringIO(body.decode())))
+        assert len(rows) == 1500 and rows[-1]["url"] == "https://s.test/1499" and rows[0]["major"] == "1"
+        assert len(statements) == 2 and 'FROM public."seo_audit_pages"' in statements[0][0]
+        assert statements[1][1] == ("a1", "91", "p-00999")  # resumes after the last (score, id)
+
+    @pytest.mark.asyncio
+    async def test_json_keeps_its_shape(self):
+        body, _ = await self._export("json")
+
+        data = json.loads(body)
+        assert data["audit_id"] == "a1" and len(data["items"]) == 1500
+        assert "id" not in data["items"][0] and data["items"][0]["issues_summary"] == {"major": 1}
+
+
+class TestDownload:
+    def _client(self, tmp_path, content=b"0123456789" * 100, file=True):
+        from fastapi import FastAPI
+        from fastapi.testclient import TestClient
+        from app.api.v1.endpoints import jobs
+        from app.core.security import get_current_user_id
+        from app.services.export_storage import LocalExportStorage
+        from tests.test_imports import FakeSupabase
+
+        storage = LocalExportStorage(str(tmp_path))
+        (tmp_path / "u" / "j").mkdir(parents=True)
+        (tmp_path / "u" / "j" / "products.csv.gz").write_bytes(content)
+        output = {"file": {"path": "u/j/products.csv.gz", "filename": "products.csv.gz",
+                           "size": len(content), "content_type": "application/gzip"}} if file else {}
+        fake = FakeSupabase(rows={"jobs": [{"id": "j", "user_id": "u", "status": "completed", "output_data": output}]})
+
+        app = FastAPI()
+        app.include_router(jobs.router, prefix="/jobs")
+        app.dependency_overrides[get_current_user_id] = lambda: "u"
+        self._patches = [patch.object(jobs, "get_supabase", return_value=fake),
+                         patch("app.services.export_storage.get_export_storage", return_value=storage)]
+        for p in self._patches:
+            p.start()
+        return TestClient(app)
+
+    def teardown_method(self):
+        for p in getattr(self, "_patches", []):
+            p.stop()
+
+    def test_full_download_advertises_ranges(self, tmp_path):
+        response = self._client(tmp_path).get("/jobs/j/download")
+        assert response.status_code == 200 and len(response.content) == 1000
+        assert response.headers["accept-ranges"] == "bytes"
+        assert response.headers["content-disposition"].endswith("products.csv.gz")
+
+    def test_range_requests_return_partial_content(self, tmp_path):
+        client = self._client(tmp_path)
+
+        response = client.get("/jobs/j/download", headers={"Range": "bytes=10-19"})
+        assert response.status_code == 206 and response.content == b"0123456789"
+        assert response.headers["content-range"] == "bytes 10-19/1000"
+
+        tail = client.get("/jobs/j/download", headers={"Range": "bytes=-5"})
+        assert tail.status_code == 206 and tail.content == b"56789"
+        assert client.get("/jobs/j/download", headers={"Range": "bytes=995-"}).headers["content-length"] == "5"
+
+    def test_unsatisfiable_range_and_missing_file(self, tmp_path):
+        client = self._client(tmp_path)
+        response = client.get("/jobs/j/download", headers={"Range": "bytes=5000-"})
+        assert response.status_code == 416 and response.headers["content-range"] == "bytes */1000"
+
+        self.teardown_method()
+        assert self._client(tmp_path / "other", file=False).get("/jobs/j/download").status_code == 409
+
+    def test_signed_url_storage_redirects(self, tmp_path):
+        client = self._client(tmp_path)
+        with patch("app.services.export_storage.LocalExportStorage.signed_url", return_value="https://cdn/x?token=t"):
+            response = client.get("/jobs/j/download", follow_redirects=False)
+        assert response.status_code == 307 and response.headers["location"] == "https://cdn/x?token=t"
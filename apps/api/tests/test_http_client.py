@@ -0,0 +1,101 @@
+"""
+Pooled HTTP client tests
+Tests: one client per host and event loop, keep-alive reuse by the platform
+adapters (against a local stub API), adapter / supplier context managers, LRU
+eviction sparing leased clients, and clients closed with the Celery task loop.
+"""
+
+import asyncio
+import pytest
+
+from benchmarks.bench_http_pool import StubServer, _adapter
+
+
+class TestHTTPClientPool:
+    @pytest.mark.asyncio
+    async def test_one_client_per_host(self):
+        from app.core.http_client import HTTPClientPool, host_key
+        pool = HTTPClientPool()
+
+        shop = await pool.client("https://shop.example.com/admin/api/2024-01")
+        assert await pool.client("https://shop.example.com:443/products.json") is shop
+        assert await pool.client("https://other.example.com/") is not shop
+        assert host_key("http://127.0.0.1:8080/x?y=1") == "http://127.0.0.1:8080"
+        await pool.aclose()
+        assert shop.is_closed
+
+    @pytest.mark.asyncio
+    async def test_least_recently_used_idle_host_is_evicted(self):
+        from app.core.http_client import HTTPClientPool
+        pool = HTTPClientPool(max_hosts=2)
+
+        leased = await pool.acquire("https://a.example.com")
+        idle = await pool.client("https://b.example.com")
+        await pool.client("https://c.example.com")
+
+        assert idle.is_closed and not leased.is_closed
+        pool.release("https://a.example.com")
+        await pool.client("https://d.example.com")
+        assert leased.is_closed
+        await pool.aclose()
+
+    @pytest.mark.asyncio
+    async def test_leased_call_is_not_evicted_mid_request(self):
+        from app.core.http_client import HTTPClientPool
+        pool = HTTPClientPool(max_hosts=1)
+
+        async with pool.lease("https://a.example.com") as client:
+            await pool.client("https://b.example.com")  # another caller's new host
+            assert not client.is_closed
+        await pool.client("https://c.example.com")
+        assert client.is_closed
+        await pool.aclose()
+
+    @pytest.mark.asyncio
+    async def test_supplier_context_manager_pins_its_client(self):
+        from app.core.http_client import get_http_pool, host_key
+        from app.services.suppliers.bigbuy import BigBuyService
+        pool = get_http_pool()
+        service = BigBuyService(api_key="k")
+
+        async with service:
+            assert service._client is await pool.client(service.base_url)
+            assert pool._loop_clients().leases[host_key(service.base_url)] == 1
+        assert service._client is None and not pool._loop_clients().leases[host_key(service.base_url)]
+        await pool.aclose()
+
+    def test_task_loop_clients_are_closed_with_the_loop(self):
+        from app.core.http_client import get_http_client
+        from app.queue.tasks import run_async
+
+        first = run_async(get_http_client("https://shop.example.com"))
+        second = run_async(get_http_client("https://shop.example.com"))
+
+        assert first is not second and first.is_closed and second.is_closed
+
+
+class TestAdaptersReuseConnections:
+    @pytest.mark.asyncio
+    async def test_requests_share_one_keep_alive_connection(self):
+        from app.core.http_client import close_loop_http_clients
+        with StubServer() as server:
+            adapter = _adapter(server.url)
+            for i in range(10):
+                assert (await adapter._request("GET", f"/products/{i}"))["product"]["id"] == 1
+            await close_loop_http_clients()
+
+        assert server.connections == 1
+
+    @pytest.mark.asyncio
+    async def test_context_manager_pins_the_host_client(self):
+        from app.core.http_client import close_loop_http_clients, get_http_pool, host_key
+        pool = get_http_pool()
+        with StubServer() as server:
+            async with _adapter(server.url) as adapter:
+                assert pool._loop_clients().leases[host_key(server.url)] == 1
+                assert adapter._client is await pool.client(server.url)
+                await asyncio.gather(*(adapter.pull_product(str(i)) for i in range(4)))
+            assert adapter._client is None and not pool._loop_clients().leases[host_key(server.url)]
+            await close_loop_http_clients()
+
+        assert server.connections <= 4
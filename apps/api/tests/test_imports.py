@@ -0,0 +1,682 @@
+"""
+Import pipeline tests
+Tests: streaming parsers, chunked prefetch + bulk upsert, import metrics,
+incremental imports (conditional GET, row fingerprints, removed SKUs),
+fan-out imports (coordinator, chunk tasks, reducer), compiled mapping plans.
+"""
+
+import pytest
+from unittest.mock import MagicMock, patch
+
+
+class FakeQuery:
+    """Minimal PostgREST builder: records every executed statement"""
+
+    def __init__(self, db, table):
+        self.db = db
+        self.table = table
+        self.op = "select"
+        self.payload = None
+        self.filters = {}
+        self.kwargs = {}
+        self.ordering = None
+        self.bounds = None
+
+    def select(self, *args, **kwargs):
+        self.op = "select"
+        return self
+
+    def eq(self, column, value):
+        self.filters[column] = [value]
+        return self
+
+    def in_(self, column, values):
+        self.filters[column] = list(values)
+        return self
+
+    def order(self, column, desc=False):
+        self.ordering = (column, desc)
+        return self
+
+    def range(self, start, end):
+        self.bounds = (start, end)
+        return self
+
+    def upsert(self, rows, **kwargs):
+        self.op, self.payload, self.kwargs = "upsert", rows, kwargs
+        return self
+
+    def insert(self, rows, **kwargs):
+        self.op, self.payload, self.kwargs = "insert", rows, kwargs
+        return self
+
+    def update(self, values, **kwargs):
+        self.op, self.payload, self.kwargs = "update", values, kwargs
+        return self
+
+    def delete(self, **kwargs):
+        self.op, self.kwargs = "delete", kwargs
+        return self
+
+    def _matches(self, row):
+        return all(row.get(c) in v for c, v in self.filters.items())
+
+    def execute(self):
+        self.db.calls.append((self.table, self.op, self.payload, self.kwargs))
+        rows = self.db.rows.setdefault(self.table, [])
+        if self.op == "select":
+            data = [r for r in rows if self._matches(r)]
+            if self.ordering:
+                data.sort(key=lambda r: r.get(self.ordering[0]), reverse=self.ordering[1])
+            if self.bounds:
+                data = data[self.bounds[0]:self.bounds[1] + 1]
+            return MagicMock(data=data[:self.db.max_rows])
+        if self.op == "update":
+            data = [r for r in rows if self._matches(r)]
+            for row in data:
+                row.update(self.payload)
+            return MagicMock(data=data)
+        if self.op == "delete":
+            data = [r for r in rows if self._matches(r)]
+            rows[:] = [r for r in rows if not self._matches(r)]
+            return MagicMock(data=data)
+        payload = self.payload if isinstance(self.payload, list) else [self.payload]
+        for row in payload:
+            if self.db.fail_on and self.db.fail_on(row):
+                raise ValueError(f"rejected row {row.get('sku')}")
+        if self.op == "upsert":
+            keys = self.kwargs.get("on_conflict", "user_id,sku").split(",")
+            for row in payload:
+                rows[:] = [r for r in rows if [r.get(k) for k in keys] != [row.get(k) for k in keys]]
+        rows.extend(payload)
+        return MagicMock(data=payload)
+
+
+class FakeSupabase:
+    def __init__(self, rows=None, fail_on=None, max_rows=None):
+        self.rows = rows or {}
+        self.calls = []
+        self.fail_on = fail_on
+        self.max_rows = max_rows  # PostgREST db-max-rows: selects return at most this many
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+    def writes(self):
+        return [c for c in self.calls if c[1] != "select"]
+
+
+def _csv(n, start=0):
+    lines = ["title,sku,price,stock"]
+    lines += [f"Product {i},SKU-{i},{i}.50,{i}" for i in range(start, start + n)]
+    return "\n".join(lines)
+
+
+class FakeFeedStore:
+    """In-memory stand-in for the RedisQueue import feed state"""
+
+    def __init__(self):
+        self.validators = {}
+        self.fingerprints = {}
+        self.lookups = 0
+
+    def get_feed_validators(self, user_id, feed_key):
+        return dict(self.validators.get((user_id, feed_key), {}))
+
+    def set_feed_validators(self, user_id, feed_key, etag=None, last_modified=None):
+        self.validators[(user_id, feed_key)] = {
+            k: v for k, v in (("etag", etag), ("last_modified", last_modified)) if v
+        }
+
+    def get_import_fingerprints(self, user_id, feed_key, skus):
+        self.lookups += 1
+        stored = self.fingerprints.get((user_id, feed_key), {})
+        return {sku: stored[sku] for sku in skus if sku in stored}
+
+    def set_import_fingerprints(self, user_id, feed_key, fingerprints):
+        self.fingerprints.setdefault((user_id, feed_key), {}).update(fingerprints)
+
+    def delete_import_fingerprints(self, user_id, feed_key, skus):
+        stored = self.fingerprints.get((user_id, feed_key), {})
+        for sku in skus:
+            stored.pop(sku, None)
+
+    def iter_import_fingerprint_skus(self, user_id, feed_key):
+        return iter(list(self.fingerprints.get((user_id, feed_key), {})))
+
+
+def _run_import(fake, content, fmt="csv", chunk_size=100, feed_store=None, **kwargs):
+    from app.services.import_service import ImportService
+    with patch("app.services.import_service.get_supabase", return_value=fake):
+        return ImportService(chunk_size=chunk_size, feed_store=feed_store).import_from_content(
+            user_id="user-1", content=content, format=fmt, **kwargs
+        )
+
+
+class TestChunkedSave:
+    def test_one_prefetch_and_one_upsert_per_chunk(self):
+        fake = FakeSupabase()
+        result = _run_import(fake, _csv(250), chunk_size=100)
+
+        assert result["total"] == 250
+        assert result["imported"] == 250
+        assert result["metrics"]["chunks"] == 3
+        # 3 chunks x (1 SKU prefetch + 1 upsert)
+        assert result["metrics"]["round_trips"] == 6
+        assert result["metrics"]["round_trips_per_1k_rows"] == 24.0
+        upserts = [c for c in fake.calls if c[1] == "upsert"]
+        assert len(upserts) == 3
+        assert all(c[3]["on_conflict"] == "user_id,sku" for c in upserts)
+
+    def test_requested_chunk_size_is_bounded(self):
+        from pydantic import ValidationError
+        from app.api.v1.endpoints.imports import MAX_IMPORT_CHUNK_SIZE, UrlImportRequest
+
+        assert UrlImportRequest(url="https://feeds.test/p.csv", chunk_size=MAX_IMPORT_CHUNK_SIZE).chunk_size == MAX_IMPORT_CHUNK_SIZE
+        for size in (0, -5, MAX_IMPORT_CHUNK_SIZE + 1):
+            with pytest.raises(ValidationError):
+                UrlImportRequest(url="https://feeds.test/p.csv", chunk_size=size)
+
+    def test_existing_skus_are_updated_and_keep_status(self):
+        fake = FakeSupabase(rows={"products": [
+            {"user_id": "user-1", "sku": "SKU-1", "status": "active", "created_at": "2025-01-01"},
+        ]})
+        result = _run_import(fake, _csv(3))
+
+        assert result["imported"] == 2
+        assert result["updated"] == 1
+        sku1 = next(r for r in fake.rows["products"] if r["sku"] == "SKU-1")
+        assert sku1["status"] == "active"
+        assert sku1["created_at"] == "2025-01-01"
+        assert sku1["sale_price"] == 1.5
+
+    def test_update_existing_false_skips_known_skus(self):
+        fake = FakeSupabase(rows={"products": [
+            {"user_id": "user-1", "sku": "SKU-0", "status": "active", "created_at": "2025-01-01"},
+        ]})
+        result = _run_import(fake, _csv(2), update_existing=False)
+
+        assert result["imported"] == 1
+        assert result["skipped"] == 1
+        upserted = [r["sku"] for c in fake.writes() for r in c[2]]
+        assert upserted == ["SKU-1"]
+
+    def test_duplicate_sku_in_chunk_last_wins(self):
+        content = "title,sku,price\nFirst,DUP,1\nSecond,DUP,2"
+        fake = FakeSupabase()
+        result = _run_import(fake, content)
+
+        assert result["imported"] == 1
+        assert result["skipped"] == 1
+        assert fake.rows["products"][0]["title"] == "Second"
+
+    def test_rows_without_sku_are_inserted(self):
+        content = "title,price\nNo SKU,3"
+        fake = FakeSupabase()
+        result = _run_import(fake, content)
+
+        assert result["imported"] == 1
+        assert [c[1] for c in fake.calls] == ["insert"]
+        assert fake.rows["products"][0]["sku"] is None
+
+    def test_failed_bulk_write_isolates_bad_rows(self):
+        fake = FakeSupabase(fail_on=lambda row: row.get("sku") == "SKU-2")
+        result = _run_import(fake, _csv(5))
+
+        assert result["imported"] == 4
+        assert result["failed"] == 1
+        assert result["errors"][0]["index"] == 2
+
+    def test_json_and_xml_use_same_save_path(self):
+        fake = FakeSupabase()
+        json_result = _run_import(fake, '[{"title": "J", "sku": "J-1", "price": "9,90"}]', fmt="json")
+        xml_result = _run_import(
+            fake, "<feed><item><title>X</title><sku>X-1</sku><price>5</price></item></feed>", fmt="xml"
+        )
+
+        assert json_result["imported"] == 1
+        assert xml_result["imported"] == 1
+        assert {r["sku"] for r in fake.rows["products"]} == {"J-1", "X-1"}
+
+
+
+class TestMappingPlan:
+    CONTENT = (
+        "Name,Reference,Prix,Qty,Image\n"
+        "Lamp,L-1,\"19,90 €\",12,https://cdn/a.jpg|https://cdn/b.jpg\n"
+        "\n"
+        "Chair,C-1,$ 1 250,in stock\n"
+        "Desk,D-1,,\n"
+        ",NO-TITLE,5,5,\n"
+    )
+
+    def test_row_and_vectorized_modes_agree(self):
+        from app.services.import_service import ImportService
+        rows = list(ImportService(vectorized=False)._parse_csv(self.CONTENT))
+        vectorized = list(ImportService(chunk_size=2, vectorized=True)._parse_csv(self.CONTENT))
+
+        assert rows == vectorized
+        assert [p["title"] for p in rows] == ["Lamp", "Chair", "Desk"]
+        assert rows[0]["sale_price"] == 19.9
+        assert rows[0]["images"] == ["https://cdn/a.jpg", "https://cdn/b.jpg"]
+        assert rows[1]["sale_price"] == 1250.0 and rows[1]["stock"] == 100
+
+    def test_short_rows_read_missing_cells(self):
+        from app.services.import_mapping import MappingPlan
+        plan = MappingPlan.compile(["title", "sku", "price"], {"title": "title", "sku": "sku", "price": "price"})
+
+        assert plan.map_row(["Lamp"]) == {
+            "title": "Lamp", "description": "", "sale_price": 0.0, "cost_price": 0,
+            "sku": None, "stock": 0, "images": [], "category": "",
+        }
+        assert plan.map_rows([["Lamp"]]) == [plan.map_row(["Lamp"])]
+
+    def test_duplicate_header_last_column_wins(self):
+        from app.services.import_mapping import MappingPlan
+        plan = MappingPlan.compile(["title", "sku", "title"], {"title": "title"})
+
+        assert plan.map_row(["Old", "S-1", "New"])["title"] == "New"
+
+    @pytest.mark.parametrize("column", [
+        ["12,50 €", "3", "", None],
+        ["1.2.3", "7"],
+        ["nan", "1_000", "1e3", "\t5"],
+    ])
+    def test_vectorized_price_coercion_matches_scalar(self, column):
+        from app.services.import_mapping import coerce_prices, parse_price
+        import math
+        expected = [parse_price(v) for v in column]
+        got = coerce_prices(column)
+        assert all(a == b or (math.isnan(a) and math.isnan(b)) for a, b in zip(got, expected))
+
+    @pytest.mark.parametrize("column", [
+        ["12", " 3 ", "", None],
+        ["in stock", "5", "Rupture"],
+        ["99999999999999999999", "1"],
+        ["5.0", "2"],
+    ])
+    def test_vectorized_stock_coercion_matches_scalar(self, column):
+        from app.services.import_mapping import coerce_stocks, parse_stock
+        assert coerce_stocks(column) == [parse_stock(v) for v in column]
+
+class TestStreamingParsers:
+    def test_csv_from_byte_chunks_split_mid_row(self):
+        from app.services.import_service import ImportService, _ByteStream
+        import io
+        data = 'title;sku;price\n"Multi\nline";A-1;1,50\nPlain;A-2;2\n'.encode()
+        chunks = [data[i:i + 7] for i in range(0, len(data), 7)]
+        text = io.TextIOWrapper(io.BufferedReader(_ByteStream(chunks)), encoding="utf-8", newline="")
+
+        products = list(ImportService(chunk_size=10)._parse_csv(text))
+
+        assert [p["sku"] for p in products] == ["A-1", "A-2"]
+        assert products[0]["title"] == "Multi\nline"
+        assert products[0]["sale_price"] == 1.5
+
+    def test_xml_parser_reads_feed_lazily(self):
+        from app.services.import_service import ImportService, _ByteStream
+        consumed = []
+
+        def chunks():
+            yield b"<catalog><products>"
+            for i in range(3):
+                consumed.append(i)
+                yield f"<product><title>P{i}</title><sku>S{i}</sku></product>".encode()
+            yield b"</products></catalog>"
+
+        parser = ImportService(chunk_size=10)._parse_xml(_ByteStream(chunks()))
+        first = next(parser)
+
+        assert first == {"title": "P0", "sku": "S0"}
+        assert len(consumed) < 3  # the rest of the feed has not been read yet
+        assert [p["sku"] for p in parser] == ["S1", "S2"]
+
+    def test_import_from_url_streams_into_save_stage(self):
+        import httpx
+        real_client = httpx.Client
+        body = _csv(30).encode()
+
+        def handler(request):
+            return httpx.Response(200, stream=httpx.ByteStream(body), headers={"content-type": "text/csv"})
+
+        def client_factory(**kwargs):
+            return real_client(transport=httpx.MockTransport(handler), **kwargs)
+
+        from app.services.import_service import ImportService
+        fake = FakeSupabase()
+        with patch("app.services.import_service.get_supabase", return_value=fake), \
+                patch("app.services.import_service.httpx.Client", side_effect=client_factory):
+            result = ImportService(chunk_size=10).import_from_url(
+                user_id="user-1", url="https://feeds.example.com/catalog.csv"
+            )
+
+        assert result["imported"] == 30
+        assert result["metrics"]["chunks"] == 3
+
+
+class TestExcelImport:
+    def _workbook(self, rows, sheets=None):
+        import io
+        from openpyxl import Workbook
+        wb = Workbook(write_only=True)
+        for title, sheet_rows in (sheets or {"Products": rows}).items():
+            ws = wb.create_sheet(title)
+            for row in sheet_rows:
+                ws.append(row)
+        buf = io.BytesIO()
+        wb.save(buf)
+        return buf.getvalue()
+
+    def test_excel_rows_are_mapped_like_csv(self):
+        content = self._workbook([
+            [None, None, None],
+            ["Title", "SKU", "Price", "Stock"],
+            ["Lamp", 1001, 19.9, 5.0],
+            ["Chair", "C-2", "12,50 €", "in stock"],
+            [None, "NO-TITLE", 1, 1],
+        ])
+        from app.services.import_service import ImportService
+        products = list(ImportService()._parse_excel(content))
+
+        assert [p["sku"] for p in products] == ["1001", "C-2"]
+        assert products[0]["sale_price"] == 19.9
+        assert products[0]["stock"] == 5
+        assert products[1]["sale_price"] == 12.5
+        assert products[1]["stock"] == 100
+
+    def test_sheets_without_title_column_are_skipped(self):
+        content = self._workbook(None, sheets={
+            "Summary": [["Total", "Value"], [1, 2]],
+            "Catalog": [["name", "reference"], ["Desk", "D-1"]],
+        })
+        fake = FakeSupabase()
+        result = _run_import(fake, content, fmt="excel")
+
+        assert result["imported"] == 1
+        assert fake.rows["products"][0]["sku"] == "D-1"
+
+    def test_upload_validation_reads_the_imported_sheet(self):
+        from app.core.validators import _read_excel_header
+        content = self._workbook(None, sheets={
+            "Summary": [["Total", "Value"], [1, 2]],
+            "Catalog": [[None], ["name", "reference", None, "price"], ["Desk", "D-1", None, 5]],
+        })
+
+        assert _read_excel_header(content) == ["name", "reference", "price"]
+        assert _read_excel_header(self._workbook(None, sheets={"Summary": [["Total", "Value"]]})) == ["Total", "Value"]
+
+
+class TestIncrementalImport:
+    def test_unchanged_rows_are_not_written_again(self):
+        fake, store = FakeSupabase(), FakeFeedStore()
+        first = _run_import(fake, _csv(5), feed_store=store, feed_key="feed")
+        fake.calls.clear()
+
+        content = _csv(5).replace("Product 3,SKU-3,3.50", "Product 3,SKU-3,4.00")
+        second = _run_import(fake, content, feed_store=store, feed_key="feed")
+
+        assert first["imported"] == 5
+        assert second["unchanged"] == 4
+        assert second["updated"] == 1
+        assert [r["sku"] for c in fake.writes() for r in c[2]] == ["SKU-3"]
+
+    def test_fully_unchanged_chunk_costs_no_database_round_trip(self):
+        fake, store = FakeSupabase(), FakeFeedStore()
+        _run_import(fake, _csv(20), chunk_size=10, feed_store=store, feed_key="feed")
+        fake.calls.clear()
+
+        result = _run_import(fake, _csv(20), chunk_size=10, feed_store=store, feed_key="feed")
+
+        assert result["unchanged"] == 20
+        assert result["metrics"]["round_trips"] == 0
+        assert fake.calls == []
+
+    def test_failed_rows_are_retried_next_run(self):
+        store = FakeFeedStore()
+        _run_import(FakeSupabase(fail_on=lambda row: row.get("sku") == "SKU-1"), _csv(3),
+                    feed_store=store, feed_key="feed")
+
+        result = _run_import(FakeSupabase(), _csv(3), feed_store=store, feed_key="feed")
+
+        assert result["unchanged"] == 2
+        assert result["imported"] == 1
+
+    @pytest.mark.parametrize("action", ["out_of_stock", "delete", "ignore"])
+    def test_removed_skus_are_handled(self, action):
+        fake, store = FakeSupabase(), FakeFeedStore()
+        _run_import(fake, _csv(4), feed_store=store, feed_key="feed")
+
+        result = _run_import(fake, _csv(2), feed_store=store, feed_key="feed", removed_action=action)
+
+        by_sku = {r["sku"]: r for r in fake.rows["products"]}
+        if action == "out_of_stock":
+            assert result["removed"] == 2
+            assert by_sku["SKU-2"]["stock"] == 0 and by_sku["SKU-3"]["stock"] == 0
+            assert by_sku["SKU-1"]["stock"] == 1
+        elif action == "delete":
+            assert result["removed"] == 2
+            assert set(by_sku) == {"SKU-0", "SKU-1"}
+        else:
+            assert result["removed"] == 2
+            assert len(by_sku) == 4
+        assert set(store.fingerprints[("user-1", "feed")]) == {"SKU-0", "SKU-1"}
+
+    def test_empty_feed_does_not_remove_catalog(self):
+        fake, store = FakeSupabase(), FakeFeedStore()
+        _run_import(fake, _csv(3), feed_store=store, feed_key="feed")
+
+        result = _run_import(fake, "title,sku,price,stock", feed_store=store, feed_key="feed")
+
+        assert result["removed"] == 0
+        assert all(r["stock"] for r in fake.rows["products"] if r["sku"] != "SKU-0")
+
+    def test_conditional_get_skips_unmodified_feed(self):
+        import httpx
+        from app.services.import_service import ImportService
+        real_client = httpx.Client
+        seen_headers = []
+
+        def handler(request):
+            seen_headers.append(dict(request.headers))
+            if request.headers.get("if-none-match") == '"v1"':
+                return httpx.Response(304)
+            return httpx.Response(200, content=_csv(3).encode(), headers={
+                "content-type": "text/csv", "etag": '"v1"',
+                "last-modified": "Thu, 15 Oct 2026 10:00:00 GMT",
+            })
+
+        def client_factory(**kwargs):
+            return real_client(transport=httpx.MockTransport(handler), **kwargs)
+
+        fake, store = FakeSupabase(), FakeFeedStore()
+        service = ImportService(chunk_size=10, feed_store=store)
+        with patch("app.services.import_service.get_supabase", return_value=fake), \
+                patch("app.services.import_service.httpx.Client", side_effect=client_factory):
+            first = service.import_from_url(user_id="user-1", url="https://feeds.example.com/a.csv", incremental=True)
+            second = service.import_from_url(user_id="user-1", url="https://feeds.example.com/a.csv", incremental=True)
+
+        assert first["imported"] == 3
+        assert second["not_modified"] is True
+        assert second["total"] == 0
+        assert seen_headers[1]["if-modified-since"] == "Thu, 15 Oct 2026 10:00:00 GMT"
+
+
+class FakeChunkStaging:
+    """In-memory stand-in for the RedisQueue import chunk staging"""
+
+    def __init__(self):
+        self.chunks = {}
+        self.progress = {}
+        self.stats_invalidated = []
+
+    def stash_import_chunk(self, job_id, chunk_index, payload, ttl_seconds=86400):
+        self.chunks[(job_id, chunk_index)] = payload
+
+    def get_import_chunk(self, job_id, chunk_index):
+        return self.chunks.get((job_id, chunk_index))
+
+    def delete_import_chunk(self, job_id, chunk_index):
+        self.chunks.pop((job_id, chunk_index), None)
+
+    def incr_import_progress(self, job_id, rows):
+        self.progress[job_id] = self.progress.get(job_id, 0) + rows
+        return self.progress[job_id]
+
+    def invalidate_product_stats(self, user_id):
+        self.stats_invalidated.append(user_id)
+
+
+class TestParallelImport:
+    JOB_ID = "6f1c2f4e-8a0b-4c1d-9e2f-3a4b5c6d7e8f"
+
+    def _patches(self, fake, staging):
+        return (
+            patch("app.core.database.get_supabase", return_value=fake),
+            patch("app.services.import_service.get_supabase", return_value=fake),
+            patch("app.queue.redis_queue.redis_queue", staging),
+        )
+
+    def _run(self, task, fake, staging, retries=0, **kwargs):
+        p1, p2, p3 = self._patches(fake, staging)
+        with p1, p2, p3:
+            return task.apply(kwargs=kwargs, task_id=self.JOB_ID, retries=retries).get()
+
+    def test_coordinator_stages_chunks_and_fans_out(self):
+        from app.queue.tasks import import_feed_parallel
+        fake, staging = FakeSupabase(), FakeChunkStaging()
+        p1, p2, p3 = self._patches(fake, staging)
+        with p1, p2, p3, patch("app.queue.tasks.chord") as chord:
+            result = import_feed_parallel.apply(kwargs=dict(
+                user_id="user-1", file_content=_csv(25), filename="feed.csv", chunk_size=10
+            ), task_id=self.JOB_ID).get()
+            header = list(chord.call_args[0][0])
+
+        assert result == {"job_id": self.JOB_ID, "chunks": 3, "total": 25}
+        assert [staging.chunks[(self.JOB_ID, n)]["start"] for n in range(3)] == [0, 10, 20]
+        assert len(staging.chunks[(self.JOB_ID, 2)]["rows"]) == 5
+        assert [s.kwargs["chunk_index"] for s in header] == [0, 1, 2]
+        items = fake.rows["job_items"]
+        assert len(items) == 3 and {i["status"] for i in items} == {"pending"}
+        # settings kept for job retries / resumes
+        input_data = fake.rows["jobs"][0]["input_data"]
+        assert input_data["parallel"] and input_data["chunk_size"] == 10 and input_data["update_existing"] is True
+        # chunk items are written in one statement
+        assert len([c for c in fake.calls if c[0] == "job_items"]) == 1
+
+    def test_chunk_task_imports_and_records_item(self):
+        from app.queue.tasks import import_chunk, _chunk_item_id
+        from app.services.import_service import ImportService
+        staging = FakeChunkStaging()
+        rows = list(ImportService().parse(_csv(5, start=10), "csv"))
+        staging.stash_import_chunk(self.JOB_ID, 1, {"start": 10, "rows": rows})
+        item_id = _chunk_item_id(self.JOB_ID, 1)
+        fake = FakeSupabase(rows={"job_items": [{"id": item_id, "job_id": self.JOB_ID, "status": "pending"}]})
+
+        result = self._run(import_chunk, fake, staging,
+                           job_id=self.JOB_ID, user_id="user-1", chunk_index=1, total=15)
+
+        assert result["status"] == "success" and result["imported"] == 5
+        assert len(fake.rows["products"]) == 5
+        item = fake.rows["job_items"][0]
+        assert item["status"] == "success" and item["after_state"]["imported"] == 5
+        assert (self.JOB_ID, 1) not in staging.chunks
+        assert staging.progress[self.JOB_ID] == 5
+        assert staging.stats_invalidated == ["user-1"]
+
+    def test_failed_chunk_keeps_payload_and_does_not_raise(self):
+        from app.queue.tasks import import_chunk
+        from app.services.import_service import ImportService
+        staging = FakeChunkStaging()
+        rows = list(ImportService().parse(_csv(3), "csv"))
+        staging.stash_import_chunk(self.JOB_ID, 0, {"start": 0, "rows": rows})
+        fake = FakeSupabase()
+        fake.table = lambda name: _FailingSelect(fake, name)
+
+        # retries exhausted: the chunk is marked failed instead of raising into the chord
+        result = self._run(import_chunk, fake, staging, retries=3,
+                           job_id=self.JOB_ID, user_id="user-1", chunk_index=0)
+
+        assert result["status"] == "failed"
+        assert "All 3 rows failed" in result["error"]
+        assert (self.JOB_ID, 0) in staging.chunks
+
+    def test_chunk_with_only_rejected_rows_is_not_retried(self):
+        from app.queue.tasks import import_chunk, _chunk_item_id
+        from app.services.import_service import ImportService
+        staging = FakeChunkStaging()
+        rows = list(ImportService().parse(_csv(3), "csv"))
+        staging.stash_import_chunk(self.JOB_ID, 0, {"start": 0, "rows": rows})
+        fake = FakeSupabase(rows={"job_items": [{"id": _chunk_item_id(self.JOB_ID, 0), "status": "pending"}]},
+                            fail_on=lambda row: True)
+
+        result = self._run(import_chunk, fake, staging, job_id=self.JOB_ID, user_id="user-1", chunk_index=0)
+
+        assert result["status"] == "success" and result["failed"] == 3
+        assert "rejected row" in fake.rows["job_items"][0]["after_state"]["errors"][0]["error"]
+
+    def test_retried_job_keeps_import_settings(self):
+        from app.api.v1.endpoints.jobs import _reenqueue_task
+        original = {"job_type": "import", "job_subtype": "xml", "input_data": {
+            "feed_url": "https://feeds.test/p.xml", "parallel": True,
+            "mapping_config": {"title": "name"}, "update_existing": False, "chunk_size": 250,
+        }}
+        with patch("app.queue.tasks.import_feed_parallel") as task:
+            task.delay.return_value.id = "job-2"
+            assert _reenqueue_task(original, "user-1") == "job-2"
+
+        assert task.delay.call_args.kwargs == {
+            "user_id": "user-1", "feed_url": "https://feeds.test/p.xml", "format": "xml",
+            "mapping_config": {"title": "name"}, "update_existing": False, "chunk_size": 250,
+        }
+
+    def test_finalize_aggregates_chunk_items(self):
+        from app.queue.tasks import _chunk_item_id, import_finalize
+        fake = FakeSupabase(rows={
+            "jobs": [{"id": self.JOB_ID}],
+            "job_items": [
+                {"id": _chunk_item_id(self.JOB_ID, 0), "job_id": self.JOB_ID, "status": "success",
+                 "raw_data": {"chunk_index": 0, "rows": 10},
+                 "after_state": {"total": 10, "imported": 8, "updated": 1, "skipped": 0, "failed": 1,
+                                 "errors": [{"index": 4, "error": "bad"}]}},
+                {"id": _chunk_item_id(self.JOB_ID, 1), "job_id": self.JOB_ID, "status": "failed",
+                 "raw_data": {"chunk_index": 1, "rows": 5}, "error_message": "timeout"},
+            ],
+        })
+
+        output = self._run(import_finalize, fake, FakeChunkStaging(), job_id=self.JOB_ID, user_id="user-1")
+
+        assert output["total"] == 15
+        assert output["imported"] == 8 and output["updated"] == 1
+        assert output["failed"] == 6
+        assert output["failed_chunks"] == [{"chunk_index": 1, "rows": 5, "error": "timeout"}]
+        job = fake.rows["jobs"][0]
+        assert job["status"] == "completed"
+        assert job["processed_items"] == 9
+
+
+    def test_finalize_reads_every_chunk_item(self):
+        from app.queue.tasks import _chunk_item_id, import_finalize
+        fake = FakeSupabase(max_rows=1000, rows={
+            "jobs": [{"id": self.JOB_ID}],
+            "job_items": [
+                {"id": _chunk_item_id(self.JOB_ID, i), "job_id": self.JOB_ID, "status": "success",
+                 "raw_data": {"chunk_index": i, "rows": 2}, "after_state": {"total": 2, "imported": 2}}
+                for i in range(2500)
+            ] + [{"id": _chunk_item_id(self.JOB_ID, 2500), "job_id": self.JOB_ID, "status": "failed",
+                  "raw_data": {"chunk_index": 2500, "rows": 2}, "error_message": "timeout"}],
+        })
+
+        output = self._run(import_finalize, fake, FakeChunkStaging(), job_id=self.JOB_ID, user_id="user-1")
+
+        assert output["chunks"] == 2501 and output["total"] == 5002 and output["imported"] == 5000
+        assert output["failed_chunks"] == [{"chunk_index": 2500, "rows": 2, "error": "timeout"}]
+        assert len([c for c in fake.calls if c[:2] == ("job_items", "select")]) == 3
+
+
+class _FailingSelect(FakeQuery):
+    """Products prefetch raises, as when the database is unreachable"""
+
+    def execute(self):
+        if self.table == "products" and self.op == "select":
+            raise ConnectionError("database unreachable")
+        return super().execute()
@@ -0,0 +1,190 @@
+"""
+Cursor pagination tests
+Tests: opaque cursor encoding, NULL-aware keyset conditions (SQL and PostgREST),
+count modes, and cursor pages on the product, job and SEO page lists.
+"""
+
+import json
+import pytest
+from fastapi import HTTPException
+from unittest.mock import MagicMock, patch
+
+from tests.test_repository import FakeExecutor
+
+
+class RecordingQuery:
+    """PostgREST builder stand-in: records chained calls, returns canned rows"""
+
+    def __init__(self, data, count=None):
+        self.calls = []
+        self.data, self.count = data, count
+
+    def __getattr__(self, name):
+        def call(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+            return self
+        return call
+
+    def execute(self):
+        return MagicMock(data=self.data, count=self.count)
+
+    def called(self, name):
+        return [(args, kwargs) for n, args, kwargs in self.calls if n == name]
+
+
+class TestCursor:
+    def test_round_trip_is_opaque_and_url_safe(self):
+        from app.core.pagination import decode_cursor, encode_cursor
+        cursor = encode_cursor("created_at.desc", ["2026-01-01 10:00:00+00:00", "id-1"])
+
+        assert "=" not in cursor and "+" not in cursor and "/" not in cursor
+        assert decode_cursor(cursor, "created_at.desc") == ["2026-01-01 10:00:00+00:00", "id-1"]
+
+    def test_rejects_garbage_and_cursor_of_another_sort(self):
+        from app.core.pagination import decode_cursor, encode_cursor
+        for cursor, sort in (("not-a-cursor", "price.asc"), (encode_cursor("price.desc", [1, "a"]), "price.asc")):
+            with pytest.raises(HTTPException) as exc:
+                decode_cursor(cursor, sort)
+            assert exc.value.status_code == 400
+
+
+class TestKeysetConditions:
+    def test_sql_row_comparison_with_null_handling(self):
+        from app.core.pagination import keyset_sql
+        desc = keyset_sql("price", "numeric", True, ["9.5", "id-1"], 3)
+        asc = keyset_sql("price", "numeric", False, ["9.5", "id-1"], 3)
+
+        assert desc == ('("price", "id") < ($4::text::numeric, $3::text::uuid)', ["id-1", "9.5"])
+        assert asc[0] == '(("price", "id") > ($4::text::numeric, $3::text::uuid) OR "price" IS NULL)'
+        # Cursor on a NULL sort value: NULLs sort first in DESC, last in ASC
+        assert keyset_sql("price", "numeric", True, [None, "id-1"], 3) == \
+            ('("price" IS NOT NULL OR "id" < $3::text::uuid)', ["id-1"])
+        assert keyset_sql("price", "numeric", False, [None, "id-1"], 3)[0] == \
+            '("price" IS NULL AND "id" > $3::text::uuid)'
+
+    def test_postgrest_filter_quotes_values(self):
+        from app.core.pagination import keyset_postgrest
+        assert keyset_postgrest("created_at", True, ["2026-01-01T10:00:00+00:00", "id-1"]) == (
+            'created_at.lt."2026-01-01T10:00:00+00:00",'
+            'and(created_at.eq."2026-01-01T10:00:00+00:00",id.lt.id-1)'
+        )
+        assert keyset_postgrest("score", False, ["70", "id-1"]).endswith(",score.is.null")
+
+
+class TestCountModes:
+    @pytest.mark.asyncio
+    async def test_planned_count_reads_the_plan_without_counting(self):
+        from app.core.pagination import count_rows
+        from app.core.repository import Repository
+        db = FakeExecutor()
+
+        async def fetchval(query, *args):
+            db.statements.append((query, args))
+            return json.dumps([{"Plan": {"Plan Rows": 250_000}}])
+        db.fetchval = fetchval
+
+        assert await count_rows(Repository(db), "products WHERE user_id = $1", ["u"], "planned") == 250_000
+        assert await count_rows(Repository(db), "products WHERE user_id = $1", ["u"], "none") is None
+        assert len(db.statements) == 1 and db.statements[0][0].startswith("EXPLAIN (FORMAT JSON) SELECT 1 FROM products")
+
+    @pytest.mark.asyncio
+    async def test_estimated_counts_exactly_when_small(self):
+        from app.core.pagination import count_rows
+        from app.core.repository import Repository
+        db = FakeExecutor()
+        answers = iter([[{"Plan": {"Plan Rows": 120}}], 118])
+
+        async def fetchval(query, *args):
+            db.statements.append((query, args))
+            return next(answers)
+        db.fetchval = fetchval
+
+        assert await count_rows(Repository(db), "jobs WHERE user_id = $1", ["u"], "estimated") == 118
+        assert db.statements[1][0] == "SELECT count(*) FROM jobs WHERE user_id = $1"
+
+
+class TestCursorEndpoints:
+    async def _list_products(self, db, **kwargs):
+        from app.api.v1.endpoints import products
+        from app.core.repository import Repository
+        params = dict(
+            page=1, limit=2, status=None, category=None, search=None, vendor=None, min_price=None,
+            max_price=None, low_stock=None, tags=None, sort_by="created_at", sort_order="desc",
+        )
+        params.update(kwargs)
+        with patch.object(products, "get_repository", return_value=Repository(db)):
+            return await products.list_products(user_id="u", **params)
+
+    @pytest.mark.asyncio
+    async def test_products_cursor_page_resumes_after_last_row(self):
+        from app.core.pagination import decode_cursor
+        rows = [{"id": f"p{i}", "created_at": f"2026-01-0{i}", "_total": 5} for i in (1, 2, 3)]
+        first = await self._list_products(FakeExecutor(rows=rows))
+
+        assert [p["id"] for p in first["products"]] == ["p1", "p2"]
+        cursor = first["pagination"]["next_cursor"]
+        assert first["pagination"]["has_more"] and decode_cursor(cursor, "created_at.desc") == ["2026-01-02", "p2"]
+
+        db = FakeExecutor(rows=[{"id": "p3", "created_at": "2026-01-03"}])
+        second = await self._list_products(db, cursor=cursor, count="none")
+
+        query, args = db.statements[0]
+        assert '("created_at", "id") < ($3::text::timestamptz, $2::text::uuid)' in query
+        assert "OVER ()" not in query and args == ("u", "p2", "2026-01-02", 3, 0)
+        assert len(db.statements) == 1
+        assert second["pagination"] == {
+            "limit": 2, "total": None, "count_mode": "none", "total_pages": None,
+            "next_cursor": None, "has_more": False,
+        }
+
+    @pytest.mark.asyncio
+    async def test_products_cursor_for_another_sort_is_rejected(self):
+        from app.core.pagination import encode_cursor
+        with pytest.raises(HTTPException) as exc:
+            await self._list_products(FakeExecutor(), cursor=encode_cursor("price.asc", ["1", "p"]))
+        assert exc.value.status_code == 400
+
+    @pytest.mark.asyncio
+    async def test_jobs_cursor_uses_keyset_filter_and_planned_count(self):
+        from app.api.v1.endpoints import jobs
+        from app.core.pagination import encode_cursor
+        page_query = RecordingQuery([{"id": "j3", "created_at": "2026-01-03"}])
+        count_query = RecordingQuery([], count=90_000)
+        supabase = MagicMock()
+        supabase.table.return_value.select.side_effect = [page_query, count_query]
+
+        with patch.object(jobs, "get_supabase", return_value=supabase):
+            result = await jobs.list_jobs(
+                user_id="u", status="completed", job_type=None, page=1, limit=20,
+                cursor=encode_cursor("created_at.desc", ["2026-01-04", "j4"]), count="planned",
+            )
+
+        assert supabase.table.return_value.select.call_args_list[1].kwargs == {"count": "planned"}
+        assert page_query.called("or_") == [(('created_at.lt."2026-01-04",and(created_at.eq."2026-01-04",id.lt.j4)',), {})]
+        assert page_query.called("range") == [((0, 20), {})]
+        assert page_query.called("order") == [(("created_at",), {"desc": True}), (("id",), {"desc": True})]
+        assert result["jobs"] == [{"id": "j3", "created_at": "2026-01-03"}]
+        assert result["pagination"]["total"] == 90_000 and result["pagination"]["has_more"] is False
+
+    @pytest.mark.asyncio
+    async def test_seo_pages_offset_mode_still_works(self):
+        from app.api.v1.endpoints import seo
+        from app.core.pagination import decode_cursor
+        pages = RecordingQuery([{"id": f"s{i}", "score": 90 - i} for i in range(4)], count=40)
+        supabase = MagicMock()
+        supabase.table.return_value.select.return_value.eq.return_value.eq.return_value.single.return_value \
+            .execute.return_value = MagicMock(data={"id": "a"})
+        supabase.table.return_value.select.side_effect = [
+            supabase.table.return_value.select.return_value, pages,
+        ]
+
+        with patch.object(seo, "get_supabase", return_value=supabase):
+            result = await seo.list_audit_pages(
+                audit_id="a", user_id="u", page=3, limit=3, sort="score_desc", page_type=None,
+                min_score=None, max_score=None, has_critical=None,
+            )
+
+        assert pages.called("range") == [((6, 9), {})]
+        assert [i["id"] for i in result["items"]] == ["s0", "s1", "s2"]
+        assert result["page"] == 3 and result["total"] == 40 and result["has_more"] is True
+        assert decode_cursor(result["next_cursor"], "score.desc") == ["88", "s2"]
@@ -0,0 +1,79 @@
+"""
+Product search tests
+Tests: tsquery building from user input, list filter clause, ranked search and
+autocomplete statements, internal search column kept out of responses.
+"""
+
+import pytest
+from unittest.mock import patch
+
+from tests.test_repository import FakeExecutor
+
+
+class TestSearchQuery:
+    def test_words_become_prefix_terms_without_tsquery_syntax(self):
+        from app.services.product_queries import search_tsquery
+        assert search_tsquery("Lampe  LED-12") == "'lampe':* & 'led':* & '12':*"
+        assert search_tsquery("a' | !b:*") == "'a':* & 'b':*"
+        assert search_tsquery("Lam", weights="A") == "'lam':*A"
+        assert search_tsquery("--") == ""
+
+    def test_list_filter_uses_trigram_substrings_or_search_vector(self):
+        from app.services.product_queries import product_filters
+        where, args = product_filters("u", search="desk lamp", min_price=5)
+
+        assert where == (
+            "user_id = $1 AND (title ILIKE $2 OR sku ILIKE $2 OR search_vector @@ to_tsquery('simple', $3)) "
+            "AND price >= $4"
+        )
+        assert args == ["u", "%desk lamp%", "'desk':* & 'lamp':*", 5]
+        assert "description" not in where
+
+
+class TestSearchEndpoints:
+    @pytest.mark.asyncio
+    async def test_search_is_one_ranked_indexed_query(self):
+        from app.api.v1.endpoints import products
+        from app.core.repository import Repository
+        db = FakeExecutor(rows=[{"id": "p1", "title": "Desk lamp", "rank": 0.61234}])
+
+        with patch.object(products, "get_repository", return_value=Repository(db)):
+            result = await products.search_catalog(
+                q="desk lam_", user_id="u", limit=5, offset=10, status="active", category=None, fuzzy=True,
+            )
+
+        assert result["results"] == [{"id": "p1", "title": "Desk lamp", "rank": 0.6123}]
+        query, args = db.statements[0]
+        assert len(db.statements) == 1
+        assert "p.search_vector @@ query OR p.sku ILIKE $4 OR $3 <% p.title" in query
+        assert "AND p.status = $5" in query and "ORDER BY rank DESC" in query
+        assert "LIMIT 5 OFFSET 10" in query and "description" not in query
+        assert args == ("u", "'desk':* & 'lam_':*", "desk lam_", "desk lam\\_%", "active")
+
+    @pytest.mark.asyncio
+    async def test_suggest_matches_title_and_sku_prefixes(self):
+        from app.api.v1.endpoints import products
+        from app.core.repository import Repository
+        db = FakeExecutor(rows=[{"id": "p1", "title": "Lamp", "sku": "LMP-1", "image_url": None}])
+
+        with patch.object(products, "get_repository", return_value=Repository(db)):
+            result = await products.suggest_catalog(q="lmp", user_id="u", limit=8)
+
+        assert [s["id"] for s in result["suggestions"]] == ["p1"]
+        query, args = db.statements[0]
+        assert args == ("u", "'lmp':*A", "lmp%") and query.endswith("LIMIT 8")
+        assert "ORDER BY (p.title ILIKE $3) DESC" in query
+
+    @pytest.mark.asyncio
+    async def test_list_products_drops_search_vector(self):
+        from app.api.v1.endpoints import products
+        from app.core.repository import Repository
+        db = FakeExecutor(rows=[{"id": "p1", "title": "Lamp", "search_vector": "'lamp':1A", "_total": 1}])
+
+        with patch.object(products, "get_repository", return_value=Repository(db)):
+            result = await products.list_products(
+                user_id="u", page=1, limit=20, status=None, category=None, search=None, vendor=None,
+                min_price=None, max_price=None, low_stock=None, tags=None, sort_by="created_at", sort_order="desc",
+            )
+
+        assert result["products"] == [{"id": "p1", "title": "Lamp"}]
@@ -0,0 +1,460 @@
+"""
+Async data-access layer tests
+Tests: bulk helper SQL (one statement per call), value typing through the row type,
+record conversion, hot endpoints awaiting the repository.
+"""
+
+import json
+import pytest
+from contextlib import asynccontextmanager
+from datetime import datetime
+from decimal import Decimal
+from uuid import UUID
+from unittest.mock import AsyncMock, MagicMock, patch
+
+
+class FakeExecutor:
+    """Stands in for an asyncpg pool/connection and records statements"""
+
+    def __init__(self, rows=None, status="UPDATE 0"):
+        self.statements = []
+        self.rows = rows or []
+        self.status = status
+
+    async def fetch(self, query, *args):
+        self.statements.append((query, args))
+        return self.rows
+
+    async def fetchrow(self, query, *args):
+        self.statements.append((query, args))
+        return self.rows[0] if self.rows else None
+
+    async def fetchval(self, query, *args):
+        self.statements.append((query, args))
+        return len(self.rows)
+
+    async def execute(self, query, *args):
+        self.statements.append((query, args))
+        return self.status
+
+
+class TransactionalExecutor(FakeExecutor):
+    """FakeExecutor with acquire() / transaction(): records BEGIN / COMMIT / ROLLBACK,
+    serves `products` selects and optionally fails statements containing `fail_on`"""
+
+    def __init__(self, products=(), fail_on=None):
+        super().__init__(status="UPDATE 1")
+        self.products, self.fail_on = list(products), fail_on
+
+    @asynccontextmanager
+    async def acquire(self):
+        yield self
+
+    @asynccontextmanager
+    async def transaction(self):
+        self.statements.append(("BEGIN", ()))
+        try:
+            yield
+        except Exception:
+            self.statements.append(("ROLLBACK", ()))
+            raise
+        self.statements.append(("COMMIT", ()))
+
+    def _check(self, query):
+        if self.fail_on and self.fail_on in query:
+            raise ConnectionError("connection lost")
+
+    async def fetch(self, query, *args):
+        self.statements.append((query, args))
+        self._check(query)
+        return self.products if query.startswith("SELECT") else [{"id": "job-1"}]
+
+    async def execute(self, query, *args):
+        self.statements.append((query, args))
+        self._check(query)
+        return self.status
+
+
+class TestBulkHelpers:
+    @pytest.mark.asyncio
+    async def test_bulk_insert_is_one_statement_through_row_type(self):
+        from app.core.repository import Repository
+        db = FakeExecutor(rows=[{"id": UUID(int=1)}])
+        rows = [{"title": f"P{i}", "created_at": datetime(2026, 1, 1)} for i in range(3)]
+
+        result = await Repository(db).bulk_insert("products", rows, returning="id")
+
+        assert len(db.statements) == 1
+        query, args = db.statements[0]
+        assert 'INSERT INTO public."products" ("title", "created_at")' in query
+        assert "jsonb_populate_recordset(NULL::public.\"products\", $1::jsonb)" in query
+        assert query.endswith("RETURNING id")
+        assert json.loads(args[0])[2] == {"title": "P2", "created_at": "2026-01-01 00:00:00"}
+        assert result == [{"id": "00000000-0000-0000-0000-000000000001"}]
+
+    @pytest.mark.asyncio
+    async def test_rows_with_different_keys_get_separate_statements(self):
+        from app.core.repository import Repository
+        db = FakeExecutor()
+
+        await Repository(db).bulk_insert("job_items", [
+            {"job_id": "j", "status": "success", "product_id": "p"},
+            {"job_id": "j", "status": "failed"},
+            {"job_id": "j", "status": "success", "product_id": "q"},
+        ], returning=None)
+
+        assert len(db.statements) == 2
+        assert [len(json.loads(args[0])) for _, args in db.statements] == [2, 1]
+
+    @pytest.mark.asyncio
+    async def test_bulk_upsert_updates_non_conflict_columns(self):
+        from app.core.repository import Repository
+        db = FakeExecutor()
+
+        await Repository(db).bulk_upsert(
+            "products", [{"user_id": "u", "sku": "A", "title": "T", "stock": 1}],
+            on_conflict=["user_id", "sku"], returning=None,
+        )
+
+        query = db.statements[0][0]
+        assert 'ON CONFLICT ("user_id", "sku") DO UPDATE SET "title" = EXCLUDED."title", "stock" = EXCLUDED."stock"' in query
+
+    @pytest.mark.asyncio
+    async def test_bulk_update_by_ids_returns_affected_count(self):
+        from app.core.repository import Repository
+        db = FakeExecutor(status="UPDATE 2")
+
+        count = await Repository(db).bulk_update_by_ids(
+            "products", ["a", "b"], {"status": "active"}, filters={"user_id": "u"}
+        )
+
+        query, args = db.statements[0]
+        assert count == 2
+        assert 'SET "status" = r."status"' in query
+        assert 'WHERE t."id" = ANY($2) AND t."user_id" = $3' in query
+        assert args == ('{"status": "active"}', ["a", "b"], "u")
+
+    @pytest.mark.asyncio
+    async def test_empty_input_makes_no_round_trip(self):
+        from app.core.repository import Repository
+        db = FakeExecutor()
+        repo = Repository(db)
+
+        assert await repo.bulk_insert("products", []) == []
+        assert await repo.bulk_update_by_ids("products", [], {"status": "x"}) == 0
+        assert await repo.select_by_ids("products", []) == []
+        assert db.statements == []
+
+    def test_identifiers_are_validated(self):
+        from app.core.repository import ident
+        assert ident("sale_price") == '"sale_price"'
+        with pytest.raises(ValueError):
+            ident('title"; DROP TABLE products; --')
+
+    def test_records_are_rendered_like_postgrest(self):
+        from app.core.repository import record_to_dict
+        row = record_to_dict({
+            "id": UUID(int=5), "price": Decimal("19.90"), "created_at": datetime(2026, 1, 2, 3, 4, 5),
+            "tags": ["a"], "metadata": {"k": 1},
+        })
+        assert row == {
+            "id": "00000000-0000-0000-0000-000000000005", "price": 19.9,
+            "created_at": "2026-01-02T03:04:05", "tags": ["a"], "metadata": {"k": 1},
+        }
+
+    def test_pool_is_resolved_at_call_time(self):
+        from app.core import database
+        from app.core.repository import Repository
+        with patch.object(database, "db_pool", None):
+            with pytest.raises(RuntimeError):
+                Repository().executor
+        pool = FakeExecutor()
+        with patch.object(database, "db_pool", pool):
+            assert Repository().executor is pool
+
+
+class TestEndpointsUseRepository:
+    @pytest.mark.asyncio
+    async def test_list_products_fetches_page_and_total_in_one_query(self):
+        from app.api.v1.endpoints import products
+        db = FakeExecutor(rows=[{"id": "p1", "title": "Lamp", "_total": 41}])
+
+        with patch.object(products, "get_repository", return_value=__import__(
+                "app.core.repository", fromlist=["Repository"]).Repository(db)):
+            result = await products.list_products(
+                user_id="u", page=2, limit=20, status="active", category=None, search="lamp",
+                vendor=None, min_price=None, max_price=None, low_stock=None, tags=None,
+                sort_by="price", sort_order="asc",
+            )
+
+        assert len(db.statements) == 1
+        query, args = db.statements[0]
+        assert "count(*) OVER ()" in query
+        assert "status = $2 AND (title ILIKE $3 OR sku ILIKE $3 OR search_vector @@ to_tsquery('simple', $4))" in query
+        assert 'ORDER BY "price" ASC' in query
+        assert args == ("u", "active", "%lamp%", "'lamp':*", 21, 20)  # one extra row tells has_more
+        assert result["products"] == [{"id": "p1", "title": "Lamp"}]
+        assert result["pagination"] == {
+            "page": 2, "limit": 20, "total": 41, "total_pages": 3,
+            "count_mode": "exact", "next_cursor": None, "has_more": False,
+        }
+
+    @pytest.mark.asyncio
+    async def test_product_detail_is_one_query_with_etag(self):
+        from app.api.v1.endpoints import products
+        from app.core.repository import Repository
+        row = {
+            "id": "p1", "title": "Lamp", "search_vector": "'lamp':1A",
+            "variants": [{"id": "v1"}, {"id": "v2"}], "images": [{"id": "i1"}], "store_links": [],
+        }
+        db = FakeExecutor(rows=[dict(row)])
+        request = MagicMock(headers={})
+
+        with patch.object(products, "get_repository", return_value=Repository(db)):
+            response = await products.get_product(product_id="p1", request=request, user_id="u")
+            db.rows = [dict(row)]
+            request.headers = {"if-none-match": f'"other", {response.headers["etag"]}'}
+            not_modified = await products.get_product(product_id="p1", request=request, user_id="u")
+
+        assert len(db.statements) == 2 and db.statements[0][1] == ("p1", "u")
+        assert "CROSS JOIN LATERAL" in db.statements[0][0]
+        body = json.loads(response.body)["product"]
+        assert [v["id"] for v in body["variants"]] == ["v1", "v2"] and body["images"] == [{"id": "i1"}]
+        assert "search_vector" not in body
+        assert response.headers["etag"].startswith('W/"') and response.headers["cache-control"] == "private, no-cache"
+        assert not_modified.status_code == 304 and not_modified.body == b""
+        assert not_modified.headers["etag"] == response.headers["etag"]
+
+    @pytest.mark.asyncio
+    async def test_product_detail_etag_changes_with_child_rows(self):
+        from app.api.v1.endpoints import products
+        from app.core.repository import Repository
+        row = {
+            "id": "p1", "title": "Lamp", "updated_at": "2026-10-01T00:00:00",
+            "variants": [], "images": [{"id": "i1", "alt_text": "Lamp", "created_at": "2026-10-01T00:00:00"}],
+            "store_links": [{"id": "l1", "stores": {"name": "Shop", "domain": "shop.test"}}],
+        }
+        edited_image = dict(row, images=[dict(row["images"][0], alt_text="Desk lamp")])
+        renamed_store = dict(row, store_links=[{"id": "l1", "stores": {"name": "Shop 2", "domain": "shop.test"}}])
+        etags = []
+
+        with patch.object(products, "get_repository") as get_repository:
+            for version in (row, row, edited_image, renamed_store):
+                get_repository.return_value = Repository(FakeExecutor(rows=[json.loads(json.dumps(version))]))
+                response = await products.get_product(product_id="p1", request=MagicMock(headers={}), user_id="u")
+                etags.append(response.headers["etag"])
+
+        assert etags[0] == etags[1] and len(set(etags)) == 3
+
+    def test_if_none_match_uses_weak_comparison(self):
+        from app.api.v1.endpoints.products import _etag_matches
+        assert _etag_matches('W/"abc"', 'W/"abc"') and _etag_matches('"abc"', 'W/"abc"')
+        assert _etag_matches("*", 'W/"abc"')
+        assert not _etag_matches(None, 'W/"abc"') and not _etag_matches('W/"abd"', 'W/"abc"')
+
+    @pytest.mark.asyncio
+    async def test_stats_are_one_aggregate_query_then_cached(self):
+        from app.api.v1.endpoints import products
+        from app.core.repository import Repository
+        db = FakeExecutor(rows=[{
+            "total": 4, "active": 2, "draft": 1, "paused": 1, "error": 0, "low_stock": 1,
+            "out_of_stock": 1, "total_value": 1234.567, "avg_margin": 41.666, "categories": {"A": 3, "Non catégorisé": 1},
+        }])
+        cache = {}
+        queue = MagicMock()
+        queue.get_product_stats.side_effect = lambda user_id: cache.get(user_id)
+        queue.set_product_stats.side_effect = cache.__setitem__
+
+        with patch.object(products, "get_repository", return_value=Repository(db)), \
+                patch.object(products, "redis_queue", queue):
+            first = await products.get_product_stats(user_id="u")
+            second = await products.get_product_stats(user_id="u")
+
+        assert first == second
+        assert first["stats"]["total_value"] == 1234.57 and first["stats"]["avg_margin"] == 41.67
+        assert db.statements == [(products.PRODUCT_STATS_SQL, ("u",))]
+
+    @pytest.mark.asyncio
+    async def test_product_writes_invalidate_stats(self):
+        from app.api.v1.endpoints import products
+        from tests.test_imports import FakeSupabase
+        fake = FakeSupabase(rows={"products": [{"id": "p1", "user_id": "u", "status": "draft"}]})
+
+        with patch.object(products, "get_supabase", return_value=fake), \
+                patch.object(products, "redis_queue") as queue:
+            await products.bulk_status_update(
+                products.BulkStatusRequest(product_ids=["p1"], status="active"), user_id="u"
+            )
+            await products.delete_product("p1", user_id="u")
+
+        assert queue.invalidate_product_stats.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_bulk_tags_is_one_statement_returning_affected_count(self):
+        from app.api.v1.endpoints import products
+        from app.core.repository import Repository
+        db = FakeExecutor(rows=[1, 2, 3])
+        ids = [f"p{i}" for i in range(5000)]
+
+        with patch.object(products, "get_repository", return_value=Repository(db)):
+            result = await products.bulk_tags_update(
+                products.BulkTagsRequest(product_ids=ids, tags=["sale"], action="remove"), user_id="u"
+            )
+
+        assert result == {"success": True, "updated": 3}
+        assert db.statements == [
+            ("SELECT public.bulk_update_product_tags($1, $2, $3, $4)", ("u", ids, ["sale"], "remove"))
+        ]
+
+    def test_bulk_tags_rejects_unknown_action(self):
+        from pydantic import ValidationError
+        from app.api.v1.endpoints.products import BulkTagsRequest
+        with pytest.raises(ValidationError):
+            BulkTagsRequest(product_ids=["p1"], tags=["x"], action="merge")
+
+    @pytest.mark.asyncio
+    async def test_apply_sync_actions_awaits_repository(self):
+        from app.services.platform_sync.conflict_resolution import apply_sync_actions
+        repo = AsyncMock()
+
+        result = await apply_sync_actions(repo, [
+            {"direction": "pull", "field": "price", "value": 9.5, "product_id": "p1", "store_id": "s1"},
+            {"direction": "push", "field": "title", "value": "T", "product_id": "p1", "store_id": "s1"},
+        ], user_id="u")
+
+        assert result == {"pushed": 1, "pulled": 1}
+        pull, push = repo.bulk_update_by_ids.await_args_list
+        assert pull.args[:2] == ("products", ["p1"]) and "sale_price" in pull.args[2]
+        assert push.kwargs == {"id_column": "product_id", "filters": {"store_id": "s1"}}
+
+
+class TestBulkUpdateOffload:
+    JOB_ID = "0b6f7c1e-2d3a-4b5c-8d9e-0f1a2b3c4d5e"
+
+    @staticmethod
+    def _id(i):
+        return str(UUID(int=i + 1))
+
+    def _products(self, n):
+        return [{"id": self._id(i), "user_id": "u", "title": f"P{i}", "status": "draft"} for i in range(n)]
+
+    def _run(self, fake, progress, retries=0, **kwargs):
+        from app.queue.tasks import bulk_update_products
+        with patch("app.core.database.get_supabase", return_value=fake), \
+                patch("app.queue.redis_queue.redis_queue", progress):
+            return bulk_update_products.apply(kwargs=kwargs, task_id=self.JOB_ID, retries=retries).get()
+
+    @pytest.mark.asyncio
+    async def test_large_request_is_queued_not_run_inline(self):
+        from app.api.v1.endpoints import products
+        ids = [self._id(i) for i in range(products.BULK_UPDATE_INLINE_LIMIT + 1)]
+        task = MagicMock()
+        task.delay.return_value.id = self.JOB_ID
+
+        with patch("app.queue.tasks.bulk_update_products", task), \
+                patch.object(products, "redis_queue") as queue, \
+                patch.object(products, "get_repository") as repo:
+            result = await products.bulk_update(
+                products.BulkUpdateRequest(product_ids=ids, updates={"status": "active"}), user_id="u"
+            )
+
+        assert result["job_id"] == self.JOB_ID and result["status"] == "queued"
+        assert task.delay.call_args.kwargs == {"user_id": "u", "product_ids": ids, "updates": {"status": "active"}}
+        queue.track_user_job.assert_called_once_with("u", self.JOB_ID, "bulk_edit")
+        repo.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_inline_update_and_its_job_share_one_transaction(self):
+        from app.api.v1.endpoints import products
+        from app.core.repository import Repository
+        db = TransactionalExecutor(products=self._products(2))
+
+        with patch.object(products, "redis_queue"), patch.object(products, "get_repository", return_value=Repository(db)):
+            result = await products.bulk_update(
+                products.BulkUpdateRequest(product_ids=[self._id(0), self._id(1), self._id(99)], updates={"status": "active"}), user_id="u"
+            )
+
+        assert result == {"success": True, "job_id": "job-1", "results": {"success": 2, "failed": 1}}
+        queries = [q for q, _ in db.statements]
+        assert queries[0] == "BEGIN" and queries[-1] == "COMMIT"
+        assert 'INSERT INTO public."jobs"' in queries[1] and 'UPDATE public."jobs"' in queries[-2]
+        items = [i for q, args in db.statements if 'INSERT INTO public."job_items"' in q for i in json.loads(args[0])]
+        assert [(i["product_id"], i["status"]) for i in items] == [
+            (self._id(0), "success"), (self._id(1), "success"), (self._id(99), "failed"),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_failed_inline_update_leaves_no_running_job(self):
+        from fastapi import HTTPException
+        from app.api.v1.endpoints import products
+        from app.core.repository import Repository
+        db = TransactionalExecutor(products=self._products(2), fail_on='INSERT INTO public."job_items"')
+
+        with patch.object(products, "redis_queue"), patch.object(products, "get_repository", return_value=Repository(db)), \
+                pytest.raises(HTTPException) as error:
+            await products.bulk_update(products.BulkUpdateRequest(product_ids=[self._id(0)], updates={"status": "active"}), user_id="u")
+
+        assert error.value.status_code == 500
+        assert db.statements[0][0] == "BEGIN" and db.statements[-1][0] == "ROLLBACK"
+        assert 'INSERT INTO public."jobs"' in db.statements[1][0]  # rolled back with the update
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("product_ids, updates, detail", [
+        (["not-a-uuid"], {"status": "active"}, "Invalid product id: not-a-uuid"),
+        ([None], {"user_id": "other", "id": "x"}, "Unknown product fields: id, user_id"),
+        ([None], {"price": "cheap"}, "price"),
+    ])
+    async def test_invalid_input_is_rejected_before_any_write(self, product_ids, updates, detail):
+        from fastapi import HTTPException
+        from app.api.v1.endpoints import products
+        ids = [pid or self._id(0) for pid in product_ids]
+
+        with patch.object(products, "get_repository") as repo, pytest.raises(HTTPException) as error:
+            await products.bulk_update(products.BulkUpdateRequest(product_ids=ids, updates=updates), user_id="u")
+
+        assert error.value.status_code == 400 and detail in error.value.detail
+        repo.assert_not_called()
+
+    def test_task_rejects_unknown_fields(self):
+        from tests.test_imports import FakeSupabase
+        fake = FakeSupabase(rows={"products": self._products(1)})
+
+        with pytest.raises(ValueError):
+            self._run(fake, MagicMock(), user_id="u", product_ids=[self._id(0)], updates={"user_id": "other"})
+
+        assert fake.rows["products"][0]["user_id"] == "u"
+        assert not [c for c in fake.calls if c[1] == "update" and c[0] == "products"]
+
+    def test_task_is_set_based_per_chunk_with_progress(self):
+        from tests.test_imports import FakeSupabase
+        fake, progress = FakeSupabase(rows={"products": self._products(5)}), MagicMock()
+
+        result = self._run(fake, progress, user_id="u", product_ids=[self._id(i) for i in (0, 1, 2, 3, 4, 99)],
+                           updates={"status": "active"}, chunk_size=4)
+
+        assert result == {"total": 6, "success": 5, "failed": 1}
+        assert {p["status"] for p in fake.rows["products"]} == {"active"}
+        # 2 chunks: one snapshot select, one update and one job_items write each
+        ops = [(t, op) for t, op, _, _ in fake.calls if t in ("products", "job_items")]
+        assert ops == [("products", "select"), ("products", "update"), ("job_items", "upsert")] * 2
+        items = {i["product_id"]: i for i in fake.rows["job_items"]}
+        assert items[self._id(0)]["before_state"]["title"] == "P0" and items[self._id(0)]["after_state"]["status"] == "active"
+        assert items[self._id(99)]["status"] == "failed"
+        assert [c.args[1] for c in progress.set_job_progress.call_args_list] == [66, 100, 100]
+        assert progress.set_job_progress.call_args.args[2] == "completed"
+
+    def test_retry_skips_products_already_recorded(self):
+        from tests.test_imports import FakeSupabase
+        from app.queue.tasks import _bulk_item_id
+        fake = FakeSupabase(rows={
+            "products": self._products(3),
+            "job_items": [{"id": _bulk_item_id(self.JOB_ID, self._id(0)), "job_id": self.JOB_ID, "product_id": self._id(0)}],
+        })
+
+        result = self._run(fake, MagicMock(), retries=1, user_id="u",
+                           product_ids=[self._id(i) for i in range(3)], updates={"status": "active"})
+
+        assert result == {"total": 3, "success": 2, "failed": 0}
+        updates = [c for c in fake.calls if c[0] == "products" and c[1] == "update"]
+        assert len(updates) == 1 and updates[0][0] == "products"
+        assert fake.rows["products"][0]["status"] == "draft"
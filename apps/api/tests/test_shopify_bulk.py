@@ -0,0 +1,251 @@
+"""
+Shopify bulk operation tests
+Tests: bulk query output reassembled into products, bulk mutations pushed from
+staged JSONL uploads with per-line errors, upload chunking, failed operations,
+and small batches staying on the REST loop. Runs against MockShopify, a local
+stand-in for the Admin GraphQL API, the staged upload target and the result files.
+"""
+
+import json
+from contextlib import asynccontextmanager
+from email.parser import BytesParser
+
+import httpx
+import pytest
+from unittest.mock import patch
+
+from app.services.platform_sync.shopify_bulk import legacy_id
+from tests.test_shopify_rate_limit import LocalBuckets
+
+UPLOAD_URL = "https://uploads.mock.test/bucket"
+RESULTS_URL = "https://results.mock.test"
+
+
+class MockShopify:
+    """Bulk operations lifecycle: staged upload -> run -> RUNNING -> COMPLETED -> JSONL file"""
+
+    def __init__(self, catalog=None, fail_mutations=False):
+        self.catalog = catalog or []
+        self.fail_mutations = fail_mutations
+        self.uploads = {}
+        self.operations = {}
+        self.results = {}
+        self.stock = {}
+        self.graphql_calls = 0
+        self.rest_calls = 0
+        self.next_id = 1000
+
+    def __call__(self, request):
+        url = str(request.url)
+        if url.startswith(UPLOAD_URL):
+            return self._upload(request)
+        if url.startswith(RESULTS_URL):
+            return httpx.Response(200, content=self.results[url].encode())
+        if url.endswith("/graphql.json"):
+            self.graphql_calls += 1
+            body = json.loads(request.content)
+            return httpx.Response(200, json={"data": self._graphql(body["query"], body["variables"])})
+        self.rest_calls += 1
+        if url.endswith("/locations.json"):
+            return httpx.Response(200, json={"locations": [{"id": 77}]})
+        self.next_id += 1
+        return httpx.Response(200, json={"product": {"id": self.next_id}})
+
+    def _upload(self, request):
+        raw = b"Content-Type: " + request.headers["content-type"].encode() + b"\r\n\r\n" + request.content
+        parts = {p.get_param("name", header="content-disposition"): p.get_payload(decode=True)
+                 for p in BytesParser().parsebytes(raw).get_payload()}
+        self.uploads[parts["key"].decode()] = parts["file"].decode()
+        return httpx.Response(201)
+
+    def _graphql(self, query, variables):
+        if "stagedUploadsCreate" in query:
+            key = f"tmp/bulk/{len(self.uploads)}/bulk_op_vars.jsonl"
+            return {"stagedUploadsCreate": {"userErrors": [], "stagedTargets": [{
+                "url": UPLOAD_URL, "resourceUrl": f"{UPLOAD_URL}/{key}",
+                "parameters": [{"name": "key", "value": key}, {"name": "policy", "value": "p"}],
+            }]}}
+        if "bulkOperationRunQuery" in query:
+            return {"bulkOperationRunQuery": {"userErrors": [], "bulkOperation": self._start(self._export())}}
+        if "bulkOperationRunMutation" in query:
+            lines = self.uploads[variables["stagedUploadPath"]].splitlines()
+            field = "productCreate" if "productCreate" in variables["mutation"] else "productUpdate"
+            return {"bulkOperationRunMutation": {"userErrors": [], "bulkOperation": self._start(
+                self._mutate(field, lines), failed=self.fail_mutations,
+            )}}
+        if "inventorySetQuantities" in query:
+            for q in variables["input"]["quantities"]:
+                self.stock[q["inventoryItemId"]] = q["quantity"]
+            return {"inventorySetQuantities": {"userErrors": []}}
+        if "node(id" in query:
+            operation = self.operations[variables["id"]]
+            operation["polls"] += 1
+            if operation["polls"] < 2:
+                return {"node": {"id": variables["id"], "status": "RUNNING"}}
+            return {"node": operation["final"]}
+        raise AssertionError(f"unexpected query {query}")
+
+    def _start(self, lines, failed=False):
+        op_id = f"gid://shopify/BulkOperation/{len(self.operations) + 1}"
+        url = f"{RESULTS_URL}/{len(self.operations) + 1}.jsonl"
+        self.results[url] = "".join(json.dumps(line) + "\n" for line in lines)
+        final = {"id": op_id, "status": "FAILED", "errorCode": "INTERNAL_SERVER_ERROR", "url": None} if failed \
+            else {"id": op_id, "status": "COMPLETED", "objectCount": str(len(lines)), "url": url if lines else None}
+        self.operations[op_id] = {"polls": 0, "final": final}
+        return {"id": op_id, "status": "CREATED"}
+
+    def _export(self):
+        lines = []
+        for product in self.catalog:
+            lines.append({k: v for k, v in product.items() if k not in ("variants", "images")})
+            for child in product.get("variants", []) + product.get("images", []):
+                lines.append({**child, "__parentId": product["id"]})
+        return lines
+
+    def _mutate(self, field, lines):
+        results = []
+        for n, line in enumerate(lines):
+            data = json.loads(line)["input"]
+            if not data.get("title"):
+                payload = {"product": None, "userErrors": [{"field": ["title"], "message": "Title can't be blank"}]}
+            else:
+                self.next_id += 1
+                product_id = legacy_id(data.get("id")) if data.get("id") else str(self.next_id)
+                payload = {"product": {"id": f"gid://shopify/Product/{product_id}", "variants": {"edges": [{"node": {
+                    "id": f"gid://shopify/ProductVariant/{product_id}1",
+                    "inventoryItem": {"id": f"gid://shopify/InventoryItem/{product_id}2"},
+                }}]}}, "userErrors": []}
+            results.append({"data": {field: payload}, "__lineNumber": n})
+        return results
+
+
+def _adapter(mock, **bulk_options):
+    from app.services.platform_sync.shopify_adapter import ShopifyAdapter
+    from app.services.platform_sync.shopify_bulk import ShopifyBulkOperations
+    adapter = ShopifyAdapter({"access_token": "t", "shop_domain": "demo.myshopify.com"})
+    adapter.rate_limiter._queue = LocalBuckets()
+    adapter._client = httpx.AsyncClient(transport=httpx.MockTransport(mock))
+    adapter._bulk = lambda: ShopifyBulkOperations(adapter, poll_interval=0.001, **bulk_options)
+    return adapter
+
+
+def _transfers(adapter):
+    """Upload and result hosts go through the same mock transport"""
+    @asynccontextmanager
+    async def lease(url):
+        yield adapter._client
+    return patch("app.services.platform_sync.shopify_bulk.lease_http_client", lease)
+
+
+def _products(n, linked=0):
+    from app.services.platform_sync.base import PlatformProduct
+    return [PlatformProduct(
+        external_id=str(500 + i) if i < linked else None, title=f"P{i}", price=9.5 + i, sku=f"SKU-{i}", stock=i,
+        status="active", tags=["bulk"], images=["https://cdn.test/p.jpg"],
+    ) for i in range(n)]
+
+
+class TestBulkQuery:
+    @pytest.mark.asyncio
+    async def test_catalog_is_reassembled_from_jsonl(self):
+        mock = MockShopify(catalog=[{
+            "id": f"gid://shopify/Product/{i}", "title": f"Remote {i}", "descriptionHtml": "<p>d</p>",
+            "status": "ACTIVE" if i % 2 else "DRAFT", "tags": ["a", "b"], "updatedAt": "2026-10-01T00:00:00Z",
+            "variants": [{"id": f"gid://shopify/ProductVariant/{i}{v}", "title": f"V{v}", "price": "12.50",
+                          "compareAtPrice": "15.00", "sku": f"S{i}{v}", "inventoryQuantity": 4,
+                          "inventoryItem": {"id": f"gid://shopify/InventoryItem/{i}{v}"}} for v in range(2)],
+            "images": [{"id": f"gid://shopify/ProductImage/{i}", "url": f"https://cdn.test/{i}.jpg"}],
+        } for i in range(1, 4)])
+        adapter = _adapter(mock)
+
+        with _transfers(adapter):
+            products = [p async for p in adapter.pull_products_bulk()]
+
+        assert [p.external_id for p in products] == ["1", "2", "3"]
+        first = products[0]
+        assert first.title == "Remote 1" and first.status == "active" and products[1].status == "draft"
+        assert first.price == 12.5 and first.compare_at_price == 15.0 and first.stock == 4
+        assert [v["external_id"] for v in first.variants] == ["10", "11"]
+        assert first.variants[0]["inventory_item_id"] == "10"
+        assert first.images == ["https://cdn.test/1.jpg"] and first.tags == ["a", "b"]
+        # run + 2 polls, whatever the catalog size
+        assert mock.graphql_calls == 3
+
+    @pytest.mark.asyncio
+    async def test_search_filter_and_empty_result(self):
+        from app.services.platform_sync.shopify_bulk import products_query
+        adapter = _adapter(MockShopify())
+
+        with _transfers(adapter):
+            assert [p async for p in adapter.pull_products_bulk("updated_at:>'2026-10-01'")] == []
+
+        assert "products(query: \"updated_at:>'2026-10-01'\")" in products_query("updated_at:>'2026-10-01'")
+        assert "products {" in products_query()
+
+
+class TestBulkMutation:
+    @pytest.mark.asyncio
+    async def test_batch_is_pushed_through_staged_uploads(self):
+        mock = MockShopify()
+        adapter = _adapter(mock)
+        products = _products(60, linked=20)
+        products[30].title = ""  # rejected by Shopify
+
+        with _transfers(adapter):
+            result = await adapter.push_products_batch(products)
+
+        assert result.synced == 59 and result.failed == 1 and not result.success
+        assert result.errors == [{"sku": "SKU-30", "error": "Title can't be blank"}]
+        ids = result.details["external_ids"]
+        assert ids[:20] == [str(500 + i) for i in range(20)] and ids[30] is None
+        assert len(set(ids[20:30] + ids[31:])) == 39
+        assert [op["status"] for op in result.details["bulk_operations"]] == ["COMPLETED", "COMPLETED"]
+        # per mutation: upload, run, 2 polls; then one inventorySetQuantities and the location
+        assert mock.graphql_calls == 9 and mock.rest_calls == 1
+        assert result.details["stock"] == {"synced": 59, "failed": 0}
+        assert mock.stock["gid://shopify/InventoryItem/5022"] == 2 and len(mock.stock) == 59
+
+        create, update = mock.uploads.values()
+        created = [json.loads(line)["input"] for line in create.splitlines()]
+        updated = [json.loads(line)["input"] for line in update.splitlines()]
+        assert len(created) == 40 and len(updated) == 20
+        assert created[0]["variants"] == [{"price": "29.5", "sku": "SKU-20"}]
+        assert created[0]["images"] == [{"src": "https://cdn.test/p.jpg"}] and created[0]["status"] == "ACTIVE"
+        assert updated[0]["id"] == "gid://shopify/Product/500" and "variants" not in updated[0]
+
+    @pytest.mark.asyncio
+    async def test_large_uploads_are_chunked(self):
+        from app.services.platform_sync.shopify_bulk import PRODUCT_CREATE_MUTATION, jsonl_chunks
+        mock = MockShopify()
+        adapter = _adapter(mock, max_upload_bytes=300)
+        variables = [{"input": {"title": f"P{i}", "descriptionHtml": "x" * 40}} for i in range(10)]
+
+        chunks = list(jsonl_chunks(variables, 300))
+        assert all(len(payload) <= 300 for _, _, payload in chunks) and len(chunks) > 1
+        assert [start for start, _, _ in chunks] == [sum(c for _, c, _ in chunks[:n]) for n in range(len(chunks))]
+
+        with _transfers(adapter):
+            lines = [line async for line in adapter._bulk().run_mutation(PRODUCT_CREATE_MUTATION, variables)]
+
+        assert len(mock.uploads) == len(chunks)
+        assert [line["__lineNumber"] for line in lines] == list(range(10))
+
+    @pytest.mark.asyncio
+    async def test_failed_operation_fails_its_products(self):
+        adapter = _adapter(MockShopify(fail_mutations=True))
+
+        with _transfers(adapter):
+            result = await adapter.push_products_batch(_products(50))
+
+        assert result.failed == 50 and result.synced == 0
+        assert "failed: INTERNAL_SERVER_ERROR" in result.errors[0]["error"]
+        assert result.details["external_ids"] == [None] * 50
+
+    @pytest.mark.asyncio
+    async def test_small_batches_use_rest(self):
+        mock = MockShopify()
+        adapter = _adapter(mock)
+
+        result = await adapter.push_products_batch(_products(3))
+
+        assert result.synced == 3 and mock.rest_calls == 3 and mock.graphql_calls == 0
@@ -0,0 +1,230 @@
+"""
+Shopify id cache tests
+Tests: stock / price updates served from cached variant and location ids,
+batched id lookups, expiry, stale ids re-fetched, Redis outages, and batched
+inventorySetQuantities with per-item rejections.
+"""
+
+import json
+
+import httpx
+import pytest
+import redis
+from unittest.mock import MagicMock
+
+from tests.test_shopify_rate_limit import LocalBuckets
+
+
+class LocalCache:
+    """In-process stand-in for the RedisQueue cache / Shopify id hash methods"""
+
+    def __init__(self, down=False):
+        self.hashes, self.values, self.down = {}, {}, down
+
+    def _check(self):
+        if self.down:
+            raise redis.ConnectionError("down")
+
+    def get_shopify_ids(self, shop, external_ids):
+        self._check()
+        known = self.hashes.get(shop, {})
+        return {e: known[e] for e in external_ids if e in known}
+
+    def set_shopify_ids(self, shop, ids):
+        self._check()
+        self.hashes.setdefault(shop, {}).update(ids)
+
+    def delete_shopify_ids(self, shop, external_ids):
+        self._check()
+        for e in external_ids:
+            self.hashes.get(shop, {}).pop(e, None)
+
+    def cache_get(self, key):
+        self._check()
+        return self.values.get(key)
+
+    def cache_set(self, key, value, ttl_seconds=300):
+        self._check()
+        self.values[key] = value
+
+    def cache_delete(self, key):
+        self._check()
+        self.values.pop(key, None)
+
+
+class ShopifyStore:
+    """REST products / variants / inventory endpoints plus inventorySetQuantities"""
+
+    def __init__(self, reject_items=()):
+        self.requests = []
+        self.levels = {}
+        self.gone_variants = set()
+        self.reject_items = set(reject_items)
+
+    def __call__(self, request):
+        path = request.url.path.split("/2024-01")[-1]
+        self.requests.append((request.method, path))
+        if path == "/products.json":
+            ids = request.url.params["ids"].split(",")
+            return httpx.Response(200, json={"products": [
+                {"id": int(i), "variants": [{"id": int(i) * 10, "inventory_item_id": int(i) * 100}]} for i in ids
+            ]})
+        if path == "/locations.json":
+            return httpx.Response(200, json={"locations": [{"id": 7}, {"id": 8}]})
+        if path == "/inventory_levels/set.json":
+            body = json.loads(request.content)
+            self.levels[str(body["inventory_item_id"])] = body["available"]
+            return httpx.Response(200, json={"inventory_level": body})
+        if path.startswith("/variants/"):
+            if path in self.gone_variants:
+                return httpx.Response(404, json={"errors": "Not Found"})
+            return httpx.Response(200, json={"variant": json.loads(request.content)["variant"]})
+        if path.startswith("/products/") and request.method == "PUT":
+            pid = int(path.split("/")[-1].split(".")[0])
+            return httpx.Response(200, json={"product": {
+                "id": pid, "variants": [{"id": pid * 10 + 1, "inventory_item_id": pid * 100 + 1}],
+            }})
+        if path.startswith("/products/") and request.method == "DELETE":
+            return httpx.Response(200, json={})
+        if path == "/graphql.json":
+            quantities = json.loads(request.content)["variables"]["input"]["quantities"]
+            errors = [{"field": ["input", "quantities", str(i), "inventoryItemId"], "message": "Item not stocked"}
+                      for i, q in enumerate(quantities) if q["inventoryItemId"].rsplit("/", 1)[-1] in self.reject_items]
+            if not errors:
+                for q in quantities:
+                    self.levels[q["inventoryItemId"].rsplit("/", 1)[-1]] = q["quantity"]
+            return httpx.Response(200, json={"data": {"inventorySetQuantities": {
+                "inventoryAdjustmentGroup": None if errors else {"id": "gid://shopify/InventoryAdjustmentGroup/1"},
+                "userErrors": errors,
+            }}})
+        raise AssertionError(f"unexpected {request.method} {path}")
+
+
+def _adapter(store, cache=None, ttl_seconds=None):
+    from app.services.platform_sync.shopify_adapter import ShopifyAdapter
+    adapter = ShopifyAdapter({"access_token": "t", "shop_domain": "demo.myshopify.com"})
+    adapter.rate_limiter._queue = LocalBuckets()
+    adapter.id_cache._queue = cache if cache is not None else LocalCache()
+    if ttl_seconds is not None:
+        adapter.id_cache.ttl_seconds = ttl_seconds
+    adapter._client = httpx.AsyncClient(transport=httpx.MockTransport(store))
+    return adapter
+
+
+class TestCachedUpdates:
+    @pytest.mark.asyncio
+    async def test_repeat_updates_cost_one_request(self):
+        store = ShopifyStore()
+        adapter = _adapter(store)
+
+        assert await adapter.update_stock("1", 5) is True
+        assert len(store.requests) == 3  # ids, locations, set
+        assert await adapter.update_stock("1", 6) is True
+        assert await adapter.update_price("1", 19.9, compare_at=25) is True
+        assert store.requests[3:] == [("POST", "/inventory_levels/set.json"), ("PUT", "/variants/10.json")]
+        assert await adapter.update_stock("2", 1) is True
+        assert len(store.requests) == 7  # location still cached
+        assert store.levels == {"100": 6, "200": 1}
+
+    @pytest.mark.asyncio
+    async def test_stale_ids_are_refetched_once(self):
+        store = ShopifyStore()
+        cache = LocalCache()
+        adapter = _adapter(store, cache)
+        await adapter.update_price("3", 10)
+        cache.hashes["demo.myshopify.com"]["3"] = json.dumps(["999", "9990", 4102444800])
+        store.gone_variants.add("/variants/999.json")
+
+        assert await adapter.update_price("3", 11) is True
+
+        assert store.requests[-3:] == [
+            ("PUT", "/variants/999.json"), ("GET", "/products.json"), ("PUT", "/variants/30.json"),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_expired_entries_and_redis_outage_fall_back_to_lookups(self):
+        for adapter_kwargs in ({"ttl_seconds": 0}, {"cache": LocalCache(down=True)}):
+            store = ShopifyStore()
+            adapter = _adapter(store, **adapter_kwargs)
+
+            await adapter.update_price("1", 10)
+            await adapter.update_price("1", 12)
+
+            assert [r for r in store.requests if r[0] == "GET"] == [("GET", "/products.json")] * 2
+
+    @pytest.mark.asyncio
+    async def test_pushes_refresh_and_deletes_drop_entries(self):
+        from app.services.platform_sync.base import PlatformProduct
+        adapter = _adapter(ShopifyStore())
+        await adapter.update_price("4", 10)
+        assert adapter.id_cache.get(["4"])["4"].variant_id == "40"
+
+        await adapter.push_product(PlatformProduct(external_id="4", title="P4"))  # variants replaced
+        assert adapter.id_cache.get(["4"])["4"] == ("41", "401")
+
+        await adapter.delete_product("4")
+        assert adapter.id_cache.get(["4"]) == {}
+
+
+class TestInventoryBatch:
+    @pytest.mark.asyncio
+    async def test_stock_batch_costs_one_request_per_batch(self):
+        store = ShopifyStore()
+        adapter = _adapter(store)
+        quantities = {str(i): i % 7 for i in range(1, 601)}
+
+        result = await adapter.update_stock_batch(quantities)
+
+        assert result.synced == 600 and result.success
+        assert store.requests.count(("GET", "/products.json")) == 3
+        assert store.requests.count(("POST", "/graphql.json")) == 3
+        assert store.requests.count(("GET", "/locations.json")) == 1
+        assert store.levels["1200"] == 12 % 7
+
+        store.requests.clear()
+        await adapter.update_stock_batch(quantities)
+        assert store.requests == [("POST", "/graphql.json")] * 3
+
+    @pytest.mark.asyncio
+    async def test_rejected_items_are_dropped_and_the_rest_resent(self):
+        store = ShopifyStore(reject_items={"200"})
+        adapter = _adapter(store)
+
+        result = await adapter.update_stock_batch({"1": 3, "2": 4, "3": 5})
+
+        assert result.synced == 2 and result.failed == 1
+        assert result.errors == [{"external_id": "2", "error": "Item not stocked"}]
+        assert store.levels == {"100": 3, "300": 5}
+        assert adapter.id_cache.get(["2"]) == {}
+
+    @pytest.mark.asyncio
+    async def test_default_batch_loops_update_stock(self):
+        from app.services.platform_sync.base import PlatformAdapter
+        from app.services.platform_sync.woocommerce_adapter import WooCommerceAdapter
+        adapter = WooCommerceAdapter({"consumer_key": "ck", "consumer_secret": "cs", "store_url": "https://w.test"})
+        calls = []
+
+        async def update_stock(external_id, quantity):
+            calls.append(external_id)
+            if external_id == "bad":
+                raise RuntimeError("boom")
+            return True
+        adapter.update_stock = update_stock
+
+        # WooCommerce overrides it with /products/batch: call the base default
+        result = await PlatformAdapter.update_stock_batch(adapter, {"a": 1, "bad": 2})
+
+        assert calls == ["a", "bad"] and result.synced == 1
+        assert result.errors == [{"external_id": "bad", "error": "boom"}]
+
+
+class TestRedisIdHash:
+    def test_ids_are_read_in_one_hmget(self):
+        from app.queue.redis_queue import RedisQueue
+        rq = RedisQueue("redis://localhost:6379/0")
+        rq._client = MagicMock()
+        rq._client.hmget.return_value = ["[\"10\", \"100\", 1]", None]
+
+        assert rq.get_shopify_ids("demo.myshopify.com", ["1", "2"]) == {"1": "[\"10\", \"100\", 1]"}
+        rq._client.hmget.assert_called_once_with("shopify_ids:demo.myshopify.com", ["1", "2"])
+        assert rq.get_shopify_ids("demo.myshopify.com", []) == {}
@@ -0,0 +1,169 @@
+"""
+Shopify rate limiter tests
+Tests: Redis bucket scripts, call-limit header and GraphQL cost handling, Redis
+outages, and several workers pacing one shop without 429s.
+"""
+
+import asyncio
+import time
+import httpx
+import pytest
+import redis
+from unittest.mock import MagicMock, patch
+
+
+class LocalBuckets:
+    """In-process stand-in for the RedisQueue bucket scripts (same arithmetic)"""
+
+    def __init__(self):
+        self.buckets = {}
+
+    def _drained(self, key, capacity, rate):
+        level, ts, capacity, rate = self.buckets.get(key, (0.0, time.monotonic(), capacity, rate))
+        return max(0.0, level - (time.monotonic() - ts) * rate), capacity, rate
+
+    def reserve_bucket(self, key, cost, capacity, rate, headroom=0, ttl_seconds=3600):
+        level, capacity, rate = self._drained(key, capacity, rate)
+        level += cost
+        self.buckets[key] = (level, time.monotonic(), capacity, rate)
+        return max(0.0, (level - capacity + headroom) / rate)
+
+    def observe_bucket(self, key, level, capacity=0, rate=0, refund=0, defaults=(0, 1), ttl_seconds=3600):
+        known = self.buckets.get(key)
+        capacity = capacity or (known[2] if known else defaults[0])
+        rate = rate or (known[3] if known else defaults[1])
+        current, _, _ = self._drained(key, capacity, rate)
+        observed = capacity if level < 0 else level
+        self.buckets[key] = (max(current - refund, observed, 0), time.monotonic(), capacity, rate)
+
+
+class ShopifyStub:
+    """Shopify-like REST endpoint with its own leaky bucket (429 on overflow)"""
+
+    def __init__(self, capacity=4, rate=40.0):
+        self.capacity, self.rate = capacity, rate
+        self.level, self.ts = 0.0, time.monotonic()
+        self.ok = self.throttled = 0
+
+    def __call__(self, request):
+        now = time.monotonic()
+        self.level, self.ts = max(0.0, self.level - (now - self.ts) * self.rate), now
+        if self.level + 1 > self.capacity:
+            self.throttled += 1
+            return httpx.Response(429, headers={"Retry-After": "0.05"})
+        self.level += 1
+        self.ok += 1
+        return httpx.Response(200, json={"product": {"id": 1}}, headers={
+            "X-Shopify-Shop-Api-Call-Limit": f"{int(round(self.level))}/{self.capacity}",
+        })
+
+
+def _adapter(stub, queue):
+    from app.services.platform_sync.shopify_adapter import ShopifyAdapter
+    adapter = ShopifyAdapter({"access_token": "t", "shop_domain": "demo.myshopify.com"})
+    adapter.rate_limiter._queue = queue
+    adapter._client = httpx.AsyncClient(transport=httpx.MockTransport(stub))
+    return adapter
+
+
+class TestRedisBuckets:
+    def test_scripts_are_registered_once_and_return_floats(self):
+        from app.queue.redis_queue import RedisQueue
+        rq = RedisQueue("redis://localhost:6379/0")
+        rq._client = MagicMock()
+        rq._client.register_script.return_value.return_value = "0.75"
+
+        assert rq.reserve_bucket("shopify_bucket:demo:rest", 1, 40, 2.0, 2) == 0.75
+        assert rq.reserve_bucket("shopify_bucket:demo:rest", 1, 40, 2.0, 2) == 0.75
+
+        rq._client.register_script.assert_called_once_with(rq._BUCKET_RESERVE_LUA)
+        script = rq._client.register_script.return_value
+        assert script.call_args.kwargs == {"keys": ["shopify_bucket:demo:rest"], "args": [1, 40, 2.0, 2, 3600]}
+
+
+class TestShopifyRateLimiter:
+    def test_call_limit_header_sets_level_capacity_and_rate(self):
+        from app.services.platform_sync.rate_limit import ShopifyRateLimiter
+        queue = MagicMock()
+        limiter = ShopifyRateLimiter("https://Demo.myshopify.com/", queue)
+
+        limiter.observe_rest({"X-Shopify-Shop-Api-Call-Limit": "320/400"})
+        limiter.observe_rest({})
+
+        queue.observe_bucket.assert_called_once_with(
+            "shopify_bucket:demo.myshopify.com:rest", 320.0, 400.0, 20.0, 0, (40, 2.0),
+        )
+
+    def test_graphql_cost_refunds_unused_points(self):
+        from app.services.platform_sync.rate_limit import ShopifyRateLimiter
+        queue = MagicMock()
+
+        ShopifyRateLimiter("demo.myshopify.com", queue).observe_graphql({
+            "requestedQueryCost": 52, "actualQueryCost": 12,
+            "throttleStatus": {"maximumAvailable": 2000.0, "currentlyAvailable": 1900, "restoreRate": 100.0},
+        }, reserved=52)
+
+        assert queue.observe_bucket.call_args.args == (
+            "shopify_bucket:demo.myshopify.com:graphql", 100.0, 2000.0, 100.0, 40, (1000, 50.0),
+        )
+
+    @pytest.mark.asyncio
+    async def test_redis_outage_does_not_block_requests(self):
+        from app.services.platform_sync.rate_limit import ShopifyRateLimiter
+        queue = MagicMock()
+        queue.reserve_bucket.side_effect = redis.ConnectionError("down")
+        queue.observe_bucket.side_effect = redis.ConnectionError("down")
+        limiter = ShopifyRateLimiter("demo.myshopify.com", queue)
+
+        assert await limiter.acquire("rest") == 0.0
+        limiter.throttled("rest")
+
+
+class TestShopifyPacing:
+    async def _burst(self, queue, workers=3, calls=10):
+        from app.services.platform_sync import rate_limit
+        stub = ShopifyStub()
+        adapters = [_adapter(stub, queue) for _ in range(workers)]
+        with patch.dict(rate_limit.BUCKETS, rest=rate_limit.BucketSpec(capacity=4, rate=40.0, headroom=1)), \
+                patch.object(rate_limit, "REST_DRAIN_SECONDS", 0.1):
+            start = time.monotonic()
+            results = await asyncio.gather(*(
+                adapter._request("GET", f"/products/{i}.json") for adapter in adapters for i in range(calls)
+            ), return_exceptions=True)
+        lost = [r for r in results if isinstance(r, httpx.HTTPStatusError)]
+        return stub, lost, time.monotonic() - start
+
+    @pytest.mark.asyncio
+    async def test_workers_sharing_a_bucket_never_hit_429(self):
+        stub, lost, elapsed = await self._burst(LocalBuckets())
+
+        assert stub.ok == 30 and stub.throttled == 0 and not lost
+        # 30 calls through a 4-call bucket draining 40/s: paced, not bursted
+        assert elapsed >= (30 - 4) / 40 * 0.9
+
+    @pytest.mark.asyncio
+    async def test_without_pacing_the_shop_throttles(self):
+        queue = MagicMock()
+        queue.reserve_bucket.side_effect = redis.ConnectionError("down")
+
+        stub, lost, _ = await self._burst(queue)
+
+        # Unpaced bursts get 429s, and some calls run out of retries
+        assert stub.throttled > 0 and stub.ok + len(lost) == 30
+
+    @pytest.mark.asyncio
+    async def test_graphql_throttled_response_is_retried_after_draining(self):
+        cost = {"requestedQueryCost": 10, "actualQueryCost": None,
+                "throttleStatus": {"maximumAvailable": 100.0, "currentlyAvailable": 5, "restoreRate": 1000.0}}
+        responses = iter([
+            httpx.Response(200, json={"errors": [{"message": "Throttled", "extensions": {"code": "THROTTLED"}}],
+                                      "extensions": {"cost": cost}}),
+            httpx.Response(200, json={"data": {"shop": {"name": "Demo"}},
+                                      "extensions": {"cost": {**cost, "actualQueryCost": 2}}}),
+        ])
+        queue = LocalBuckets()
+        adapter = _adapter(lambda request: next(responses), queue)
+
+        assert await adapter._graphql("{ shop { name } }", cost=10) == {"shop": {"name": "Demo"}}
+        level, _, capacity, rate = queue.buckets["shopify_bucket:demo.myshopify.com:graphql"]
+        assert (capacity, rate) == (100.0, 1000.0) and level >= 95
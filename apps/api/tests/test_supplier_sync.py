@@ -0,0 +1,207 @@
+"""
+Supplier sync tests
+Tests: concurrent pagination (bounded, ordered, stopping at the catalog end or
+`limit`), retries with backoff / Retry-After, per-account rate limiting, and the
+BigBuy catalog streaming into chunked bulk upserts (failing batches split down to
+the bad rows) and stock into batched updates.
+"""
+
+import asyncio
+import json
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from app.services.platform_sync.rate_limit import BucketSpec
+from app.services.suppliers.pagination import SupplierRateLimiter, paginate, request_with_retry
+from tests.test_repository import FakeExecutor
+from tests.test_shopify_rate_limit import LocalBuckets
+
+
+class Catalog:
+    """Paged catalog with `total` items, tracking page requests in flight"""
+
+    def __init__(self, total, page_size=10):
+        self.total, self.page_size = total, page_size
+        self.requested, self.in_flight, self.peak = [], 0, 0
+
+    async def page(self, page):
+        self.requested.append(page)
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(0.001 * (page % 3))  # pages complete out of order
+        self.in_flight -= 1
+        start = page * self.page_size
+        return [{"id": i} for i in range(start, min(start + self.page_size, self.total))]
+
+
+async def _collect(pages):
+    return [item["id"] async for page in pages for item in page]
+
+
+class TestPaginate:
+    @pytest.mark.asyncio
+    async def test_pages_are_fetched_concurrently_in_order(self):
+        catalog = Catalog(total=95)
+
+        ids = await _collect(paginate(catalog.page, 10, concurrency=3, first_page=0))
+
+        assert ids == list(range(95))
+        assert catalog.peak == 3
+        assert max(catalog.requested) <= 9 + 3  # past the short page: at most one window
+
+    @pytest.mark.asyncio
+    async def test_limit_spans_pages(self):
+        catalog = Catalog(total=1000)
+
+        ids = await _collect(paginate(catalog.page, 10, limit=25, concurrency=8, first_page=0))
+
+        assert ids == list(range(25))
+        assert sorted(catalog.requested) == [0, 1, 2]
+
+    @pytest.mark.asyncio
+    async def test_failed_page_stops_the_stream(self):
+        async def page(n):
+            if n == 2:
+                raise RuntimeError("page 2 failed")
+            return [{"id": n}]
+
+        seen = []
+        with pytest.raises(RuntimeError):
+            async for items in paginate(page, 1, concurrency=4):
+                seen += items
+        assert seen == [{"id": 1}]
+
+
+class TestRetries:
+    @pytest.mark.asyncio
+    async def test_throttling_and_server_errors_are_retried(self):
+        responses = [
+            httpx.Response(429, headers={"Retry-After": "7"}),
+            httpx.Response(503),
+            httpx.Response(200, json=[]),
+        ]
+        delays = []
+
+        async def send():
+            return responses.pop(0)
+
+        async def sleep(seconds):
+            delays.append(seconds)
+
+        with patch("app.services.suppliers.pagination.asyncio.sleep", sleep):
+            response = await request_with_retry(send, base_delay=2)
+
+        assert response.status_code == 200
+        assert delays[0] == 7 and 2 <= delays[1] <= 4  # Retry-After, then jittered 2 * 2^1
+
+    @pytest.mark.asyncio
+    async def test_gives_up_after_retries(self):
+        calls = []
+
+        async def send():
+            calls.append(1)
+            raise httpx.ConnectError("refused")
+
+        async def sleep(seconds):
+            pass
+
+        with patch("app.services.suppliers.pagination.asyncio.sleep", sleep), pytest.raises(httpx.ConnectError):
+            await request_with_retry(send, retries=2)
+        assert len(calls) == 3
+
+    @pytest.mark.asyncio
+    async def test_requests_share_the_account_bucket(self):
+        buckets = LocalBuckets()
+        spec = BucketSpec(capacity=2, rate=1.0, headroom=0)  # slow refill: no timing dependence
+        first = SupplierRateLimiter("bigbuy", "key", spec, queue=buckets)
+        other_worker = SupplierRateLimiter("bigbuy", "key", spec, queue=buckets)
+
+        async def sleep(seconds):
+            pass
+
+        with patch("app.services.suppliers.pagination.asyncio.sleep", sleep):
+            waits = [await limiter.acquire() for limiter in (first, other_worker, first, other_worker)]
+
+        assert waits[:2] == [0, 0] and all(w > 0 for w in waits[2:])
+        assert list(buckets.buckets) == [first.key]
+
+
+class BigBuyStub:
+    def __init__(self, total):
+        self.total = total
+        self.pages = []
+
+    def __call__(self, request):
+        if request.url.path.endswith("/productsstockbyreference.json"):
+            return httpx.Response(200, json=[
+                {"sku": "S1", "stocks": [{"quantity": 4}]}, {"sku": "S2", "stocks": []}, {"stocks": []},
+            ])
+        page, size = int(request.url.params["page"]), int(request.url.params["pageSize"])
+        self.pages.append(page)
+        return httpx.Response(200, json=[
+            {"id": i, "name": f"P{i}", "sku": f"S{i}", "wholesalePrice": 2.5, "images": [{"url": "u"}]}
+            for i in range(page * size, min((page + 1) * size, self.total))
+        ])
+
+
+def _bigbuy(stub, **config):
+    from app.services.suppliers.bigbuy import BigBuyService
+    service = BigBuyService(api_key="k", config=config)
+    service.limiter._queue = LocalBuckets()
+    service._client = httpx.AsyncClient(transport=httpx.MockTransport(stub))
+    return service
+
+
+class TestBigBuySync:
+    @pytest.mark.asyncio
+    async def test_limit_beyond_one_page_streams_into_chunked_upserts(self):
+        from app.core.repository import Repository
+        stub = BigBuyStub(total=1000)
+        db = FakeExecutor()
+        service = _bigbuy(stub, requests_per_second=1000)
+        service.upsert_batch_size = 100
+
+        result = await service.sync_products(Repository(db), "u1", limit=250)
+
+        assert sorted(stub.pages) == [0, 1, 2]
+        assert result["fetched"] == 250 and result["errors"] == []
+        upserts = [json.loads(args[0]) for query, args in db.statements if "ON CONFLICT" in query]
+        assert [len(rows) for rows in upserts] == [100, 100, 50]
+        assert upserts[0][0]["supplier"] == "bigbuy" and upserts[0][0]["supplier_product_id"] == "0"
+        assert 'ON CONFLICT ("supplier", "supplier_product_id", "user_id")' in db.statements[0][0]
+
+    @pytest.mark.asyncio
+    async def test_bad_row_does_not_drop_its_batch(self):
+        class RejectingRepo:
+            def __init__(self):
+                self.statements = 0
+
+            async def bulk_upsert(self, table, rows, on_conflict, returning="*"):
+                self.statements += 1
+                if any(row["supplier_product_id"] == "13" for row in rows):
+                    raise ValueError("invalid input syntax for type numeric")
+                return [{"id": row["supplier_product_id"]} for row in rows]
+
+        repo = RejectingRepo()
+        service = _bigbuy(BigBuyStub(total=40), requests_per_second=1000)
+        service.upsert_batch_size = 40
+
+        result = await service.sync_products(repo, "u1", limit=40)
+
+        assert result["fetched"] == 40 and result["saved"] == 39
+        assert result["errors"] == ["13: invalid input syntax for type numeric"]
+        assert repo.statements <= 2 * 6 + 1  # halved down to the bad row, not row by row
+
+    @pytest.mark.asyncio
+    async def test_stock_is_updated_in_batches(self):
+        from app.core.repository import Repository
+        db = FakeExecutor()
+
+        result = await _bigbuy(BigBuyStub(total=0)).sync_stock(Repository(db), "u1")
+
+        [(query, args)] = db.statements
+        assert 't."sku" = r."sku"' in query
+        assert [(r["sku"], r["stock_quantity"]) for r in json.loads(args[0])] == [("S1", 4), ("S2", 0)]
+        assert args[1:] == ("u1", "bigbuy") and result == {"updated": 0}
@@ -0,0 +1,372 @@
+"""
+Sync engine tests
+Tests: per-store concurrency bounds, batched link / job_items writes, failures,
+conflicts held for review, retries skipping recorded links, snapshot-based
+skipping of unchanged links, delta pushes, and the queued bulk_sync endpoint.
+"""
+
+import asyncio
+import json
+import uuid
+import pytest
+from unittest.mock import MagicMock, patch
+
+from tests.test_repository import FakeExecutor
+
+JOB_ID = str(uuid.UUID(int=16))
+
+
+class FakeAdapter:
+    """Platform adapter stand-in: tracks requests in flight, echoes pushes"""
+    max_concurrency = 4
+
+    def __init__(self, remote=None, fail=False):
+        self.remote, self.fail = remote, fail
+        self.in_flight = self.peak = 0
+        self.pushed = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        pass
+
+    async def pull_product(self, external_id):
+        return self.remote
+
+    async def push_product(self, product):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(0.001)
+        self.in_flight -= 1
+        if self.fail:
+            raise RuntimeError("store unavailable")
+        self.pushed.append(product)
+        return {"external_id": product.external_id or f"ext-{len(self.pushed)}"}
+
+
+class SweepAdapter(FakeAdapter):
+    """FakeAdapter whose store can list changed products (updated_at_min sweeps)"""
+    supports_change_sweep = True
+
+    def __init__(self, changes=None, sweep_error=None, **kwargs):
+        super().__init__(**kwargs)
+        self.changes, self.sweep_error = changes or {}, sweep_error
+        self.pulled, self.sweeps, self.deltas = [], [], []
+
+    async def list_changed_since(self, since):
+        self.sweeps.append(since)
+        if self.sweep_error:
+            raise self.sweep_error
+        for external_id, updated_at in self.changes.items():
+            yield external_id, updated_at
+
+    async def pull_product(self, external_id):
+        self.pulled.append(external_id)
+        return await super().pull_product(external_id)
+
+    async def push_product(self, product):
+        result = await super().push_product(product)
+        return {**result, "updated_at": "2026-10-17T10:00:00+00:00"}
+
+    async def push_product_delta(self, product, fields):
+        self.deltas.append((product.external_id, fields))
+        return {"external_id": product.external_id, "updated_at": None}
+
+
+class MemoryWatermarks:
+    def __init__(self, **marks):
+        self.marks = marks
+
+    def get(self, store_id):
+        return self.marks.get(store_id)
+
+    def set(self, store_id, swept_at):
+        self.marks[store_id] = swept_at
+
+
+def _synced(links, remote_version="2026-10-01T00:00:00+00:00", fields=False):
+    """Links as a previous sync left them (with their synced field values if `fields`)"""
+    from app.services.platform_sync.snapshots import payload_hash, synced_fields
+    for link in links:
+        link.update(sync_hash=payload_hash(link["products"]), remote_updated_at=remote_version,
+                    last_remote_update=remote_version)
+        if fields:
+            link["synced_fields"] = synced_fields(link["products"])
+    return links
+
+
+def _links(store_id, n, platform="shopify", external=False):
+    return [{
+        "id": f"{store_id}-l{i}",
+        "product_id": f"p{i}",
+        "external_product_id": f"x{i}" if external else None,
+        "products": {"id": f"p{i}", "title": f"P{i}", "description": "", "sale_price": 10, "stock": 3,
+                     "status": "active", "updated_at": "2026-01-02T00:00:00"},
+        "shops": {"id": store_id, "name": store_id.title(), "platform": platform, "credentials_encrypted": "{}"},
+    } for i in range(n)]
+
+
+def _engine(db, adapters, **kwargs):
+    from app.core.repository import Repository
+    from app.services.platform_sync.sync_engine import SyncEngine
+    return SyncEngine(Repository(db), JOB_ID, "u", adapter_factory=lambda platform, creds: adapters[platform], **kwargs)
+
+
+class TestSyncEngine:
+    @pytest.mark.asyncio
+    async def test_concurrency_is_bounded_per_store(self):
+        shopify, woo = FakeAdapter(), FakeAdapter()
+        woo.max_concurrency = 8
+        engine = _engine(FakeExecutor(), {"shopify": shopify, "woocommerce": woo})
+
+        result = await engine.run(_links("a", 20) + _links("b", 30, platform="woocommerce"))
+
+        assert shopify.peak == 4 and woo.peak == 8
+        assert result["synced"] == 50 and result["failed"] == 0
+        stores = {s["store_id"]: s for s in result["stores"]}
+        assert stores["a"]["concurrency"] == 4 and stores["b"]["links"] == 30
+        assert stores["b"]["links_per_second"] > 0
+
+    @pytest.mark.asyncio
+    async def test_writes_are_batched(self):
+        db = FakeExecutor(status="UPDATE 10")
+        progress = []
+
+        async def on_progress(processed, total):
+            progress.append((processed, total))
+
+        engine = _engine(db, {"shopify": FakeAdapter()}, write_batch_size=10, on_progress=on_progress)
+        await engine.run(_links("a", 25))
+
+        updates = [a for q, a in db.statements if q.startswith('UPDATE public."product_store_links"')]
+        inserts = [a for q, a in db.statements if q.startswith('INSERT INTO public."job_items"')]
+        assert len(updates) == len(inserts) == 3
+        assert sum(len(json.loads(a[0])) for a in inserts) == 25
+        assert progress == [(10, 25), (20, 25), (25, 25)]
+        item = json.loads(inserts[0][0])[0]
+        assert item["job_id"] == JOB_ID and item["status"] == "success"
+
+    @pytest.mark.asyncio
+    async def test_failures_are_recorded_per_link(self):
+        from app.core.repository import Repository
+        from app.services.platform_sync.sync_engine import SyncEngine
+        db = FakeExecutor()
+
+        def factory(platform, creds):
+            if platform == "unknown":
+                raise ValueError("Unsupported platform: unknown")
+            return FakeAdapter(fail=True)
+
+        result = await SyncEngine(Repository(db), JOB_ID, "u", adapter_factory=factory).run(
+            _links("a", 2) + _links("b", 3, platform="unknown")
+        )
+
+        assert result["failed"] == 5 and result["synced"] == 0
+        items = json.loads(next(a for q, a in db.statements if "job_items" in q)[0])
+        assert {i["error_code"] for i in items} == {"SYNC_FAILED"}
+        assert sorted(i["message"] for i in items) == ["Unsupported platform: unknown"] * 3 + ["store unavailable"] * 2
+
+    @pytest.mark.asyncio
+    async def test_manual_conflicts_are_held_for_review(self):
+        from app.services.platform_sync.base import PlatformProduct
+        remote = PlatformProduct(external_id="x0", title="Remote title", description="", price=10, stock=3,
+                                 status="active")
+        adapter = FakeAdapter(remote=remote)
+        db = FakeExecutor()
+
+        result = await _engine(db, {"shopify": adapter}, conflict_strategy="manual").run(
+            _links("a", 1, external=True)
+        )
+
+        assert adapter.pushed == [] and result["conflicts"] >= 1
+        update = json.loads(next(a for q, a in db.statements if "product_store_links" in q)[0])[0]
+        assert update["sync_status"] == "conflict"
+        item = json.loads(next(a for q, a in db.statements if "job_items" in q)[0])[0]
+        assert item["status"] == "skipped" and item["error_code"] == "CONFLICT_REVIEW"
+
+    @pytest.mark.asyncio
+    async def test_recorded_links_are_skipped(self):
+        adapter = FakeAdapter()
+        links = _links("a", 3)
+
+        result = await _engine(FakeExecutor(), {"shopify": adapter}).run(links, skip_link_ids={"a-l0", "a-l1"})
+
+        assert result["skipped"] == 2 and result["synced"] == 1 and len(adapter.pushed) == 1
+
+    @pytest.mark.asyncio
+    async def test_bulk_update_rows_joins_on_id(self):
+        from app.core.repository import Repository
+        db = FakeExecutor(status="UPDATE 2")
+        rows = [{"id": "l1", "sync_status": "synced"}, {"id": "l2", "sync_status": "error"}]
+
+        assert await Repository(db).bulk_update_rows("product_store_links", rows) == 2
+
+        query, args = db.statements[0]
+        assert query == (
+            'UPDATE public."product_store_links" AS t SET "sync_status" = r."sync_status" '
+            'FROM jsonb_populate_recordset(NULL::public."product_store_links", $1::jsonb) AS r '
+            'WHERE t."id" = r."id"'
+        )
+        assert json.loads(args[0]) == rows
+
+
+class TestSnapshots:
+    @pytest.mark.asyncio
+    async def test_steady_state_sync_skips_unchanged_links(self):
+        from datetime import datetime, timezone
+        changed = {"x3": "2026-10-05T00:00:00+00:00", "x7": "2026-10-05T00:00:00+00:00", "gone": "2026-10-05"}
+        adapter = SweepAdapter(changes=changed)
+        marks = MemoryWatermarks(a=datetime(2026, 10, 2, tzinfo=timezone.utc))
+        links = _synced(_links("a", 100, external=True))
+        links[5]["products"]["sale_price"] = 12  # changed locally
+        db = FakeExecutor()
+
+        result = await _engine(db, {"shopify": adapter}, watermarks=marks).run(links)
+
+        assert sorted(adapter.pulled) == ["x3", "x7"]
+        assert sorted(p.external_id for p in adapter.pushed) == ["x3", "x5", "x7"]
+        api_calls = len(adapter.sweeps) + len(adapter.pulled) + len(adapter.pushed)
+        assert api_calls / 200 < 0.1  # every link pulled and pushed before
+        assert result["unchanged"] == 97 and result["synced"] == 3
+        assert result["stores"][0]["remote_changes"] == 3
+        assert adapter.sweeps[0] == datetime(2026, 10, 1, 23, 55, tzinfo=timezone.utc)  # overlap
+        assert marks.marks["a"] > datetime(2026, 10, 16, tzinfo=timezone.utc)
+
+        sweep_query, sweep_args = next((q, a) for q, a in db.statements if '"last_remote_update"' in q)
+        assert 't."external_product_id" = r."external_product_id" AND t."store_id" = $2' in sweep_query
+        assert {r["external_product_id"] for r in json.loads(sweep_args[0])} == set(changed)
+
+        updates = [r for q, a in db.statements if "sync_hash" in q for r in json.loads(a[0])]
+        assert {u["id"] for u in updates} == {"a-l3", "a-l5", "a-l7"}
+        assert all(u["remote_updated_at"] == "2026-10-17T10:00:00+00:00" for u in updates)
+
+    @pytest.mark.asyncio
+    async def test_without_versions_every_link_is_pulled(self):
+        links = _links("a", 4, external=True)
+        adapter = SweepAdapter()
+        marks = MemoryWatermarks()
+
+        with patch("app.services.platform_sync.sync_engine.oldest_remote_version", return_value=None):
+            result = await _engine(FakeExecutor(), {"shopify": adapter}, watermarks=marks).run(links)
+
+        # No recorded version: nothing to sweep, every link pulled, versions recorded from here on
+        assert adapter.sweeps == [] and len(adapter.pulled) == 4
+        assert result["synced"] == 4 and "a" in marks.marks
+
+    @pytest.mark.asyncio
+    async def test_failed_sweep_falls_back_to_pulls(self):
+        from datetime import datetime, timezone
+        since = datetime(2026, 10, 2, tzinfo=timezone.utc)
+        adapter = SweepAdapter(sweep_error=RuntimeError("429"))
+        marks = MemoryWatermarks(a=since)
+
+        result = await _engine(FakeExecutor(), {"shopify": adapter}, watermarks=marks).run(
+            _synced(_links("a", 3, external=True))
+        )
+
+        assert len(adapter.pulled) == 3 and result["unchanged"] == 0
+        assert marks.marks["a"] == since
+
+    def test_remote_moved_compares_store_versions(self):
+        from app.services.platform_sync.snapshots import remote_moved
+        assert remote_moved({"remote_updated_at": None})
+        assert not remote_moved({"remote_updated_at": "2026-10-01T10:00:00Z", "last_remote_update": None})
+        assert not remote_moved({"remote_updated_at": "2026-10-01T12:00:00+02:00",
+                                 "last_remote_update": "2026-10-01T10:00:00"})
+        assert remote_moved({"remote_updated_at": "2026-10-01T10:00:00Z",
+                             "last_remote_update": "2026-10-01T10:00:01+00:00"})
+
+
+class TestDeltaPush:
+    @staticmethod
+    async def _run(links, adapter, **kwargs):
+        from datetime import datetime, timezone
+        db = FakeExecutor()
+        marks = MemoryWatermarks(a=datetime(2026, 10, 2, tzinfo=timezone.utc))
+        result = await _engine(db, {"shopify": adapter}, watermarks=marks, **kwargs).run(links)
+        updates = {r["id"]: r for q, a in db.statements if "synced_fields" in q for r in json.loads(a[0])}
+        return result, updates
+
+    @pytest.mark.asyncio
+    async def test_local_changes_push_only_changed_fields(self):
+        links = _synced(_links("a", 3, external=True), fields=True)
+        links[0]["products"]["sale_price"] = 11
+        links[1]["products"].update(stock=0, title="Renamed")
+        adapter = SweepAdapter()
+
+        result, updates = await self._run(links, adapter)
+
+        assert adapter.deltas == [("x0", {"price"}), ("x1", {"stock", "title"})]
+        assert adapter.pushed == [] and adapter.pulled == [] and result["unchanged"] == 1
+        assert updates["a-l0"]["synced_fields"]["price"] == 11.0
+        assert "remote_updated_at" not in updates["a-l0"]  # version unreported: the recorded one stays
+
+    @pytest.mark.asyncio
+    async def test_store_side_differences_are_pushed_back(self):
+        from app.services.platform_sync.base import PlatformProduct
+        links = _synced(_links("a", 2, external=True), fields=True)
+        adapter = SweepAdapter(
+            changes={"x0": "2026-10-05T00:00:00+00:00", "x1": "2026-10-05T00:00:00+00:00"},
+            remote=PlatformProduct(title="P0", description="", price=10, stock=3, status="active"),
+        )
+
+        result, updates = await self._run(links, adapter)
+
+        # x0 matches the store, x1's title was edited there (local wins)
+        assert sorted(adapter.pulled) == ["x0", "x1"]
+        assert adapter.deltas == [("x1", {"title"})] and adapter.pushed == []
+        assert updates["a-l0"]["remote_updated_at"] == "2026-10-05T00:00:00+00:00"
+        assert result["synced"] == 2
+
+    @pytest.mark.asyncio
+    async def test_links_without_synced_fields_push_in_full(self):
+        links = _synced(_links("a", 2, external=True))
+        links[0]["products"]["stock"] = 9
+        adapter = SweepAdapter()
+
+        _, updates = await self._run(links, adapter)
+        assert [p.external_id for p in adapter.pushed] == ["x0"] and adapter.deltas == []
+        assert updates["a-l0"]["synced_fields"]["stock"] == 9
+
+        links = _synced(_links("a", 2, external=True), fields=True)
+        links[0]["products"]["stock"] = 9
+        adapter = SweepAdapter()
+        await self._run(links, adapter, delta_push=False)
+        assert len(adapter.pushed) == 1 and adapter.deltas == []
+
+
+class TestBulkSyncEndpoint:
+    @pytest.mark.asyncio
+    async def test_sync_is_queued_with_link_count(self):
+        from app.api.v1.endpoints import sync
+        from app.core.repository import Repository
+        db = FakeExecutor(rows=[{}] * 12)
+        task = MagicMock()
+        task.delay.return_value.id = JOB_ID
+
+        with patch("app.queue.tasks.sync_platform_links", task), \
+                patch.object(sync, "redis_queue") as queue, \
+                patch.object(sync, "get_repository", return_value=Repository(db)):
+            result = await sync.bulk_sync(
+                sync.BulkSyncRequest(store_ids=["s1"], conflict_strategy="newest_wins"), user_id="u"
+            )
+
+        assert result == {"success": True, "job_id": JOB_ID, "status": "queued", "links": 12}
+        assert db.statements[0][1] == ("u", ["s1"])
+        assert task.delay.call_args.kwargs == {
+            "user_id": "u", "product_ids": [], "store_ids": ["s1"], "conflict_strategy": "newest_wins",
+        }
+        queue.track_user_job.assert_called_once_with("u", JOB_ID, "sync")
+
+    @pytest.mark.asyncio
+    async def test_unknown_strategy_and_no_links_are_rejected(self):
+        from fastapi import HTTPException
+        from app.api.v1.endpoints import sync
+        from app.core.repository import Repository
+
+        with patch.object(sync, "get_repository", return_value=Repository(FakeExecutor())):
+            for request in (sync.BulkSyncRequest(conflict_strategy="coin_flip"), sync.BulkSyncRequest()):
+                with pytest.raises(HTTPException) as exc:
+                    await sync.bulk_sync(request, user_id="u")
+                assert exc.value.status_code == 400
@@ -0,0 +1,103 @@
+"""
+WooCommerce /products/batch tests
+Tests: pushes, stock / price updates and deletes chunked into calls of at most
+100 operations (creates and updates mixed), per-item errors mapped into
+SyncResult.errors, and failed calls failing only their own chunk.
+"""
+
+import json
+
+import httpx
+import pytest
+
+from app.services.platform_sync.base import PlatformProduct
+from tests.test_delta_push import _woo
+
+
+class BatchStore:
+    """/products/batch echoing ids; items listed in `reject` (by id or name) get an error line"""
+
+    def __init__(self, reject=(), fail_calls=()):
+        self.calls = []
+        self.reject, self.fail_calls = set(reject), set(fail_calls)
+        self.next_id = 1000
+
+    def __call__(self, request):
+        assert request.method == "POST" and request.url.path.endswith("/products/batch")
+        body = json.loads(request.content)
+        self.calls.append(body)
+        if len(self.calls) in self.fail_calls:
+            return httpx.Response(503, json={"message": "Service unavailable"})
+        response = {}
+        for action, items in body.items():
+            lines = []
+            for item in items:
+                key = item if action == "delete" else item.get("id", item.get("name"))
+                if str(key) in self.reject:
+                    lines.append({"id": 0, "error": {"code": "woocommerce_rest_invalid", "message": f"Invalid {key}"}})
+                elif action == "create":
+                    self.next_id += 1
+                    lines.append({"id": self.next_id, "name": item["name"]})
+                else:
+                    lines.append({"id": int(key)})
+            response[action] = lines
+        return httpx.Response(200, json=response)
+
+
+def _products(n, linked=0):
+    return [PlatformProduct(external_id=str(i) if i <= linked else None, title=f"P{i}", sku=f"S{i}", price=5)
+            for i in range(1, n + 1)]
+
+
+class TestWooCommerceBatch:
+    @pytest.mark.asyncio
+    async def test_push_chunks_by_100_operations(self):
+        store = BatchStore()
+
+        result = await _woo(store).push_products_batch(_products(250, linked=130))
+
+        assert [sum(len(v) for v in call.values()) for call in store.calls] == [100, 100, 50]
+        assert set(store.calls[1]) == {"update", "create"}  # creates and updates share calls
+        assert result.synced == 250 and result.success
+        external_ids = result.details["external_ids"]
+        assert external_ids[:130] == [str(i) for i in range(1, 131)]
+        assert external_ids[130] == "1001" and len(set(external_ids)) == 250
+
+    @pytest.mark.asyncio
+    async def test_item_errors_are_mapped_to_their_products(self):
+        store = BatchStore(reject={"3", "P7"})
+
+        result = await _woo(store).push_products_batch(_products(10, linked=5))
+
+        assert result.synced == 8 and result.failed == 2 and not result.success
+        assert result.errors == [{"sku": "S3", "error": "Invalid 3"}, {"sku": "S7", "error": "Invalid P7"}]
+        assert result.details["external_ids"][2] is None and result.details["external_ids"][6] is None
+
+    @pytest.mark.asyncio
+    async def test_stock_price_and_delete(self):
+        store = BatchStore(reject={"2"})
+        adapter = _woo(store)
+
+        stock = await adapter.update_stock_batch({str(i): i for i in range(1, 151)})
+        price = await adapter.update_price_batch({"1": (9.5, 12.0), "2": (3.0, None)})
+        deleted = await adapter.delete_products_batch(["1", "2", "3"])
+
+        assert [len(call["update"]) for call in store.calls[:2]] == [100, 50]
+        assert store.calls[0]["update"][0] == {"id": "1", "manage_stock": True, "stock_quantity": 1}
+        assert store.calls[2] == {"update": [
+            {"id": "1", "regular_price": "12.0", "sale_price": "9.5"},
+            {"id": "2", "regular_price": "3.0", "sale_price": ""},
+        ]}
+        assert store.calls[3] == {"delete": ["1", "2", "3"]}
+        assert (stock.synced, price.synced, deleted.synced) == (149, 1, 2)
+        assert deleted.errors == [{"external_id": "2", "error": "Invalid 2"}]
+
+    @pytest.mark.asyncio
+    async def test_failed_call_fails_its_chunk_only(self):
+        store = BatchStore(fail_calls={1})
+
+        result = await _woo(store).update_stock_batch({str(i): 1 for i in range(1, 121)})
+
+        assert len(store.calls) == 2
+        assert result.synced == 20 and result.failed == 100
+        assert result.errors[0]["external_id"] == "1" and "503" in result.errors[0]["error"]
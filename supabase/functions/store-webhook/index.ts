@@ -279,7 +279,8 @@ async function handleProductEvent(
       .from("product_store_links")
       .update({
         sync_status: "remote_updated",
-        last_remote_update: new Date().toISOString(),
+        // The store's own version stamp: compared with remote_updated_at by the sync engine
+        last_remote_update: remoteUpdatedAt(payload),
         remote_snapshot: { price: payload.variants?.[0]?.price, title: payload.title },
         updated_at: new Date().toISOString(),
       })
@@ -373,6 +374,14 @@ function normalizeOrder(payload: any, platform: string, storeId: string): Record
 }
 
 
+function remoteUpdatedAt(payload: any): string {
+  // Shopify: updated_at (with offset); WooCommerce: date_modified_gmt (naive UTC)
+  if (payload.updated_at) return new Date(payload.updated_at).toISOString();
+  if (payload.date_modified_gmt) return new Date(`${payload.date_modified_gmt}Z`).toISOString();
+  return new Date().toISOString();
+}
+
+
 function respond(data: Record<string, unknown>, status = 200) {
   return new Response(JSON.stringify(data), {
     headers: { ...corsHeaders, "Content-Type": "application/json" },
@@ -0,0 +1,18 @@
+-- Bulk import upserts: ImportService writes each chunk with
+-- upsert(on_conflict="user_id,sku"), which needs a unique index on (user_id, sku).
+-- NULL SKUs stay allowed (NULLs never conflict). Skipped with a notice if a
+-- tenant already has duplicate SKUs, so the migration never fails on live data.
+DO $$
+BEGIN
+  IF EXISTS (
+    SELECT 1 FROM public.products
+    WHERE sku IS NOT NULL
+    GROUP BY user_id, sku
+    HAVING count(*) > 1
+  ) THEN
+    RAISE NOTICE 'products has duplicate (user_id, sku) pairs: idx_products_user_sku_unique not created';
+  ELSE
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_products_user_sku_unique
+      ON public.products(user_id, sku);
+  END IF;
+END $$;
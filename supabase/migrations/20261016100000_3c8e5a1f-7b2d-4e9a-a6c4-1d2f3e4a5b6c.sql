@@ -0,0 +1,55 @@
+-- Bulk tag mutation in one statement: add / remove / replace tags on many
+-- products, de-duplicated server-side (first occurrence order kept), so
+-- concurrent edits never overwrite each other's tags. Rows whose tags would
+-- not change are left untouched. Returns the number of products updated.
+CREATE OR REPLACE FUNCTION public.bulk_update_product_tags(
+  p_user_id UUID,
+  p_product_ids UUID[],
+  p_tags TEXT[],
+  p_action TEXT DEFAULT 'add'
+)
+RETURNS INTEGER
+LANGUAGE plpgsql
+SET search_path = public
+AS $$
+DECLARE
+  v_updated INTEGER := 0;
+BEGIN
+  IF p_action NOT IN ('add', 'remove', 'replace') THEN
+    RAISE EXCEPTION 'Invalid tag action: %', p_action;
+  END IF;
+
+  WITH changed AS (
+    SELECT p.id,
+      CASE p_action
+        WHEN 'remove' THEN ARRAY(
+          SELECT t FROM unnest(COALESCE(p.tags, '{}')) AS t
+          WHERE t <> ALL (COALESCE(p_tags, '{}'))
+        )
+        ELSE ARRAY(
+          SELECT d.tag FROM (
+            SELECT DISTINCT ON (u.tag) u.tag, u.ord
+            FROM unnest(
+              CASE WHEN p_action = 'add' THEN COALESCE(p.tags, '{}') ELSE '{}' END
+              || COALESCE(p_tags, '{}')
+            ) WITH ORDINALITY AS u(tag, ord)
+            ORDER BY u.tag, u.ord
+          ) d
+          ORDER BY d.ord
+        )
+      END AS new_tags
+    FROM products p
+    WHERE p.user_id = p_user_id
+      AND p.id = ANY (p_product_ids)
+  )
+  UPDATE products p
+  SET tags = c.new_tags,
+      updated_at = now()
+  FROM changed c
+  WHERE p.id = c.id
+    AND COALESCE(p.tags, '{}') IS DISTINCT FROM c.new_tags;
+
+  GET DIAGNOSTICS v_updated = ROW_COUNT;
+  RETURN v_updated;
+END;
+$$;
@@ -0,0 +1,5 @@
+-- Keyset pagination for streamed product exports: pages are read with
+-- WHERE user_id = $1 AND (created_at, id) < (...) ORDER BY created_at DESC, id DESC,
+-- which this index serves without sorting the tenant's catalog once per page.
+CREATE INDEX IF NOT EXISTS idx_products_user_created_id
+  ON public.products(user_id, created_at DESC, id DESC);
@@ -0,0 +1,5 @@
+-- Private bucket for background export files (written by Celery export tasks
+-- with the service role, downloaded through short-lived signed URLs).
+INSERT INTO storage.buckets (id, name, public)
+VALUES ('exports', 'exports', false)
+ON CONFLICT (id) DO NOTHING;
@@ -0,0 +1,9 @@
+-- Keyset (cursor) pagination: list pages resume with (sort_key, id) < (...)
+-- ORDER BY sort_key DESC, id DESC, served straight from these indexes.
+CREATE INDEX IF NOT EXISTS idx_jobs_user_created_id
+  ON public.jobs(user_id, created_at DESC, id DESC);
+
+-- Supersedes idx_seo_audit_pages_score (audit_id, score DESC)
+CREATE INDEX IF NOT EXISTS idx_seo_audit_pages_score_id
+  ON public.seo_audit_pages(audit_id, score DESC, id DESC);
+DROP INDEX IF EXISTS public.idx_seo_audit_pages_score;
@@ -0,0 +1,25 @@
+-- Product search: a maintained full-text vector (title/SKU weighted first, then
+-- vendor/category, then the head of the description) behind a GIN index, plus
+-- trigram indexes on title and SKU for substring / fuzzy / prefix matches.
+-- The 'simple' configuration (no stemming, no stop words) keeps FR/EN catalogs
+-- and SKU-like tokens searchable alike; SKU separators become spaces so
+-- 'SKU-0012345' is not read as the word 'sku' and the number -0012345.
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+ALTER TABLE public.products
+  ADD COLUMN IF NOT EXISTS search_vector TSVECTOR
+  GENERATED ALWAYS AS (
+    setweight(to_tsvector('simple', COALESCE(title, '')), 'A') ||
+    setweight(to_tsvector('simple', translate(COALESCE(sku, ''), '-_./', '    ')), 'A') ||
+    setweight(to_tsvector('simple', COALESCE(vendor, '') || ' ' || COALESCE(category, '')), 'B') ||
+    setweight(to_tsvector('simple', left(COALESCE(description, ''), 20000)), 'C')
+  ) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_products_search_vector
+  ON public.products USING GIN (search_vector);
+
+CREATE INDEX IF NOT EXISTS idx_products_title_trgm
+  ON public.products USING GIN (title gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS idx_products_sku_trgm
+  ON public.products USING GIN (sku gin_trgm_ops);
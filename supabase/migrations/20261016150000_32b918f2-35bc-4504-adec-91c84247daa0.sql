@@ -0,0 +1,15 @@
+-- Sync snapshots: what each product-store link last agreed on with its store, so
+-- a sync only pulls / diffs / pushes links whose local or remote version moved.
+--   sync_hash          hash of the product payload last pushed or pulled
+--   remote_updated_at  the store's updated_at for that payload
+--   last_remote_update latest updated_at the store reported for the product
+--                      (store-webhook, updated_at_min sweeps at sync start)
+ALTER TABLE public.product_store_links
+  ADD COLUMN IF NOT EXISTS sync_hash TEXT,
+  ADD COLUMN IF NOT EXISTS remote_updated_at TIMESTAMPTZ,
+  ADD COLUMN IF NOT EXISTS last_remote_update TIMESTAMPTZ,
+  ADD COLUMN IF NOT EXISTS remote_snapshot JSONB;
+
+-- Sweeps record remote versions by (store, external id)
+CREATE INDEX IF NOT EXISTS idx_product_store_links_store_external
+  ON public.product_store_links (store_id, external_product_id);
@@ -0,0 +1,5 @@
+-- Delta push: the field values each product-store link last synced
+-- (title, description, price, stock, status), so a sync sends only the fields
+-- that changed through the platform's price / stock / metadata endpoints.
+ALTER TABLE public.product_store_links
+  ADD COLUMN IF NOT EXISTS synced_fields JSONB;
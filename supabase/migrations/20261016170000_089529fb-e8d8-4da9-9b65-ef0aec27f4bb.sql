@@ -0,0 +1,69 @@
+-- bulk_update_product_tags computed the new tags in a CTE from the statement's
+-- snapshot of products.tags, so a concurrent tag edit was overwritten with the
+-- stale array. The new tags are now computed in the UPDATE's SET from the row
+-- being updated: under READ COMMITTED a row changed concurrently is re-read and
+-- the add / remove / replace is applied on top of the other writer's tags.
+
+-- add / remove / replace p_tags on one tag array (de-duplicated, first occurrence order kept)
+CREATE OR REPLACE FUNCTION public.product_tags_after(
+  p_current TEXT[],
+  p_tags TEXT[],
+  p_action TEXT
+)
+RETURNS TEXT[]
+LANGUAGE sql
+IMMUTABLE
+SET search_path = public
+AS $$
+  SELECT CASE p_action
+    WHEN 'remove' THEN ARRAY(
+      SELECT t FROM unnest(COALESCE(p_current, '{}')) AS t
+      WHERE t <> ALL (COALESCE(p_tags, '{}'))
+    )
+    ELSE ARRAY(
+      SELECT d.tag FROM (
+        SELECT DISTINCT ON (u.tag) u.tag, u.ord
+        FROM unnest(
+          CASE WHEN p_action = 'add' THEN COALESCE(p_current, '{}') ELSE '{}' END
+          || COALESCE(p_tags, '{}')
+        ) WITH ORDINALITY AS u(tag, ord)
+        ORDER BY u.tag, u.ord
+      ) d
+      ORDER BY d.ord
+    )
+  END
+$$;
+
+-- Bulk tag mutation in one statement: add / remove / replace tags on many
+-- products, de-duplicated server-side. Each row's new tags are derived from its
+-- current tags inside the UPDATE, so concurrent tag edits are not lost. Rows
+-- whose tags would not change are left untouched. Returns the number of
+-- products updated.
+CREATE OR REPLACE FUNCTION public.bulk_update_product_tags(
+  p_user_id UUID,
+  p_product_ids UUID[],
+  p_tags TEXT[],
+  p_action TEXT DEFAULT 'add'
+)
+RETURNS INTEGER
+LANGUAGE plpgsql
+SET search_path = public
+AS $$
+DECLARE
+  v_updated INTEGER := 0;
+BEGIN
+  IF p_action NOT IN ('add', 'remove', 'replace') THEN
+    RAISE EXCEPTION 'Invalid tag action: %', p_action;
+  END IF;
+
+  UPDATE products p
+  SET tags = public.product_tags_after(p.tags, p_tags, p_action),
+      updated_at = now()
+  WHERE p.user_id = p_user_id
+    AND p.id = ANY (p_product_ids)
+    AND COALESCE(p.tags, '{}') IS DISTINCT FROM public.product_tags_after(p.tags, p_tags, p_action);
+
+  GET DIAGNOSTICS v_updated = ROW_COUNT;
+  RETURN v_updated;
+END;
+$$;
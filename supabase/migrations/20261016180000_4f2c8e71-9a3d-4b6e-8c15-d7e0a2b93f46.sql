@@ -0,0 +1,57 @@
+-- idx_products_user_sku_unique was skipped (with only a notice) when a tenant
+-- already had duplicate (user_id, sku) rows, and every chunked import upsert
+-- (on_conflict "user_id,sku") then failed at runtime. Duplicates are now resolved
+-- first: the most recently updated product keeps the SKU, the others have it
+-- cleared (rows and their references are kept) and are listed in
+-- product_sku_duplicates for review. The index is then created unconditionally,
+-- so the migration fails loudly if it still cannot be.
+
+CREATE TABLE IF NOT EXISTS public.product_sku_duplicates (
+  product_id UUID PRIMARY KEY REFERENCES public.products(id) ON DELETE CASCADE,
+  user_id UUID NOT NULL,
+  sku TEXT NOT NULL,
+  kept_product_id UUID NOT NULL,
+  resolved_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+ALTER TABLE public.product_sku_duplicates ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Users can view own product sku duplicates" ON public.product_sku_duplicates;
+CREATE POLICY "Users can view own product sku duplicates"
+  ON public.product_sku_duplicates FOR SELECT
+  USING (auth.uid() = user_id);
+
+DO $$
+DECLARE
+  v_cleared INTEGER;
+BEGIN
+  WITH ranked AS (
+    SELECT id, user_id, sku,
+           first_value(id) OVER w AS kept_id,
+           row_number() OVER w AS rn
+    FROM public.products
+    WHERE sku IS NOT NULL
+    WINDOW w AS (
+      PARTITION BY user_id, sku
+      ORDER BY updated_at DESC NULLS LAST, created_at DESC NULLS LAST, id DESC
+    )
+  ),
+  reported AS (
+    INSERT INTO public.product_sku_duplicates (product_id, user_id, sku, kept_product_id)
+    SELECT id, user_id, sku, kept_id FROM ranked WHERE rn > 1
+    ON CONFLICT (product_id) DO NOTHING
+    RETURNING product_id
+  )
+  UPDATE public.products p
+  SET sku = NULL, updated_at = now()
+  FROM reported r
+  WHERE p.id = r.product_id;
+
+  GET DIAGNOSTICS v_cleared = ROW_COUNT;
+  IF v_cleared > 0 THEN
+    RAISE WARNING 'Cleared the SKU of % duplicate products (see public.product_sku_duplicates)', v_cleared;
+  END IF;
+END $$;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_products_user_sku_unique
+  ON public.products(user_id, sku);
@@ -0,0 +1,6 @@
+-- Bulk edit job items record the product id that was requested, including
+-- "Product ... not found" failures (so retries / resumes can skip them). An id
+-- that matches no product cannot satisfy a foreign key, so job_items.product_id
+-- becomes a plain reference: items of deleted products keep the id for the
+-- job history. idx_job_items_product_id stays for lookups.
+ALTER TABLE public.job_items DROP CONSTRAINT IF EXISTS job_items_product_id_fkey;